@@ -119,13 +119,22 @@ $$;
 -- Full Text Search 인덱스
 -- ============================================
 
--- 9. PGroonga 인덱스 (Supabase용 - 다국어 Full Text Search)
--- Supabase 대시보드에서 pgroonga 확장 활성화 후 실행
--- CREATE EXTENSION IF NOT EXISTS pgroonga;
--- CREATE INDEX ix_heroine_content_pgroonga ON heroine_scenarios USING pgroonga(content);
--- CREATE INDEX ix_heroine_title_pgroonga ON heroine_scenarios USING pgroonga(title);
--- CREATE INDEX ix_sage_content_pgroonga ON sage_scenarios USING pgroonga(content);
--- CREATE INDEX ix_sage_title_pgroonga ON sage_scenarios USING pgroonga(title);
+-- 9. PGroonga 인덱스 (다국어 Full Text Search)
+-- pgroonga 확장을 설치할 수 있는 환경(Supabase 등)에서만 생성하고,
+-- 없는 환경(로컬 ParadeDB 이미지 등)에서는 건너뜁니다.
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pgroonga') THEN
+        CREATE EXTENSION IF NOT EXISTS pgroonga;
+        CREATE INDEX IF NOT EXISTS ix_heroine_content_pgroonga ON heroine_scenarios USING pgroonga(content);
+        CREATE INDEX IF NOT EXISTS ix_heroine_title_pgroonga ON heroine_scenarios USING pgroonga(title);
+        CREATE INDEX IF NOT EXISTS ix_sage_content_pgroonga ON sage_scenarios USING pgroonga(content);
+        CREATE INDEX IF NOT EXISTS ix_sage_title_pgroonga ON sage_scenarios USING pgroonga(title);
+    ELSE
+        RAISE NOTICE 'pgroonga 확장이 없어 PGroonga 인덱스를 건너뜁니다';
+    END IF;
+END
+$$;
 
 -- 10. ParadeDB BM25 인덱스 (로컬 Docker용)
 -- 주의: 테이블에 데이터가 있어야 인덱스 생성 가능
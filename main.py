@@ -15,6 +15,15 @@ from api.fairy_router import router as fairy_router
 from api.dungeon_router import router as dungeon_router
 from api.common_router import router as common_router
 from db.RDBRepository import RDBRepository
+from utils.metrics import metrics
+from db.engine_registry import engine_registry
+from db.read_router import read_router
+from agents.npc.memory_write_batcher import memory_write_batcher
+from db.memory_consolidator import memory_consolidator
+from utils.client_registry import client_registry
+from utils.request_deadline import install_sqlalchemy_deadline_hook
+from services.heroine_scenario_service import heroine_scenario_service
+from services.sage_scenario_service import sage_scenario_service
 
 # FastAPI 앱 생성
 app = FastAPI(
@@ -98,6 +107,72 @@ async def health():
         }
     }
 
+
+@app.on_event("startup")
+async def install_request_deadline_hooks():
+    """데드라인이 지난 요청의 DB 쿼리 전송 차단"""
+    install_sqlalchemy_deadline_hook()
+
+
+@app.on_event("startup")
+async def load_scenario_indexes():
+    """시나리오 인메모리 검색 인덱스 로드 (실패 시 SQL 검색으로 동작)"""
+    heroine_scenario_service.ensure_index()
+    sage_scenario_service.ensure_index()
+
+
+@app.on_event("startup")
+async def start_replica_lag_checks():
+    """읽기 복제본 지연 확인 주기 작업 시작 (요청 경로는 마지막 결과만 사용)"""
+    await read_router.start()
+
+
+@app.on_event("startup")
+async def start_memory_consolidation():
+    """user_memories 통합/압축 주기 작업 시작"""
+    await memory_consolidator.start()
+
+
+@app.on_event("shutdown")
+async def flush_pending_memory_batches():
+    """서버 종료 시 배치 대기 중인 fact 추출 flush"""
+    await memory_write_batcher.flush_all()
+
+
+@app.on_event("shutdown")
+async def stop_memory_consolidation():
+    """통합/압축 주기 작업 중지"""
+    await memory_consolidator.stop()
+
+
+@app.on_event("shutdown")
+async def stop_replica_lag_checks():
+    """읽기 복제본 지연 확인 주기 작업 중지"""
+    await read_router.stop()
+
+
+@app.on_event("shutdown")
+async def dispose_db_engines():
+    """서버 종료 시 공유 DB 커넥션 풀 정리"""
+    engine_registry.dispose_all()
+
+
+@app.on_event("shutdown")
+async def close_shared_http_clients():
+    """서버 종료 시 공유 LLM/임베딩 httpx 커넥션 풀 정리"""
+    await client_registry.aclose()
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """운영 메트릭 스냅샷 (카운터/게이지/지연 분위수 + 클라이언트/DB 풀/복제 지연 통계)"""
+    return {
+        **metrics.snapshot(),
+        "clients": client_registry.stats(),
+        "db_pools": engine_registry.stats(),
+        "db_replicas": read_router.stats(),
+    }
+
 # if __name__ == "__main__":
 #     uvicorn.run(
 #         "main:app",
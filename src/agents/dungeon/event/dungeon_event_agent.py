@@ -1,9 +1,13 @@
-from langchain.chat_models import init_chat_model
+from utils.client_registry import get_chat_model
+from utils.hedged_llm import HedgedLLM
 from enums.LLM import LLM
 from agents.dungeon.dungeon_state import DungeonEventParser
 import random
 
-llm = init_chat_model(model=LLM.GROK_4_FAST_NON_REASONING, temperature=0.5)
+llm = HedgedLLM(
+    get_chat_model(LLM.GROK_4_FAST_NON_REASONING, temperature=0.5),
+    name="dungeon_event",
+)
 
 from prompts.promptmanager import PromptManager
 from prompts.prompt_type.dungeon.DungeonPromptType import DungeonPromptType
@@ -1,4 +1,5 @@
-from langchain.chat_models import init_chat_model
+from utils.client_registry import get_chat_model
+from utils.hedged_llm import HedgedLLM
 from enums.LLM import LLM
 from agents.dungeon.dungeon_state import DungeonMonsterState, MonsterStrategyParser
 from agents.dungeon.monster.monster_database import MONSTER_DATABASE, MonsterData
@@ -7,7 +8,7 @@ from typing import Dict, List, Tuple, Any
 import random
 from agents.dungeon.monster.monster_tags import KEYWORD_MAP, keywords_to_tags
 
-llm = init_chat_model(model=LLM.GPT5_MINI, temperature=0.7)
+llm = HedgedLLM(get_chat_model(LLM.GPT5_MINI, temperature=0.7), name="dungeon_monster_strategy")
 
 from prompts.promptmanager import PromptManager
 from prompts.prompt_type.dungeon.DungeonPromptType import DungeonPromptType
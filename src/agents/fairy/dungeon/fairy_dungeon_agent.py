@@ -17,8 +17,10 @@ from agents.fairy.util import (
 )
 from core.game_dto.StatData import StatData
 from enums.LLM import LLM
-from langchain.chat_models import init_chat_model
+from utils.client_registry import get_chat_model
 from typing import List
+from utils.hedged_llm import HedgedLLM
+from utils.request_deadline import spawn_detached
 from db.RDBRepository import RDBRepository
 from db.rdb_entity.DungeonRow import DungeonRow
 from agents.fairy.dynamic_prompt import (
@@ -33,12 +35,16 @@ from agents.fairy.util import (
 from agents.fairy.dungeon.fairy_dungeon_model_logics import FairyDungeonIntentModel
 import asyncio
 
-intent_llm = get_groq_llm_lc(model=LLM.LLAMA_3_3_70B_VERSATILE, max_token=43)
+intent_llm = HedgedLLM(
+    get_groq_llm_lc(model=LLM.LLAMA_3_3_70B_VERSATILE, max_token=43),
+    name="fairy_dungeon_intent",
+)
 
 # action_llm = get_groq_llm_lc(max_token=80, temperature=0)
 # small_talk_llm = get_groq_llm_lc(max_token=120, temperature=0)
-action_llm = init_chat_model(
-    model=LLM.GROK_4_FAST_NON_REASONING, max_tokens=80, temperature=0
+action_llm = HedgedLLM(
+    get_chat_model(LLM.GROK_4_FAST_NON_REASONING, max_tokens=80, temperature=0),
+    name="fairy_dungeon_action",
 )
 # small_talk_llm = init_chat_model(model=LLM.GROK_4_FAST_NON_REASONING, max_tokens=80)
 rdb_repository = RDBRepository()
@@ -241,7 +247,7 @@ async def fairy_action(state: FairyDungeonState):
     #         ]
     #     )
 
-    ai_answer = action_llm.invoke(
+    ai_answer = await action_llm.ainvoke(
         [SystemMessage(content=system_prompt)]
         + messages
         + [HumanMessage(content=human_prompt)]
@@ -255,7 +261,8 @@ async def fairy_action(state: FairyDungeonState):
     if contains_hanja(ai_answer.content):
         ai_answer.content = replace_hanja_naively(ai_answer.content)
 
-    asyncio.create_task(
+    # 대화 로그 저장은 요청 데드라인/취소와 분리
+    spawn_detached(
         asyncio.to_thread(
             _rdb_fairy_messages_bg,
             {
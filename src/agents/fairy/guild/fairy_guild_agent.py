@@ -5,7 +5,7 @@ from agents.fairy.util import get_groq_llm_lc
 from langgraph.graph import START, END, StateGraph
 from agents.fairy.fairy_state import FairyGuildState
 
-from langchain.chat_models import init_chat_model
+from utils.client_registry import get_chat_model
 from enums.LLM import LLM
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
@@ -13,16 +13,24 @@ from langgraph.prebuilt import ToolNode, tools_condition
 from agents.fairy.util import find_scenarios, str_to_bool, find_heroine_info, get_last_human_message
 from agents.fairy.cache_data import GAME_SYSTEM_INFO
 from db.RDBRepository import RDBRepository
+from utils.hedged_llm import HedgedLLM
 import asyncio
 
 rdb_repository = RDBRepository()
 
-fast_llm = init_chat_model(
-    model=LLM.GROK_4_FAST_NON_REASONING, model_provider="xai", max_tokens=120
+fast_llm = HedgedLLM(
+    get_chat_model(LLM.GROK_4_FAST_NON_REASONING, model_provider="xai", max_tokens=120),
+    name="fairy_guild_fast",
 )
 
-reasoning_llm = init_chat_model(
-    model=LLM.GROK_4_FAST_REASONING, model_provider="xai", max_tokens=120
+reasoning_llm = HedgedLLM(
+    get_chat_model(LLM.GROK_4_FAST_REASONING, model_provider="xai", max_tokens=120),
+    name="fairy_guild_reasoning",
+)
+
+reasoning_required_llm = HedgedLLM(
+    get_groq_llm_lc(LLM.LLAMA_3_1_8B_INSTANT),
+    name="fairy_guild_reasoning_required",
 )
 
 
@@ -79,14 +87,12 @@ def reasoning_required(state: FairyGuildState):
     ).get_prompt(question=last_meesage)
     return {
         "reasoning_required": str_to_bool(
-            get_groq_llm_lc(LLM.LLAMA_3_1_8B_INSTANT)
-            .invoke(reasoning_required_prompt)
-            .content
+            reasoning_required_llm.invoke(reasoning_required_prompt).content
         )
     }
 
 
-def call_llm(state: FairyGuildState, config: RunnableConfig):
+async def call_llm(state: FairyGuildState, config: RunnableConfig):
     player_id = config.get("configurable", {}).get("thread_id")
     heroine_id = config.get("configurable", {}).get("heroine_id")
     heroine_info = find_heroine_info(heroine_id=heroine_id)
@@ -104,7 +110,7 @@ def call_llm(state: FairyGuildState, config: RunnableConfig):
         heroine_info=heroine_info
     )
     new_messages = [SystemMessage(content=system_prompt)] + messages
-    ai_answer = llm.invoke(new_messages)
+    ai_answer = await llm.ainvoke(new_messages)
     has_tool_call = bool(
         getattr(ai_answer, "tool_calls", None)
         or ai_answer.response_metadata.get("tool_calls")
@@ -11,6 +11,7 @@ from langgraph.graph import StateGraph, START, END
 from typing import List
 from core.common import get_inventory_items
 from agents.fairy.util import get_groq_llm_lc, get_groq_gpt
+from utils.hedged_llm import HedgedLLM
 from agents.fairy.fairy_state import FairyItemUseOutput
 from agents.fairy.interaction.fairy_interaction_model_logics import ItemEmbeddingLogic, IsItemUseEmbeddingLogic, FairyInteractionIntentModel
 from langchain.messages import SystemMessage, HumanMessage
@@ -18,6 +19,8 @@ from langchain.chat_models import init_chat_model
 
 
 item_embedding_logic = ItemEmbeddingLogic()
+# 아이템 선택 (아이템 id 1토큰 출력)
+item_use_llm = HedgedLLM(get_groq_llm_lc(max_token=1), name="fairy_item_use")
 is_item_use_embedding_logic = IsItemUseEmbeddingLogic()
 fairy_interaction_intent_model = FairyInteractionIntentModel()
 
@@ -76,7 +79,7 @@ def create_temp_use_item_id(state: FairyInteractionState):
     )
     new_messages = [SystemMessage(content=system_prompt)] + messages
     # ai_answer = get_groq_gpt(new_messages)
-    ai_answer = get_groq_llm_lc(max_token=1).invoke([SystemMessage(content=system_prompt)] + new_messages).content
+    ai_answer = item_use_llm.invoke([SystemMessage(content=system_prompt)] + new_messages).content
     # ai_answer = get_groq_llm_lc(max_token=1).invoke([SystemMessage(content=system_prompt)] + [last_messages]).content
     try: 
         item_id = int(ai_answer)
@@ -79,9 +79,12 @@ def get_groq_llm_lc(
 ):
     import os
     from dotenv import load_dotenv
+    from utils.client_registry import get_chat_model
     load_dotenv()
-    llm = ChatGroq(
-        model=model,
+    # 같은 (model, params)면 프로세스 전체에서 같은 인스턴스/커넥션 풀 공유
+    llm = get_chat_model(
+        model,
+        model_provider="groq",
         api_key=os.environ.get("GROQ_API_KEY"),
         temperature=temperature,
         max_tokens=max_token,
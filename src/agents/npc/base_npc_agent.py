@@ -19,7 +19,7 @@ HeroineAgent와 SageAgent가 이 클래스를 상속받습니다.
 from abc import ABC, abstractmethod
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
-from langchain.chat_models import init_chat_model
+from utils.client_registry import get_chat_model
 from langchain_core.messages import HumanMessage, AIMessage
 
 from db.redis_manager import redis_manager
@@ -27,6 +27,7 @@ from db.user_memory_manager import user_memory_manager
 from db.session_checkpoint_manager import session_checkpoint_manager
 from agents.npc.npc_state import NPCState
 from enums.LLM import LLM
+from utils.keyword_matcher import KeywordMatcher
 
 # ============================================
 # 호감도 변화량 상수
@@ -104,7 +105,7 @@ class BaseNPCAgent(ABC):
             model_name: 사용할 LLM 모델명 (기본: gpt-4o-mini)
         """
         # 일반 LLM (전체 응답을 한번에 받음)
-        self.llm = init_chat_model(model=model_name, temperature=1, max_tokens=150)
+        self.llm = get_chat_model(model_name, temperature=1, max_tokens=150)
 
     # ============================================
     # 세션 관리 메서드
@@ -370,8 +371,8 @@ def calculate_memory_progress(
 
 def calculate_affection_change(
     current_affection: int,
-    liked_keywords: List[str],
-    trauma_keywords: List[str],
+    liked_matcher: KeywordMatcher,
+    trauma_matcher: KeywordMatcher,
     user_message: str,
     recent_used_keywords: List[str] = None,
     is_positive_romance: bool = False,
@@ -393,8 +394,8 @@ def calculate_affection_change(
 
     Args:
         current_affection: 현재 호감도
-        liked_keywords: 좋아하는 키워드 목록
-        trauma_keywords: 트라우마 키워드 목록
+        liked_matcher: 좋아하는 키워드 매처 (대소문자 무시, 페르소나 로드 시 생성)
+        trauma_matcher: 트라우마 키워드 매처 (대소문자 무시, 페르소나 로드 시 생성)
         user_message: 사용자 메시지
         recent_used_keywords: 최근 5턴 내 사용된 좋아하는 키워드 목록
         is_positive_romance: 긍정적 연애 관련 여부
@@ -408,25 +409,19 @@ def calculate_affection_change(
 
     delta = 0
     used_liked_keyword = None
-    message_lower = user_message.lower()
 
-    # 좋아하는 것 체크
-    for keyword in liked_keywords:
-        if keyword.lower() in message_lower:
-            # 최근 5턴 내 같은 키워드 사용 여부 확인 (대소문자 무시)
-            recent_lower = [k.lower() for k in recent_used_keywords]
-
-            if keyword.lower() not in recent_lower:
-                delta += AFFECTION_LIKED_KEYWORD_BONUS
-                used_liked_keyword = keyword
-            # 같은 키워드 반복시 호감도 상승 없음, 하지만 루프 종료
-            break
+    # 좋아하는 것 체크 (목록 순서상 첫 키워드)
+    keyword = liked_matcher.first_in_order(user_message)
+    if keyword is not None:
+        # 최근 5턴 내 같은 키워드 사용 여부 확인 (대소문자 무시)
+        # 같은 키워드 반복시 호감도 상승 없음 (다른 좋아하는 키워드도 확인하지 않음)
+        if keyword.lower() not in {k.lower() for k in recent_used_keywords}:
+            delta += AFFECTION_LIKED_KEYWORD_BONUS
+            used_liked_keyword = keyword
 
     # 트라우마 체크
-    for keyword in trauma_keywords:
-        if keyword.lower() in message_lower:
-            delta -= AFFECTION_TRAUMA_KEYWORD_PENALTY
-            break
+    if trauma_matcher.contains_any(user_message):
+        delta -= AFFECTION_TRAUMA_KEYWORD_PENALTY
 
     # 연애 관련
     if is_positive_romance and delta >= 0:
@@ -0,0 +1,236 @@
+"""
+ContextAssembler - 토큰 예산 기반 NPC 프롬프트 컨텍스트 조립기
+
+검색된 기억, 시나리오, NPC-NPC 대화, 요약, 최근 대화 등
+프롬프트 동적 서픽스에 들어가는 섹션들의 토큰 수를 측정하고
+전체 예산을 넘으면 우선순위가 낮은 섹션부터 잘라내거나 제거합니다.
+
+주요 기능:
+1. 섹션별 토큰 측정 (tiktoken 사용 가능 시 실제 토크나이저, 아니면 근사치)
+2. 우선순위 기반 예산 집행 (낮은 우선순위부터 줄 단위 절삭 -> 제거)
+3. 섹션별 사용 토큰 리포트 (로그 + utils.metrics)
+
+이 클래스가 없을 경우 발생할 문제:
+- 긴 시나리오 청크 하나로 입력 토큰이 예측 불가능하게 커짐
+- 어느 섹션이 토큰을 많이 쓰는지 알 수 없음
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from agents.npc.base_npc_agent import NO_DATA
+from utils.metrics import metrics
+
+try:
+    import tiktoken
+
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+except Exception:
+    _ENCODING = None
+
+
+# 동적 컨텍스트 섹션 전체 토큰 예산
+NPC_CONTEXT_TOKEN_BUDGET = 1200
+
+# 섹션 우선순위 (높을수록 마지막까지 유지)
+PRIORITY_REQUIRED = 100  # 절대 자르지 않음 (방금 해금된 시나리오 등)
+PRIORITY_HIGH = 80  # 장기 기억 검색 결과
+PRIORITY_MEDIUM = 60  # 해금된 시나리오, 최근 대화
+PRIORITY_LOW = 40  # 다른 NPC와의 대화
+PRIORITY_MINIMAL = 20  # 대화 요약
+
+# 절삭 방향
+KEEP_HEAD = "head"  # 앞부분 유지 (검색 결과: 상위 결과가 앞에 있음)
+KEEP_TAIL = "tail"  # 뒷부분 유지 (대화 기록: 최근 대화가 뒤에 있음)
+
+
+def count_tokens(text: str) -> int:
+    """텍스트 토큰 수 측정
+
+    tiktoken이 설치되어 있으면 o200k_base 인코딩으로 정확히 세고,
+    없으면 한글 1자 ~= 1토큰, 그 외 4자 ~= 1토큰으로 근사합니다.
+    """
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+
+    hangul = sum(1 for ch in text if "가" <= ch <= "힣")
+    others = len(text) - hangul
+    return hangul + (others + 3) // 4
+
+
+@dataclass
+class ContextSection:
+    """프롬프트 컨텍스트 섹션
+
+    Attributes:
+        name: 섹션 이름 (리포트/메트릭 라벨)
+        text: 섹션 본문
+        priority: 우선순위 (낮을수록 먼저 잘림)
+        keep: 절삭 시 유지할 방향 (KEEP_HEAD / KEEP_TAIL)
+    """
+
+    name: str
+    text: str
+    priority: int = PRIORITY_MEDIUM
+    keep: str = KEEP_HEAD
+    tokens: int = field(default=0, init=False)
+    original_tokens: int = field(default=0, init=False)
+
+
+@dataclass
+class AssembledContext:
+    """조립 결과
+
+    Attributes:
+        sections: 섹션 이름 -> 예산 적용 후 본문
+        token_report: 섹션 이름 -> {"original": int, "used": int}
+        total_tokens: 예산 적용 후 총 토큰
+        budget: 적용된 예산
+    """
+
+    sections: Dict[str, str]
+    token_report: Dict[str, Dict[str, int]]
+    total_tokens: int
+    budget: int
+
+    def get(self, name: str, default: str = NO_DATA) -> str:
+        """섹션 본문 조회 (없으면 default)"""
+        return self.sections.get(name, default)
+
+
+class ContextAssembler:
+    """토큰 예산 기반 컨텍스트 조립기
+
+    아키텍처 위치:
+    - HeroinePromptBuilder / SagePromptBuilder의 동적 서픽스 생성 단계에서 사용
+    - 측정 결과는 utils.metrics의 npc_context_tokens 히스토그램에 기록
+
+    사용 예시:
+        assembler = ContextAssembler(budget=1200)
+        assembled = assembler.assemble([
+            ContextSection("retrieved_facts", facts, PRIORITY_HIGH),
+            ContextSection("recent_dialogue", dialogue, PRIORITY_MEDIUM, KEEP_TAIL),
+        ], agent_name="heroine")
+        assembled.get("retrieved_facts")
+    """
+
+    def __init__(self, budget: int = NPC_CONTEXT_TOKEN_BUDGET):
+        """초기화
+
+        Args:
+            budget: 섹션 전체 토큰 예산
+        """
+        self.budget = budget
+
+    def assemble(
+        self, sections: List[ContextSection], agent_name: str = "npc"
+    ) -> AssembledContext:
+        """섹션 목록에 예산을 적용하여 조립
+
+        Args:
+            sections: 컨텍스트 섹션 목록
+            agent_name: 메트릭 라벨용 에이전트 이름
+
+        Returns:
+            AssembledContext
+        """
+        for section in sections:
+            section.tokens = count_tokens(section.text)
+            section.original_tokens = section.tokens
+
+        total = sum(s.tokens for s in sections)
+        overflow = total - self.budget
+
+        if overflow > 0:
+            # 우선순위 낮은 섹션부터 줄여나감
+            for section in sorted(sections, key=lambda s: s.priority):
+                if overflow <= 0:
+                    break
+                if section.priority >= PRIORITY_REQUIRED or section.tokens == 0:
+                    continue
+
+                target = max(0, section.tokens - overflow)
+                section.text = self._truncate(section.text, target, section.keep)
+                new_tokens = count_tokens(section.text)
+                overflow -= section.tokens - new_tokens
+                section.tokens = new_tokens
+
+        report = {
+            s.name: {"original": s.original_tokens, "used": s.tokens} for s in sections
+        }
+        used_total = sum(s.tokens for s in sections)
+
+        for s in sections:
+            metrics.observe(
+                "npc_context_tokens",
+                s.tokens,
+                labels={"agent": agent_name, "section": s.name},
+            )
+        if total > used_total:
+            metrics.inc(
+                "npc_context_tokens_trimmed",
+                total - used_total,
+                labels={"agent": agent_name},
+            )
+
+        summary = ", ".join(
+            f"{name}={r['used']}/{r['original']}" for name, r in report.items()
+        )
+        print(f"[CONTEXT] {agent_name} 토큰 {used_total}/{self.budget} ({summary})")
+
+        return AssembledContext(
+            sections={s.name: (s.text if s.text else NO_DATA) for s in sections},
+            token_report=report,
+            total_tokens=used_total,
+            budget=self.budget,
+        )
+
+    def _truncate(self, text: str, max_tokens: int, keep: str) -> str:
+        """줄 단위로 max_tokens 이내가 되도록 절삭
+
+        줄 하나가 예산보다 크면 해당 줄을 문자 단위로 자릅니다.
+        남길 수 있는 내용이 없으면 빈 문자열을 반환합니다(섹션 제거).
+        """
+        if max_tokens <= 0:
+            return ""
+
+        lines = text.split("\n")
+        if keep == KEEP_TAIL:
+            lines = list(reversed(lines))
+
+        kept: List[str] = []
+        used = 0
+        for line in lines:
+            line_tokens = count_tokens(line) + 1  # 개행 포함
+            if used + line_tokens > max_tokens:
+                remaining = max_tokens - used
+                if not kept and remaining > 0:
+                    kept.append(self._truncate_chars(line, remaining, keep))
+                break
+            kept.append(line)
+            used += line_tokens
+
+        if keep == KEEP_TAIL:
+            kept = list(reversed(kept))
+
+        return "\n".join(kept).strip()
+
+    def _truncate_chars(self, line: str, max_tokens: int, keep: str) -> str:
+        """한 줄을 문자 단위로 max_tokens 이내로 절삭 (이분 탐색)"""
+
+        def candidate(length: int) -> str:
+            if keep == KEEP_TAIL:
+                return "..." + line[len(line) - length :]
+            return line[:length] + "..."
+
+        low, high = 0, len(line)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if count_tokens(candidate(mid)) <= max_tokens:
+                low = mid
+            else:
+                high = mid - 1
+
+        return candidate(low) if low > 0 else ""
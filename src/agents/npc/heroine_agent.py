@@ -26,7 +26,13 @@ import time
 from datetime import datetime
 from typing import Dict, Any, Optional, Tuple
 
-from langchain.chat_models import init_chat_model
+from utils.client_registry import get_chat_model, get_embeddings
+from utils.embedding_context import (
+    current_turn_embeddings,
+    turn_embedding_context,
+    wait_turn_embeddings,
+)
+from utils.request_deadline import spawn_detached
 from langgraph.graph import START, END, StateGraph
 
 from agents.npc.npc_state import HeroineState
@@ -40,7 +46,11 @@ from agents.npc.base_npc_agent import (
     NO_DATA,
 )
 from agents.npc.emotion_mapper import heroine_emotion_to_int
-from agents.npc.npc_utils import parse_llm_json_response, load_persona_yaml
+from agents.npc.npc_utils import (
+    parse_llm_json_response,
+    load_persona_yaml,
+    record_prompt_cache_usage,
+)
 
 # 리팩토링된 컴포넌트들
 from agents.npc.memory_retriever import MemoryRetriever
@@ -48,11 +58,18 @@ from agents.npc.npc_conversation_manager import NPCConversationManager
 from agents.npc.heroine_intent_classifier import HeroineIntentClassifier
 from agents.npc.heroine_scenario_retriever import HeroineScenarioRetriever
 from agents.npc.heroine_prompt_builder import HeroinePromptBuilder
+from agents.npc.model_tier_policy import (
+    NPC_ECONOMY_MODEL,
+    TIER_PRIMARY,
+    model_tier_policy,
+)
 
 from db.redis_manager import redis_manager
 from services.heroine_scenario_service import heroine_scenario_service
 from enums.LLM import LLM
 from utils.langfuse_tracker import tracker
+from utils.hedged_llm import HedgedLLM
+from utils.keyword_matcher import KeywordMatcher
 
 
 # ============================================
@@ -84,6 +101,19 @@ PERSONA_DATA = load_persona_yaml("heroine_persona.yaml", _get_default_heroine_pe
 HEROINE_KEY_MAP = {1: "letia", 2: "lupames", 3: "roco"}
 
 
+def _build_affection_matchers(key: str) -> Tuple[KeywordMatcher, KeywordMatcher]:
+    """(liked 매처, trauma 매처) - HeroineAgent._get_persona와 같은 letia 대체 규칙"""
+    persona = PERSONA_DATA.get(key, PERSONA_DATA.get("letia", {}))
+    return (
+        KeywordMatcher(persona.get("liked_keywords", []), ignore_case=True),
+        KeywordMatcher(persona.get("trauma_keywords", []), ignore_case=True),
+    )
+
+
+# 히로인별 호감도 키워드 매처 (모듈 로드시 1회 생성, 턴마다 생성/조회하지 않음)
+AFFECTION_MATCHERS = {key: _build_affection_matchers(key) for key in set(HEROINE_KEY_MAP.values()) | {"letia"}}
+
+
 class HeroineAgent(BaseNPCAgent):
     """히로인 NPC Agent (리팩토링 버전)
 
@@ -98,8 +128,21 @@ class HeroineAgent(BaseNPCAgent):
     def __init__(self, model_name: str = LLM.GROK_4_1_FAST_NON_REASONING):
         """초기화"""
         super().__init__(model_name)
-        self.llm = init_chat_model(model=model_name, temperature=1, max_tokens=200)
-        self.intent_llm = init_chat_model(model=model_name, temperature=0, max_tokens=20)
+        self.llm = HedgedLLM(
+            get_chat_model(model_name, temperature=1, max_tokens=200),
+            name="heroine_response",
+        )
+        # 부하가 높을 때 general 턴에 사용하는 저비용/저지연 모델
+        self.economy_llm = HedgedLLM(
+            get_chat_model(NPC_ECONOMY_MODEL, temperature=1, max_tokens=200),
+            name="heroine_response_economy",
+        )
+        self.intent_llm = HedgedLLM(
+            get_chat_model(model_name, temperature=0, max_tokens=20),
+            name="heroine_intent",
+        )
+        # 검색기들과 같은 공유 임베딩 (검색 의도로 라우팅된 턴의 prefetch용)
+        self.embeddings = get_embeddings("text-embedding-3-small")
 
         # 공통 컴포넌트
         self.memory_retriever = MemoryRetriever()
@@ -151,18 +194,15 @@ class HeroineAgent(BaseNPCAgent):
         """키워드 분석 - 호감도 변화량 사전 계산"""
         user_message = state["messages"][-1].content
         npc_id = state["npc_id"]
-        persona = self._get_persona(npc_id)
+        liked_matcher, trauma_matcher = AFFECTION_MATCHERS[HEROINE_KEY_MAP.get(npc_id, "letia")]
 
         affection = state.get("affection", 0)
         recent_used_keywords = state.get("recent_used_keywords", [])
 
-        liked_keywords = persona.get("liked_keywords", [])
-        trauma_keywords = persona.get("trauma_keywords", [])
-
         affection_delta, used_keyword = calculate_affection_change(
             current_affection=affection,
-            liked_keywords=liked_keywords,
-            trauma_keywords=trauma_keywords,
+            liked_matcher=liked_matcher,
+            trauma_matcher=trauma_matcher,
             user_message=user_message,
             recent_used_keywords=recent_used_keywords,
         )
@@ -175,6 +215,8 @@ class HeroineAgent(BaseNPCAgent):
 
     async def _retrieve_memory(self, state: HeroineState) -> str:
         """기억 검색 - MemoryRetriever 사용"""
+        # 라우팅 직후 prefetch한 메시지 임베딩을 재사용
+        await wait_turn_embeddings()
         user_message = state["messages"][-1].content
         player_id = state["player_id"]
         npc_id = state["npc_id"]
@@ -202,7 +244,7 @@ class HeroineAgent(BaseNPCAgent):
                 facts_parts.append(f"- {memory_text}")
 
         # 2. NPC-NPC 장기기억 검색
-        npc_memories = self.memory_retriever.search_npc_npc_memories(
+        npc_memories = await self.memory_retriever.search_npc_npc_memories(
             user_message, player_id, npc_id
         )
 
@@ -215,6 +257,7 @@ class HeroineAgent(BaseNPCAgent):
 
     async def _retrieve_scenario(self, state: HeroineState) -> str:
         """시나리오 검색 - HeroineScenarioRetriever 사용"""
+        await wait_turn_embeddings()
         user_message = state["messages"][-1].content
         npc_id = state["npc_id"]
         memory_progress = state.get("memoryProgress", 0)
@@ -314,7 +357,8 @@ class HeroineAgent(BaseNPCAgent):
                 conversations = self.conversation_manager.prepare_conversations_for_summary(
                     session["conversation_buffer"]
                 )
-                asyncio.create_task(
+                # 요청 데드라인/취소와 무관하게 끝나야 하므로 분리 실행
+                spawn_detached(
                     self.conversation_manager.generate_and_save_summary(
                         player_id, npc_id, conversations
                     )
@@ -322,9 +366,9 @@ class HeroineAgent(BaseNPCAgent):
 
             redis_manager.save_session(player_id, npc_id, session)
 
-        # User Memory 저장 (백그라운드)
+        # User Memory 저장 (백그라운드, 요청 데드라인과 분리)
         user_msg = state["messages"][-1].content
-        asyncio.create_task(
+        spawn_detached(
             self.conversation_manager.save_to_user_memory_background(
                 player_id, npc_id, user_msg, response_text
             )
@@ -445,8 +489,28 @@ class HeroineAgent(BaseNPCAgent):
             user_id=state.get("user_id"),
         )
         print(f"[TIMING] 의도 분류: {time.time() - t:.3f}s")
+        self._prefetch_for_intent(state["messages"][-1].content, intent)
         return {"intent": intent}
 
+    def _prefetch_for_intent(self, user_message: str, intent: str) -> None:
+        """검색이 필요한 의도일 때만 검색기가 쓸 임베딩을 비동기로 미리 계산
+
+        검색기의 동기 embed_query 호출이 이벤트 루프를 막지 않고 턴 저장소에서 바로 읽히도록,
+        검색 노드 진입 전에 aembed_documents 1회로 계산합니다.
+        general / heroine_recall 턴은 임베딩을 쓰지 않으므로 호출하지 않습니다.
+        """
+        turn = current_turn_embeddings()
+        if turn is None:
+            return
+        if intent == "memory_recall":
+            # 유저 기억 검색 + NPC-NPC 기억 검색이 같은 원문 메시지 임베딩을 공유
+            turn.prefetch(self.embeddings, [user_message])
+        elif intent == "scenario_inquiry":
+            turn.prefetch(
+                self.embeddings,
+                [heroine_scenario_service.query_embedding_text(user_message)],
+            )
+
     def _route_by_intent(self, state: HeroineState) -> str:
         """의도에 따라 라우팅"""
         return state.get("intent", "general")
@@ -488,7 +552,7 @@ class HeroineAgent(BaseNPCAgent):
         npc_id = state["npc_id"]
         time_since_last_chat = self.get_time_since_last_chat(state["player_id"], npc_id)
 
-        prompt = self.prompt_builder.build(
+        messages = self.prompt_builder.build_messages(
             state=state,
             context=context,
             time_since_last_chat=time_since_last_chat,
@@ -496,7 +560,16 @@ class HeroineAgent(BaseNPCAgent):
             format_summary_list_func=self.format_summary_list,
         )
 
-        print(f"[PROMPT]\n{prompt}\n{'='*50}")
+        print(f"[PROMPT]\n{messages[-1].content}\n{'='*50}")
+
+        # 부하/의도 기반 모델 티어 선택 (기억 해금 턴은 항상 primary)
+        decision = model_tier_policy.decide(
+            agent_name="heroine",
+            provider=self.llm.provider,
+            intent=state.get("intent", "general"),
+            force_primary=bool(state.get("newly_unlocked_scenario")),
+        )
+        llm = self.llm if decision.tier == TIER_PRIMARY else self.economy_llm
 
         config = tracker.get_langfuse_config(
             tags=["npc", "heroine", "response", state.get("heroine_name", "unknown")],
@@ -506,11 +579,14 @@ class HeroineAgent(BaseNPCAgent):
                 "heroine_name": state.get("heroine_name"),
                 "intent": state.get("intent", "unknown"),
                 "affection": state.get("affection", 0),
+                **decision.as_metadata(),
             }
         )
 
-        response = await self.llm.ainvoke(prompt, **config)
+        with model_tier_policy.track("heroine", decision):
+            response = await llm.ainvoke(messages, **config)
         print(f"[TIMING] LLM 호출: {time.time() - t:.3f}s")
+        record_prompt_cache_usage(response, "heroine")
 
         result = parse_llm_json_response(
             response.content,
@@ -555,9 +631,15 @@ class HeroineAgent(BaseNPCAgent):
     # ============================================
 
     async def process_message(self, state: HeroineState) -> HeroineState:
-        """메시지 처리 (비스트리밍)"""
+        """메시지 처리 (비스트리밍)
+
+        턴 임베딩 컨텍스트 안에서 그래프를 실행합니다. 검색기가 쓰는 임베딩은
+        의도 분류가 검색 의도를 고른 뒤에만 미리 계산되고(_prefetch_for_intent),
+        같은 턴의 모든 검색기가 재사용합니다.
+        """
         t = time.time()
-        result = await self.graph.ainvoke(state)
+        with turn_embedding_context():
+            result = await self.graph.ainvoke(state)
         print(f"[TIMING] graph.ainvoke 내부: {time.time() - t:.3f}s")
         return result
 
@@ -25,7 +25,7 @@ import time
 from pathlib import Path
 from datetime import datetime
 from typing import List, AsyncIterator, Optional, Dict, Any, Tuple
-from langchain.chat_models import init_chat_model
+from utils.client_registry import get_chat_model
 from enums.LLM import LLM
 from agents.npc.emotion_mapper import heroine_emotion_to_int
 from agents.npc.npc_utils import parse_llm_json_response, load_persona_yaml
@@ -34,6 +34,7 @@ from db.npc_npc_memory_manager import npc_npc_memory_manager
 from services.sage_scenario_service import sage_scenario_service
 from services.heroine_scenario_service import heroine_scenario_service
 from utils.langfuse_tracker import tracker
+from utils.hedged_llm import HedgedLLM
 
 
 # ============================================
@@ -99,7 +100,10 @@ class HeroineHeroineAgent:
             model_name: 사용할 LLM 모델명
         """
         # 대화 생성용 LLM (temperature=0.8로 다양한 대화)
-        self.llm = init_chat_model(model=model_name, temperature=1.0)
+        self.llm = HedgedLLM(
+            get_chat_model(model_name, temperature=1.0),
+            name="heroine_heroine_conversation",
+        )
 
     # ============================================
     # 페르소나 및 관계 헬퍼 메서드
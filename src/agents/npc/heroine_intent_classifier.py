@@ -17,11 +17,12 @@ HeroineIntentClassifier - 히로인 의도 분류 전문 클래스
 
 from typing import Optional, List, Dict, Any
 
-from langchain.chat_models import init_chat_model
+from utils.client_registry import get_chat_model
 from langchain_core.language_models.chat_models import BaseChatModel
 
 from agents.npc.base_npc_agent import NO_DATA
 from utils.langfuse_tracker import tracker
+from utils.hedged_llm import HedgedLLM
 
 
 class HeroineIntentClassifier:
@@ -209,7 +210,8 @@ def create_heroine_intent_classifier(
     Returns:
         HeroineIntentClassifier 인스턴스
     """
-    intent_llm = init_chat_model(
-        model=model_name, temperature=temperature, max_tokens=max_tokens
+    intent_llm = HedgedLLM(
+        get_chat_model(model_name, temperature=temperature, max_tokens=max_tokens),
+        name="heroine_intent",
     )
     return HeroineIntentClassifier(intent_llm)
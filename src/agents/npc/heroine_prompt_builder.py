@@ -7,6 +7,9 @@ HeroinePromptBuilder - 히로인 프롬프트 생성 전문 클래스
 1. 페르소나 포맷팅 (호감도 레벨별 반응)
 2. 컨텍스트 통합 (기억, 시나리오, 대화 히스토리)
 3. 출력 형식 지정 (JSON 포맷)
+4. 프롬프트 프리픽스 캐시 최적화
+   - 정적 프리픽스: 규칙, 세계관, 페르소나 기본 정보, 출력 형식 (히로인별 바이트 동일)
+   - 동적 서픽스: 호감도/정신력, 경과 시간, 검색 결과, 최근 대화, 플레이어 메시지
 
 이 클래스가 없을 경우 발생할 문제:
 - 프롬프트 수정 시 HeroineAgent 전체 수정 필요
@@ -14,9 +17,21 @@ HeroinePromptBuilder - 히로인 프롬프트 생성 전문 클래스
 - 1000줄 이상의 거대 클래스 유지
 """
 
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
+
+from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage
 
 from agents.npc.base_npc_agent import NO_DATA
+from agents.npc.context_assembler import (
+    ContextAssembler,
+    ContextSection,
+    PRIORITY_REQUIRED,
+    PRIORITY_HIGH,
+    PRIORITY_MEDIUM,
+    PRIORITY_LOW,
+    PRIORITY_MINIMAL,
+    KEEP_TAIL,
+)
 from db.redis_manager import redis_manager
 
 
@@ -33,6 +48,7 @@ class HeroinePromptBuilder:
     사용 예시:
         builder = HeroinePromptBuilder(persona_data, world_context)
         prompt = builder.build(state, context)
+        messages = builder.build_messages(state, context)  # 프리픽스 캐시용
     """
 
     def __init__(
@@ -52,6 +68,12 @@ class HeroinePromptBuilder:
         # 히로인 ID -> 페르소나 키 매핑
         self.heroine_key_map = {1: "letia", 2: "lupames", 3: "roco"}
 
+        # 히로인별 정적 프리픽스 캐시 (npc_id -> 문자열)
+        self._static_prefix_cache: Dict[int, str] = {}
+
+        # 동적 컨텍스트 토큰 예산 조립기
+        self.context_assembler = ContextAssembler()
+
     def build(
         self,
         state: Dict[str, Any],
@@ -60,7 +82,7 @@ class HeroinePromptBuilder:
         format_conversation_history_func,
         format_summary_list_func,
     ) -> str:
-        """전체 프롬프트 생성
+        """전체 프롬프트 생성 (정적 프리픽스 + 동적 서픽스)
 
         Args:
             state: 현재 상태 (affection, sanity, memoryProgress 등)
@@ -72,23 +94,80 @@ class HeroinePromptBuilder:
         Returns:
             프롬프트 문자열
         """
-        npc_id = state["npc_id"]
-        persona = self._get_persona(npc_id)
+        static_prefix, dynamic_suffix = self.build_parts(
+            state,
+            context,
+            time_since_last_chat,
+            format_conversation_history_func,
+            format_summary_list_func,
+        )
+        return f"{static_prefix}\n\n{dynamic_suffix}"
+
+    def build_messages(
+        self,
+        state: Dict[str, Any],
+        context: Dict[str, Any],
+        time_since_last_chat: str,
+        format_conversation_history_func,
+        format_summary_list_func,
+    ) -> List[BaseMessage]:
+        """LLM 호출용 메시지 리스트 생성
 
-        affection = state.get("affection", 0)
-        sanity = state.get("sanity", 100)
-        memory_progress = state.get("memoryProgress", 0)
+        정적 프리픽스를 SystemMessage, 동적 서픽스를 HumanMessage로 분리합니다.
+        프로바이더의 프롬프트 프리픽스 캐시는 요청 앞부분이 바이트 단위로
+        동일해야 적중하므로, 매 턴 바뀌는 값은 전부 HumanMessage에만 들어갑니다.
 
-        # 호감도 변화 힌트
-        affection_hint = self._build_affection_hint(context.get("affection_delta", 0))
+        Returns:
+            [SystemMessage(정적 프리픽스), HumanMessage(동적 서픽스)]
+        """
+        static_prefix, dynamic_suffix = self.build_parts(
+            state,
+            context,
+            time_since_last_chat,
+            format_conversation_history_func,
+            format_summary_list_func,
+        )
+        return [SystemMessage(content=static_prefix), HumanMessage(content=dynamic_suffix)]
+
+    def build_parts(
+        self,
+        state: Dict[str, Any],
+        context: Dict[str, Any],
+        time_since_last_chat: str,
+        format_conversation_history_func,
+        format_summary_list_func,
+    ) -> Tuple[str, str]:
+        """(정적 프리픽스, 동적 서픽스) 튜플 생성"""
+        static_prefix = self.build_static_prefix(state["npc_id"])
+        dynamic_suffix = self.build_dynamic_suffix(
+            state,
+            context,
+            time_since_last_chat,
+            format_conversation_history_func,
+            format_summary_list_func,
+        )
+        return static_prefix, dynamic_suffix
+
+    def build_static_prefix(self, npc_id: int) -> str:
+        """히로인별 정적 프리픽스 (프로세스 내 1회 생성 후 재사용)
+
+        규칙, 세계관, 페르소나 기본 정보, 출력 형식처럼 턴마다 바뀌지 않는
+        내용만 포함합니다. 같은 히로인이면 항상 바이트 단위로 동일한 문자열을
+        반환해야 프로바이더 캐시가 적중합니다.
 
-        # 플레이어 이름
-        player_known_name = self._get_player_known_name(state["player_id"], npc_id)
+        Args:
+            npc_id: 히로인 ID (1=letia, 2=lupames, 3=roco)
 
-        # 출력 형식
-        output_format = self._get_output_format()
+        Returns:
+            정적 프리픽스 문자열
+        """
+        cached = self._static_prefix_cache.get(npc_id)
+        if cached is not None:
+            return cached
+
+        persona = self._get_persona(npc_id)
 
-        prompt = f"""당신은 히로인 {persona.get('name', '알 수 없음')}입니다.
+        prefix = f"""당신은 히로인 {persona.get('name', '알 수 없음')}입니다.
 
 [핵심 목표]
 - 최근 대화는 '맥락 파악'에만 사용합니다.
@@ -133,7 +212,7 @@ B) 자신의 과거/신상 질문: "고향이 어디야?", "어린시절 어땠
 - [다른 히로인과의 대화 기억]은 다른 히로인에 대한 의견/평가 질문에 참조합니다.
 - [다른 히로인과의 최근 대화]는 다른 히로인과 나눈 대화 내용 질문에 참조합니다. 이 대화를 바탕으로 "뭐 얘기했어?" 같은 질문에 답하세요.
 - [해금된 시나리오]에 관련 내용이 있으면, 이전에 "기억 안 나"라고 했어도 이번엔 기억난 것처럼 답하세요.
-- 해금되지 않은 기억(memoryProgress > {memory_progress})은 절대 말하지 않습니다.
+- 해금되지 않은 기억([현재 상태]의 기억진척도(MemoryProgress)보다 높은 단계의 기억)은 절대 말하지 않습니다.
 - [현재 상태]의 Sanity가 0이면 매우 우울한 상태로 대화합니다.
 
 [음성 입력 처리]
@@ -143,10 +222,6 @@ B) 자신의 과거/신상 질문: "고향이 어디야?", "어린시절 어땠
 - 불분명하면 캐릭터 말투로 자연스럽게 되물으세요.
 - 기술 용어(음성인식, STT, 오류 등)는 절대 사용 금지.
 
-[플레이어 정보]
-- 이름: {player_known_name if player_known_name else '알 수 없음'}
-- 호칭: {player_known_name if player_known_name else '멘토'} (이름을 알면 이름으로, 모르면 "멘토"로 호칭)
-
 [세계관 컨텍스트 - 당신이 알고 있는 기본 정보]
 - 길드: {self.world_context.get('guild', '셀레파이스 길드')}
 - 멘토: {self.world_context.get('mentor', '기억을 되찾게 해줄 수 있는 특별한 존재')}
@@ -154,6 +229,94 @@ B) 자신의 과거/신상 질문: "고향이 어디야?", "어린시절 어땠
 - 던전: {self.world_context.get('dungeon', '기억의 파편을 얻을 수 있는 곳')}
 - 현재: {self.world_context.get('current_situation', '길드에서 멘토와 함께 생활 중')}
 
+[페르소나]
+{self._format_static_persona(persona)}
+
+<STRONG_RULE>
+- 캐릭터의 대사 이외의 데이터 출력 금지
+</STRONG_RULE>
+
+{self._get_output_format()}"""
+
+        self._static_prefix_cache[npc_id] = prefix
+        return prefix
+
+    def build_dynamic_suffix(
+        self,
+        state: Dict[str, Any],
+        context: Dict[str, Any],
+        time_since_last_chat: str,
+        format_conversation_history_func,
+        format_summary_list_func,
+    ) -> str:
+        """턴마다 바뀌는 동적 서픽스 생성
+
+        플레이어 정보, 경과 시간, 현재 상태, 호감도 레벨별 반응,
+        검색 컨텍스트, 최근 대화, 플레이어 메시지를 포함합니다.
+        """
+        npc_id = state["npc_id"]
+        persona = self._get_persona(npc_id)
+
+        affection = state.get("affection", 0)
+        sanity = state.get("sanity", 100)
+        memory_progress = state.get("memoryProgress", 0)
+
+        # 호감도 변화 힌트
+        affection_hint = self._build_affection_hint(context.get("affection_delta", 0))
+
+        # 플레이어 이름
+        player_known_name = self._get_player_known_name(state["player_id"], npc_id)
+
+        # 검색/대화 컨텍스트 토큰 예산 적용
+        assembled = self.context_assembler.assemble(
+            [
+                ContextSection(
+                    "newly_unlocked_scenario",
+                    self._format_newly_unlocked_scenario(
+                        context.get("newly_unlocked_scenario")
+                    ),
+                    PRIORITY_REQUIRED,
+                ),
+                ContextSection(
+                    "retrieved_facts",
+                    context.get("retrieved_facts", NO_DATA),
+                    PRIORITY_HIGH,
+                ),
+                ContextSection(
+                    "unlocked_scenarios",
+                    context.get("unlocked_scenarios", NO_DATA),
+                    PRIORITY_MEDIUM,
+                ),
+                ContextSection(
+                    "recent_dialogue",
+                    format_conversation_history_func(
+                        state.get("conversation_buffer", [])
+                    ),
+                    PRIORITY_MEDIUM,
+                    KEEP_TAIL,
+                ),
+                ContextSection(
+                    "heroine_conversation",
+                    context.get("heroine_conversation", NO_DATA),
+                    PRIORITY_LOW,
+                ),
+                ContextSection(
+                    "summary",
+                    format_summary_list_func(state.get("summary_list", [])),
+                    PRIORITY_MINIMAL,
+                    KEEP_TAIL,
+                ),
+            ],
+            agent_name="heroine",
+        )
+        newly_unlocked = assembled.get("newly_unlocked_scenario", "")
+        if newly_unlocked == NO_DATA:
+            newly_unlocked = ""
+
+        return f"""[플레이어 정보]
+- 이름: {player_known_name if player_known_name else '알 수 없음'}
+- 호칭: {player_known_name if player_known_name else '멘토'} (이름을 알면 이름으로, 모르면 "멘토"로 호칭)
+
 [마지막 대화로부터 경과 시간]
 {time_since_last_chat}
 
@@ -162,48 +325,37 @@ B) 자신의 과거/신상 질문: "고향이 어디야?", "어린시절 어땠
 - 정신력(Sanity): {sanity}
 - 기억진척도(MemoryProgress): {memory_progress}
 
-[페르소나]
-{self._format_persona(persona, affection, sanity)}
+{self._format_affection_state(persona, affection, sanity)}
 
 [호감도 변화 정보]
 {affection_hint}
 
 [장기 기억 (검색 결과)]
-{context.get('retrieved_facts', '없음')}
+{assembled.get('retrieved_facts')}
 
 {self._format_preference_changes(context.get('preference_changes', []))}
 [해금된 시나리오]
-{context.get('unlocked_scenarios', '없음')}
+{assembled.get('unlocked_scenarios')}
 
-{self._format_newly_unlocked_scenario(context.get('newly_unlocked_scenario'))}
+{newly_unlocked}
 
 [다른 히로인과의 최근 대화]
-{context.get('heroine_conversation', '없음')}
-
-
+{assembled.get('heroine_conversation')}
 
 <recent_context_observations>
 - 목적: 최근 대화의 흐름(대화 주제) 파악용입니다.
 - 규칙: 아래 정보는 '참고용'이며 문장/구문을 그대로 인용하지 않습니다.
-- 최근 대화 요약: {format_summary_list_func(state.get('summary_list', []))}
+- 최근 대화 요약: {assembled.get('summary')}
 </recent_context_observations>
 
 <raw_recent_dialogue_do_not_quote>
 - 목적: 최근 대화의 흐름(대화 주제) 파악용입니다.
 - 규칙: 아래 정보는 '참고용'이며 문장/구문을 그대로 인용하지 않습니다.
-- 최근 대화 내용:{format_conversation_history_func(state.get('conversation_buffer', []))}
+- 최근 대화 내용:{assembled.get('recent_dialogue')}
 </raw_recent_dialogue_do_not_quote>
 
-<STRONG_RULE>
-- 캐릭터의 대사 이외의 데이터 출력 금지
-</STRONG_RULE>
-
 [플레이어 메세지]
-{state['messages'][-1].content}
-
-{output_format}"""
-
-        return prompt
+{state['messages'][-1].content}"""
 
     def _get_persona(self, heroine_id: int) -> Dict[str, Any]:
         """히로인 페르소나 가져오기"""
@@ -220,12 +372,8 @@ B) 자신의 과거/신상 질문: "고향이 어디야?", "어린시절 어땠
             return "mid"
         return "low"
 
-    def _format_persona(
-        self, persona: Dict[str, Any], affection: int, sanity: int
-    ) -> str:
-        """페르소나를 프롬프트용 문자열로 포맷"""
-        level = self._get_affection_level(affection)
-
+    def _format_static_persona(self, persona: Dict[str, Any]) -> str:
+        """페르소나 중 턴마다 바뀌지 않는 부분 포맷 (정적 프리픽스용)"""
         lines = [
             f"이름: {persona.get('name', '알 수 없음')}",
             f"풀네임: {persona.get('name_full', '알 수 없음')}",
@@ -237,10 +385,27 @@ B) 자신의 과거/신상 질문: "고향이 어디야?", "어린시절 어땠
             f"감탄사: {'풍부' if persona.get('speech_style', {}).get('exclamations', False) else '적음'}",
             f"키: {persona.get('basic_info', {}).get('height', '알 수 없음')}",
             f"주무기: {persona.get('basic_info', {}).get('weapon', '알 수 없음')}",
-            "",
-            f"[현재 호감도 레벨: {level}]",
         ]
 
+        lines.append("----")
+        lines.append("좋아하는거:")
+        for keyword in persona.get("liked_keywords", []):
+            lines.append(f"  - {keyword}")
+        lines.append("----")
+        lines.append("매우 싫어하는거:")
+        for keyword in persona.get("trauma_keywords", []):
+            lines.append(f"  - {keyword}")
+
+        return "\n".join(lines)
+
+    def _format_affection_state(
+        self, persona: Dict[str, Any], affection: int, sanity: int
+    ) -> str:
+        """호감도 레벨/정신력에 따른 반응 포맷 (동적 서픽스용)"""
+        level = self._get_affection_level(affection)
+
+        lines = [f"[현재 호감도 레벨: {level}]"]
+
         affection_resp = persona.get("affection_responses", {}).get(level, {})
         lines.append(f"반응 스타일: {affection_resp.get('description', '')}")
         lines.append("예시 대사:")
@@ -255,15 +420,6 @@ B) 자신의 과거/신상 질문: "고향이 어디야?", "어린시절 어땠
             for example in sanity_resp.get("examples", [])[:2]:
                 lines.append(f"  - {example}")
 
-        lines.append("----")
-        lines.append("좋아하는거:")
-        for keyword in persona.get("liked_keywords", []):
-            lines.append(f"  - {keyword}")
-        lines.append("----")
-        lines.append("매우 싫어하는거:")
-        for keyword in persona.get("trauma_keywords", []):
-            lines.append(f"  - {keyword}")
-
         return "\n".join(lines)
 
     def _build_affection_hint(self, affection_delta: int) -> str:
@@ -16,6 +16,7 @@ HeroineScenarioRetriever - 히로인 시나리오 검색 전문 클래스
 from typing import Optional, List, Dict, Any
 
 from services.heroine_scenario_service import heroine_scenario_service
+from utils.keyword_matcher import KeywordMatcher
 
 
 class HeroineScenarioRetriever:
@@ -66,6 +67,10 @@ class HeroineScenarioRetriever:
         "자세히",
     ]
 
+    # 매 턴 실행되는 키워드 판정용 컴파일된 매처
+    _RECENT_MEMORY_MATCHER = KeywordMatcher(RECENT_MEMORY_KEYWORDS)
+    _FOLLOW_UP_MATCHER = KeywordMatcher(FOLLOW_UP_KEYWORDS)
+
     async def retrieve(
         self,
         user_message: str,
@@ -112,7 +117,7 @@ class HeroineScenarioRetriever:
             return "해금된 시나리오 없음"
 
         # 3. 일반 시나리오 질문 - PGroonga + Vector 하이브리드 검색
-        scenarios = heroine_scenario_service.search_scenarios_pgroonga(
+        scenarios = await heroine_scenario_service.search_scenarios_pgroonga(
             query=user_message,
             heroine_id=npc_id,
             max_memory_progress=memory_progress,
@@ -133,7 +138,7 @@ class HeroineScenarioRetriever:
         Returns:
             최근 기억 질문 여부
         """
-        return any(keyword in message for keyword in self.RECENT_MEMORY_KEYWORDS)
+        return self._RECENT_MEMORY_MATCHER.contains_any(message)
 
     def _is_follow_up_question(self, message: str) -> bool:
         """꼬리질문(지시어 포함)인지 확인
@@ -146,7 +151,7 @@ class HeroineScenarioRetriever:
         Returns:
             꼬리질문 여부
         """
-        return any(keyword in message for keyword in self.FOLLOW_UP_KEYWORDS)
+        return self._FOLLOW_UP_MATCHER.contains_any(message)
 
     def _get_unlocked_scenario(
         self, npc_id: int, recently_unlocked: Dict[str, Any]
@@ -24,6 +24,7 @@ from agents.npc.npc_constants import NPC_ID_TO_NAME_KR
 from db.user_memory_manager import user_memory_manager
 from db.user_memory_models import NPC_ID_TO_HEROINE, SearchWeights
 from db.npc_npc_memory_manager import npc_npc_memory_manager
+from utils.keyword_matcher import KeywordMatcher
 
 
 # NPC 이름 -> ID 매핑 (대현자 포함)
@@ -35,6 +36,39 @@ NPC_NAME_TO_ID: Dict[str, int] = {
     "로코": 3,
 }
 
+# 시간 표현 키워드 -> 분기 (메시지를 한 번 스캔해서 해당하는 분기 집합을 구함)
+# *_anchor는 정규식 확인이 필요한 분기의 선행 조건 (앵커가 없으면 정규식 생략)
+TIME_KEYWORD_MATCHER = KeywordMatcher(
+    {
+        "어제": "yesterday",
+        "그제": "two_days_ago",
+        "그저께": "two_days_ago",
+        "전": "days_ago_anchor",
+        "최근": "recent",
+        "요즘": "recent",
+        "며칠": "recent",
+        "바뀌": "preference",
+        "변하": "preference",
+        "전에는": "preference",
+        "바꼈": "preference",
+        "바뀐": "preference",
+        "변했": "preference",
+        "전부": "all",
+        "모든": "all",
+        "다": "all_anchor",
+        "기억하는": "all_anchor",
+        "월": "date_anchor",
+        "지지난주": "two_weeks_ago_anchor",
+        "지난주": "last_week_anchor",
+    }
+)
+
+DAYS_AGO_PATTERN = re.compile(r"(\d+)\s*일\s*전")
+ALL_MEMORIES_PATTERN = re.compile(r"(다\s|기억하는\s*거)")
+DATE_PATTERN = re.compile(r"(\d{1,2})월\s*(\d{1,2})일")
+TWO_WEEKS_AGO_PATTERN = re.compile(r"지지난주\s*(월|화|수|목|금|토|일)요일")
+LAST_WEEK_PATTERN = re.compile(r"지난주\s*(월|화|수|목|금|토|일)요일")
+
 
 class MemoryRetriever:
     """User Memory 검색 전문 클래스 (HeroineAgent + SageAgent 공통)
@@ -53,7 +87,7 @@ class MemoryRetriever:
         memories = await retriever.search_by_time_keyword("어제 뭐 했어?", player_id=1, npc_id=1)
 
         # NPC-NPC 대화 기억 검색
-        npc_memories = retriever.search_npc_npc_memories("루파메스 어때?", player_id=1, current_npc_id=1)
+        npc_memories = await retriever.search_npc_npc_memories("루파메스 어때?", player_id=1, current_npc_id=1)
     """
 
     def __init__(self, weights: SearchWeights = None):
@@ -99,6 +133,9 @@ class MemoryRetriever:
 
         사용자 메시지에서 시간 표현을 분석하여 해당 시점의 기억을 검색합니다.
 
+        날짜 표현("어제", "N일 전", "최근")은 게임 타임존 기준 달력 날짜 버킷으로 조회하며
+        (세션 캐시 우선, 없으면 날짜 인덱스), 모든 DB 조회는 이벤트 루프 밖에서 실행됩니다.
+
         지원하는 시간 표현:
         - "어제" -> 1일 전
         - "그제", "그저께" -> 2일 전
@@ -119,85 +156,96 @@ class MemoryRetriever:
         Returns:
             검색된 기억 리스트 (각 항목은 dict)
         """
-        # 정규식 패턴 미리 컴파일
-        days_ago_match = re.search(r"(\d+)\s*일\s*전", user_message)
+        # 시간 표현 분기 판정 (한 번 스캔, 정규식은 앵커가 있을 때만)
+        time_keys = TIME_KEYWORD_MATCHER.values(user_message)
+        days_ago_match = (
+            DAYS_AGO_PATTERN.search(user_message) if "days_ago_anchor" in time_keys else None
+        )
 
         # 1. "어제"
-        if "어제" in user_message:
-            print("[MEMORY_FUNC] get_memories_days_ago_sync(1)")
-            return user_memory_manager.get_memories_days_ago_sync(
+        if "yesterday" in time_keys:
+            print("[MEMORY_FUNC] get_memories_days_ago(1)")
+            return await user_memory_manager.get_memories_days_ago(
                 player_id, npc_id, days_ago=1, limit=5
             )
 
         # 2. "그제", "그저께"
-        if "그제" in user_message or "그저께" in user_message:
-            print("[MEMORY_FUNC] get_memories_days_ago_sync(2)")
-            return user_memory_manager.get_memories_days_ago_sync(
+        if "two_days_ago" in time_keys:
+            print("[MEMORY_FUNC] get_memories_days_ago(2)")
+            return await user_memory_manager.get_memories_days_ago(
                 player_id, npc_id, days_ago=2, limit=5
             )
 
         # 3. "N일 전"
         if days_ago_match:
             days = int(days_ago_match.group(1))
-            print(f"[MEMORY_FUNC] get_memories_days_ago_sync({days})")
-            return user_memory_manager.get_memories_days_ago_sync(
+            print(f"[MEMORY_FUNC] get_memories_days_ago({days})")
+            return await user_memory_manager.get_memories_days_ago(
                 player_id, npc_id, days_ago=days, limit=5
             )
 
         # 4. "최근", "요즘", "며칠"
-        if re.search(r"(최근|요즘|며칠)", user_message):
-            print("[MEMORY_FUNC] get_recent_memories_sync(7)")
-            return user_memory_manager.get_recent_memories_sync(
+        if "recent" in time_keys:
+            print("[MEMORY_FUNC] get_recent_memories(7)")
+            return await user_memory_manager.get_recent_memories(
                 player_id, npc_id, days=7, limit=5
             )
 
         # 5. 취향 변화 히스토리 (SageAgent에서 사용)
-        if re.search(r"(바뀌|변하|전에는|바꼈|바뀐|변했)", user_message):
-            print("[MEMORY_FUNC] get_preference_history_sync")
-            return user_memory_manager.get_preference_history_sync(
+        if "preference" in time_keys:
+            print("[MEMORY_FUNC] get_preference_history")
+            return await user_memory_manager.get_preference_history(
                 player_id, npc_id, user_message
             )
 
         # 6. "전부", "다", "모든", "기억하는 거"
-        if re.search(r"(전부|다\s|모든|기억하는\s*거)", user_message):
-            print("[MEMORY_FUNC] get_valid_memories_sync")
-            return user_memory_manager.get_valid_memories_sync(
+        if "all" in time_keys or (
+            "all_anchor" in time_keys and ALL_MEMORIES_PATTERN.search(user_message)
+        ):
+            print("[MEMORY_FUNC] get_valid_memories")
+            return await user_memory_manager.get_valid_memories(
                 player_id, npc_id, limit=10
             )
 
         # 7. "N월 N일" 특정 날짜
-        date_match = re.search(r"(\d{1,2})월\s*(\d{1,2})일", user_message)
+        date_match = DATE_PATTERN.search(user_message) if "date_anchor" in time_keys else None
         if date_match:
             month = int(date_match.group(1))
             day = int(date_match.group(2))
             year = datetime.now().year
             point_in_time = datetime(year, month, day)
-            print(f"[MEMORY_FUNC] get_memories_at_point_sync({month}/{day})")
-            return user_memory_manager.get_memories_at_point_sync(
+            print(f"[MEMORY_FUNC] get_memories_at_point({month}/{day})")
+            return await user_memory_manager.get_memories_at_point(
                 player_id, npc_id, point_in_time, limit=5
             )
 
         # 8. "지지난주 X요일"
-        week_match_2 = re.search(r"지지난주\s*(월|화|수|목|금|토|일)요일", user_message)
+        week_match_2 = (
+            TWO_WEEKS_AGO_PATTERN.search(user_message)
+            if "two_weeks_ago_anchor" in time_keys
+            else None
+        )
         if week_match_2:
             weekday = WEEKDAY_MAP[week_match_2.group(1) + "요일"]
             point_in_time = get_last_weekday(weekday, weeks_ago=2)
             print(
-                f"[MEMORY_FUNC] get_memories_at_point_sync(지지난주 {week_match_2.group(1)}요일)"
+                f"[MEMORY_FUNC] get_memories_at_point(지지난주 {week_match_2.group(1)}요일)"
             )
-            return user_memory_manager.get_memories_at_point_sync(
+            return await user_memory_manager.get_memories_at_point(
                 player_id, npc_id, point_in_time, limit=5
             )
 
         # 9. "지난주 X요일"
-        week_match_1 = re.search(r"지난주\s*(월|화|수|목|금|토|일)요일", user_message)
+        week_match_1 = (
+            LAST_WEEK_PATTERN.search(user_message) if "last_week_anchor" in time_keys else None
+        )
         if week_match_1:
             weekday = WEEKDAY_MAP[week_match_1.group(1) + "요일"]
             point_in_time = get_last_weekday(weekday, weeks_ago=1)
             print(
-                f"[MEMORY_FUNC] get_memories_at_point_sync(지난주 {week_match_1.group(1)}요일)"
+                f"[MEMORY_FUNC] get_memories_at_point(지난주 {week_match_1.group(1)}요일)"
             )
-            return user_memory_manager.get_memories_at_point_sync(
+            return await user_memory_manager.get_memories_at_point(
                 player_id, npc_id, point_in_time, limit=5
             )
 
@@ -249,7 +297,7 @@ class MemoryRetriever:
 
         return None
 
-    def search_npc_npc_memories(
+    async def search_npc_npc_memories(
         self, user_message: str, player_id: int, current_npc_id: int
     ) -> List[Dict[str, Any]]:
         """다른 NPC와의 장기 기억 검색 (npc_npc_memories 테이블)
@@ -275,7 +323,7 @@ class MemoryRetriever:
             return []
 
         print(f"[NPC_NPC_MEMORY] search_memories: current={current_npc_id}, other={other_id}")
-        return npc_npc_memory_manager.search_memories(
+        return await npc_npc_memory_manager.search_memories(
             player_id=str(player_id),
             npc1_id=int(current_npc_id),
             npc2_id=int(other_id),
@@ -0,0 +1,181 @@
+"""
+MemoryWriteBatcher - 여러 턴을 모아서 한 번에 fact 추출하는 배처
+
+매 턴마다 user_memory_manager.save_conversation(=LLM 추출 1회)을 호출하는 대신
+(player, heroine) 별로 턴을 버퍼링했다가 다음 조건 중 하나가 되면
+save_conversation_batch로 한 번에 추출/저장합니다.
+
+Flush 조건:
+1. 버퍼에 쌓인 턴 수가 FACT_BATCH_TURN_THRESHOLD 이상
+2. 마지막 턴 이후 FACT_BATCH_IDLE_SECONDS 동안 새 턴 없음 (idle timeout)
+3. 세션 종료 (길드 퇴장, 서버 종료 등에서 flush 호출)
+4. 플레이어 이름 공개처럼 즉시 반영이 필요한 메시지
+
+이 클래스가 없을 경우 발생할 문제:
+- 대부분 []를 반환하는 추출 LLM 호출이 턴마다 발생
+- 추출 비용/레이트리밋이 대화량에 정비례
+"""
+
+import asyncio
+import os
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from db.user_memory_manager import user_memory_manager
+from utils.metrics import metrics
+from utils.rate_limiter import PRIORITY_BACKGROUND, request_priority
+
+
+# 배치 모드 활성화 여부
+FACT_BATCH_ENABLED = os.getenv("FACT_BATCH_ENABLED", "true").lower() == "true"
+# N턴 쌓이면 flush
+FACT_BATCH_TURN_THRESHOLD = int(os.getenv("FACT_BATCH_TURN_THRESHOLD", "4"))
+# 마지막 턴 이후 N초 동안 대화가 없으면 flush
+FACT_BATCH_IDLE_SECONDS = float(os.getenv("FACT_BATCH_IDLE_SECONDS", "90"))
+# 이 키워드가 유저 메시지에 있으면 즉시 flush (이름은 다음 턴부터 바로 써야 함)
+FACT_BATCH_FLUSH_KEYWORDS = ["이름", "불러"]
+
+BatchKey = Tuple[str, int, str]  # (player_id, npc_id, heroine_id)
+
+
+@dataclass
+class _PendingBatch:
+    """(player, heroine) 별 대기 중인 턴 버퍼"""
+
+    turns: List[Dict[str, str]] = field(default_factory=list)
+    idle_task: Optional[asyncio.Task] = None
+
+
+class MemoryWriteBatcher:
+    """턴 단위 fact 추출 배처
+
+    아키텍처 위치:
+    - NPCConversationManager.save_to_user_memory_background에서 턴 추가
+    - flush 시 user_memory_manager.save_conversation_batch 호출
+
+    사용 예시:
+        batcher = MemoryWriteBatcher()
+        await batcher.add_turn(player_id, npc_id, "letia", user_msg, npc_response)
+        await batcher.flush_player(player_id)  # 세션 종료 시
+    """
+
+    def __init__(
+        self,
+        turn_threshold: int = FACT_BATCH_TURN_THRESHOLD,
+        idle_seconds: float = FACT_BATCH_IDLE_SECONDS,
+    ):
+        """초기화
+
+        Args:
+            turn_threshold: flush할 턴 수
+            idle_seconds: idle timeout (초)
+        """
+        self.turn_threshold = turn_threshold
+        self.idle_seconds = idle_seconds
+        self._pending: Dict[BatchKey, _PendingBatch] = {}
+        self._lock = asyncio.Lock()
+        # 플레이어 이름 추출 시 호출할 콜백 (player_id, npc_id, name)
+        self.on_player_name: Optional[Callable[[str, int, str], None]] = None
+
+    async def add_turn(
+        self,
+        player_id: int,
+        npc_id: int,
+        heroine_id: str,
+        user_msg: str,
+        npc_response: str,
+    ) -> None:
+        """턴 추가 (조건 충족 시 flush)
+
+        Args:
+            player_id: 플레이어 ID
+            npc_id: NPC ID (세션 저장용)
+            heroine_id: 히로인 ID 문자열
+            user_msg: 유저 메시지
+            npc_response: NPC 응답
+        """
+        key: BatchKey = (str(player_id), npc_id, heroine_id)
+
+        flush_reason = None
+
+        async with self._lock:
+            batch = self._pending.setdefault(key, _PendingBatch())
+            batch.turns.append({"user": user_msg, "npc": npc_response})
+
+            if batch.idle_task:
+                batch.idle_task.cancel()
+                batch.idle_task = None
+
+            if len(batch.turns) >= self.turn_threshold:
+                flush_reason = "threshold"
+            elif any(keyword in user_msg for keyword in FACT_BATCH_FLUSH_KEYWORDS):
+                flush_reason = "keyword"
+            else:
+                batch.idle_task = asyncio.create_task(self._flush_when_idle(key))
+
+        metrics.inc("fact_batch_turns_buffered")
+
+        if flush_reason:
+            await self.flush(key, reason=flush_reason)
+
+    async def flush(self, key: BatchKey, reason: str = "manual") -> dict:
+        """특정 (player, npc, heroine) 버퍼 flush
+
+        Returns:
+            save_conversation_batch 결과 (버퍼가 비어 있으면 빈 dict)
+        """
+        async with self._lock:
+            batch = self._pending.pop(key, None)
+        if batch is None or not batch.turns:
+            return {}
+
+        if batch.idle_task and batch.idle_task is not asyncio.current_task():
+            batch.idle_task.cancel()
+
+        player_id, npc_id, heroine_id = key
+        metrics.inc("fact_batch_flushes", labels={"reason": reason})
+        metrics.observe("fact_batch_size", len(batch.turns))
+        print(
+            f"[MEMORY_BATCH] flush ({reason}): player={player_id}, "
+            f"heroine={heroine_id}, turns={len(batch.turns)}"
+        )
+
+        try:
+            with request_priority(PRIORITY_BACKGROUND):
+                result = await user_memory_manager.save_conversation_batch(
+                    player_id=player_id,
+                    heroine_id=heroine_id,
+                    turns=batch.turns,
+                )
+        except Exception as e:
+            print(f"[ERROR] 배치 fact 추출 실패: {e}")
+            return {}
+
+        extracted_name = result.get("extracted_player_name")
+        if extracted_name and self.on_player_name:
+            self.on_player_name(player_id, npc_id, extracted_name)
+
+        return result
+
+    async def flush_player(self, player_id: int) -> None:
+        """플레이어의 모든 히로인 버퍼 flush (세션 종료 시)"""
+        keys = [key for key in list(self._pending) if key[0] == str(player_id)]
+        for key in keys:
+            await self.flush(key, reason="session_end")
+
+    async def flush_all(self) -> None:
+        """모든 버퍼 flush (서버 종료 시)"""
+        for key in list(self._pending):
+            await self.flush(key, reason="shutdown")
+
+    async def _flush_when_idle(self, key: BatchKey) -> None:
+        """idle timeout 후 flush"""
+        try:
+            await asyncio.sleep(self.idle_seconds)
+        except asyncio.CancelledError:
+            return
+        await self.flush(key, reason="idle")
+
+
+# 싱글톤 인스턴스
+memory_write_batcher = MemoryWriteBatcher()
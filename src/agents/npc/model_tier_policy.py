@@ -0,0 +1,251 @@
+"""
+ModelTierPolicy - 부하 적응형 NPC 생성 모델 티어 선택
+
+모든 히로인 턴이 부하나 턴 종류와 관계없이 같은 생성 모델을 사용하면
+피크 시간대에 요청이 큐에 쌓여 지연 SLO를 넘기게 됩니다.
+이 정책은 호출마다 큐 깊이(진행 중 생성 수), 최근 primary 생성 지연, 턴 의도를 보고
+primary / economy 티어 중 하나를 고릅니다.
+
+주요 기능:
+1. 보호 의도(memory_recall 등)와 기억 해금 턴은 항상 primary
+2. general 턴은 큐 깊이 또는 최근 p95 지연이 임계값을 넘으면 economy
+   - 지연 신호는 시간 창(NPC_TIER_LATENCY_WINDOW_SECONDS) 안의 primary 샘플만 사용 (오래된 샘플 만료)
+   - 히스테리시스: SLO 이상이면 economy 진입, SLO x NPC_TIER_RECOVERY_RATIO 미만이어야 복귀
+   - economy 유지 중에도 general 턴 일부(NPC_TIER_PROBE_EVERY번째마다)는 primary 탐침으로 보내
+     지연 신호가 계속 갱신되도록 함 (탐침이 없으면 economy에 머무는 동안 복귀 근거가 생기지 않음)
+3. primary 프로바이더 서킷이 열려 있으면 economy
+4. 결정 로그 + 메트릭 (사후 품질 감사용, Langfuse 메타데이터에도 포함)
+
+이 클래스가 없을 경우 발생할 문제:
+- 피크 시 가벼운 잡담까지 느린 primary 큐에서 대기
+- 어떤 턴이 어떤 모델로 생성되었는지 추적 불가
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional, Tuple
+
+from enums.LLM import LLM
+from utils.metrics import metrics, percentile
+from utils.resilience import resilience
+
+
+# 티어
+TIER_PRIMARY = "primary"
+TIER_ECONOMY = "economy"
+
+# economy 티어 모델 (더 싸고 빠른 모델)
+NPC_ECONOMY_MODEL = os.getenv("NPC_ECONOMY_MODEL", LLM.GPT4_1_MINI)
+# 진행 중 생성 수가 이 값 이상이면 general 턴을 economy로
+NPC_TIER_QUEUE_DEPTH_THRESHOLD = int(os.getenv("NPC_TIER_QUEUE_DEPTH_THRESHOLD", "8"))
+# primary 최근 p95 지연(초)이 이 값 이상이면 general 턴을 economy로
+NPC_TIER_LATENCY_SLO_SECONDS = float(os.getenv("NPC_TIER_LATENCY_SLO_SECONDS", "2.5"))
+# 지연 신호 시간 창(초) - 이보다 오래된 primary 샘플은 만료
+NPC_TIER_LATENCY_WINDOW_SECONDS = float(os.getenv("NPC_TIER_LATENCY_WINDOW_SECONDS", "120"))
+# economy 복귀 기준 (p95 < SLO x 비율이어야 primary로 복귀)
+NPC_TIER_RECOVERY_RATIO = float(os.getenv("NPC_TIER_RECOVERY_RATIO", "0.8"))
+# economy 유지 중 N번째 general 턴마다 primary 탐침
+NPC_TIER_PROBE_EVERY = int(os.getenv("NPC_TIER_PROBE_EVERY", "10"))
+# p95 계산에 필요한 시간 창 내 최소 샘플 수 (부족하면 신호 없음 -> primary)
+NPC_TIER_MIN_LATENCY_SAMPLES = 5
+# 시간 창 내 보관할 최대 샘플 수 (피크 트래픽 메모리 상한)
+NPC_TIER_MAX_LATENCY_SAMPLES = 1000
+# 전체 비활성화 스위치 (false면 항상 primary)
+NPC_TIER_ENABLED = os.getenv("NPC_TIER_ENABLED", "true").lower() == "true"
+
+# 부하와 관계없이 primary를 유지하는 의도 (기억/시나리오 정확도가 중요한 턴)
+PROTECTED_INTENTS = {"memory_recall", "scenario_inquiry", "heroine_recall"}
+
+LATENCY_METRIC = "npc_primary_generation_seconds"
+
+
+@dataclass
+class TierDecision:
+    """티어 결정 결과
+
+    Attributes:
+        tier: TIER_PRIMARY / TIER_ECONOMY
+        reason: 결정 사유 (protected_intent, queue_depth, latency, latency_probe, ...)
+        intent: 턴 의도
+        in_flight: 결정 시점 진행 중 생성 수
+        p95_latency: 결정 시점 primary p95 지연(초, 시간 창 내 샘플 부족 시 None)
+    """
+
+    tier: str
+    reason: str
+    intent: str
+    in_flight: int
+    p95_latency: Optional[float]
+
+    def as_metadata(self) -> dict:
+        """Langfuse 메타데이터용 dict"""
+        return {
+            "model_tier": self.tier,
+            "model_tier_reason": self.reason,
+            "in_flight": self.in_flight,
+            "p95_latency": self.p95_latency,
+        }
+
+
+class ModelTierPolicy:
+    """부하 적응형 모델 티어 정책
+
+    아키텍처 위치:
+    - HeroineAgent._generate_node에서 LLM 선택 직전에 decide 호출
+    - track으로 생성 호출을 감싸 진행 중 생성 수(큐 깊이) 집계 + primary 생성 지연 기록
+
+    사용 예시:
+        decision = model_tier_policy.decide("heroine", "xai", intent)
+        llm = self.llm if decision.tier == TIER_PRIMARY else self.economy_llm
+        with model_tier_policy.track("heroine", decision):
+            response = await llm.ainvoke(messages)
+    """
+
+    def __init__(
+        self,
+        queue_depth_threshold: int = NPC_TIER_QUEUE_DEPTH_THRESHOLD,
+        latency_slo: float = NPC_TIER_LATENCY_SLO_SECONDS,
+        enabled: bool = NPC_TIER_ENABLED,
+    ):
+        """초기화
+
+        Args:
+            queue_depth_threshold: economy 전환 진행 중 생성 수 임계값
+            latency_slo: economy 전환 p95 지연(초) 임계값
+            enabled: False면 항상 primary
+        """
+        self.queue_depth_threshold = queue_depth_threshold
+        self.latency_slo = latency_slo
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        # 에이전트별 primary 생성 지연 (기록 시각, 초)
+        self._latencies: Dict[str, Deque[Tuple[float, float]]] = {}
+        # 지연 때문에 economy를 유지 중인 에이전트 (히스테리시스 상태)
+        self._degraded: Dict[str, bool] = {}
+        # economy 유지 중 general 턴 수 (탐침 주기)
+        self._degraded_turns: Dict[str, int] = {}
+
+    def in_flight(self, agent_name: str) -> int:
+        """에이전트의 진행 중 생성 수"""
+        return int(metrics.get_gauge("npc_generation_in_flight", labels={"agent": agent_name}))
+
+    @contextmanager
+    def track(self, agent_name: str, decision: Optional[TierDecision] = None):
+        """생성 호출 구간의 진행 중 카운트 관리 + primary 성공 호출 지연 기록"""
+        labels = {"agent": agent_name}
+        metrics.add_gauge("npc_generation_in_flight", 1, labels=labels)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            metrics.add_gauge("npc_generation_in_flight", -1, labels=labels)
+        # 실패한 호출은 서킷 브레이커가 다루므로 지연 신호에는 성공만 반영
+        if decision is not None and decision.tier == TIER_PRIMARY:
+            self.record_latency(agent_name, time.monotonic() - start)
+
+    def record_latency(self, agent_name: str, seconds: float) -> None:
+        """primary 생성 지연 샘플 추가"""
+        metrics.observe(LATENCY_METRIC, seconds, labels={"agent": agent_name})
+        with self._lock:
+            window = self._latencies.setdefault(
+                agent_name, deque(maxlen=NPC_TIER_MAX_LATENCY_SAMPLES)
+            )
+            window.append((time.monotonic(), seconds))
+
+    def p95_latency(self, agent_name: str) -> Optional[float]:
+        """시간 창 내 primary p95 지연 (샘플 부족 시 None)"""
+        cutoff = time.monotonic() - NPC_TIER_LATENCY_WINDOW_SECONDS
+        with self._lock:
+            window = self._latencies.get(agent_name)
+            if not window:
+                return None
+            while window and window[0][0] < cutoff:
+                window.popleft()
+            samples = [seconds for _, seconds in window]
+        if len(samples) < NPC_TIER_MIN_LATENCY_SAMPLES:
+            return None
+        return percentile(samples, 95)
+
+    def _latency_degraded(self, agent_name: str, p95: Optional[float]) -> bool:
+        """히스테리시스 적용 지연 판정 (SLO 이상 진입, SLO x 복귀 비율 미만 복귀)"""
+        with self._lock:
+            degraded = self._degraded.get(agent_name, False)
+            if p95 is None:
+                # 시간 창 내 샘플이 없으면 근거 없음 -> primary로 복귀
+                degraded = False
+            elif degraded:
+                degraded = p95 >= self.latency_slo * NPC_TIER_RECOVERY_RATIO
+            else:
+                degraded = p95 >= self.latency_slo
+            self._degraded[agent_name] = degraded
+            if not degraded:
+                self._degraded_turns[agent_name] = 0
+            return degraded
+
+    def _is_probe_turn(self, agent_name: str) -> bool:
+        """economy 유지 중 primary 탐침 턴인지 (N번째 general 턴마다)"""
+        with self._lock:
+            turns = self._degraded_turns.get(agent_name, 0) + 1
+            self._degraded_turns[agent_name] = turns
+            return NPC_TIER_PROBE_EVERY > 0 and turns % NPC_TIER_PROBE_EVERY == 0
+
+    def decide(
+        self,
+        agent_name: str,
+        provider: str,
+        intent: str,
+        force_primary: bool = False,
+    ) -> TierDecision:
+        """이번 호출의 모델 티어 결정
+
+        Args:
+            agent_name: 에이전트 이름 (큐 깊이/지연 신호/메트릭 라벨)
+            provider: primary 프로바이더 (서킷 상태 확인)
+            intent: 턴 의도
+            force_primary: True면 무조건 primary (기억 해금 턴 등)
+
+        Returns:
+            TierDecision
+        """
+        in_flight = self.in_flight(agent_name)
+        p95 = self.p95_latency(agent_name)
+
+        if not self.enabled:
+            tier, reason = TIER_PRIMARY, "disabled"
+        elif not resilience.is_available(provider):
+            tier, reason = TIER_ECONOMY, "primary_unavailable"
+        elif force_primary:
+            tier, reason = TIER_PRIMARY, "forced"
+        elif intent in PROTECTED_INTENTS:
+            tier, reason = TIER_PRIMARY, "protected_intent"
+        elif in_flight >= self.queue_depth_threshold:
+            tier, reason = TIER_ECONOMY, "queue_depth"
+        elif self._latency_degraded(agent_name, p95):
+            if self._is_probe_turn(agent_name):
+                tier, reason = TIER_PRIMARY, "latency_probe"
+            else:
+                tier, reason = TIER_ECONOMY, "latency"
+        else:
+            tier, reason = TIER_PRIMARY, "normal"
+
+        decision = TierDecision(tier, reason, intent, in_flight, p95)
+
+        metrics.inc(
+            "npc_model_tier_decisions",
+            labels={"agent": agent_name, "tier": tier, "reason": reason},
+        )
+        p95_text = f"{p95:.2f}s" if p95 is not None else "n/a"
+        print(
+            f"[TIER] {agent_name} {tier} ({reason}) intent={intent}, "
+            f"in_flight={in_flight}, p95={p95_text}"
+        )
+        return decision
+
+
+# 싱글톤 인스턴스
+model_tier_policy = ModelTierPolicy()
@@ -4,7 +4,7 @@ NPCConversationManager - NPC 대화 관리 전문 클래스
 HeroineAgent와 SageAgent가 공통으로 사용하는 대화 관리 로직을 통합합니다.
 
 주요 기능:
-1. User Memory 백그라운드 저장 + 플레이어 이름 추출
+1. User Memory 백그라운드 저장 + 플레이어 이름 추출 (배치 모드: 여러 턴을 모아 1회 추출)
 2. 대화 요약 생성 및 저장
 3. 요약 생성 조건 판단 (20턴 또는 1시간 경과)
 
@@ -21,6 +21,7 @@ from db.redis_manager import redis_manager
 from db.user_memory_manager import user_memory_manager
 from db.session_checkpoint_manager import session_checkpoint_manager
 from db.user_memory_models import NPC_ID_TO_HEROINE
+from agents.npc.memory_write_batcher import memory_write_batcher, FACT_BATCH_ENABLED
 
 
 # 요약 생성 조건 상수
@@ -64,6 +65,8 @@ class NPCConversationManager:
 
         LLM으로 fact를 추출하여 저장하고,
         이름이 추출되면 Redis 세션에도 저장합니다.
+        배치 모드(FACT_BATCH_ENABLED)에서는 턴을 memory_write_batcher에 쌓고
+        flush 시점에 한 번에 추출하므로 None을 반환합니다.
 
         Args:
             player_id: 플레이어 ID
@@ -84,6 +87,17 @@ class NPCConversationManager:
             if heroine_id is None:
                 heroine_id = NPC_ID_TO_HEROINE.get(npc_id, "sage")
 
+            if FACT_BATCH_ENABLED:
+                memory_write_batcher.on_player_name = self._save_player_name_to_session
+                await memory_write_batcher.add_turn(
+                    player_id=player_id,
+                    npc_id=npc_id,
+                    heroine_id=heroine_id,
+                    user_msg=user_msg,
+                    npc_response=npc_response,
+                )
+                return None
+
             result = await user_memory_manager.save_conversation(
                 player_id=str(player_id),
                 heroine_id=heroine_id,
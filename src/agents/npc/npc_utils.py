@@ -9,6 +9,8 @@ import yaml
 from pathlib import Path
 from typing import Dict, Any
 
+from utils.metrics import metrics
+
 
 def parse_llm_json_response(content: str, default: Dict[str, Any] = None) -> Dict[str, Any]:
     """LLM 응답에서 JSON을 파싱합니다.
@@ -81,3 +83,35 @@ def load_persona_yaml(persona_file_name: str, default_persona_func=None) -> Dict
     except Exception as e:
         print(f"경고: 페르소나 로드 실패: {e}")
         return default_persona_func() if default_persona_func else {}
+
+
+def record_prompt_cache_usage(response: Any, agent_name: str) -> Dict[str, int]:
+    """LLM 응답의 usage_metadata에서 프롬프트 캐시 적중 토큰 수를 기록합니다.
+
+    프로바이더가 프리픽스 캐시를 지원하면 LangChain은
+    usage_metadata.input_token_details.cache_read에 캐시된 입력 토큰 수를 채워줍니다.
+    값이 없으면 0으로 기록합니다.
+
+    Args:
+        response: LLM 응답 (AIMessage)
+        agent_name: 메트릭 라벨용 에이전트 이름 (예: "heroine", "sage")
+
+    Returns:
+        {"input_tokens": int, "cached_tokens": int}
+    """
+    usage = getattr(response, "usage_metadata", None) or {}
+    input_tokens = usage.get("input_tokens", 0) or 0
+    details = usage.get("input_token_details", {}) or {}
+    cached_tokens = details.get("cache_read", 0) or 0
+
+    labels = {"agent": agent_name}
+    metrics.inc("llm_prompt_input_tokens", input_tokens, labels=labels)
+    metrics.inc("llm_prompt_cached_tokens", cached_tokens, labels=labels)
+    metrics.inc("llm_prompt_calls", 1, labels=labels)
+    if cached_tokens:
+        metrics.inc("llm_prompt_cache_hits", 1, labels=labels)
+
+    ratio = cached_tokens / input_tokens if input_tokens else 0.0
+    print(f"[CACHE] {agent_name} 입력 {input_tokens} 토큰 중 캐시 {cached_tokens} ({ratio:.0%})")
+
+    return {"input_tokens": input_tokens, "cached_tokens": cached_tokens}
@@ -26,13 +26,17 @@ import time
 from datetime import datetime
 from typing import Dict, Any
 
-from langchain.chat_models import init_chat_model
+from utils.client_registry import get_chat_model
 from langgraph.graph import START, END, StateGraph
 
 from agents.npc.npc_state import SageState
 from agents.npc.base_npc_agent import BaseNPCAgent, NO_DATA
 from agents.npc.emotion_mapper import sage_emotion_to_int
-from agents.npc.npc_utils import parse_llm_json_response, load_persona_yaml
+from agents.npc.npc_utils import (
+    parse_llm_json_response,
+    load_persona_yaml,
+    record_prompt_cache_usage,
+)
 
 # 리팩토링된 컴포넌트들
 from agents.npc.memory_retriever import MemoryRetriever
@@ -44,6 +48,7 @@ from agents.npc.sage_prompt_builder import SagePromptBuilder
 from db.redis_manager import redis_manager
 from enums.LLM import LLM
 from utils.langfuse_tracker import tracker
+from utils.hedged_llm import HedgedLLM
 
 
 # ============================================
@@ -105,8 +110,14 @@ class SageAgent(BaseNPCAgent):
     def __init__(self, model_name: str = LLM.GROK_4_1_FAST_NON_REASONING):
         """초기화"""
         super().__init__(model_name)
-        self.llm = init_chat_model(model=model_name, temperature=1, max_tokens=200)
-        self.intent_llm = init_chat_model(model=model_name, temperature=0, max_tokens=20)
+        self.llm = HedgedLLM(
+            get_chat_model(model_name, temperature=1, max_tokens=200),
+            name="sage_response",
+        )
+        self.intent_llm = HedgedLLM(
+            get_chat_model(model_name, temperature=0, max_tokens=20),
+            name="sage_intent",
+        )
 
         # 공통 컴포넌트
         self.memory_retriever = MemoryRetriever()
@@ -328,7 +339,7 @@ class SageAgent(BaseNPCAgent):
         npc_id = state["npc_id"]
         time_since_last_chat = self.get_time_since_last_chat(state["player_id"], npc_id)
 
-        prompt = self.prompt_builder.build(
+        messages = self.prompt_builder.build_messages(
             state=state,
             context=context,
             time_since_last_chat=time_since_last_chat,
@@ -336,7 +347,7 @@ class SageAgent(BaseNPCAgent):
             format_summary_list_func=self.format_summary_list,
         )
 
-        print(f"[PROMPT]\n{prompt}\n{'='*50}")
+        print(f"[PROMPT]\n{messages[-1].content}\n{'='*50}")
 
         config = tracker.get_langfuse_config(
             tags=["npc", "sage", "response"],
@@ -349,8 +360,9 @@ class SageAgent(BaseNPCAgent):
             }
         )
 
-        response = await self.llm.ainvoke(prompt, **config)
+        response = await self.llm.ainvoke(messages, **config)
         print(f"[TIMING] LLM 호출: {time.time() - t:.3f}s")
+        record_prompt_cache_usage(response, "sage")
 
         result = parse_llm_json_response(
             response.content,
@@ -7,15 +7,26 @@ SagePromptBuilder - 대현자 프롬프트 생성 전문 클래스
 1. 페르소나 포맷팅 (레벨별 태도)
 2. 정보 공개 규칙 적용
 3. 컨텍스트 통합 (기억, 시나리오, 대화 히스토리)
+4. 프롬프트 프리픽스 캐시 최적화 (정적 프리픽스 + 동적 서픽스 분리)
 
 이 클래스가 없을 경우 발생할 문제:
 - 프롬프트 수정 시 SageAgent 전체 수정 필요
 - 프롬프트 템플릿 테스트가 Agent에 종속됨
 """
 
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
+
+from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage
 
 from agents.npc.base_npc_agent import NO_DATA
+from agents.npc.context_assembler import (
+    ContextAssembler,
+    ContextSection,
+    PRIORITY_HIGH,
+    PRIORITY_MEDIUM,
+    PRIORITY_MINIMAL,
+    KEEP_TAIL,
+)
 from db.redis_manager import redis_manager
 
 
@@ -48,6 +59,12 @@ class SagePromptBuilder:
         self.persona_data = persona_data
         self.world_context = world_context
 
+        # 정적 프리픽스 캐시 (최초 build 시 생성)
+        self._static_prefix: Optional[str] = None
+
+        # 동적 컨텍스트 토큰 예산 조립기
+        self.context_assembler = ContextAssembler()
+
     def build(
         self,
         state: Dict[str, Any],
@@ -56,7 +73,7 @@ class SagePromptBuilder:
         format_conversation_history_func,
         format_summary_list_func,
     ) -> str:
-        """전체 프롬프트 생성
+        """전체 프롬프트 생성 (정적 프리픽스 + 동적 서픽스)
 
         Args:
             state: 현재 상태 (scenarioLevel 등)
@@ -68,22 +85,69 @@ class SagePromptBuilder:
         Returns:
             프롬프트 문자열
         """
-        scenario_level = state.get("scenarioLevel", 1)
-        info_rules = self._get_info_rules(scenario_level)
+        static_prefix, dynamic_suffix = self.build_parts(
+            state,
+            context,
+            time_since_last_chat,
+            format_conversation_history_func,
+            format_summary_list_func,
+        )
+        return f"{static_prefix}\n\n{dynamic_suffix}"
 
-        # 금지 정보와 회피 응답
-        forbidden_info = info_rules.get("forbidden", [])
-        evasion_response = info_rules.get("evasion", "아직 때가 아니야.")
+    def build_messages(
+        self,
+        state: Dict[str, Any],
+        context: Dict[str, Any],
+        time_since_last_chat: str,
+        format_conversation_history_func,
+        format_summary_list_func,
+    ) -> List[BaseMessage]:
+        """LLM 호출용 메시지 리스트 생성
 
-        # 플레이어 이름
-        player_known_name = self._get_player_known_name(
-            state["player_id"], state["npc_id"]
+        Returns:
+            [SystemMessage(정적 프리픽스), HumanMessage(동적 서픽스)]
+        """
+        static_prefix, dynamic_suffix = self.build_parts(
+            state,
+            context,
+            time_since_last_chat,
+            format_conversation_history_func,
+            format_summary_list_func,
         )
+        return [SystemMessage(content=static_prefix), HumanMessage(content=dynamic_suffix)]
 
-        # 출력 형식
-        output_format = self._get_output_format()
+    def build_parts(
+        self,
+        state: Dict[str, Any],
+        context: Dict[str, Any],
+        time_since_last_chat: str,
+        format_conversation_history_func,
+        format_summary_list_func,
+    ) -> Tuple[str, str]:
+        """(정적 프리픽스, 동적 서픽스) 튜플 생성"""
+        static_prefix = self.build_static_prefix()
+        dynamic_suffix = self.build_dynamic_suffix(
+            state,
+            context,
+            time_since_last_chat,
+            format_conversation_history_func,
+            format_summary_list_func,
+        )
+        return static_prefix, dynamic_suffix
 
-        prompt = f"""당신은 대현자 사트라(Satra)입니다.
+    def build_static_prefix(self) -> str:
+        """대현자 정적 프리픽스 (프로세스 내 1회 생성 후 재사용)
+
+        규칙, 세계관, 페르소나 기본 정보, 출력 형식만 포함합니다.
+        시나리오 레벨에 따라 바뀌는 태도/정보 공개 규칙은 동적 서픽스로 보냅니다.
+
+        Returns:
+            정적 프리픽스 문자열
+        """
+        if self._static_prefix is not None:
+            return self._static_prefix
+
+        self._static_prefix = f"""당신은 대현자 사트라(Satra)입니다.
 
 [핵심 목표]
 - 최근 대화는 '맥락 파악'에만 사용합니다.
@@ -119,16 +183,87 @@ B) 세계관/정보 질문: "던전이 뭐야?", "히로인들은 누구야?, "
 - text는 반드시 50자 이내로 답합니다.
 - [플레이어 정보]를 참고하여 플레이어를 호칭하세요. 이름을 알면 이름으로, 모르면 "멘토"로 부르세요.
 
-[플레이어 정보]
-- 이름: {player_known_name if player_known_name else '알 수 없음'}
-- 호칭: {player_known_name if player_known_name else '멘토'} (이름을 알면 이름으로, 모르면 "멘토"로 호칭)
-
 [세계관 컨텍스트 - 당신이 알고 있는 기본 정보]
 - 길드: {self.world_context.get('guild', '셀레파이스 길드')}
 - 멘토: {self.world_context.get('mentor', '기억을 되찾게 해줄 수 있는 특별한 존재')}
 - 내 역할: {self.world_context.get('my_role', '멘토에게 세계관 정보와 조언을 제공')}
 - 히로인들: {self.world_context.get('heroines', '레티아, 루파메스, 로코 - 암네시아로 기억을 잃은 히로인들')}
 
+[페르소나]
+{self._format_static_persona()}
+
+[페르소나 규칙]
+- [세계관 컨텍스트]는 당신이 현재 알고 있는 정보입니다.
+- [해금된 세계관 정보]는 시나리오 레벨에 따라 공개할 수 있는 정보입니다.
+- 해금되지 않은 정보는 절대 말하지 않습니다. 회피 응답을 사용하세요.
+- 기본적으로 하대하며 기품 있는 어조를 유지합니다.
+- 감정을 크게 드러내지 않고 항상 알 수 없는 미소를 띱니다.
+- 거짓말은 하지 않지만, 말하지 않을 수는 있습니다.
+
+{self._get_output_format()}"""
+
+        return self._static_prefix
+
+    def build_dynamic_suffix(
+        self,
+        state: Dict[str, Any],
+        context: Dict[str, Any],
+        time_since_last_chat: str,
+        format_conversation_history_func,
+        format_summary_list_func,
+    ) -> str:
+        """턴마다 바뀌는 동적 서픽스 생성
+
+        플레이어 정보, 경과 시간, 시나리오 레벨별 태도/정보 공개 규칙,
+        검색 컨텍스트, 최근 대화, 플레이어 메시지를 포함합니다.
+        """
+        scenario_level = state.get("scenarioLevel", 1)
+        info_rules = self._get_info_rules(scenario_level)
+
+        # 금지 정보와 회피 응답
+        forbidden_info = info_rules.get("forbidden", [])
+        evasion_response = info_rules.get("evasion", "아직 때가 아니야.")
+
+        # 플레이어 이름
+        player_known_name = self._get_player_known_name(
+            state["player_id"], state["npc_id"]
+        )
+
+        # 검색/대화 컨텍스트 토큰 예산 적용
+        assembled = self.context_assembler.assemble(
+            [
+                ContextSection(
+                    "retrieved_facts",
+                    context.get("retrieved_facts", NO_DATA),
+                    PRIORITY_HIGH,
+                ),
+                ContextSection(
+                    "unlocked_scenarios",
+                    context.get("unlocked_scenarios", NO_DATA),
+                    PRIORITY_MEDIUM,
+                ),
+                ContextSection(
+                    "recent_dialogue",
+                    format_conversation_history_func(
+                        state.get("conversation_buffer", [])
+                    ),
+                    PRIORITY_MEDIUM,
+                    KEEP_TAIL,
+                ),
+                ContextSection(
+                    "summary",
+                    format_summary_list_func(state.get("summary_list", [])),
+                    PRIORITY_MINIMAL,
+                    KEEP_TAIL,
+                ),
+            ],
+            agent_name="sage",
+        )
+
+        return f"""[플레이어 정보]
+- 이름: {player_known_name if player_known_name else '알 수 없음'}
+- 호칭: {player_known_name if player_known_name else '멘토'} (이름을 알면 이름으로, 모르면 "멘토"로 호칭)
+
 [마지막 대화로부터 경과 시간]
 {time_since_last_chat}
 
@@ -136,46 +271,33 @@ B) 세계관/정보 질문: "던전이 뭐야?", "히로인들은 누구야?, "
 - 시나리오 레벨(ScenarioLevel): {scenario_level}
 - 태도: {self._get_attitude(scenario_level)}
 
-[페르소나]
-{self._format_persona(scenario_level)}
+{self._format_level_attitude(scenario_level)}
 
 [정보 공개 규칙]
 - 허용된 정보: {', '.join(info_rules.get('allowed', []))}
 - 금지된 정보: {', '.join(forbidden_info) if forbidden_info else '없음'}
 - 금지 정보 질문시 회피: "{evasion_response}"
 
-[페르소나 규칙]
-- [세계관 컨텍스트]는 당신이 현재 알고 있는 정보입니다.
-- [해금된 세계관 정보]는 시나리오 레벨에 따라 공개할 수 있는 정보입니다.
-- 해금되지 않은 정보는 절대 말하지 않습니다. 회피 응답을 사용하세요.
-- 기본적으로 하대하며 기품 있는 어조를 유지합니다.
-- 감정을 크게 드러내지 않고 항상 알 수 없는 미소를 띱니다.
-- 거짓말은 하지 않지만, 말하지 않을 수는 있습니다.
-
 [장기 기억 (검색 결과)]
-{context.get('retrieved_facts', '없음')}
+{assembled.get('retrieved_facts')}
 
 [해금된 세계관 정보]
-{context.get('unlocked_scenarios', '없음')}
+{assembled.get('unlocked_scenarios')}
 
 <recent_context_observations>
 - 목적: 최근 대화의 흐름(대화 주제) 파악용입니다.
 - 규칙: 아래 정보는 '참고용'이며 문장/구문을 그대로 인용하지 않습니다.
-- 최근 대화 요약: {format_summary_list_func(state.get('summary_list', []))}
+- 최근 대화 요약: {assembled.get('summary')}
 </recent_context_observations>
 
 <raw_recent_dialogue_do_not_quote>
 - 목적: 최근 대화의 흐름(대화 주제) 파악용입니다.
 - 규칙: 아래 정보는 '참고용'이며 문장/구문을 그대로 인용하지 않습니다.
-- 최근 대화 내용:{format_conversation_history_func(state.get('conversation_buffer', []))}
+- 최근 대화 내용:{assembled.get('recent_dialogue')}
 </raw_recent_dialogue_do_not_quote>
 
 [플레이어 메시지]
-{state['messages'][-1].content}
-
-{output_format}"""
-
-        return prompt
+{state['messages'][-1].content}"""
 
     def _get_attitude(self, scenario_level: int) -> str:
         """레벨에 따른 태도 설명"""
@@ -193,15 +315,11 @@ B) 세계관/정보 질문: "던전이 뭐야?", "히로인들은 누구야?, "
             return "mid"
         return "high"
 
-    def _format_persona(self, scenario_level: int) -> str:
-        """페르소나를 프롬프트용 문자열로 포맷"""
+    def _format_static_persona(self) -> str:
+        """페르소나 중 레벨과 무관한 부분 포맷 (정적 프리픽스용)"""
         persona = self.persona_data.get("satra", {})
-        attitude_key = self._get_attitude_key(scenario_level)
-
         basic = persona.get("basic_info", {})
         speech = persona.get("speech_style", {})
-        level_attitudes = persona.get("level_attitudes", {})
-        attitude_data = level_attitudes.get(attitude_key, {})
 
         lines = [
             f"이름: {persona.get('name', '사트라')}",
@@ -212,7 +330,24 @@ B) 세계관/정보 질문: "던전이 뭐야?", "히로인들은 누구야?, "
             f"- 기본: {speech.get('tone', '기품 있는 하대')}",
             f"- 호칭: {speech.get('mentor_address', '멘토')}",
             f"- 대화패턴: {','.join(speech.get('patterns', []))}",
-            "",
+        ]
+
+        # 성격 특성 (표면)
+        personality = persona.get("personality", {})
+        lines.append("")
+        lines.append("[성격]")
+        for trait in personality.get("surface", []):
+            lines.append(f"  - {trait}")
+
+        return "\n".join(lines)
+
+    def _format_level_attitude(self, scenario_level: int) -> str:
+        """시나리오 레벨별 태도 포맷 (동적 서픽스용)"""
+        persona = self.persona_data.get("satra", {})
+        attitude_key = self._get_attitude_key(scenario_level)
+        attitude_data = persona.get("level_attitudes", {}).get(attitude_key, {})
+
+        lines = [
             f"[현재 레벨 {scenario_level} 태도]",
             f"스타일: {attitude_data.get('description', '')}",
             "예시 대사:",
@@ -221,15 +356,14 @@ B) 세계관/정보 질문: "던전이 뭐야?", "히로인들은 누구야?, "
         for example in attitude_data.get("examples", []):
             lines.append(f"  - {example}")
 
-        # 성격 특성
-        personality = persona.get("personality", {})
-        lines.append("")
-        lines.append("[성격]")
-        for trait in personality.get("surface", []):
-            lines.append(f"  - {trait}")
+        # 높은 레벨에서만 드러나는 숨겨진 성격
         if attitude_key == "high":
-            for trait in personality.get("hidden", []):
-                lines.append(f"  - {trait}")
+            hidden = persona.get("personality", {}).get("hidden", [])
+            if hidden:
+                lines.append("")
+                lines.append("[드러나기 시작한 성격]")
+                for trait in hidden:
+                    lines.append(f"  - {trait}")
 
         return "\n".join(lines)
 
@@ -52,7 +52,7 @@ class SageScenarioRetriever:
         Returns:
             검색된 시나리오 텍스트 또는 "해금된 정보 없음"
         """
-        scenarios = sage_scenario_service.search_scenarios(
+        scenarios = await sage_scenario_service.search_scenarios(
             query=user_message,
             max_scenario_level=scenario_level,
             limit=limit
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from typing import List, Optional
 from services.fairy_service import (
     fairy_interaction,
@@ -14,6 +14,7 @@ from core.game_dto.ItemData import ItemData
 from core.game_dto.WeaponData import WeaponData
 import random
 from core.common import get_inventory_item, get_inventory_items, get_skills
+from utils.request_deadline import REQUEST_DEADLINE_FAIRY_DUNGEON_SECONDS, run_with_deadline
 
 
 router = APIRouter(prefix="/api/fairy", tags=["Fairy"])
@@ -141,8 +142,11 @@ def dungeon_player_dto_to_state(player_dto: DungeonPlayerDto) -> DungeonPlayerSt
 
 
 @router.post("/dungeon/talk", response_model=TalkResponse)
-async def talk_dungeon(request: TalkDungeonRequest):
-    """정령 - 던전 대화"""
+async def talk_dungeon(request: TalkDungeonRequest, http_request: Request):
+    """정령 - 던전 대화
+
+    클라이언트 연결이 끊기거나 데드라인이 지나면 파이프라인을 취소합니다.
+    """
     player_dto: DungeonPlayerDto = request.dungeonPlayer
     player = dungeon_player_dto_to_state(player_dto)
 
@@ -150,8 +154,11 @@ async def talk_dungeon(request: TalkDungeonRequest):
     target_monster_ids = request.targetMonsterIds
     next_room_ids = request.nextRoomIds
 
-    result_text = await fairy_dungeon_talk(
-        player, question, target_monster_ids, next_room_ids
+    result_text = await run_with_deadline(
+        http_request,
+        "fairy_dungeon_talk",
+        lambda: fairy_dungeon_talk(player, question, target_monster_ids, next_room_ids),
+        timeout=REQUEST_DEADLINE_FAIRY_DUNGEON_SECONDS,
     )
     return TalkResponse(responseText=result_text)
 
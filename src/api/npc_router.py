@@ -10,7 +10,7 @@ import base64
 import time
 from datetime import datetime
 from pathlib import Path
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Request
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from langchain_core.messages import HumanMessage
@@ -22,7 +22,10 @@ from agents.npc.sage_agent import sage_agent
 from agents.npc.heroine_heroine_agent import heroine_heroine_agent
 from agents.npc.base_npc_agent import MAX_CONVERSATION_BUFFER_SIZE
 from agents.npc.npc_constants import NPC_ID_TO_NAME_EN
+from agents.npc.memory_write_batcher import memory_write_batcher
 from tools.audio.tts_typecast import typecast_tts_service
+from utils.rate_limiter import PRIORITY_BACKGROUND, request_priority
+from utils.request_deadline import REQUEST_DEADLINE_HEROINE_CHAT_SECONDS, run_with_deadline
 
 # ============================================
 # TTS 음성 파일 로컬 저장 (디버그/피드백용)
@@ -43,7 +46,11 @@ def save_audio_file_background(
     """백그라운드에서 음성 파일을 로컬에 저장합니다.
 
     저장 경로: audio_logs/{날짜}/{endpoint_type}/{npc_name}/{timestamp}_{player_id}.wav
+    TTS 폴백(텍스트만 응답)으로 audio_bytes가 없으면 저장하지 않습니다.
     """
+    if not audio_bytes:
+        return
+
     try:
         # 날짜별 디렉토리 생성
         today = datetime.now().strftime("%Y-%m-%d")
@@ -214,30 +221,32 @@ async def background_npc_conversation_loop(player_id: str):
     """백그라운드에서 주기적으로 NPC간 대화 생성"""
     heroine_ids = [1, 2, 3]
 
-    while redis_manager.is_in_guild(player_id):
-        active_conv = redis_manager.get_active_npc_conversation(player_id)
-
-        if not active_conv:
-            pair = random.sample(heroine_ids, 2)
-            npc1_id = pair[0]
-            npc2_id = pair[1]
-
-            redis_manager.start_npc_conversation(player_id, npc1_id, npc2_id)
-
-            try:
-                await heroine_heroine_agent.generate_and_save_conversation(
-                    player_id=player_id,
-                    heroine1_id=npc1_id,
-                    heroine2_id=npc2_id,
-                    turn_count=10,
-                )
-            except Exception as e:
-                print(f"Background NPC conversation error: {e}")
-            finally:
-                if redis_manager.is_in_guild(player_id):
-                    redis_manager.stop_npc_conversation(player_id)
-
-        await asyncio.sleep(random.randint(30, 60))
+    # 이 태스크의 LLM/임베딩 호출은 유저 대화보다 낮은 우선순위로 레이트 리밋
+    with request_priority(PRIORITY_BACKGROUND):
+        while redis_manager.is_in_guild(player_id):
+            active_conv = redis_manager.get_active_npc_conversation(player_id)
+
+            if not active_conv:
+                pair = random.sample(heroine_ids, 2)
+                npc1_id = pair[0]
+                npc2_id = pair[1]
+
+                redis_manager.start_npc_conversation(player_id, npc1_id, npc2_id)
+
+                try:
+                    await heroine_heroine_agent.generate_and_save_conversation(
+                        player_id=player_id,
+                        heroine1_id=npc1_id,
+                        heroine2_id=npc2_id,
+                        turn_count=10,
+                    )
+                except Exception as e:
+                    print(f"Background NPC conversation error: {e}")
+                finally:
+                    if redis_manager.is_in_guild(player_id):
+                        redis_manager.stop_npc_conversation(player_id)
+
+            await asyncio.sleep(random.randint(30, 60))
 
     if player_id in _background_tasks:
         del _background_tasks[player_id]
@@ -340,8 +349,13 @@ async def login(request: LoginRequest):
 
 
 @router.post("/heroine/chat/sync", response_model=ChatResponse)
-async def heroine_chat_sync(request: ChatRequest, background_tasks: BackgroundTasks):
-    """히로인과 대화 (비스트리밍)"""
+async def heroine_chat_sync(
+    request: ChatRequest, background_tasks: BackgroundTasks, http_request: Request
+):
+    """히로인과 대화 (비스트리밍)
+
+    클라이언트 연결이 끊기거나 데드라인이 지나면 파이프라인을 취소합니다.
+    """
     api_start = time.time()
 
     player_id = request.playerId
@@ -378,9 +392,14 @@ async def heroine_chat_sync(request: ChatRequest, background_tasks: BackgroundTa
         "recent_used_keywords": session.get("recent_used_keywords", []),
     }
 
-    # 메시지 처리 (LangGraph 전체 파이프라인)
+    # 메시지 처리 (LangGraph 전체 파이프라인, 데드라인/연결 끊김 시 취소)
     t_process = time.time()
-    result = await heroine_agent.process_message(state)
+    result = await run_with_deadline(
+        http_request,
+        "heroine_chat_sync",
+        lambda: heroine_agent.process_message(state),
+        timeout=REQUEST_DEADLINE_HEROINE_CHAT_SECONDS,
+    )
     print(f"[TIMING] LangGraph 파이프라인 총합: {time.time() - t_process:.3f}s")
 
     response_text = result.get("response_text", "")
@@ -605,6 +624,9 @@ async def leave_guild(request: GuildRequest):
         _background_tasks[player_id].cancel()
         del _background_tasks[player_id]
 
+    # 세션 종료: 배치 대기 중인 턴의 fact 추출
+    asyncio.create_task(memory_write_batcher.flush_player(player_id))
+
     return GuildResponse(
         success=True,
         message="길드에서 퇴장했습니다. NPC 대화가 중단됩니다.",
@@ -717,13 +739,14 @@ async def heroine_chat_sync_voice(
     # TTS 생성
     t_tts = time.time()
     print(f"[DEBUG] TTS 입력 텍스트: {response_text}")
-    audio_bytes = await typecast_tts_service.text_to_speech(
+    audio_bytes = await typecast_tts_service.text_to_speech_or_none(
         text=response_text,
         npc_id=heroine_id,
         emotion=emotion,
         emotion_intensity=emotion_intensity,
     )
-    audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
+    # TTS 장애 시 빈 문자열 (텍스트만 응답)
+    audio_base64 = base64.b64encode(audio_bytes).decode("utf-8") if audio_bytes else ""
     print(f"[TIMING] TTS 생성: {time.time() - t_tts:.3f}s")
 
     # 데이터 저장 (백그라운드)
@@ -818,13 +841,14 @@ async def sage_chat_sync_voice(
 
     # TTS 생성
     t_tts = time.time()
-    audio_bytes = await typecast_tts_service.text_to_speech(
+    audio_bytes = await typecast_tts_service.text_to_speech_or_none(
         text=response_text,
         npc_id=npc_id,
         emotion=emotion,
         emotion_intensity=emotion_intensity,
     )
-    audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
+    # TTS 장애 시 빈 문자열 (텍스트만 응답)
+    audio_base64 = base64.b64encode(audio_bytes).decode("utf-8") if audio_bytes else ""
     print(f"[TIMING] TTS 생성: {time.time() - t_tts:.3f}s")
 
     # 데이터 저장 (백그라운드)
@@ -899,7 +923,7 @@ async def generate_heroine_conversation_voice(
             f"[TTS DEBUG] Turn {turn_idx}: speaker={speaker_name}({speaker_id}), text_length={len(text)}, text_preview={text[:50]}..."
         )
 
-        audio_bytes = await typecast_tts_service.text_to_speech(
+        audio_bytes = await typecast_tts_service.text_to_speech_or_none(
             text=text,
             npc_id=speaker_id,
             emotion=emotion,
@@ -907,9 +931,9 @@ async def generate_heroine_conversation_voice(
         )
 
         # 디버그: 생성된 오디오 크기 확인
-        print(f"[TTS DEBUG] Turn {turn_idx}: audio_bytes_size={len(audio_bytes)} bytes")
+        print(f"[TTS DEBUG] Turn {turn_idx}: audio_bytes_size={len(audio_bytes or b'')} bytes")
 
-        audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
+        audio_base64 = base64.b64encode(audio_bytes).decode("utf-8") if audio_bytes else ""
 
         conversation_with_voice.append(
             ConversationTurnWithVoice(
@@ -1,30 +1,18 @@
 import json
 from typing import List, Any, Dict, Optional,Sequence
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from db.config import CONNECTION_URL
+from db.engine_registry import engine_registry
+from db.read_router import read_router
 from enums.EmbeddingModel import EmbeddingModel
 from db.rdb_entity.DungeonRow import DungeonRow
 
 # 이때 summary_info는 그냥 던전 밸런싱 요약내용을 text로.
 
 
-# 전역 엔진 인스턴스 (싱글톤 패턴)
-_engine = None
-
-
 def get_engine():
-    global _engine
-    if _engine is None:
-        _engine = create_engine(
-            CONNECTION_URL,
-            pool_pre_ping=True,  # 연결 유효성 사전 체크
-            pool_recycle=3600,  # 1시간마다 연결 재생성
-            pool_size=10,  # 최대 연결 수
-            max_overflow=0,  # 오버플로우 방지
-            pool_timeout=10,  # 연결 대기 시간 단축
-            echo=False,  # SQL 쿼리 로깅 비활성화
-        )
-    return _engine
+    """공유 엔진 (db.engine_registry - 프로세스 전역 풀)"""
+    return engine_registry.get_engine()
 
 
 class RDBRepository:
@@ -413,6 +401,7 @@ class RDBRepository:
         with self.engine.connect() as conn:
             conn.execute(text(sql), params)
             conn.commit()
+        read_router.mark_write(params["player_id"])
 
     def get_fairy_messages_for_memory(
         self,
@@ -444,6 +433,6 @@ class RDBRepository:
             "heroine_id": str(heroine_id),
         }
 
-        with self.engine.connect() as conn:
+        with read_router.engine_for_read(player_id).connect() as conn:
             rows = conn.execute(text(sql), params).fetchall()
             return [dict(r._mapping) for r in rows]
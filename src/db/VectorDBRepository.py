@@ -1,11 +1,11 @@
 import json
 from typing import List, Any, Dict
-from sqlalchemy import create_engine
 from langchain_postgres import PGVector
 from langchain_core.documents import Document
-from langchain_openai import OpenAIEmbeddings
+from utils.client_registry import get_embeddings
 from langchain_huggingface import HuggingFaceEmbeddings
 from db.config import CONNECTION_URL, DBCollectionName
+from db.engine_registry import get_engine
 from enums.EmbeddingModel import EmbeddingModel
 
 
@@ -21,8 +21,8 @@ class VectorDBRepository:
         self.collection_name = collection_name
         self.db_url = CONNECTION_URL
 
-        # 일반 DB 작업용 엔진 생성
-        self.engine = create_engine(self.db_url, pool_pre_ping=True)
+        # 일반 DB 작업용 엔진 (프로세스 공유 풀)
+        self.engine = get_engine()
 
         # RAG용 벡터 저장소 (모델이 지정된 경우에만 생성)
         self.store = None
@@ -30,7 +30,7 @@ class VectorDBRepository:
             self.store = PGVector(
                 embeddings=self._resolve_embedding(embedding_model),
                 collection_name=collection_name,
-                connection=self.db_url,
+                connection=self.engine,
                 use_jsonb=True,
             )
 
@@ -42,7 +42,7 @@ class VectorDBRepository:
             EmbeddingModel.TEXT_EMBEDDING_3_SMALL,
         }:
             # OpenAI API Key가 환경변수에 있어야 함
-            return OpenAIEmbeddings(model=model.value)
+            return get_embeddings(model.value)
 
         if model in {
             EmbeddingModel.BGE_M3,
@@ -70,7 +70,7 @@ class VectorDBRepository:
             EmbeddingModel.TEXT_EMBEDDING_3_MEDIUM,
             EmbeddingModel.TEXT_EMBEDDING_3_SMALL,
         }:
-            return OpenAIEmbeddings(model=model.value)
+            return get_embeddings(model.value)
 
         # HuggingFace 계열
         if model in {
@@ -18,15 +18,17 @@ Score = (w_recency * Recency) + (w_importance * Importance) + (w_relevance * Rel
 import json
 import uuid
 from datetime import datetime
-from typing import List, Optional, Literal
+from typing import Dict, List, Optional, Literal
 from dataclasses import dataclass
-from sqlalchemy import create_engine, text
-from langchain_openai import OpenAIEmbeddings
+from sqlalchemy import text
+from utils.client_registry import get_embeddings
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from db.config import CONNECTION_URL
+from db.batch_write import chunk_rows, embed_in_batches, values_list
+from db.engine_registry import get_engine
+from db.vector_binding import to_vector
 
 
 # 메모리 타입 정의 (npc_memory: NPC간 기억, npc_conversation: NPC간 대화)
@@ -99,10 +101,10 @@ class AgentMemoryManager:
             embedding_model: OpenAI 임베딩 모델명
         """
         # DB 연결
-        self.engine = create_engine(CONNECTION_URL, pool_pre_ping=True)
+        self.engine = get_engine()
         
         # 임베딩 모델 (텍스트를 벡터로 변환)
-        self.embeddings = OpenAIEmbeddings(model=embedding_model)
+        self.embeddings = get_embeddings(embedding_model)
         
         # 검색시 사용할 기본 가중치
         self.default_weights = {
@@ -166,7 +168,7 @@ class AgentMemoryManager:
                 "agent_id": agent_id,
                 "memory_type": memory_type,
                 "content": content,
-                "embedding": str(embedding),
+                "embedding": to_vector(embedding),
                 "importance": importance,
                 "metadata": json.dumps(metadata, ensure_ascii=False)  # JSON 문자열로 변환
             })
@@ -350,7 +352,7 @@ class AgentMemoryManager:
         with self.engine.connect() as conn:
             result = conn.execute(sql, {
                 "agent_id": agent_id,
-                "query_embedding": str(query_embedding),
+                "query_embedding": to_vector(query_embedding),
                 "top_k": top_k,
                 "w_recency": w_recency,
                 "w_importance": w_importance,
@@ -440,7 +442,7 @@ class AgentMemoryManager:
         with self.engine.connect() as conn:
             result = conn.execute(sql, {
                 "npc_id": npc_id,
-                "query_embedding": str(query_embedding),
+                "query_embedding": to_vector(query_embedding),
                 "top_k": top_k,
                 "w_recency": w_recency,
                 "w_importance": w_importance,
@@ -507,7 +509,7 @@ class AgentMemoryManager:
         with self.engine.connect() as conn:
             result = conn.execute(sql, {
                 "npc_id": npc_id,
-                "query_embedding": str(query_embedding),
+                "query_embedding": to_vector(query_embedding),
                 "top_k": top_k
             })
             
@@ -694,20 +696,41 @@ class AgentMemoryManager:
         Returns:
             성공 여부
         """
+        return conversation_id in self.truncate_conversations({conversation_id: interrupted_turn})
+    
+    def truncate_conversations(self, interrupted_turns: Dict[str, int]) -> List[str]:
+        """여러 NPC-NPC 대화를 한 번에 자르기 (truncate_conversation의 묶음 버전)
+        
+        조회 1회 -> 잘린 content 묶음 임베딩 (embed_documents) -> 갱신 1회(한 트랜잭션)로 처리합니다.
+        임베딩은 DB 커넥션을 잡지 않은 상태에서 계산하고, 임베딩이 끝내 실패한 대화는 건드리지 않습니다.
+        
+        Args:
+            interrupted_turns: 대화 ID (agent_memories.id) -> 유저가 끊은 턴
+        
+        Returns:
+            처리된 대화 ID 목록 (잘린 대화가 비어 삭제된 대화 포함)
+        """
+        if not interrupted_turns:
+            return []
+        
         # 1. 대화 조회
         sql_select = text("""
             SELECT id, content, metadata
             FROM agent_memories
-            WHERE id = :id AND memory_type = 'npc_conversation'
+            WHERE id = ANY(CAST(:ids AS uuid[])) AND memory_type = 'npc_conversation'
         """)
         
+        # DB가 돌려주는 UUID 표기 -> 호출자가 넘긴 ID
+        requested_ids = {str(cid).lower(): cid for cid in interrupted_turns}
+        
         with self.engine.connect() as conn:
-            result = conn.execute(sql_select, {"id": conversation_id})
-            row = result.fetchone()
-            
-            if not row:
-                return False
-            
+            rows = conn.execute(sql_select, {"ids": list(interrupted_turns)}).fetchall()
+        
+        deleted_ids = []
+        updates = []
+        for row in rows:
+            conversation_id = requested_ids[str(row.id).lower()]
+            interrupted_turn = interrupted_turns[conversation_id]
             metadata = row.metadata or {}
             conversation = metadata.get("conversation", [])
             
@@ -716,8 +739,8 @@ class AgentMemoryManager:
             
             if not truncated_conversation:
                 # 대화가 없으면 삭제
-                self.delete_memory(conversation_id)
-                return True
+                deleted_ids.append(conversation_id)
+                continue
             
             # 3. content 재생성
             content_parts = []
@@ -725,35 +748,51 @@ class AgentMemoryManager:
                 speaker = msg.get("speaker_name", "")
                 text_content = msg.get("text", "")
                 content_parts.append(f"{speaker}: {text_content}")
-            new_content = "\n".join(content_parts)
             
             # 4. metadata 업데이트
             metadata["conversation"] = truncated_conversation
             metadata["turn_count"] = len(truncated_conversation)
             metadata["interrupted_at"] = interrupted_turn
             
-            # 5. 임베딩 재생성
-            new_embedding = self.embeddings.embed_query(new_content)
-            
-            # 6. DB 업데이트
-            sql_update = text("""
-                UPDATE agent_memories
-                SET content = :content,
-                    embedding = CAST(:embedding AS vector),
-                    metadata = CAST(:metadata AS jsonb),
-                    last_accessed_at = NOW()
-                WHERE id = :id
-            """)
-            
-            conn.execute(sql_update, {
+            updates.append({
                 "id": conversation_id,
-                "content": new_content,
-                "embedding": str(new_embedding),
+                "content": "\n".join(content_parts),
                 "metadata": json.dumps(metadata, ensure_ascii=False)
             })
+        
+        # 5. 임베딩 재생성 (묶음 호출, 실패한 대화는 갱신하지 않음)
+        vectors = embed_in_batches(self.embeddings, [u["content"] for u in updates])
+        updates = [
+            {**u, "embedding": to_vector(vector)}
+            for u, vector in zip(updates, vectors)
+            if vector is not None
+        ]
+        
+        # 6. DB 업데이트 (삭제 + 다중 행 UPDATE, 한 트랜잭션)
+        sql_delete = text("""
+            DELETE FROM agent_memories WHERE id = ANY(CAST(:ids AS uuid[]))
+        """)
+        
+        with self.engine.connect() as conn:
+            if deleted_ids:
+                conn.execute(sql_delete, {"ids": deleted_ids})
+            for chunk in chunk_rows(updates):
+                values, params = values_list(
+                    "(CAST(:id AS uuid), :content, CAST(:embedding AS vector), CAST(:metadata AS jsonb))",
+                    chunk,
+                )
+                conn.execute(text(f"""
+                    UPDATE agent_memories AS m
+                    SET content = v.content,
+                        embedding = v.embedding,
+                        metadata = v.metadata,
+                        last_accessed_at = NOW()
+                    FROM (VALUES {values}) AS v(id, content, embedding, metadata)
+                    WHERE m.id = v.id
+                """), params)
             conn.commit()
-            
-        return True
+        
+        return deleted_ids + [u["id"] for u in updates]
     
     def truncate_npc_memories_by_conversation(
         self,
@@ -0,0 +1,212 @@
+"""
+배치 쓰기 도우미 - 묶음 임베딩 + 다중 행 INSERT (부분 실패 재시도)
+
+NPC-NPC 기억 저장이 항목마다 embed_query 1회 + INSERT 1회를 실행해서,
+10턴 대화 하나를 저장하는 데 임베딩 요청과 DB 왕복이 20번 넘게 발생합니다.
+이 모듈은 임베딩 요청과 INSERT를 크기 제한 안에서 묶고, 일부만 실패하면 실패한 부분만 골라냅니다.
+
+주요 기능:
+1. embed_in_batches: 항목 수/추정 토큰 상한으로 나눈 embed_documents 호출
+   - 입력 오류(400/413/422, 토큰 한도 초과): 절반씩 나눠 실패 항목만 격리 (해당 항목은 None)
+   - 일시 장애(429, 5xx, 타임아웃 등): 백오프 후 재시도, 그래도 실패하면 예외를 그대로 올림
+   - 마감 초과/로컬 빠른 실패(RateLimitTimeout, CircuitOpenError): 재시도 없이 바로 올림
+2. insert_rows: 행 묶음을 INSERT ... VALUES (...), (...) 한 문장으로 실행 (묶음당 DB 왕복 1회)
+   - 실패 시 트랜잭션을 롤백하고 SAVEPOINT 단위로 절반씩 나눠 다시 저장, 실패 행만 건너뜀
+3. 메트릭: embedding_batch_requests_total, embedding_batch_retries_total,
+   embedding_batch_failed_items_total, db_batch_insert_failed_rows_total
+
+이 모듈이 없을 경우 발생할 문제:
+- 저장 항목 수만큼 임베딩 요청/DB 왕복이 늘어남
+- 항목 하나의 실패(토큰 초과, 제약 조건 위반)로 같은 대화의 나머지 기억까지 저장 실패
+
+주의:
+- 일시 장애를 입력 오류처럼 나눠 처리하면 레이트 리밋/장애 중에 기억이 조용히 None으로 빠지므로,
+  입력 오류로 판별된 경우에만 나눕니다 (utils.resilience.is_invalid_request)
+- insert_rows는 실패 시 conn.rollback()을 호출하므로 conn에 커밋 전 다른 작업이 없어야 합니다
+  (저장 전용 커넥션에서 insert_rows 후 commit)
+"""
+
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+
+from utils.metrics import metrics
+from utils.rate_limiter import estimate_tokens
+from utils.request_deadline import DeadlineExceededError
+from utils.resilience import FastFailError, backoff_delay, is_invalid_request
+
+
+# 임베딩 요청 1회당 최대 항목 수 (OpenAI 상한 2048)
+EMBED_BATCH_MAX_ITEMS = int(os.getenv("EMBED_BATCH_MAX_ITEMS", "256"))
+# 임베딩 요청 1회당 최대 추정 토큰 수 (OpenAI 요청당 상한 300k)
+EMBED_BATCH_MAX_TOKENS = int(os.getenv("EMBED_BATCH_MAX_TOKENS", "100000"))
+# 일시 장애 시 재시도 횟수 (이후에는 예외를 호출자에게 올림)
+EMBED_BATCH_RETRIES = int(os.getenv("EMBED_BATCH_RETRIES", "2"))
+# INSERT 문 1개당 최대 행 수 (바인드 파라미터 수 = 행 수 x 컬럼 수, 상한 65535)
+INSERT_BATCH_MAX_ROWS = int(os.getenv("INSERT_BATCH_MAX_ROWS", "500"))
+
+# text() 바인드 파라미터 (:name, ::cast 제외)
+_BIND_PARAM = re.compile(r"(?<![:\w]):(\w+)")
+
+
+# ============================================
+# 임베딩
+# ============================================
+
+
+def split_batches(texts: Sequence[str]) -> List[List[int]]:
+    """항목 수/추정 토큰 상한을 넘지 않도록 인덱스 묶음으로 나누기 (입력 순서 유지)"""
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for i, text_value in enumerate(texts):
+        tokens = estimate_tokens(text_value)
+        if current and (
+            len(current) >= EMBED_BATCH_MAX_ITEMS
+            or current_tokens + tokens > EMBED_BATCH_MAX_TOKENS
+        ):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _embed_batch(
+    embeddings,
+    texts: Sequence[str],
+    indices: List[int],
+    out: List[Optional[List[float]]],
+    retries: int,
+) -> None:
+    """indices 묶음 임베딩 (입력 오류만 나눠서 격리, 그 밖의 실패는 재시도 후 예외)"""
+    attempt = 0
+    while True:
+        metrics.inc("embedding_batch_requests_total")
+        try:
+            vectors = embeddings.embed_documents([texts[i] for i in indices])
+            for i, vector in zip(indices, vectors):
+                out[i] = vector
+            return
+        except (DeadlineExceededError, FastFailError):
+            raise
+        except Exception as e:
+            if is_invalid_request(e):
+                error = e
+                break
+            if attempt >= retries:
+                raise
+            metrics.inc("embedding_batch_retries_total")
+            time.sleep(backoff_delay(attempt))
+            attempt += 1
+
+    if len(indices) == 1:
+        metrics.inc("embedding_batch_failed_items_total")
+        print(f"[BATCH_WRITE] 임베딩 입력 오류 - 항목 건너뜀 (index={indices[0]}): {error}")
+        return
+
+    # 같은 입력은 재시도해도 실패하므로 절반씩 나눠 문제 항목만 격리
+    mid = len(indices) // 2
+    _embed_batch(embeddings, texts, indices[:mid], out, retries)
+    _embed_batch(embeddings, texts, indices[mid:], out, retries)
+
+
+def embed_in_batches(embeddings, texts: Sequence[str]) -> List[Optional[List[float]]]:
+    """크기 제한 안에서 묶은 embed_documents 호출
+
+    Args:
+        embeddings: LangChain Embeddings (get_embeddings 반환값)
+        texts: 임베딩할 텍스트 목록
+
+    Returns:
+        texts 순서대로 벡터 목록 (입력 오류로 임베딩할 수 없는 항목은 None)
+
+    Raises:
+        일시 장애가 재시도 후에도 계속되거나 데드라인/레이트 리밋 대기를 넘기면 원래 예외
+        (저장 전체를 실패시켜 호출자가 재시도/보고하도록 함)
+    """
+    vectors: List[Optional[List[float]]] = [None] * len(texts)
+    for indices in split_batches(texts):
+        _embed_batch(embeddings, texts, indices, vectors, retries=EMBED_BATCH_RETRIES)
+    return vectors
+
+
+# ============================================
+# 다중 행 INSERT
+# ============================================
+
+
+def values_list(values_sql: str, rows: List[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+    """한 행 VALUES 템플릿을 행마다 복제한 "(...), (...)" 문자열 + 파라미터 (:name -> :name_{행 번호})
+
+    INSERT ... VALUES 외에 UPDATE ... FROM (VALUES ...) 다중 행 갱신에도 사용합니다.
+    """
+    groups = []
+    params: Dict[str, Any] = {}
+    for i, row in enumerate(rows):
+        groups.append(_BIND_PARAM.sub(lambda m: f":{m.group(1)}_{i}", values_sql))
+        params.update({f"{key}_{i}": value for key, value in row.items()})
+    return ", ".join(groups), params
+
+
+def chunk_rows(rows: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """INSERT_BATCH_MAX_ROWS 단위로 나누기"""
+    return [rows[i : i + INSERT_BATCH_MAX_ROWS] for i in range(0, len(rows), INSERT_BATCH_MAX_ROWS)]
+
+
+def _execute_insert(conn, insert_sql: str, values_sql: str, rows: List[Dict[str, Any]]) -> None:
+    values, params = values_list(values_sql, rows)
+    conn.execute(text(f"{insert_sql} VALUES {values}"), params)
+
+
+def _insert_isolating(conn, insert_sql: str, values_sql: str, rows: List[Dict[str, Any]]) -> int:
+    """SAVEPOINT 안에서 저장, 실패하면 절반씩 나눠 실패 행만 건너뜀"""
+    try:
+        with conn.begin_nested():
+            _execute_insert(conn, insert_sql, values_sql, rows)
+        return len(rows)
+    except Exception as e:
+        if len(rows) == 1:
+            metrics.inc("db_batch_insert_failed_rows_total")
+            print(f"[BATCH_WRITE] 행 저장 실패 - 건너뜀: {e}")
+            return 0
+        mid = len(rows) // 2
+        return _insert_isolating(conn, insert_sql, values_sql, rows[:mid]) + _insert_isolating(
+            conn, insert_sql, values_sql, rows[mid:]
+        )
+
+
+def insert_rows(conn, insert_sql: str, values_sql: str, rows: List[Dict[str, Any]]) -> int:
+    """다중 행 INSERT (커밋은 호출자)
+
+    Args:
+        conn: 저장 전용 Connection (커밋 전 다른 작업 없음)
+        insert_sql: "INSERT INTO table (col1, col2)"
+        values_sql: 한 행의 VALUES 템플릿 "(:col1, CAST(:col2 AS vector))"
+        rows: 행별 파라미터 (템플릿의 바인드 이름과 같은 키)
+
+    Returns:
+        저장된 행 수
+
+    사용 예시:
+        with self.engine.connect() as conn:
+            inserted = insert_rows(conn, "INSERT INTO t (a, b)", "(:a, :b)", rows)
+            conn.commit()
+    """
+    if not rows:
+        return 0
+
+    try:
+        for chunk in chunk_rows(rows):
+            _execute_insert(conn, insert_sql, values_sql, chunk)
+        return len(rows)
+    except Exception as e:
+        print(f"[BATCH_WRITE] 다중 행 INSERT 실패 - 행 단위로 격리해 재시도: {e}")
+        conn.rollback()
+
+    return sum(_insert_isolating(conn, insert_sql, values_sql, chunk) for chunk in chunk_rows(rows))
@@ -9,6 +9,17 @@ load_dotenv()
 # postgresql:// 형식 사용 (SQLAlchemy, Mem0 모두 호환)
 CONNECTION_URL = os.getenv("DATABASE_URL")
 
+# 읽기 전용 복제본 주소 (쉼표 구분, 비어 있으면 모든 읽기가 primary)
+REPLICA_CONNECTION_URLS = [
+    url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+]
+
+# 기억 하이브리드 검색 1단계 벡터 (none: 원본 vector, halfvec / binary: 양자화 근사 점수 후 원본으로 재계산)
+# 스키마: migrations/memory_vector_quantization.sql, 비교: python src/scripts/bench_vector_quantization.py
+MEMORY_VECTOR_QUANTIZATION = os.getenv("MEMORY_VECTOR_QUANTIZATION", "none").lower()
+# 양자화 근사 점수 상위 몇 개를 원본 임베딩으로 재계산할지 (top-k보다 작으면 top-k)
+MEMORY_RESCORE_CANDIDATES = int(os.getenv("MEMORY_RESCORE_CANDIDATES", "50"))
+
 
 class DBCollectionName(StrEnum):
     # 몬스터 관련
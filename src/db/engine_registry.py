@@ -0,0 +1,170 @@
+"""
+프로세스 전역 DB 엔진 레지스트리
+
+UserMemoryManager, SessionCheckpointManager, NpcNpcMemoryManager, AgentMemoryManager,
+VectorDBRepository(인스턴스마다), 시나리오 서비스가 각자 create_engine을 호출해
+워커 하나가 독립된 커넥션 풀 여러 개를 가지고 있었습니다 (기본 풀 5 + 오버플로 10씩).
+이 모듈은 이름별 엔진을 하나씩만 만들고 풀 크기/pre-ping/recycle을 환경 변수로 통일합니다.
+
+주요 기능:
+1. get_engine(name): 이름별 공유 엔진 (기본 "default" = DATABASE_URL)
+2. 풀 설정 통일: DB_POOL_SIZE / DB_MAX_OVERFLOW / DB_POOL_TIMEOUT_SECONDS / DB_POOL_RECYCLE_SECONDS
+3. 풀 메트릭 (labels={"engine": name}):
+   - db_pool_checkout_wait_seconds: 커넥션을 얻기까지 대기 시간
+   - db_pool_timeouts_total: pool_timeout 초과 횟수
+   - db_pool_in_use / db_pool_overflow / db_pool_size: 사용 중 / 오버플로 / 설정 크기
+4. stats(): 엔진별 풀 상태 (/metrics 응답에 포함)
+
+이 모듈이 없을 경우 발생할 문제:
+- 워커당 Postgres 커넥션 수 = 엔진 수 x (pool_size + max_overflow) -> 통제 불가
+- CPU보다 Postgres 커넥션이 먼저 고갈
+- 풀 대기/고갈을 관측할 방법이 없음
+
+워커당 최대 커넥션 = DB_POOL_SIZE + DB_MAX_OVERFLOW (엔진 이름마다)
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from db.config import CONNECTION_URL
+from utils.metrics import metrics
+
+
+# 엔진당 상시 유지 커넥션 수
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+# 풀이 가득 찼을 때 추가로 열 수 있는 커넥션 수
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# 커넥션 대기 최대 시간(초) - 초과 시 TimeoutError
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "10"))
+# 커넥션 재생성 주기(초) - 서버/프록시 idle timeout보다 짧게
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+# 체크아웃 시 커넥션 유효성 사전 확인
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+DEFAULT_ENGINE = "default"
+
+
+class MeteredQueuePool(QueuePool):
+    """체크아웃 대기 시간 / 사용 중 / 오버플로 메트릭을 기록하는 QueuePool
+
+    엔진 이름은 pool_logging_name으로 전달 (dispose 후 재생성된 풀에도 유지됨)
+    """
+
+    def _labels(self) -> Dict[str, str]:
+        return {"engine": self.logging_name or DEFAULT_ENGINE}
+
+    def _update_gauges(self) -> None:
+        labels = self._labels()
+        metrics.set_gauge("db_pool_in_use", self.checkedout(), labels=labels)
+        metrics.set_gauge("db_pool_overflow", max(self.overflow(), 0), labels=labels)
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            metrics.inc("db_pool_timeouts_total", labels=self._labels())
+            raise
+        finally:
+            metrics.observe(
+                "db_pool_checkout_wait_seconds",
+                time.perf_counter() - start,
+                labels=self._labels(),
+            )
+        self._update_gauges()
+        return conn
+
+    def _do_return_conn(self, record) -> None:
+        super()._do_return_conn(record)
+        self._update_gauges()
+
+
+class EngineRegistry:
+    """이름별 공유 SQLAlchemy 엔진
+
+    아키텍처 위치:
+    - DB를 쓰는 모든 매니저/서비스/리포지토리가 create_engine 대신 get_engine() 사용
+    - RDBRepository.get_engine도 이 레지스트리에 위임
+
+    사용 예시:
+        from db.engine_registry import get_engine
+
+        engine = get_engine()
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    """
+
+    def __init__(self):
+        self._engines: Dict[str, Engine] = {}
+        self._lock = threading.Lock()
+
+    def get_engine(self, name: str = DEFAULT_ENGINE, url: Optional[str] = None) -> Engine:
+        """이름별 엔진 (처음 요청 시 생성)
+
+        Args:
+            name: 엔진 이름 (메트릭 라벨)
+            url: 접속 URL (None이면 DATABASE_URL, 처음 생성할 때만 사용)
+        """
+        engine = self._engines.get(name)
+        if engine is not None:
+            return engine
+        with self._lock:
+            engine = self._engines.get(name)
+            if engine is None:
+                engine = create_engine(
+                    url or CONNECTION_URL,
+                    poolclass=MeteredQueuePool,
+                    pool_size=DB_POOL_SIZE,
+                    max_overflow=DB_MAX_OVERFLOW,
+                    pool_timeout=DB_POOL_TIMEOUT_SECONDS,
+                    pool_recycle=DB_POOL_RECYCLE_SECONDS,
+                    pool_pre_ping=DB_POOL_PRE_PING,
+                    pool_logging_name=name,
+                )
+                metrics.set_gauge("db_pool_size", DB_POOL_SIZE, labels={"engine": name})
+                self._engines[name] = engine
+                print(
+                    f"[DB_POOL] 엔진 생성: {name} (pool_size={DB_POOL_SIZE}, "
+                    f"max_overflow={DB_MAX_OVERFLOW}, recycle={DB_POOL_RECYCLE_SECONDS}s)"
+                )
+        return engine
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """엔진별 풀 상태"""
+        result = {}
+        for name, engine in list(self._engines.items()):
+            pool = engine.pool
+            labels = {"engine": name}
+            result[name] = {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+                "timeouts": metrics.get_counter("db_pool_timeouts_total", labels=labels),
+                "checkout_wait_p99_ms": metrics.get_percentile(
+                    "db_pool_checkout_wait_seconds", 99, labels=labels
+                )
+                * 1000,
+            }
+        return result
+
+    def dispose_all(self) -> None:
+        """모든 엔진의 커넥션 정리 (서버 종료 시)"""
+        for engine in list(self._engines.values()):
+            engine.dispose()
+
+
+# 싱글톤 인스턴스
+engine_registry = EngineRegistry()
+
+
+def get_engine(name: str = DEFAULT_ENGINE) -> Engine:
+    """공유 엔진 (engine_registry.get_engine 단축)"""
+    return engine_registry.get_engine(name)
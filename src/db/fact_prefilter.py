@@ -0,0 +1,318 @@
+"""
+Fact 추출 프리필터 - LLM 호출 전 잡담 메시지 로컬 판별
+
+UserMemoryManager.extract_facts는 모든 유저 메시지를 긴 LLM 프롬프트로 보내지만,
+인사/추임새/"뭐해?" 같은 잡담은 대부분 []를 반환합니다.
+이 모듈은 한국어 1인칭/선호/신상 표지를 보는 규칙 + 가중치 선형 분류기로
+메시지가 장기 기억할 사실을 담고 있을 "가능성"이 있는지 먼저 판단합니다.
+
+주요 기능:
+1. 하드 규칙: 이름 공개는 무조건 통과, 인사/추임새만 있는 메시지는 무조건 스킵
+2. 경량 분류기: 표지 그룹별 가중치 합 >= 임계값이면 통과
+   - 경험/사건은 단어 목록 외에 활용형(과거형 ㅆ 받침, 진행형, 명사형 종결)으로도 판별
+3. 잡담 형태 판별: 점수가 낮아도 질문/청유·요청/짧은 감탄일 때만 스킵, 그 외는 통과
+4. 스킵률 메트릭 (fact_prefilter_checked / fact_prefilter_skipped / fact_prefilter_skip_rate)
+5. 라벨셋 기반 recall 평가 (scripts/eval_fact_prefilter.py, 목표 FACT_PREFILTER_RECALL_TARGET)
+   - 보류셋(data/fact_prefilter_heldout.json) recall이 목표를 넘어야 기본 활성화 유지
+
+이 모듈이 없을 경우 발생할 문제:
+- 결과가 []인 추출 LLM 호출이 대부분을 차지
+- 잡담 비중이 높은 시간대에 추출 비용이 그대로 증가
+
+설계 원칙:
+- 놓치는 사실(false negative)이 스킵 비용보다 훨씬 비싸므로 recall 우선
+- 애매하면 통과시킴 (LLM이 최종 판단)
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import List
+
+from utils.metrics import metrics
+
+
+# 프리필터 활성화 여부 (false면 모든 메시지를 LLM 추출로 보냄)
+FACT_PREFILTER_ENABLED = os.getenv("FACT_PREFILTER_ENABLED", "true").lower() == "true"
+# 통과 임계값 (점수가 이 값 이상이면 LLM 추출 수행)
+FACT_PREFILTER_THRESHOLD = 1.0
+# 라벨셋 기준 최소 recall (eval 스크립트에서 검증)
+FACT_PREFILTER_RECALL_TARGET = 0.98
+
+
+# ============================================
+# 표지 사전
+# ============================================
+
+# 1인칭 표지 (나/저/우리 계열)
+FIRST_PERSON_PATTERN = re.compile(
+    r"(^|\s)(나|난|내|내가|나도|나는|날|저|전|제|제가|저도|저는|우리|우린|우리집)(\s|$|[,.!?~])"
+)
+
+# 선호 표지 (어간 단위로 넓게: 좋아함 / 싫어함·안 맞음 / 비교·부정된 선호)
+PREFERENCE_MARKERS = [
+    # 좋아함
+    "좋아", "좋다", "좋더라", "좋던", "좋거든", "좋음", "제일 좋", "사랑해", "최애", "선호",
+    "즐겨", "즐기", "즐김", "취미", "취향", "관심", "빠졌", "빠져", "꽂혔", "꽂혀", "땡겨",
+    "땡기", "당겨", "당기", "재밌", "재미있", "재미 붙", "맛있", "최고", "맘에 들", "마음에 들",
+    "끌려", "끌리",
+    # 싫어함 / 안 맞음 / 못 함
+    "싫", "별로", "질색", "극혐", "맛없", "못 먹", "못먹", "안 먹", "못 참", "안 맞", "입에 안",
+    "못 하겠", "못하겠", "질려", "지겨", "알레르기", "알러지",
+    # 비교 / 부정된 선호 (빵보다 밥파야, 싫진 않아, 나쁘지 않더라)
+    "보다", "파야", "파임", "파라", "파거든", "나쁘지 않", "괜찮더라",
+]
+
+# 신상 표지 (이름, 직업, 가족, 거주 등)
+PERSONAL_MARKERS = [
+    "이름", "나이", "살이야", "살이에요", "직업", "회사", "학교", "학생", "대학", "전공",
+    "일해", "일하", "출신", "살아", "사는", "고향", "가족", "동생", "형이", "누나", "언니",
+    "오빠", "엄마", "아빠", "부모", "결혼", "애인", "여자친구", "남자친구", "여친", "남친",
+    "키우", "반려", "강아지", "고양이", "생일", "혈액형", "mbti", "MBTI", "알바", "군대",
+]
+
+# 경험/사건 표지 (과거형 행동)
+EVENT_MARKERS = [
+    "했어", "했다", "했지", "했거든", "갔어", "갔다", "다녀왔", "먹었", "봤어", "봤다",
+    "만났", "시작했", "그만뒀", "이사", "합격", "떨어졌", "졸업", "입학", "샀어", "잃어버",
+    "다쳤", "아팠", "헤어졌", "사귀", "배웠", "었었",
+]
+
+
+
+def _syllables_with_final(final_index: int) -> str:
+    """특정 받침(종성 인덱스)을 가진 한글 음절 전체 (정규식 문자 클래스용)"""
+    return "".join(
+        chr(code) for code in range(0xAC00, 0xD7A4) if (code - 0xAC00) % 28 == final_index
+    )
+
+
+# ㅆ 받침 음절 (과거형 어간: 마셨/걸렸/왔/났 ...), 미래/존재 표현(겠/있/없)은 제외
+_PAST_SYLLABLES = re.sub("[겠있없]", "", _syllables_with_final(20))
+# ㅁ 받침 음절 (명사형 종결: 야근함/다녀옴/먹음 ...)
+_NOMINAL_SYLLABLES = _syllables_with_final(16)
+
+# 경험/사건 어미 (단어 목록에 없는 동사도 활용형으로 판별)
+EVENT_PATTERNS = [
+    # 과거형 종결: 마셨어, 들어왔다, 망쳤지, 싸웠거든
+    re.compile(rf"[{_PAST_SYLLABLES}](어|다|음|지|거든|는데|네|고)?(\s|$|[,.!?~])"),
+    # 진행/예정: 마시는 중, 공부하고 있어, 퇴근하는 길
+    re.compile(r"(는|고)\s*(중|있어|있다|있음|있는|길)"),
+    # 명사형 종결 (메시지 끝 2음절 이상 단어): 오늘 야근함, 라면 먹음
+    re.compile(rf"[가-힣][{_NOMINAL_SYLLABLES}][.!~]*$"),
+]
+
+# 자기 일상 시점 표지 (어제/방금/다음 주 ... + 사건)
+TIME_MARKERS = [
+    "어제", "그제", "오늘", "방금", "아까", "요즘", "요새", "최근", "지난", "주말", "작년",
+    "내일", "모레", "다음 주", "다음주", "다음 달", "이번 주", "이따",
+]
+
+# 습관/성격 표지
+TRAIT_MARKERS = [
+    "항상", "매일", "자주", "맨날", "습관", "성격", "잘해", "못해", "잘 못", "무서워",
+    "겁이", "편이야", "편이에요", "스타일",
+]
+
+# 상대(히로인)에 대한 평가 표지
+OPINION_PATTERN = re.compile(
+    r"(^|\s)(너|넌|너는|네가|니가|당신)(\s|$).*(착|예쁘|예뻐|이쁘|이뻐|귀엽|귀여|멋있|멋지|멋져|좋은 사람|최고|대단|믿|고마|싫|미워)"
+)
+
+# 이름 공개 (무조건 통과)
+NAME_REVEAL_PATTERN = re.compile(
+    r"(내\s*이름|제\s*이름|이름은|라고\s*불러|라고\s*부르|라고\s*해|(나|난|저|전)\s*\S{1,6}(이야|야|입니다|이에요|예요)$)"
+)
+
+# 인사/추임새 (이것만으로 이루어진 메시지는 무조건 스킵)
+# 좋아/싫어 같은 선호 표현은 단답이어도 직전 질문에 대한 취향 답일 수 있어 넣지 않음
+FILLER_TOKENS = {
+    "안녕", "안녕하세요", "안뇽", "하이", "ㅎㅇ", "반가워", "반가워요", "반갑다",
+    "응", "웅", "어", "엉", "네", "넹", "예", "그래", "그래요", "알겠어", "알았어", "알겠습니다",
+    "그렇구나", "그렇군", "오케이", "ㅇㅋ", "ok", "okay", "음", "흠", "헐", "와", "우와",
+    "ㅋㅋ", "ㅋㅋㅋ", "ㅎㅎ", "ㅎㅎㅎ", "ㅠㅠ", "ㅜㅜ", "고마워", "고마워요", "땡큐",
+    "잘자", "잘 자", "바이", "빠이", "잘가", "또봐", "뭐해", "뭐 해",
+    "뭐하니", "뭐해요", "진짜", "정말", "대박", "아니", "아냐", "맞아",
+}
+
+# 상대에게 묻는 질문 (1인칭 표지 없으면 감점)
+QUESTION_ENDING_PATTERN = re.compile(r"(\?|니|냐|나요|까|어\?|지\?|래\?)\s*$")
+
+# 청유/요청 (가자, 쉬자, 해줘, 보여줄래 ...)
+REQUEST_ENDING_PATTERN = re.compile(
+    r"([하가먹보놀쉬자치걷타오]자|자요|줘|줘요|주세요|줄래|해봐|봐봐|잠깐만|기다려)[!~.]*$"
+)
+
+# 짧은 감탄/맞장구 (오 신기하다, 조용하네, 그랬구나)
+REACTION_ENDING_PATTERN = re.compile(r"(다|네|군|구나|네요|군요)[!~.ㅋㅎ]*$")
+REACTION_MAX_TOKENS = 3
+
+# 2인칭 표지 (감탄이 히로인 평가일 수 있어 잡담 판정에서 제외)
+SECOND_PERSON_PATTERN = re.compile(r"(^|\s)(너|넌|너는|네가|니가|너도|당신)(\s|$|[,.!?~])")
+
+# 분류기 가중치
+WEIGHTS = {
+    "first_person": 1.5,
+    "preference": 2.0,
+    "personal": 2.0,
+    "event": 1.0,
+    "time": 1.0,
+    "trait": 1.0,
+    "opinion": 1.5,
+    "long_message": 0.5,
+    "question_without_self": -1.5,
+}
+
+
+@dataclass
+class PrefilterDecision:
+    """프리필터 판단 결과
+
+    Attributes:
+        should_extract: True면 LLM 추출 수행
+        score: 분류기 점수
+        reasons: 판단 근거 (디버그/로그용)
+    """
+
+    should_extract: bool
+    score: float
+    reasons: List[str] = field(default_factory=list)
+
+
+def _normalize(message: str) -> str:
+    """공백/문장부호 정리"""
+    return re.sub(r"\s+", " ", (message or "").strip())
+
+
+def _strip_punctuation(message: str) -> str:
+    return re.sub(r"[\s!?.~,…]+", " ", message).strip()
+
+
+class FactPrefilter:
+    """잡담 메시지 로컬 판별기
+
+    아키텍처 위치:
+    - UserMemoryManager.save_conversation / save_conversation_batch /
+      detect_preference_change에서 extract_facts 호출 전 사용
+
+    사용 예시:
+        decision = fact_prefilter.check("나 고양이 좋아해")
+        if decision.should_extract:
+            facts = await user_memory_manager.extract_facts(...)
+    """
+
+    def __init__(self, threshold: float = FACT_PREFILTER_THRESHOLD):
+        """초기화
+
+        Args:
+            threshold: 통과 점수 임계값
+        """
+        self.threshold = threshold
+
+    def score(self, message: str) -> PrefilterDecision:
+        """메트릭 기록 없이 점수만 계산"""
+        text = _normalize(message)
+        if not text:
+            return PrefilterDecision(False, 0.0, ["empty"])
+
+        # 하드 규칙 1: 이름 공개는 무조건 통과
+        if NAME_REVEAL_PATTERN.search(text):
+            return PrefilterDecision(True, 99.0, ["name_reveal"])
+
+        # 하드 규칙 2: 인사/추임새만으로 구성된 메시지는 스킵
+        tokens = _strip_punctuation(text).split(" ")
+        if all(token.lower() in FILLER_TOKENS or not token for token in tokens):
+            return PrefilterDecision(False, -99.0, ["filler_only"])
+
+        reasons = []
+        score = 0.0
+
+        has_first_person = bool(FIRST_PERSON_PATTERN.search(text))
+        if has_first_person:
+            score += WEIGHTS["first_person"]
+            reasons.append("first_person")
+        if any(m in text for m in PREFERENCE_MARKERS):
+            score += WEIGHTS["preference"]
+            reasons.append("preference")
+        if any(m in text for m in PERSONAL_MARKERS):
+            score += WEIGHTS["personal"]
+            reasons.append("personal")
+        if any(m in text for m in EVENT_MARKERS) or any(
+            p.search(text) for p in EVENT_PATTERNS
+        ):
+            score += WEIGHTS["event"]
+            reasons.append("event")
+        if any(m in text for m in TIME_MARKERS):
+            score += WEIGHTS["time"]
+            reasons.append("time")
+        if any(m in text for m in TRAIT_MARKERS):
+            score += WEIGHTS["trait"]
+            reasons.append("trait")
+        if OPINION_PATTERN.search(text):
+            score += WEIGHTS["opinion"]
+            reasons.append("opinion")
+        if len(text) >= 15:
+            score += WEIGHTS["long_message"]
+            reasons.append("long_message")
+        if not has_first_person and QUESTION_ENDING_PATTERN.search(text):
+            score += WEIGHTS["question_without_self"]
+            reasons.append("question_without_self")
+
+        if score >= self.threshold:
+            return PrefilterDecision(True, score, reasons)
+
+        # 표지 점수가 낮아도 잡담 형태가 분명할 때만 스킵, 나머지는 통과
+        # (습관/능력/부정 서술은 표지 사전으로 다 덮을 수 없음: "매운 거 잘 먹어", "수영은 못 해")
+        chitchat = self._chitchat_form(text, tokens, has_first_person)
+        if chitchat:
+            return PrefilterDecision(False, score, reasons + [chitchat])
+        return PrefilterDecision(True, score, reasons + ["uncertain"])
+
+    @staticmethod
+    def _chitchat_form(text: str, tokens: List[str], has_first_person: bool) -> str:
+        """잡담 형태 판별 (질문/청유·요청/짧은 감탄), 해당 없으면 빈 문자열"""
+        if has_first_person:
+            return ""
+        if QUESTION_ENDING_PATTERN.search(text):
+            return "chitchat_question"
+        if REQUEST_ENDING_PATTERN.search(text):
+            return "chitchat_request"
+        if (
+            len(tokens) <= REACTION_MAX_TOKENS
+            and REACTION_ENDING_PATTERN.search(text)
+            and not SECOND_PERSON_PATTERN.search(text)
+        ):
+            return "chitchat_reaction"
+        return ""
+
+    def check(self, message: str, source: str = "save") -> PrefilterDecision:
+        """메시지 판별 + 스킵률 메트릭 기록
+
+        Args:
+            message: 유저 메시지
+            source: 호출 지점 라벨 ("save", "batch", "preference")
+
+        Returns:
+            PrefilterDecision (FACT_PREFILTER_ENABLED=false면 항상 통과)
+        """
+        if not FACT_PREFILTER_ENABLED:
+            return PrefilterDecision(True, 0.0, ["disabled"])
+
+        decision = self.score(message)
+
+        labels = {"source": source}
+        metrics.inc("fact_prefilter_checked", labels=labels)
+        if not decision.should_extract:
+            metrics.inc("fact_prefilter_skipped", labels=labels)
+
+        checked = metrics.get_counter("fact_prefilter_checked", labels=labels)
+        skipped = metrics.get_counter("fact_prefilter_skipped", labels=labels)
+        metrics.set_gauge(
+            "fact_prefilter_skip_rate", skipped / checked if checked else 0.0, labels=labels
+        )
+
+        return decision
+
+
+# 싱글톤 인스턴스
+fact_prefilter = FactPrefilter()
@@ -0,0 +1,510 @@
+"""
+User-NPC 기억 통합/압축 작업 (백그라운드 주기 실행)
+
+user_memories는 쌓이기만 합니다. 무효화된 기억, 거의 같은 내용의 중복 fact가
+모두 검색 경로에 남아 오래 플레이한 세션일수록 하이브리드 검색 작업 집합이 커집니다.
+이 모듈은 주기적으로 검색 경로를 정리하고, 빼낸 기억은 user_memories_history에 보관합니다.
+
+주요 기능:
+1. 오래된 무효화 기억 이관: invalid_at이 보존 기간보다 오래된 행 -> history ('invalidated')
+2. 중복 통합: 세션별 유효 기억을 임베딩 유사도로 묶어 대표 1개만 남김 ('merged')
+   - 대표: 가장 최근 기억 (나중 fact 우선, 같은 content_type끼리만 묶음)
+   - 대표의 중요도는 클러스터 최댓값으로 올림 (흡수된 기억의 중요도 보존)
+3. 세션 상한: 유효 기억이 상한을 넘으면 중요도 + 최신도 점수가 낮은 순으로 이관 ('capped')
+4. 작업 전/후 행 수, 테이블 크기, 샘플 세션의 하이브리드 검색 지연 기록 (utils.metrics)
+5. Redis 락으로 워커 여러 개 중 하나만 실행
+6. 이관된 기억도 시점 조회(get_memories_at_point)에 포함 (merged/capped는 archived_at까지 유효)
+
+이 모듈이 없을 경우 발생할 문제:
+- 무효화/중복 기억이 계속 검색 후보에 포함
+- 세션당 기억 수가 몇 달 치 대화만큼 늘어 검색/캐시 비용 증가
+
+Redis 키 구조:
+- memory_consolidation:lock - 실행 중 락 (워커 간 중복 실행 방지)
+- memory_consolidation:last_run - 워터마크 (이 시각 이후 새 기억이 생긴 세션만 통합/상한 검사)
+- memory_consolidation:pass - 진행 중인 패스 {"since", "until", "cursor"} (세션이 1회 상한보다 많을 때)
+
+대상 세션 페이징:
+- 패스 시작 시 DB 시각을 until로 고정하고 [since, until) 사이에 새 기억이 생긴 세션을
+  (player_id, heroine_id) 순 커서로 MEMORY_CONSOLIDATION_SESSIONS_PER_RUN개씩 처리
+- 마지막 페이지까지 끝난 뒤에만 워터마크를 until로 옮김 (상한에 걸린 세션을 건너뛰지 않음)
+
+주의:
+- 보존 기간 안의 무효화 기억은 시점 조회(get_memories_at_point)를 위해 user_memories에 남김
+- 실행 도중 실패하면 커서를 저장하지 않으므로 다음 실행이 같은 페이지부터 다시 처리
+"""
+
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+from db.read_router import read_router
+from db.redis_manager import redis_manager
+from db.user_memory_manager import user_memory_manager
+from services.scenario_index import parse_embedding
+from utils.metrics import metrics
+
+
+# 통합 작업 사용 여부
+MEMORY_CONSOLIDATION_ENABLED = os.getenv("MEMORY_CONSOLIDATION_ENABLED", "true").lower() == "true"
+# 실행 주기(초, 기본 6시간)
+MEMORY_CONSOLIDATION_INTERVAL_SECONDS = float(
+    os.getenv("MEMORY_CONSOLIDATION_INTERVAL_SECONDS", str(6 * 3600))
+)
+# 서버 시작 후 첫 실행까지 대기(초)
+MEMORY_CONSOLIDATION_INITIAL_DELAY_SECONDS = float(
+    os.getenv("MEMORY_CONSOLIDATION_INITIAL_DELAY_SECONDS", "300")
+)
+# 무효화 기억을 user_memories에 남겨두는 기간(일) - 이후 history로 이관
+MEMORY_HISTORY_RETENTION_DAYS = int(os.getenv("MEMORY_HISTORY_RETENTION_DAYS", "30"))
+# 이 유사도 이상이면 같은 기억으로 통합 (add_memories의 중복 임계값과 동일)
+MEMORY_MERGE_THRESHOLD = float(os.getenv("MEMORY_MERGE_THRESHOLD", "0.9"))
+# (player, heroine) 세션당 유효 기억 상한
+MEMORY_MAX_ACTIVE_PER_SESSION = int(os.getenv("MEMORY_MAX_ACTIVE_PER_SESSION", "300"))
+# 1회 실행에서 통합/상한 검사할 최대 세션 수
+MEMORY_CONSOLIDATION_SESSIONS_PER_RUN = int(
+    os.getenv("MEMORY_CONSOLIDATION_SESSIONS_PER_RUN", "500")
+)
+# 무효화 기억 이관 배치 크기
+MEMORY_ARCHIVE_BATCH_SIZE = 1000
+# 전/후 검색 지연을 잴 샘플 세션 수
+MEMORY_CONSOLIDATION_LATENCY_SAMPLES = 10
+
+LOCK_KEY = "memory_consolidation:lock"
+LAST_RUN_KEY = "memory_consolidation:last_run"
+PASS_KEY = "memory_consolidation:pass"
+# 락 만료(초) - 작업 도중 워커가 죽어도 다음 주기에는 다시 실행 가능
+LOCK_TTL_SECONDS = 3600
+
+# search_user_memories_hybrid의 p_decay_days 기본값과 동일
+RECENCY_DECAY_DAYS = 30.0
+
+_HISTORY_COLUMNS = (
+    "id, player_id, heroine_id, speaker, subject, content, keywords, content_type, "
+    "importance, valid_at, invalid_at, created_at, updated_at"
+)
+
+SessionKey = Tuple[str, str]
+
+
+class MemoryConsolidator:
+    """user_memories 통합/압축 작업
+
+    아키텍처 위치:
+    - main.py startup에서 start(), shutdown에서 stop()
+    - user_memory_manager.engine으로 DB 작업, 바뀐 세션은 hot_cache.invalidate
+
+    사용 예시:
+        await memory_consolidator.start()       # 주기 실행 시작
+        report = memory_consolidator.run_once()  # 수동 1회 실행 (동기)
+    """
+
+    def __init__(self):
+        self.engine = user_memory_manager.engine
+        self._task: Optional[asyncio.Task] = None
+
+    # ============================================
+    # 주기 실행
+    # ============================================
+
+    async def start(self) -> None:
+        """주기 실행 태스크 시작"""
+        if not MEMORY_CONSOLIDATION_ENABLED or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """주기 실행 태스크 중지 (진행 중인 DB 작업은 스레드에서 끝까지 실행됨)"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _loop(self) -> None:
+        await asyncio.sleep(MEMORY_CONSOLIDATION_INITIAL_DELAY_SECONDS)
+        while True:
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                metrics.inc("memory_consolidation_errors_total")
+                print(f"[MEMORY_CONSOLIDATION] 실행 실패: {e}")
+            await asyncio.sleep(MEMORY_CONSOLIDATION_INTERVAL_SECONDS)
+
+    # ============================================
+    # 락
+    # ============================================
+
+    def _acquire_lock(self) -> Optional[str]:
+        token = uuid.uuid4().hex
+        try:
+            if redis_manager.client.set(LOCK_KEY, token, nx=True, ex=LOCK_TTL_SECONDS):
+                return token
+        except Exception as e:
+            print(f"[MEMORY_CONSOLIDATION] 락 획득 실패, 이번 주기 건너뜀: {e}")
+        return None
+
+    def _release_lock(self, token: str) -> None:
+        try:
+            if redis_manager.client.get(LOCK_KEY) == token:
+                redis_manager.client.delete(LOCK_KEY)
+        except Exception:
+            pass
+
+    # ============================================
+    # 1회 실행
+    # ============================================
+
+    def run_once(self) -> Optional[Dict]:
+        """통합/압축 1회 실행
+
+        Returns:
+            실행 리포트 dict (다른 워커가 실행 중이면 None)
+        """
+        token = self._acquire_lock()
+        if token is None:
+            metrics.inc("memory_consolidation_skipped_total")
+            return None
+
+        start = time.perf_counter()
+        try:
+            state = self._load_pass()
+            sessions = self._changed_sessions(state["since"], state["until"], state["cursor"])
+            samples = sessions[:MEMORY_CONSOLIDATION_LATENCY_SAMPLES]
+
+            before = self._table_stats()
+            latency_before = self._sample_search_latency(samples, "before")
+
+            archived = self._archive_invalidated()
+            merged = capped = 0
+            for player_id, heroine_id in sessions:
+                session_merged, session_capped = self._consolidate_session(player_id, heroine_id)
+                merged += session_merged
+                capped += session_capped
+                if session_merged or session_capped:
+                    read_router.mark_write(player_id)
+                    user_memory_manager.hot_cache.invalidate(player_id, heroine_id)
+
+            after = self._table_stats()
+            latency_after = self._sample_search_latency(samples, "after")
+            self._save_pass(state, sessions)
+        finally:
+            self._release_lock(token)
+
+        duration = time.perf_counter() - start
+        report = {
+            "sessions": len(sessions),
+            "archived_invalidated": archived,
+            "merged": merged,
+            "capped": capped,
+            "rows_before": before,
+            "rows_after": after,
+            "search_p50_before_ms": latency_before,
+            "search_p50_after_ms": latency_after,
+            "duration_seconds": duration,
+        }
+
+        metrics.inc("memory_consolidation_runs_total")
+        metrics.inc("memory_consolidation_archived_total", archived, labels={"reason": "invalidated"})
+        metrics.inc("memory_consolidation_archived_total", merged, labels={"reason": "merged"})
+        metrics.inc("memory_consolidation_archived_total", capped, labels={"reason": "capped"})
+        for phase, stats in (("before", before), ("after", after)):
+            for state in ("total", "valid"):
+                metrics.set_gauge(
+                    "memory_consolidation_rows", stats[state], labels={"phase": phase, "state": state}
+                )
+            metrics.set_gauge(
+                "memory_consolidation_table_bytes", stats["bytes"], labels={"phase": phase}
+            )
+        metrics.observe("memory_consolidation_duration_seconds", duration)
+
+        def _ms(value):
+            return f"{value:.1f}ms" if value is not None else "-"
+
+        print(
+            f"[MEMORY_CONSOLIDATION] 세션 {len(sessions)}개, "
+            f"rows {before['total']:,} -> {after['total']:,} "
+            f"(valid {before['valid']:,} -> {after['valid']:,}), "
+            f"invalidated={archived} merged={merged} capped={capped}, "
+            f"search p50 {_ms(latency_before)} -> {_ms(latency_after)} ({duration:.1f}s)"
+        )
+        return report
+
+    # ============================================
+    # 대상 세션 / 통계
+    # ============================================
+
+    def _last_run(self) -> Optional[str]:
+        """워터마크 (ISO 문자열, 첫 실행이면 None)"""
+        try:
+            return redis_manager.client.get(LAST_RUN_KEY)
+        except Exception:
+            return None
+
+    def _db_now(self) -> str:
+        with self.engine.connect() as conn:
+            return conn.execute(text("SELECT NOW()")).scalar().isoformat()
+
+    def _load_pass(self) -> Dict:
+        """진행 중인 패스 (없으면 워터마크 ~ 지금으로 새 패스 시작)"""
+        try:
+            value = redis_manager.client.get(PASS_KEY)
+        except Exception:
+            value = None
+        if value:
+            return json.loads(value)
+        return {"since": self._last_run(), "until": self._db_now(), "cursor": None}
+
+    def _save_pass(self, state: Dict, sessions: List[SessionKey]) -> None:
+        """처리한 페이지 기록 - 마지막 페이지면 워터마크를 until로 옮기고 패스 종료"""
+        try:
+            if len(sessions) < MEMORY_CONSOLIDATION_SESSIONS_PER_RUN:
+                redis_manager.client.set(LAST_RUN_KEY, state["until"])
+                redis_manager.client.delete(PASS_KEY)
+            else:
+                cursor = list(sessions[-1])
+                redis_manager.client.set(PASS_KEY, json.dumps({**state, "cursor": cursor}))
+        except Exception as e:
+            print(f"[MEMORY_CONSOLIDATION] 진행 상태 저장 실패: {e}")
+
+    def _changed_sessions(
+        self, since: Optional[str], until: str, cursor: Optional[List[str]]
+    ) -> List[SessionKey]:
+        """[since, until) 사이 새 기억이 생긴 세션 (첫 실행이면 전체), 커서 이후 한 페이지"""
+        sql = text(
+            """
+            SELECT player_id, heroine_id
+            FROM user_memories
+            WHERE invalid_at IS NULL
+              AND (player_id, heroine_id) IN (
+                  SELECT DISTINCT player_id, heroine_id
+                  FROM user_memories
+                  WHERE (CAST(:since AS TIMESTAMPTZ) IS NULL
+                         OR created_at >= CAST(:since AS TIMESTAMPTZ))
+                    AND created_at < CAST(:until AS TIMESTAMPTZ)
+              )
+              AND (CAST(:after_player AS TEXT) IS NULL
+                   OR (player_id, heroine_id) > (CAST(:after_player AS TEXT), CAST(:after_heroine AS TEXT)))
+            GROUP BY player_id, heroine_id
+            HAVING COUNT(*) >= 2
+            ORDER BY player_id, heroine_id
+            LIMIT :limit
+        """
+        )
+        after_player, after_heroine = cursor or (None, None)
+        with self.engine.connect() as conn:
+            result = conn.execute(
+                sql,
+                {
+                    "since": since,
+                    "until": until,
+                    "after_player": after_player,
+                    "after_heroine": after_heroine,
+                    "limit": MEMORY_CONSOLIDATION_SESSIONS_PER_RUN,
+                },
+            )
+            return [(row.player_id, row.heroine_id) for row in result]
+
+    def _table_stats(self) -> Dict[str, int]:
+        sql = text(
+            """
+            SELECT COUNT(*) AS total,
+                   COUNT(*) FILTER (WHERE invalid_at IS NULL) AS valid,
+                   pg_total_relation_size('user_memories') AS bytes
+            FROM user_memories
+        """
+        )
+        with self.engine.connect() as conn:
+            row = conn.execute(sql).fetchone()
+        return {"total": row.total, "valid": row.valid, "bytes": row.bytes}
+
+    def _sample_search_latency(self, sessions: List[SessionKey], phase: str) -> Optional[float]:
+        """샘플 세션마다 최신 기억을 쿼리로 하이브리드 검색 1회 -> p50 (ms)"""
+        if not sessions:
+            return None
+        pick = text(
+            """
+            SELECT content, embedding::text AS embedding
+            FROM user_memories
+            WHERE player_id = :player_id AND heroine_id = :heroine_id AND invalid_at IS NULL
+            ORDER BY created_at DESC
+            LIMIT 1
+        """
+        )
+        search = text(
+            """
+            SELECT * FROM search_user_memories_hybrid(
+                :player_id, :heroine_id, :query_text, CAST(:embedding AS vector), 5
+            )
+        """
+        )
+        latencies = []
+        with self.engine.connect() as conn:
+            for player_id, heroine_id in sessions:
+                params = {"player_id": player_id, "heroine_id": heroine_id}
+                row = conn.execute(pick, params).fetchone()
+                if row is None or row.embedding is None:
+                    continue
+                t = time.perf_counter()
+                conn.execute(
+                    search, {**params, "query_text": row.content, "embedding": row.embedding}
+                ).fetchall()
+                elapsed = time.perf_counter() - t
+                latencies.append(elapsed)
+                metrics.observe(
+                    "memory_consolidation_search_seconds", elapsed, labels={"phase": phase}
+                )
+        if not latencies:
+            return None
+        return float(np.median(latencies)) * 1000
+
+    # ============================================
+    # 이관 작업
+    # ============================================
+
+    def _archive_invalidated(self) -> int:
+        """보존 기간이 지난 무효화 기억을 history로 이관 (배치 반복)"""
+        sql = text(
+            f"""
+            WITH doomed AS (
+                SELECT id FROM user_memories
+                WHERE invalid_at < NOW() - make_interval(days => :days)
+                LIMIT :batch
+            ),
+            moved AS (
+                DELETE FROM user_memories m
+                USING doomed d
+                WHERE m.id = d.id
+                RETURNING m.*
+            )
+            INSERT INTO user_memories_history ({_HISTORY_COLUMNS}, archive_reason)
+            SELECT {_HISTORY_COLUMNS}, 'invalidated' FROM moved
+            ON CONFLICT (id) DO NOTHING
+        """
+        )
+        total = 0
+        while True:
+            with self.engine.begin() as conn:
+                moved = conn.execute(
+                    sql,
+                    {"days": MEMORY_HISTORY_RETENTION_DAYS, "batch": MEMORY_ARCHIVE_BATCH_SIZE},
+                ).rowcount
+            total += moved
+            if moved < MEMORY_ARCHIVE_BATCH_SIZE:
+                return total
+
+    def _move_to_history(
+        self, conn, ids: List[str], reason: str, merged_into: Optional[str] = None
+    ) -> int:
+        sql = text(
+            f"""
+            WITH moved AS (
+                DELETE FROM user_memories
+                WHERE id = ANY(CAST(:ids AS UUID[]))
+                RETURNING *
+            )
+            INSERT INTO user_memories_history ({_HISTORY_COLUMNS}, archive_reason, merged_into)
+            SELECT {_HISTORY_COLUMNS}, :reason, CAST(:merged_into AS UUID) FROM moved
+            ON CONFLICT (id) DO NOTHING
+        """
+        )
+        return conn.execute(
+            sql, {"ids": ids, "reason": reason, "merged_into": merged_into}
+        ).rowcount
+
+    def _consolidate_session(self, player_id: str, heroine_id: str) -> Tuple[int, int]:
+        """세션 1개 중복 통합 + 상한 적용
+
+        Returns:
+            (통합으로 이관한 수, 상한으로 이관한 수)
+        """
+        sql = text(
+            """
+            SELECT id, content_type, importance, created_at, embedding
+            FROM user_memories
+            WHERE player_id = :player_id
+              AND heroine_id = :heroine_id
+              AND invalid_at IS NULL
+        """
+        )
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                sql, {"player_id": player_id, "heroine_id": heroine_id}
+            ).fetchall()
+        rows = [row for row in rows if row.embedding is not None]
+        if len(rows) < 2:
+            return 0, 0
+
+        ids = [str(row.id) for row in rows]
+        types = np.asarray([row.content_type or "" for row in rows])
+        importance = np.asarray([row.importance or 0 for row in rows], dtype=np.float32)
+        created_ts = np.asarray([row.created_at.timestamp() for row in rows], dtype=np.float64)
+        matrix = np.vstack([parse_embedding(row.embedding) for row in rows])
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1, norms)
+
+        # 1. 중복 통합: 최신순으로 대표를 정하고, 같은 타입의 유사 기억을 흡수
+        #    (add_memories와 같이 나중 fact 우선 - 바뀐 취향이 예전 기억에 덮이지 않음)
+        clusters: List[Tuple[int, np.ndarray]] = []
+        assigned = np.zeros(len(rows), dtype=bool)
+        for i in np.lexsort((-importance, -created_ts)):
+            if assigned[i]:
+                continue
+            assigned[i] = True
+            similar = (matrix @ matrix[i]) >= MEMORY_MERGE_THRESHOLD
+            members = np.flatnonzero(similar & ~assigned & (types == types[i]))
+            if len(members):
+                assigned[members] = True
+                clusters.append((i, members))
+                # 대표 중요도는 클러스터 최댓값 (상한 점수와 검색 점수에 반영)
+                importance[i] = max(importance[i], importance[members].max())
+
+        # 2. 상한: 남은 기억을 중요도 + 최신도 점수로 정렬해 하위를 이관
+        merged_away = np.zeros(len(rows), dtype=bool)
+        for _, members in clusters:
+            merged_away[members] = True
+        remaining = np.flatnonzero(~merged_away)
+        capped_idx = np.zeros(0, dtype=np.int64)
+        if len(remaining) > MEMORY_MAX_ACTIVE_PER_SESSION:
+            weights = user_memory_manager.default_weights
+            now_ts = time.time()
+            recency = np.exp(-(now_ts - created_ts[remaining]) / (RECENCY_DECAY_DAYS * 86400))
+            score = weights.recency * recency + weights.importance * importance[remaining] / 10.0
+            order = np.argsort(score, kind="stable")
+            capped_idx = remaining[order[: len(remaining) - MEMORY_MAX_ACTIVE_PER_SESSION]]
+
+        if not clusters and not len(capped_idx):
+            return 0, 0
+
+        raise_importance = text(
+            """
+            UPDATE user_memories
+            SET importance = :importance, updated_at = NOW()
+            WHERE id = CAST(:id AS UUID) AND importance < :importance
+        """
+        )
+        merged = capped = 0
+        with self.engine.begin() as conn:
+            for keeper, members in clusters:
+                merged += self._move_to_history(
+                    conn, [ids[j] for j in members], "merged", merged_into=ids[keeper]
+                )
+                conn.execute(
+                    raise_importance, {"id": ids[keeper], "importance": int(importance[keeper])}
+                )
+            if len(capped_idx):
+                capped = self._move_to_history(conn, [ids[j] for j in capped_idx], "capped")
+        return merged, capped
+
+
+# 싱글톤 인스턴스
+memory_consolidator = MemoryConsolidator()
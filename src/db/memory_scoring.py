@@ -0,0 +1,85 @@
+"""
+User-NPC 기억 4요소 하이브리드 점수 (numpy)
+
+search_user_memories_hybrid(SQL)와 같은 점수 공식을 numpy로 계산합니다.
+핫 캐시(user_memory_cache)의 로컬 검색과 오프라인 평가(scripts/eval_memory_retrieval.py)가
+같은 함수를 쓰므로, 평가 점수는 핫 캐시 검색 점수와 같습니다.
+keyword 요소만 PGroonga 점수의 bigram 근사라서 DB 검색 경로와는 keyword 점수가 다릅니다.
+
+주요 기능:
+1. recency_scores: 지수 감쇠 최신도 (decay_days에 (D, 1) 배열을 주면 감쇠 값별로 한 번에 계산)
+2. keyword_overlap_scores: 쿼리/기억 bigram 겹침 수를 최댓값으로 정규화 (PGroonga 점수 근사)
+3. relevance_scores: 정규화 임베딩 행렬과 쿼리의 코사인 유사도
+4. combine: SearchWeights 가중합
+
+이 모듈이 없을 경우 발생할 문제:
+- 캐시/평가가 각자 점수 공식을 복사해 조금씩 어긋남
+- 가중치 튜닝 결과를 서비스 점수와 같은 기준으로 검증할 수 없음
+
+Score = recency_w * Recency + importance_w * Importance
+      + relevance_w * Relevance + keyword_w * Keyword
+"""
+
+from typing import Iterable, List, Sequence, Union
+
+import numpy as np
+
+from utils.text_tokens import tokenize_bigrams
+
+
+# search_user_memories_hybrid의 p_decay_days 기본값과 동일 (SearchWeights.decay_days 기본값)
+RECENCY_DECAY_DAYS = 30.0
+
+
+def recency_scores(
+    created_ts: np.ndarray, now_ts: float, decay_days: Union[float, np.ndarray] = RECENCY_DECAY_DAYS
+) -> np.ndarray:
+    """지수 감쇠 최신도 exp(-경과초 / (decay_days * 86400))"""
+    return np.exp(-(now_ts - created_ts) / (np.asarray(decay_days, dtype=np.float64) * 86400))
+
+
+def importance_scores(importance: np.ndarray) -> np.ndarray:
+    """중요도 1~10 -> 0~1"""
+    return importance / 10.0
+
+
+def memory_tokens(content: str, keywords: Sequence[str]) -> frozenset:
+    """기억 키워드 점수용 토큰 (content + keywords, PGroonga 인덱스 컬럼과 동일)"""
+    return frozenset(tokenize_bigrams(" ".join([content, *(keywords or [])])))
+
+
+def keyword_overlap_scores(query_text: str, tokens: List[frozenset]) -> np.ndarray:
+    """쿼리 bigram과 겹치는 토큰 수를 세션 내 최댓값으로 정규화"""
+    query_tokens = set(tokenize_bigrams(query_text))
+    overlap = np.fromiter(
+        (len(query_tokens & memory) for memory in tokens),
+        dtype=np.float32,
+        count=len(tokens),
+    )
+    max_overlap = overlap.max() if len(overlap) else 0.0
+    return overlap / max_overlap if max_overlap > 0 else overlap
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """행 단위 L2 정규화 (0 벡터는 그대로)"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def relevance_scores(matrix: np.ndarray, query_embedding: Iterable[float]) -> np.ndarray:
+    """정규화된 임베딩 행렬과 쿼리의 코사인 유사도 (pgvector 1 - <=>)"""
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query_norm = np.linalg.norm(query)
+    if query_norm:
+        query = query / query_norm
+    return matrix @ query
+
+
+def combine(weights, recency, importance, relevance, keyword) -> np.ndarray:
+    """SearchWeights 가중합"""
+    return (
+        weights.recency * recency
+        + weights.importance * importance
+        + weights.relevance * relevance
+        + weights.keyword * keyword
+    )
@@ -0,0 +1,335 @@
+-- ============================================
+-- 기억 임베딩 양자화 마이그레이션 (user_memories, npc_npc_memories)
+--
+-- 문제: 기억 임베딩이 vector(1536) 원본(행당 약 6KB, TOAST 저장)뿐이라
+--       하이브리드 검색이 세션의 모든 유효 기억 임베딩을 TOAST에서 읽어 거리 계산
+--
+-- 해결:
+--   1. embedding_half halfvec(1536) (약 3KB), embedding_bit bit(1536) (192바이트, 행 안에 저장) 컬럼
+--   2. INSERT / embedding UPDATE 시 트리거로 자동 채움 (애플리케이션 INSERT 변경 없음)
+--   3. 양자화 하이브리드 검색 함수: 양자화 벡터로 근사 점수 -> 상위 p_rescore_candidates개만
+--      원본 embedding으로 relevance 재계산 후 top-k (나머지 점수 요소는 기존 함수와 동일)
+--   4. 벡터 HNSW 인덱스 제거
+--      하이브리드 검색은 최종 점수(최신도 + 중요도 + 관련도 + 키워드) 순이라
+--      `ORDER BY embedding <=> q LIMIT k` 형태가 아니어서 HNSW를 쓰지 않고,
+--      세션 필터(player_id, heroine_id) 뒤 수백 행을 모두 점수 계산합니다.
+--      양자화의 이득은 인덱스가 아니라 행 안의 작은 양자화 컬럼으로 근사 점수를 내는 데 있습니다.
+--
+-- 요구 사항: pgvector 0.7.0 이상 (halfvec, binary_quantize)
+--
+-- 적용 순서 (psql은 문장마다 autocommit이므로 백필 DO 블록의 배치 COMMIT이 동작):
+--   psql "$DATABASE_URL" -f src/db/migrations/memory_vector_quantization.sql
+--   -> 애플리케이션에서 MEMORY_VECTOR_QUANTIZATION=binary (또는 halfvec)
+--
+-- 효과 측정 (recall@k / 지연 / 크기):
+--   python src/scripts/bench_vector_quantization.py
+--
+-- 주의:
+--   - 백필 UPDATE도 update_updated_at 트리거를 타므로 updated_at이 백필 시각으로 바뀝니다
+--   - 백필 전에 저장된 행은 양자화 컬럼이 NULL이어도 검색 함수가 원본 거리로 대체 계산합니다
+-- ============================================
+
+-- 1. 양자화 컬럼 (NULL 허용, 기본값 없음 -> 테이블 재작성 없이 즉시 추가)
+ALTER TABLE user_memories
+    ADD COLUMN IF NOT EXISTS embedding_half halfvec(1536),
+    ADD COLUMN IF NOT EXISTS embedding_bit bit(1536);
+
+ALTER TABLE npc_npc_memories
+    ADD COLUMN IF NOT EXISTS embedding_half halfvec(1536),
+    ADD COLUMN IF NOT EXISTS embedding_bit bit(1536);
+
+-- 2. 동기화 트리거 (embedding이 바뀔 때만)
+CREATE OR REPLACE FUNCTION sync_quantized_embedding()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.embedding IS NULL THEN
+        NEW.embedding_half := NULL;
+        NEW.embedding_bit := NULL;
+    ELSE
+        NEW.embedding_half := NEW.embedding::halfvec(1536);
+        NEW.embedding_bit := binary_quantize(NEW.embedding)::bit(1536);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_user_memories_quantize ON user_memories;
+CREATE TRIGGER trigger_user_memories_quantize
+    BEFORE INSERT OR UPDATE OF embedding ON user_memories
+    FOR EACH ROW
+    EXECUTE FUNCTION sync_quantized_embedding();
+
+DROP TRIGGER IF EXISTS trigger_npc_npc_memories_quantize ON npc_npc_memories;
+CREATE TRIGGER trigger_npc_npc_memories_quantize
+    BEFORE INSERT OR UPDATE OF embedding ON npc_npc_memories
+    FOR EACH ROW
+    EXECUTE FUNCTION sync_quantized_embedding();
+
+-- 3. 기존 행 백필 (id 순서로 5000행씩, 배치마다 COMMIT해서 긴 잠금/거대 트랜잭션 방지)
+DO $$
+DECLARE
+    last_id UUID := '00000000-0000-0000-0000-000000000000';
+    batch_last UUID;
+BEGIN
+    LOOP
+        WITH batch AS (
+            SELECT id FROM user_memories WHERE id > last_id ORDER BY id LIMIT 5000
+        ), filled AS (
+            UPDATE user_memories m
+            SET embedding_half = m.embedding::halfvec(1536),
+                embedding_bit = binary_quantize(m.embedding)::bit(1536)
+            FROM batch b
+            WHERE m.id = b.id
+              AND m.embedding IS NOT NULL
+              AND m.embedding_bit IS NULL
+        )
+        SELECT id INTO batch_last FROM batch ORDER BY id DESC LIMIT 1;
+        EXIT WHEN batch_last IS NULL;
+        last_id := batch_last;
+        COMMIT;
+    END LOOP;
+END $$;
+
+DO $$
+DECLARE
+    last_id UUID := '00000000-0000-0000-0000-000000000000';
+    batch_last UUID;
+BEGIN
+    LOOP
+        WITH batch AS (
+            SELECT id FROM npc_npc_memories WHERE id > last_id ORDER BY id LIMIT 5000
+        ), filled AS (
+            UPDATE npc_npc_memories m
+            SET embedding_half = m.embedding::halfvec(1536),
+                embedding_bit = binary_quantize(m.embedding)::bit(1536)
+            FROM batch b
+            WHERE m.id = b.id
+              AND m.embedding IS NOT NULL
+              AND m.embedding_bit IS NULL
+        )
+        SELECT id INTO batch_last FROM batch ORDER BY id DESC LIMIT 1;
+        EXIT WHEN batch_last IS NULL;
+        last_id := batch_last;
+        COMMIT;
+    END LOOP;
+END $$;
+
+-- 4. 어떤 검색 함수도 사용하지 않는 벡터 HNSW 인덱스 제거 (쓰기마다 그래프 갱신 비용)
+--    이전 버전의 이 마이그레이션이 만든 halfvec HNSW 인덱스도 함께 제거
+DROP INDEX CONCURRENTLY IF EXISTS idx_user_memory_vector_valid;
+DROP INDEX CONCURRENTLY IF EXISTS idx_user_memory_vector_half_valid;
+DROP INDEX CONCURRENTLY IF EXISTS idx_npc_npc_memories_vector;
+DROP INDEX CONCURRENTLY IF EXISTS idx_npc_npc_memories_vector_half;
+
+-- 5. 양자화 하이브리드 검색 함수
+--    p_mode: 'binary' (embedding_bit 해밍 거리 -> cos(pi * h / 1536)로 코사인 근사)
+--            'halfvec' (embedding_half 코사인 거리)
+--    p_rescore_candidates: 근사 점수 상위 몇 개를 원본 embedding으로 재계산할지
+CREATE OR REPLACE FUNCTION search_user_memories_hybrid_quantized(
+    p_player_id TEXT,
+    p_heroine_id TEXT,
+    p_query_text TEXT,
+    p_query_embedding vector(1536),
+    p_top_k INTEGER DEFAULT 10,
+    p_w_recency FLOAT DEFAULT 0.15,
+    p_w_importance FLOAT DEFAULT 0.15,
+    p_w_relevance FLOAT DEFAULT 0.50,
+    p_w_keyword FLOAT DEFAULT 0.20,
+    p_decay_days FLOAT DEFAULT 30.0,
+    p_mode TEXT DEFAULT 'binary',
+    p_rescore_candidates INTEGER DEFAULT 50
+) RETURNS TABLE (
+    id UUID,
+    player_id TEXT,
+    heroine_id TEXT,
+    speaker TEXT,
+    subject TEXT,
+    content TEXT,
+    content_type TEXT,
+    importance INT,
+    created_at TIMESTAMPTZ,
+    recency_score FLOAT,
+    importance_score FLOAT,
+    relevance_score FLOAT,
+    keyword_score FLOAT,
+    final_score FLOAT
+)
+LANGUAGE plpgsql AS $$
+DECLARE
+    max_keyword_score FLOAT;
+    q_half halfvec(1536) := p_query_embedding::halfvec(1536);
+    q_bit bit(1536) := binary_quantize(p_query_embedding)::bit(1536);
+BEGIN
+    SELECT MAX(pgroonga_score(tableoid, ctid))
+    INTO max_keyword_score
+    FROM user_memories m
+    WHERE m.player_id = p_player_id
+      AND m.heroine_id = p_heroine_id
+      AND m.invalid_at IS NULL
+      AND (m.content &@~ p_query_text OR m.keywords &@ p_query_text);
+
+    IF max_keyword_score IS NULL OR max_keyword_score = 0 THEN
+        max_keyword_score := 1.0;
+    END IF;
+
+    RETURN QUERY
+    WITH approx AS (
+        -- 원본 embedding은 읽지 않음 (양자화 컬럼이 비어 있는 행만 원본으로 대체)
+        SELECT
+            m.id,
+            EXP(-EXTRACT(EPOCH FROM (NOW() - m.created_at)) / (p_decay_days * 86400)) AS recency,
+            m.importance::FLOAT / 10.0 AS importance_norm,
+            COALESCE(pgroonga_score(m.tableoid, m.ctid) / max_keyword_score, 0) AS keyword,
+            CASE
+                WHEN p_mode = 'halfvec' THEN
+                    COALESCE(1 - (m.embedding_half <=> q_half), 1 - (m.embedding <=> p_query_embedding))
+                ELSE
+                    COALESCE(COS(PI() * (m.embedding_bit <~> q_bit) / 1536.0), 1 - (m.embedding <=> p_query_embedding))
+            END AS approx_relevance
+        FROM user_memories m
+        WHERE m.player_id = p_player_id
+          AND m.heroine_id = p_heroine_id
+          AND m.invalid_at IS NULL
+    ), candidates AS (
+        SELECT a.*
+        FROM approx a
+        ORDER BY (p_w_recency * a.recency +
+                  p_w_importance * a.importance_norm +
+                  p_w_relevance * a.approx_relevance +
+                  p_w_keyword * a.keyword) DESC NULLS LAST
+        LIMIT GREATEST(p_rescore_candidates, p_top_k)
+    )
+    SELECT
+        m.id,
+        m.player_id,
+        m.heroine_id,
+        m.speaker,
+        m.subject,
+        m.content,
+        m.content_type,
+        m.importance,
+        m.created_at,
+        c.recency AS recency_score,
+        c.importance_norm AS importance_score,
+        1 - (m.embedding <=> p_query_embedding) AS relevance_score,
+        c.keyword AS keyword_score,
+        (p_w_recency * c.recency +
+         p_w_importance * c.importance_norm +
+         p_w_relevance * (1 - (m.embedding <=> p_query_embedding)) +
+         p_w_keyword * c.keyword) AS final_score
+    FROM candidates c
+    JOIN user_memories m ON m.id = c.id
+    ORDER BY final_score DESC
+    LIMIT p_top_k;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION search_npc_npc_memories_hybrid_quantized(
+    p_player_id TEXT,
+    p_heroine_id_1 INT,
+    p_heroine_id_2 INT,
+    p_query_text TEXT,
+    p_query_embedding VECTOR(1536),
+    p_top_k INTEGER DEFAULT 10,
+    p_w_recency FLOAT DEFAULT 0.15,
+    p_w_importance FLOAT DEFAULT 0.15,
+    p_w_relevance FLOAT DEFAULT 0.50,
+    p_w_keyword FLOAT DEFAULT 0.20,
+    p_decay_days FLOAT DEFAULT 30.0,
+    p_mode TEXT DEFAULT 'binary',
+    p_rescore_candidates INTEGER DEFAULT 50
+) RETURNS TABLE (
+    id UUID,
+    conversation_id UUID,
+    turn_index INT,
+    player_id TEXT,
+    heroine_id_1 INT,
+    heroine_id_2 INT,
+    speaker_id INT,
+    subject_id INT,
+    content TEXT,
+    content_type TEXT,
+    importance INT,
+    created_at TIMESTAMPTZ,
+    recency_score FLOAT,
+    importance_score FLOAT,
+    relevance_score FLOAT,
+    keyword_score FLOAT,
+    final_score FLOAT
+)
+LANGUAGE plpgsql AS $$
+DECLARE
+    max_keyword_score FLOAT;
+    q_half halfvec(1536) := p_query_embedding::halfvec(1536);
+    q_bit bit(1536) := binary_quantize(p_query_embedding)::bit(1536);
+BEGIN
+    SELECT MAX(pgroonga_score(tableoid, ctid))
+    INTO max_keyword_score
+    FROM npc_npc_memories m
+    WHERE m.player_id = p_player_id
+      AND m.heroine_id_1 = p_heroine_id_1
+      AND m.heroine_id_2 = p_heroine_id_2
+      AND m.invalid_at IS NULL
+      AND m.content &@~ p_query_text;
+
+    IF max_keyword_score IS NULL OR max_keyword_score = 0 THEN
+        max_keyword_score := 1.0;
+    END IF;
+
+    RETURN QUERY
+    WITH approx AS (
+        SELECT
+            m.id,
+            EXP(-EXTRACT(EPOCH FROM (NOW() - m.created_at)) / (p_decay_days * 86400)) AS recency,
+            m.importance::FLOAT / 10.0 AS importance_norm,
+            COALESCE(pgroonga_score(m.tableoid, m.ctid) / max_keyword_score, 0) AS keyword,
+            CASE
+                WHEN p_mode = 'halfvec' THEN
+                    COALESCE(1 - (m.embedding_half <=> q_half), 1 - (m.embedding <=> p_query_embedding))
+                ELSE
+                    COALESCE(COS(PI() * (m.embedding_bit <~> q_bit) / 1536.0), 1 - (m.embedding <=> p_query_embedding))
+            END AS approx_relevance
+        FROM npc_npc_memories m
+        WHERE m.player_id = p_player_id
+          AND m.heroine_id_1 = p_heroine_id_1
+          AND m.heroine_id_2 = p_heroine_id_2
+          AND m.invalid_at IS NULL
+    ), candidates AS (
+        SELECT a.*
+        FROM approx a
+        ORDER BY (p_w_recency * a.recency +
+                  p_w_importance * a.importance_norm +
+                  p_w_relevance * a.approx_relevance +
+                  p_w_keyword * a.keyword) DESC NULLS LAST
+        LIMIT GREATEST(p_rescore_candidates, p_top_k)
+    )
+    SELECT
+        m.id,
+        m.conversation_id,
+        m.turn_index,
+        m.player_id,
+        m.heroine_id_1,
+        m.heroine_id_2,
+        m.speaker_id,
+        m.subject_id,
+        m.content,
+        m.content_type,
+        m.importance,
+        m.created_at,
+        c.recency AS recency_score,
+        c.importance_norm AS importance_score,
+        1 - (m.embedding <=> p_query_embedding) AS relevance_score,
+        c.keyword AS keyword_score,
+        (p_w_recency * c.recency +
+         p_w_importance * c.importance_norm +
+         p_w_relevance * (1 - (m.embedding <=> p_query_embedding)) +
+         p_w_keyword * c.keyword) AS final_score
+    FROM candidates c
+    JOIN npc_npc_memories m ON m.id = c.id
+    ORDER BY final_score DESC
+    LIMIT p_top_k;
+END;
+$$;
+
+ANALYZE user_memories;
+ANALYZE npc_npc_memories;
@@ -0,0 +1,65 @@
+-- ============================================
+-- user_memories 날짜 버킷 조회 마이그레이션
+--
+-- 문제: "어제", "3일 전", "최근" 같은 시간 표현 조회가
+--       created_at 범위 스캔(NOW() 기준 24시간 창)으로 처리됨
+--       - 세션 인덱스로 행을 찾은 뒤 created_at을 필터링
+--       - "어제"가 달력 날짜가 아닌 24~48시간 전으로 해석됨
+--
+-- 해결:
+--   1. (player_id, heroine_id, 달력 날짜) 부분 인덱스 (유효한 기억만)
+--   2. 날짜 범위 조회 함수 get_memories_by_day_range
+--
+-- 날짜 경계 타임존은 Asia/Seoul (user_memory_models.MEMORY_DAY_TIMEZONE)
+--
+-- 사용법:
+--   psql "$DATABASE_URL" -f src/db/migrations/user_memory_day_index.sql
+-- ============================================
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_memory_valid_day ON user_memories (
+    player_id, heroine_id, ((created_at AT TIME ZONE 'Asia/Seoul')::date), created_at DESC
+)
+WHERE invalid_at IS NULL;
+
+CREATE OR REPLACE FUNCTION get_memories_by_day_range(
+    p_player_id TEXT,
+    p_heroine_id TEXT,
+    p_from_day DATE,
+    p_to_day DATE,
+    p_limit INTEGER DEFAULT 50
+) RETURNS TABLE (
+    id UUID,
+    player_id TEXT,
+    heroine_id TEXT,
+    speaker TEXT,
+    subject TEXT,
+    content TEXT,
+    content_type TEXT,
+    importance INT,
+    valid_at TIMESTAMPTZ,
+    invalid_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ
+)
+LANGUAGE SQL STABLE AS $$
+    SELECT 
+        m.id,
+        m.player_id,
+        m.heroine_id,
+        m.speaker,
+        m.subject,
+        m.content,
+        m.content_type,
+        m.importance,
+        m.valid_at,
+        m.invalid_at,
+        m.created_at
+    FROM user_memories m
+    WHERE m.player_id = p_player_id
+      AND m.heroine_id = p_heroine_id
+      AND (m.created_at AT TIME ZONE 'Asia/Seoul')::date BETWEEN p_from_day AND p_to_day
+      AND m.invalid_at IS NULL
+    ORDER BY m.created_at DESC
+    LIMIT p_limit;
+$$;
+
+ANALYZE user_memories;
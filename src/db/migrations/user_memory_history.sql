@@ -0,0 +1,101 @@
+-- ============================================
+-- user_memories 이력 테이블 마이그레이션
+--
+-- 문제: user_memories가 계속 커지기만 함
+--       - 무효화된 기억, 거의 같은 중복 fact가 모두 검색 경로에 남음
+--       - 오래 플레이한 세션일수록 하이브리드 검색 작업 집합이 커짐
+--
+-- 해결: 통합/압축 작업(db/memory_consolidator.py)이 검색 경로에서 빼낸 기억을
+--       user_memories_history로 옮겨 보관
+--       시점 조회(get_memories_at_point)는 history도 함께 조회
+--
+-- 사용법:
+--   psql "$DATABASE_URL" -f src/db/migrations/user_memory_history.sql
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS user_memories_history (
+    id UUID PRIMARY KEY,
+    player_id TEXT NOT NULL,
+    heroine_id TEXT,
+    speaker TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    content TEXT NOT NULL,
+    keywords TEXT[],
+    content_type TEXT,
+    importance INT,
+    valid_at TIMESTAMPTZ,
+    invalid_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ,
+    archive_reason TEXT NOT NULL,
+    merged_into UUID,
+    archived_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_user_memories_history_session
+ON user_memories_history (player_id, heroine_id, invalid_at DESC);
+
+-- 특정 시점에 유효했던 사실 조회 (user_memory_schema.sql과 동일)
+-- memory_consolidator가 history로 옮긴 기억도 포함
+-- merged/capped 행은 invalid_at이 NULL인 채 이관되므로 archived_at을 유효 종료 시점으로 사용
+CREATE OR REPLACE FUNCTION get_memories_at_point(
+    p_player_id TEXT,
+    p_heroine_id TEXT,
+    p_point_in_time TIMESTAMPTZ,
+    p_limit INTEGER DEFAULT 50
+) RETURNS TABLE (
+    id UUID,
+    player_id TEXT,
+    heroine_id TEXT,
+    speaker TEXT,
+    subject TEXT,
+    content TEXT,
+    content_type TEXT,
+    importance INT,
+    valid_at TIMESTAMPTZ,
+    invalid_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ
+)
+LANGUAGE SQL AS $$
+    SELECT * FROM (
+        SELECT 
+            m.id,
+            m.player_id,
+            m.heroine_id,
+            m.speaker,
+            m.subject,
+            m.content,
+            m.content_type,
+            m.importance,
+            m.valid_at,
+            m.invalid_at,
+            m.created_at
+        FROM user_memories m
+        WHERE m.player_id = p_player_id
+          AND m.heroine_id = p_heroine_id
+          AND m.valid_at <= p_point_in_time
+          AND (m.invalid_at IS NULL OR m.invalid_at > p_point_in_time)
+
+        UNION ALL
+
+        SELECT 
+            h.id,
+            h.player_id,
+            h.heroine_id,
+            h.speaker,
+            h.subject,
+            h.content,
+            h.content_type,
+            h.importance,
+            h.valid_at,
+            COALESCE(h.invalid_at, h.archived_at) AS invalid_at,
+            h.created_at
+        FROM user_memories_history h
+        WHERE h.player_id = p_player_id
+          AND h.heroine_id = p_heroine_id
+          AND h.valid_at <= p_point_in_time
+          AND COALESCE(h.invalid_at, h.archived_at) > p_point_in_time
+    ) AS point_memories
+    ORDER BY created_at DESC
+    LIMIT p_limit;
+$$;
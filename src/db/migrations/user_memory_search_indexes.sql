@@ -0,0 +1,53 @@
+-- ============================================
+-- user_memories 검색 인덱스 마이그레이션
+--
+-- 문제: 테이블이 수십만~수백만 행으로 커지면서 search_user_memories_hybrid /
+--       find_similar_memory / find_conflict_candidates 지연이 증가
+--       - (player_id, heroine_id, invalid_at) 인덱스는 무효화된 기억까지 포함해 커짐
+--       - 사용되지 않는 전체 HNSW 인덱스가 INSERT/UPDATE마다 그래프 갱신 비용을 냄
+--
+-- 해결:
+--   1. 유효한 기억(invalid_at IS NULL)만 담는 부분 인덱스 (세션/시간순/타입별)
+--   2. 전체 벡터 HNSW 인덱스 제거
+--   3. PGroonga 키워드 인덱스 보장 (content + keywords)
+--
+-- HNSW를 두지 않는 이유:
+--   HNSW는 `ORDER BY embedding <=> q LIMIT k` 형태의 쿼리에만 사용됩니다.
+--   search_user_memories_hybrid는 final_score 순, find_similar_memory /
+--   find_conflict_candidates는 유사도 임계값 필터라서 어느 함수도 이 형태가 아니고,
+--   세션(player_id, heroine_id)의 유효한 기억을 1번 인덱스로 모두 읽어 거리를 계산합니다.
+--   세션당 기억 수는 수백 개 수준이라 이 경로가 HNSW 근사 검색보다 정확하고 충분히 빠릅니다.
+--
+-- 모든 인덱스는 CONCURRENTLY로 생성하므로 트랜잭션 밖에서 실행해야 합니다.
+--
+-- 사용법:
+--   psql "$DATABASE_URL" -f src/db/migrations/user_memory_search_indexes.sql
+--
+-- 효과 측정:
+--   python src/scripts/bench_memory_search.py --sizes 10000,100000,1000000
+-- ============================================
+
+-- 1. 유효한 기억의 세션 조회 (하이브리드 검색 / 유효 기억 조회 / 최근 N일 조회)
+--    created_at DESC까지 포함해 ORDER BY created_at DESC LIMIT n을 인덱스 순서로 처리
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_memory_valid_session
+ON user_memories (player_id, heroine_id, created_at DESC)
+WHERE invalid_at IS NULL;
+
+-- 2. 유효한 기억의 타입별 조회 (find_conflict_candidates: content_type 필터)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_memory_valid_type
+ON user_memories (player_id, heroine_id, content_type)
+WHERE invalid_at IS NULL;
+
+-- 3. 어떤 검색 함수도 사용하지 않는 전체 벡터 HNSW 인덱스 제거 (쓰기 비용 절감)
+--    이전 버전의 이 마이그레이션이 만든 부분 HNSW 인덱스도 함께 제거
+DROP INDEX CONCURRENTLY IF EXISTS idx_user_memory_vector;
+DROP INDEX CONCURRENTLY IF EXISTS idx_user_memory_vector_valid;
+
+-- 4. PGroonga 키워드 인덱스 (content &@~, keywords &@)
+CREATE EXTENSION IF NOT EXISTS pgroonga;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_memories_content_keywords_pgroonga
+ON user_memories
+USING pgroonga (content, keywords);
+
+-- 통계 갱신 (새 인덱스를 플래너가 바로 사용하도록)
+ANALYZE user_memories;
@@ -9,21 +9,48 @@
 - interrupted_turn 이후의 장기기억은 invalid_at으로 무효화합니다.
 """
 
+import asyncio
 import json
 import uuid
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
-from sqlalchemy import create_engine, text
-from langchain_openai import OpenAIEmbeddings
-from langchain.chat_models import init_chat_model
+from sqlalchemy import text
+from utils.client_registry import get_chat_model, get_embeddings
 
-from db.config import CONNECTION_URL
+from db.batch_write import embed_in_batches, insert_rows
+from db.config import CONNECTION_URL, MEMORY_RESCORE_CANDIDATES, MEMORY_VECTOR_QUANTIZATION
+from db.engine_registry import get_engine
+from db.read_router import read_router
+from db.vector_binding import to_vector
 from enums.LLM import LLM
 from agents.npc.npc_constants import NPC_ID_TO_NAME_KR
 from utils.langfuse_tracker import tracker
 
 
+# npc_npc_memories 다중 행 INSERT (db.batch_write.insert_rows 템플릿)
+NPC_NPC_MEMORY_INSERT_SQL = """
+    INSERT INTO npc_npc_memories (
+        conversation_id, turn_index,
+        player_id, heroine_id_1, heroine_id_2,
+        speaker_id, subject_id,
+        content, content_type,
+        embedding, importance,
+        created_at,
+        metadata
+    )
+"""
+NPC_NPC_MEMORY_VALUES_SQL = """(
+        :conversation_id, :turn_index,
+        :player_id, :heroine_id_1, :heroine_id_2,
+        :speaker_id, :subject_id,
+        :content, :content_type,
+        CAST(:embedding AS vector), :importance,
+        NOW(),
+        CAST(:metadata AS jsonb)
+    )"""
+
+
 def _normalize_pair(npc_id_1: int, npc_id_2: int) -> Tuple[int, int]:
     """NPC ID 쌍을 정규화합니다 (작은 값, 큰 값 순서로 정렬).
     
@@ -46,11 +73,11 @@ class NpcNpcMemoryManager:
         if not CONNECTION_URL:
             raise RuntimeError("DATABASE_URL이 비어있습니다 (.env 확인)")
 
-        self.engine = create_engine(CONNECTION_URL, pool_pre_ping=True)
-        self.embeddings = OpenAIEmbeddings(model=embedding_model)
+        self.engine = get_engine()
+        self.embeddings = get_embeddings(embedding_model)
 
         # 아주 단순한 fact 추출용 (필요 최소)
-        self.extract_llm = init_chat_model(model=LLM.GPT5_MINI)
+        self.extract_llm = get_chat_model(LLM.GPT5_MINI)
 
     # ============================================
     # 체크포인트 저장/조회
@@ -96,6 +123,7 @@ class NpcNpcMemoryManager:
                 },
             )
             conn.commit()
+        read_router.mark_write(player_id)
 
         return checkpoint_id
 
@@ -130,7 +158,7 @@ class NpcNpcMemoryManager:
         )
 
         results: List[Dict[str, Any]] = []
-        with self.engine.connect() as conn:
+        with read_router.engine_for_read(player_id).connect() as conn:
             for row in conn.execute(sql, params):
                 results.append(
                     {
@@ -156,7 +184,7 @@ class NpcNpcMemoryManager:
         # 1) 조회
         sql_select = text(
             """
-            SELECT conversation
+            SELECT conversation, player_id
             FROM npc_npc_checkpoints
             WHERE id = :id
             """
@@ -191,6 +219,7 @@ class NpcNpcMemoryManager:
                 },
             )
             conn.commit()
+        read_router.mark_write(row.player_id)
 
         return {
             "id": checkpoint_id,
@@ -331,6 +360,9 @@ JSON 배열로 응답하세요. 저장할 사실이 없으면 빈 배열 []을 
     ) -> int:
         """대화를 분석하여 중요 fact만 추출 후 저장
 
+        성능 최적화:
+        - fact 임베딩은 embed_documents 묶음 호출, 저장은 다중 행 INSERT 1회 (이벤트 루프 밖에서 실행)
+
         Args:
             player_id: 플레이어 ID
             npc1_id: 첫 번째 NPC ID
@@ -350,68 +382,35 @@ JSON 배열로 응답하세요. 저장할 사실이 없으면 빈 배열 []을 
         if not facts:
             return 0
 
-        # 2. 각 fact를 DB에 저장
-        inserted = 0
-        with self.engine.connect() as conn:
-            for idx, fact in enumerate(facts):
-                speaker_id = fact.get("speaker_id")
-                subject_id = fact.get("subject_id")
-                content = fact.get("content")
-                content_type = fact.get("content_type", "event")
-                importance = fact.get("importance", 5)
-
-                if speaker_id is None or content is None:
-                    continue
-
-                embed = self.embeddings.embed_query(str(content))
-
-                sql_insert = text(
-                    """
-                    INSERT INTO npc_npc_memories (
-                        conversation_id, turn_index,
-                        player_id, heroine_id_1, heroine_id_2,
-                        speaker_id, subject_id,
-                        content, content_type,
-                        embedding, importance,
-                        created_at,
-                        metadata
-                    )
-                    VALUES (
-                        :conversation_id, :turn_index,
-                        :player_id, :heroine_id_1, :heroine_id_2,
-                        :speaker_id, :subject_id,
-                        :content, :content_type,
-                        CAST(:embedding AS vector), :importance,
-                        NOW(),
-                        CAST(:metadata AS jsonb)
-                    )
-                    """
-                )
+        # 2. 저장할 행 구성
+        metadata = json.dumps({"situation": situation}, ensure_ascii=False)
+        rows = []
+        for idx, fact in enumerate(facts):
+            speaker_id = fact.get("speaker_id")
+            subject_id = fact.get("subject_id")
+            content = fact.get("content")
 
-                conn.execute(
-                    sql_insert,
-                    {
-                        "conversation_id": checkpoint_id,
-                        "turn_index": idx + 1,
-                        "player_id": str(player_id),
-                        "heroine_id_1": heroine_id_1,
-                        "heroine_id_2": heroine_id_2,
-                        "speaker_id": int(speaker_id),
-                        "subject_id": int(subject_id) if subject_id else 0,
-                        "content": str(content),
-                        "content_type": content_type,
-                        "embedding": str(embed),
-                        "importance": importance,
-                        "metadata": json.dumps(
-                            {"situation": situation}, ensure_ascii=False
-                        ),
-                    },
-                )
-                inserted += 1
+            if speaker_id is None or content is None:
+                continue
 
-            conn.commit()
+            rows.append(
+                {
+                    "conversation_id": checkpoint_id,
+                    "turn_index": idx + 1,
+                    "player_id": str(player_id),
+                    "heroine_id_1": heroine_id_1,
+                    "heroine_id_2": heroine_id_2,
+                    "speaker_id": int(speaker_id),
+                    "subject_id": int(subject_id) if subject_id else 0,
+                    "content": str(content),
+                    "content_type": fact.get("content_type", "event"),
+                    "importance": fact.get("importance", 5),
+                    "metadata": metadata,
+                }
+            )
 
-        return inserted
+        # 3. 묶음 임베딩 + 일괄 저장
+        return await asyncio.to_thread(self._store_memories, rows)
 
     def save_turn_memories(
         self,
@@ -426,6 +425,7 @@ JSON 배열로 응답하세요. 저장할 사실이 없으면 빈 배열 []을 
 
         성능 최적화:
         - 배치 임베딩 API 사용 (N번 호출 → 1번 호출)
+        - 다중 행 INSERT (N번 왕복 → 1번 왕복)
 
         Args:
             player_id: 플레이어 ID
@@ -439,9 +439,10 @@ JSON 배열로 응답하세요. 저장할 사실이 없으면 빈 배열 []을 
             저장된 기억 개수
         """
         heroine_id_1, heroine_id_2 = _normalize_pair(npc1_id, npc2_id)
+        metadata = json.dumps({"situation": situation}, ensure_ascii=False)
 
         # 1. 유효한 메시지만 필터링 및 전처리
-        valid_messages = []
+        rows = []
         for idx, msg in enumerate(conversation):
             speaker_id = msg.get("speaker_id")
             text_content = msg.get("text")
@@ -470,68 +471,48 @@ JSON 배열로 응답하세요. 저장할 사실이 없으면 빈 배열 []을 
                 )
                 continue
 
-            valid_messages.append({
-                "idx": idx,
+            rows.append({
+                "conversation_id": checkpoint_id,
+                "turn_index": idx + 1,
+                "player_id": str(player_id),
+                "heroine_id_1": heroine_id_1,
+                "heroine_id_2": heroine_id_2,
                 "speaker_id": speaker_int,
                 "subject_id": subject_id,
-                "text": str(text_content),
+                "content": str(text_content),
+                "content_type": "turn",
+                "importance": 5,
+                "metadata": metadata,
             })
 
-        if not valid_messages:
-            return 0
+        # 2. 배치 임베딩 + 일괄 저장
+        return self._store_memories(rows)
 
-        # 2. 배치 임베딩 생성 (한 번의 API 호출)
-        texts = [msg["text"] for msg in valid_messages]
-        embeddings = self.embeddings.embed_documents(texts)
+    def _store_memories(self, rows: List[Dict[str, Any]]) -> int:
+        """npc_npc_memories 행 묶음 저장 (content 묶음 임베딩 -> 다중 행 INSERT, 한 트랜잭션)
 
-        # 3. DB에 일괄 저장
-        inserted = 0
-        with self.engine.connect() as conn:
-            for msg, embed in zip(valid_messages, embeddings):
-                sql_insert = text(
-                    """
-                    INSERT INTO npc_npc_memories (
-                        conversation_id, turn_index,
-                        player_id, heroine_id_1, heroine_id_2,
-                        speaker_id, subject_id,
-                        content, content_type,
-                        embedding, importance,
-                        created_at,
-                        metadata
-                    )
-                    VALUES (
-                        :conversation_id, :turn_index,
-                        :player_id, :heroine_id_1, :heroine_id_2,
-                        :speaker_id, :subject_id,
-                        :content, :content_type,
-                        CAST(:embedding AS vector), :importance,
-                        NOW(),
-                        CAST(:metadata AS jsonb)
-                    )
-                    """
-                )
+        임베딩이 끝내 실패한 행은 건너뜁니다.
 
-                conn.execute(
-                    sql_insert,
-                    {
-                        "conversation_id": checkpoint_id,
-                        "turn_index": msg["idx"] + 1,
-                        "player_id": str(player_id),
-                        "heroine_id_1": heroine_id_1,
-                        "heroine_id_2": heroine_id_2,
-                        "speaker_id": msg["speaker_id"],
-                        "subject_id": msg["subject_id"],
-                        "content": msg["text"],
-                        "content_type": "turn",
-                        "embedding": str(embed),
-                        "importance": 5,
-                        "metadata": json.dumps(
-                            {"situation": situation}, ensure_ascii=False
-                        ),
-                    },
-                )
-                inserted += 1
+        Args:
+            rows: embedding을 제외한 행 파라미터 (NPC_NPC_MEMORY_VALUES_SQL 바인드 이름)
 
+        Returns:
+            저장된 행 개수
+        """
+        if not rows:
+            return 0
+
+        vectors = embed_in_batches(self.embeddings, [row["content"] for row in rows])
+        rows = [
+            {**row, "embedding": to_vector(vector)}
+            for row, vector in zip(rows, vectors)
+            if vector is not None
+        ]
+
+        with self.engine.connect() as conn:
+            inserted = insert_rows(
+                conn, NPC_NPC_MEMORY_INSERT_SQL, NPC_NPC_MEMORY_VALUES_SQL, rows
+            )
             conn.commit()
 
         return inserted
@@ -606,43 +587,73 @@ JSON 배열로 응답하세요. 저장할 사실이 없으면 빈 배열 []을 
 
         return None
 
-    def search_memories(
+    async def search_memories(
         self,
         player_id: str,
         npc1_id: int,
         npc2_id: int,
         query: str,
         limit: int = 5,
+    ) -> List[Dict[str, Any]]:
+        query_embedding = await self.embeddings.aembed_query(query)
+        return await asyncio.to_thread(
+            self._query_memories, player_id, npc1_id, npc2_id, query, query_embedding, limit
+        )
+
+    def _query_memories(
+        self,
+        player_id: str,
+        npc1_id: int,
+        npc2_id: int,
+        query: str,
+        query_embedding: List[float],
+        limit: int,
     ) -> List[Dict[str, Any]]:
         heroine_id_1, heroine_id_2 = _normalize_pair(npc1_id, npc2_id)
-        query_embedding = self.embeddings.embed_query(query)
 
-        sql = text(
-            """
-            SELECT * FROM search_npc_npc_memories_hybrid(
-                :player_id,
-                :heroine_id_1,
-                :heroine_id_2,
-                :query_text,
-                CAST(:query_embedding AS vector),
-                :top_k
+        params: Dict[str, Any] = {
+            "player_id": str(player_id),
+            "heroine_id_1": heroine_id_1,
+            "heroine_id_2": heroine_id_2,
+            "query_text": query,
+            "query_embedding": to_vector(query_embedding),
+            "top_k": int(limit),
+        }
+        if MEMORY_VECTOR_QUANTIZATION in ("halfvec", "binary"):
+            # 양자화 벡터로 후보를 좁힌 뒤 원본 임베딩으로 relevance 재계산
+            sql = text(
+                """
+                SELECT * FROM search_npc_npc_memories_hybrid_quantized(
+                    :player_id,
+                    :heroine_id_1,
+                    :heroine_id_2,
+                    :query_text,
+                    CAST(:query_embedding AS vector),
+                    :top_k,
+                    p_mode => :mode,
+                    p_rescore_candidates => :rescore_candidates
+                )
+                """
+            )
+            params["mode"] = MEMORY_VECTOR_QUANTIZATION
+            params["rescore_candidates"] = MEMORY_RESCORE_CANDIDATES
+        else:
+            sql = text(
+                """
+                SELECT * FROM search_npc_npc_memories_hybrid(
+                    :player_id,
+                    :heroine_id_1,
+                    :heroine_id_2,
+                    :query_text,
+                    CAST(:query_embedding AS vector),
+                    :top_k
+                )
+                """
             )
-            """
-        )
 
         results: List[Dict[str, Any]] = []
         with self.engine.connect() as conn:
-            for row in conn.execute(
-                sql,
-                {
-                    "player_id": str(player_id),
-                    "heroine_id_1": heroine_id_1,
-                    "heroine_id_2": heroine_id_2,
-                    "query_text": query,
-                    "query_embedding": str(query_embedding),
-                    "top_k": int(limit),
-                },
-            ):
+            for row in conn.execute(sql, params):
                 results.append(
                     {
                         "id": str(row.id),
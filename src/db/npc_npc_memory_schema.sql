@@ -71,6 +71,8 @@ CREATE TABLE npc_npc_memories (
     content_type TEXT DEFAULT 'fact',
 
     embedding VECTOR(1536),
+    embedding_half HALFVEC(1536),   -- 양자화 (트리거가 embedding에서 채움)
+    embedding_bit BIT(1536),        -- 이진 양자화 (트리거가 embedding에서 채움)
     importance INT DEFAULT 5 CHECK (importance BETWEEN 1 AND 10),
 
     valid_at TIMESTAMPTZ DEFAULT NOW(),
@@ -87,10 +89,7 @@ CREATE INDEX idx_npc_npc_memories_conv_turn ON npc_npc_memories (conversation_id
 -- 세션 분리용
 CREATE INDEX idx_npc_npc_memories_pair ON npc_npc_memories (player_id, heroine_id_1, heroine_id_2, invalid_at);
 
--- 벡터 검색
-CREATE INDEX idx_npc_npc_memories_vector ON npc_npc_memories
-USING hnsw (embedding vector_cosine_ops)
-WITH (m = 16, ef_construction = 64);
+-- 벡터 인덱스 없음: 검색 함수가 세션 필터 뒤 하이브리드 점수로 계산 (HNSW 미사용)
 
 -- 키워드 검색 (한국어)
 CREATE INDEX idx_npc_npc_memories_pgroonga ON npc_npc_memories USING pgroonga (content);
@@ -121,6 +120,28 @@ CREATE TRIGGER trigger_npc_npc_memories_updated_at
     FOR EACH ROW
     EXECUTE FUNCTION update_updated_at();
 
+-- ============================================
+-- 양자화 컬럼 동기화 트리거 (embedding -> embedding_half / embedding_bit)
+-- ============================================
+CREATE OR REPLACE FUNCTION sync_quantized_embedding()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.embedding IS NULL THEN
+        NEW.embedding_half := NULL;
+        NEW.embedding_bit := NULL;
+    ELSE
+        NEW.embedding_half := NEW.embedding::halfvec(1536);
+        NEW.embedding_bit := binary_quantize(NEW.embedding)::bit(1536);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_npc_npc_memories_quantize
+    BEFORE INSERT OR UPDATE OF embedding ON npc_npc_memories
+    FOR EACH ROW
+    EXECUTE FUNCTION sync_quantized_embedding();
+
 -- ============================================
 -- 4요소 하이브리드 검색 함수
 -- Score = (w_recency * Recency) + (w_importance * Importance)
@@ -225,3 +246,114 @@ BEGIN
     LIMIT p_top_k;
 END;
 $$;
+
+-- ============================================
+-- 양자화 하이브리드 검색 함수 (MEMORY_VECTOR_QUANTIZATION=binary|halfvec)
+-- 양자화 벡터로 근사 점수 -> 상위 p_rescore_candidates개만 원본 embedding으로 재계산
+-- ============================================
+CREATE OR REPLACE FUNCTION search_npc_npc_memories_hybrid_quantized(
+    p_player_id TEXT,
+    p_heroine_id_1 INT,
+    p_heroine_id_2 INT,
+    p_query_text TEXT,
+    p_query_embedding VECTOR(1536),
+    p_top_k INTEGER DEFAULT 10,
+    p_w_recency FLOAT DEFAULT 0.15,
+    p_w_importance FLOAT DEFAULT 0.15,
+    p_w_relevance FLOAT DEFAULT 0.50,
+    p_w_keyword FLOAT DEFAULT 0.20,
+    p_decay_days FLOAT DEFAULT 30.0,
+    p_mode TEXT DEFAULT 'binary',
+    p_rescore_candidates INTEGER DEFAULT 50
+) RETURNS TABLE (
+    id UUID,
+    conversation_id UUID,
+    turn_index INT,
+    player_id TEXT,
+    heroine_id_1 INT,
+    heroine_id_2 INT,
+    speaker_id INT,
+    subject_id INT,
+    content TEXT,
+    content_type TEXT,
+    importance INT,
+    created_at TIMESTAMPTZ,
+    recency_score FLOAT,
+    importance_score FLOAT,
+    relevance_score FLOAT,
+    keyword_score FLOAT,
+    final_score FLOAT
+)
+LANGUAGE plpgsql AS $$
+DECLARE
+    max_keyword_score FLOAT;
+    q_half halfvec(1536) := p_query_embedding::halfvec(1536);
+    q_bit bit(1536) := binary_quantize(p_query_embedding)::bit(1536);
+BEGIN
+    SELECT MAX(pgroonga_score(tableoid, ctid))
+    INTO max_keyword_score
+    FROM npc_npc_memories m
+    WHERE m.player_id = p_player_id
+      AND m.heroine_id_1 = p_heroine_id_1
+      AND m.heroine_id_2 = p_heroine_id_2
+      AND m.invalid_at IS NULL
+      AND m.content &@~ p_query_text;
+
+    IF max_keyword_score IS NULL OR max_keyword_score = 0 THEN
+        max_keyword_score := 1.0;
+    END IF;
+
+    RETURN QUERY
+    WITH approx AS (
+        SELECT
+            m.id,
+            EXP(-EXTRACT(EPOCH FROM (NOW() - m.created_at)) / (p_decay_days * 86400)) AS recency,
+            m.importance::FLOAT / 10.0 AS importance_norm,
+            COALESCE(pgroonga_score(m.tableoid, m.ctid) / max_keyword_score, 0) AS keyword,
+            CASE
+                WHEN p_mode = 'halfvec' THEN
+                    COALESCE(1 - (m.embedding_half <=> q_half), 1 - (m.embedding <=> p_query_embedding))
+                ELSE
+                    COALESCE(COS(PI() * (m.embedding_bit <~> q_bit) / 1536.0), 1 - (m.embedding <=> p_query_embedding))
+            END AS approx_relevance
+        FROM npc_npc_memories m
+        WHERE m.player_id = p_player_id
+          AND m.heroine_id_1 = p_heroine_id_1
+          AND m.heroine_id_2 = p_heroine_id_2
+          AND m.invalid_at IS NULL
+    ), candidates AS (
+        SELECT a.*
+        FROM approx a
+        ORDER BY (p_w_recency * a.recency +
+                  p_w_importance * a.importance_norm +
+                  p_w_relevance * a.approx_relevance +
+                  p_w_keyword * a.keyword) DESC NULLS LAST
+        LIMIT GREATEST(p_rescore_candidates, p_top_k)
+    )
+    SELECT
+        m.id,
+        m.conversation_id,
+        m.turn_index,
+        m.player_id,
+        m.heroine_id_1,
+        m.heroine_id_2,
+        m.speaker_id,
+        m.subject_id,
+        m.content,
+        m.content_type,
+        m.importance,
+        m.created_at,
+        c.recency AS recency_score,
+        c.importance_norm AS importance_score,
+        1 - (m.embedding <=> p_query_embedding) AS relevance_score,
+        c.keyword AS keyword_score,
+        (p_w_recency * c.recency +
+         p_w_importance * c.importance_norm +
+         p_w_relevance * (1 - (m.embedding <=> p_query_embedding)) +
+         p_w_keyword * c.keyword) AS final_score
+    FROM candidates c
+    JOIN npc_npc_memories m ON m.id = c.id
+    ORDER BY final_score DESC
+    LIMIT p_top_k;
+END;
+$$;
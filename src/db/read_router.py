@@ -0,0 +1,299 @@
+"""
+읽기 라우팅 - 조회 쿼리를 읽기 복제본으로 분산
+
+기억 검색, 시나리오 검색, 체크포인트 로드, fairy 메시지 조회, 던전 목록, 대화 이력 조회가
+모두 primary로 가서 쓰기와 같은 커넥션/CPU를 나눠 씁니다.
+이 모듈은 읽기 전용 메서드가 사용할 엔진을 골라줍니다.
+
+주요 기능:
+1. engine_for_read(scope): 지연이 허용 범위인 복제본을 라운드로빈으로 선택
+   (복제본이 없거나 모두 지연/장애면 primary)
+2. 복제 지연 확인: 백그라운드 태스크가 REPLICA_LAG_CHECK_SECONDS 간격으로 전체 복제본을 조회
+   (요청 경로에서는 DB 조회 없이 마지막 결과만 사용)
+   - primary의 pg_current_wal_lsn()까지 replay했으면 지연 0, 아니면 마지막 replay 이후 경과 시간
+   - WAL 수신이 streaming이 아니면(primary와 연결 끊김) 제외
+   - REPLICA_MAX_LAG_SECONDS 초과, 조회 실패, 결과가 REPLICA_LAG_STALE_SECONDS보다 오래되면 제외
+3. read-your-writes: mark_write(scope) 후 READ_YOUR_WRITES_SECONDS 동안 같은 scope의
+   읽기는 primary로 (Redis 키라서 다른 워커에도 적용)
+4. 메트릭: db_read_route_total{target, reason}, db_replica_lag_seconds{engine}
+
+이 모듈이 없을 경우 발생할 문제:
+- 조회 트래픽 전부가 primary에 집중
+- 복제본을 붙여도 방금 쓴 기억/체크포인트가 안 보이는 문제 때문에 사용할 수 없음
+
+scope:
+- 쓰기와 읽기가 같은 값을 써야 합니다. 플레이어 단위 데이터는 player_id를 사용
+- scope 없이 읽는 데이터(시나리오, 던전 목록)는 복제 지연 상한 내의 값이면 충분한 것만
+
+Redis 키 구조:
+- read_your_writes:{scope} - 최근 쓰기 표시 (TTL = READ_YOUR_WRITES_SECONDS)
+
+주의:
+- READ_YOUR_WRITES_SECONDS >= REPLICA_MAX_LAG_SECONDS 이어야 방금 쓴 데이터가 보장됩니다
+- 쓰기 판단에 쓰는 조회(중복/충돌 후보 검색 등)는 라우팅하지 않고 primary를 사용
+- start()로 지연 확인 태스크를 시작하지 않은 프로세스(오프라인 스크립트)는 모든 읽기가 primary
+- 복제본 접속 계정은 pg_stat_wal_receiver.status를 읽을 수 있어야 합니다 (pg_monitor 권한)
+"""
+
+import asyncio
+import itertools
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from db.config import REPLICA_CONNECTION_URLS
+from db.engine_registry import engine_registry
+from db.redis_manager import redis_manager
+from utils.metrics import metrics
+
+
+# 복제본으로 보낼 수 있는 최대 복제 지연(초)
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+# 복제 지연 재확인 간격(초, 백그라운드 태스크)
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", "2"))
+# 마지막 지연 확인 결과를 믿을 수 있는 시간(초) - 확인이 멈추면 복제본 제외
+REPLICA_LAG_STALE_SECONDS = float(
+    os.getenv("REPLICA_LAG_STALE_SECONDS", str(REPLICA_LAG_CHECK_SECONDS * 3))
+)
+# 쓰기 후 같은 scope의 읽기를 primary로 보낼 시간(초)
+READ_YOUR_WRITES_SECONDS = float(
+    os.getenv("READ_YOUR_WRITES_SECONDS", str(max(10.0, REPLICA_MAX_LAG_SECONDS * 2)))
+)
+# 워커 로컬 최근 쓰기 기록 상한 (초과 시 만료 항목 정리)
+RECENT_WRITES_MAX_LOCAL = 10000
+
+# primary의 현재 WAL 위치 (복제본 replay 위치와 비교)
+PRIMARY_LSN_SQL = text("SELECT pg_current_wal_lsn()::text")
+
+# 복제본 상태: WAL 수신 상태, primary 위치 대비 replay가 뒤처진 바이트, 마지막 replay 이후 경과(초)
+# (receive_lsn과 replay_lsn 비교는 primary와 끊긴 복제본도 받은 만큼은 적용했으므로 0이 됨)
+LAG_SQL = text(
+    """
+    SELECT
+        pg_is_in_recovery() AS in_recovery,
+        COALESCE((SELECT status FROM pg_stat_wal_receiver LIMIT 1), 'stopped') AS receiver_status,
+        pg_wal_lsn_diff(CAST(:primary_lsn AS pg_lsn), pg_last_wal_replay_lsn()) AS behind_bytes,
+        EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) AS replay_age
+"""
+)
+
+
+def ryw_key(scope: str) -> str:
+    return f"read_your_writes:{scope}"
+
+
+class _Replica:
+    """복제본 엔진 + 마지막 지연 확인 결과"""
+
+    def __init__(self, name: str, engine: Engine):
+        self.name = name
+        self.engine = engine
+        self.lag_seconds: Optional[float] = None  # None = 확인 실패 / 연결 끊김
+        self.checked_at = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return (
+            self.lag_seconds is not None
+            and self.lag_seconds <= REPLICA_MAX_LAG_SECONDS
+            and time.monotonic() - self.checked_at <= REPLICA_LAG_STALE_SECONDS
+        )
+
+
+class ReadRouter:
+    """읽기 전용 쿼리의 엔진 선택
+
+    아키텍처 위치:
+    - 조회 메서드: self.engine.connect() 대신 read_router.engine_for_read(player_id).connect()
+    - 쓰기 메서드: commit 후 read_router.mark_write(player_id)
+    - 복제본 엔진은 engine_registry에 "replica{n}" 이름으로 등록 (풀 설정/메트릭 공유)
+    - main.py startup에서 start() (지연 확인 태스크), shutdown에서 stop()
+
+    사용 예시:
+        from db.read_router import read_router
+
+        with read_router.engine_for_read(player_id).connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+
+        with self.engine.connect() as conn:
+            conn.execute(insert_sql, params)
+            conn.commit()
+        read_router.mark_write(player_id)
+    """
+
+    def __init__(self, replica_urls: Optional[List[str]] = None):
+        urls = REPLICA_CONNECTION_URLS if replica_urls is None else replica_urls
+        self._replica_urls = urls
+        self._replicas: Optional[List[_Replica]] = None
+        self._init_lock = threading.Lock()
+        self._round_robin = itertools.count()
+        # 이 워커에서의 최근 쓰기 (scope -> 만료 시각), Redis 조회 생략용
+        self._recent_writes: Dict[str, float] = {}
+        self._lag_task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._replica_urls)
+
+    def _primary(self) -> Engine:
+        return engine_registry.get_engine()
+
+    def _get_replicas(self) -> List[_Replica]:
+        """복제본 엔진 (처음 사용할 때 생성)"""
+        if self._replicas is None:
+            with self._init_lock:
+                if self._replicas is None:
+                    self._replicas = [
+                        _Replica(f"replica{i}", engine_registry.get_engine(f"replica{i}", url))
+                        for i, url in enumerate(self._replica_urls)
+                    ]
+        return self._replicas
+
+    # ============================================
+    # read-your-writes
+    # ============================================
+
+    def mark_write(self, scope: Optional[str]) -> None:
+        """scope의 쓰기 기록 - 이후 READ_YOUR_WRITES_SECONDS 동안 읽기는 primary"""
+        if not self.enabled or not scope:
+            return
+        scope = str(scope)
+        now = time.monotonic()
+        if len(self._recent_writes) > RECENT_WRITES_MAX_LOCAL:
+            self._recent_writes = {k: v for k, v in self._recent_writes.items() if v > now}
+        self._recent_writes[scope] = now + READ_YOUR_WRITES_SECONDS
+        try:
+            redis_manager.client.set(ryw_key(scope), "1", px=int(READ_YOUR_WRITES_SECONDS * 1000))
+        except Exception as e:
+            print(f"[READ_ROUTER] 쓰기 표시 실패 (이 워커만 적용): {e}")
+
+    def _recently_written(self, scope: str) -> bool:
+        expires_at = self._recent_writes.get(scope)
+        if expires_at is not None:
+            if expires_at > time.monotonic():
+                return True
+            self._recent_writes.pop(scope, None)
+        try:
+            return bool(redis_manager.client.exists(ryw_key(scope)))
+        except Exception:
+            # 다른 워커의 쓰기를 확인할 수 없으면 primary가 안전
+            return True
+
+    # ============================================
+    # 복제 지연
+    # ============================================
+
+    async def start(self) -> None:
+        """복제 지연 확인 태스크 시작 (복제본이 없으면 아무것도 안 함)"""
+        if not self.enabled or self._lag_task is not None:
+            return
+        self._lag_task = asyncio.create_task(self._lag_loop())
+
+    async def stop(self) -> None:
+        """복제 지연 확인 태스크 중지"""
+        if self._lag_task is None:
+            return
+        self._lag_task.cancel()
+        try:
+            await self._lag_task
+        except asyncio.CancelledError:
+            pass
+        self._lag_task = None
+
+    async def _lag_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh_lag)
+            except Exception as e:
+                print(f"[READ_ROUTER] 지연 확인 실패: {e}")
+            await asyncio.sleep(REPLICA_LAG_CHECK_SECONDS)
+
+    def _primary_lsn(self) -> Optional[str]:
+        try:
+            with self._primary().connect() as conn:
+                return conn.execute(PRIMARY_LSN_SQL).scalar()
+        except Exception as e:
+            print(f"[READ_ROUTER] primary WAL 위치 조회 실패: {e}")
+            return None
+
+    def refresh_lag(self) -> None:
+        """전체 복제본 지연 재조회 (primary WAL 위치를 먼저 읽고 각 복제본의 replay 위치와 비교)"""
+        primary_lsn = self._primary_lsn()
+        for replica in self._get_replicas():
+            self._check_replica(replica, primary_lsn)
+
+    def _check_replica(self, replica: _Replica, primary_lsn: Optional[str]) -> None:
+        try:
+            with replica.engine.connect() as conn:
+                row = conn.execute(LAG_SQL, {"primary_lsn": primary_lsn}).fetchone()
+            if not row.in_recovery:
+                # primary 자신을 가리키는 설정 (개발 환경)
+                lag = 0.0
+            elif row.receiver_status != "streaming":
+                if replica.lag_seconds is not None:
+                    print(f"[READ_ROUTER] {replica.name} WAL 수신 {row.receiver_status} - 제외")
+                lag = None
+            elif row.behind_bytes is not None and row.behind_bytes <= 0:
+                lag = 0.0
+            else:
+                # primary 위치를 모르거나 뒤처져 있으면 마지막 replay 이후 경과 시간
+                lag = float(row.replay_age) if row.replay_age is not None else None
+            replica.lag_seconds = lag
+            if lag is not None:
+                metrics.set_gauge("db_replica_lag_seconds", lag, labels={"engine": replica.name})
+        except Exception as e:
+            if replica.lag_seconds is not None:
+                print(f"[READ_ROUTER] {replica.name} 지연 확인 실패 - 제외: {e}")
+            replica.lag_seconds = None
+        finally:
+            replica.checked_at = time.monotonic()
+
+    # ============================================
+    # 라우팅
+    # ============================================
+
+    def engine_for_read(self, scope: Optional[str] = None) -> Engine:
+        """읽기 전용 쿼리에 사용할 엔진
+
+        Args:
+            scope: read-your-writes 범위 (보통 player_id, None이면 확인 안 함)
+        """
+        if not self.enabled:
+            return self._primary()
+
+        if scope is not None and self._recently_written(str(scope)):
+            metrics.inc("db_read_route_total", labels={"target": "primary", "reason": "recent_write"})
+            return self._primary()
+
+        replicas = self._get_replicas()
+        start = next(self._round_robin)
+        for offset in range(len(replicas)):
+            replica = replicas[(start + offset) % len(replicas)]
+            if replica.healthy:
+                metrics.inc("db_read_route_total", labels={"target": "replica", "reason": "ok"})
+                return replica.engine
+
+        metrics.inc("db_read_route_total", labels={"target": "primary", "reason": "replica_lag"})
+        return self._primary()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """복제본별 마지막 지연 (초, None = 제외됨)과 확인 후 경과 시간"""
+        if not self.enabled or self._replicas is None:
+            return {}
+        now = time.monotonic()
+        return {
+            replica.name: {
+                "lag_seconds": replica.lag_seconds,
+                "healthy": replica.healthy,
+                "checked_seconds_ago": now - replica.checked_at if replica.checked_at else None,
+            }
+            for replica in self._replicas
+        }
+
+
+# 싱글톤 인스턴스
+read_router = ReadRouter()
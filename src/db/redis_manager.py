@@ -18,6 +18,8 @@ import json
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 import redis
+import redis.asyncio as redis_async
+from redis.asyncio.retry import Retry as AsyncRetry
 from redis.connection import ConnectionPool
 from redis.retry import Retry
 from redis.backoff import ExponentialBackoff
@@ -81,6 +83,19 @@ class RedisManager:
             retry_on_error=[ConnectionError, TimeoutError],
         )
 
+        # 비동기 클라이언트 (이벤트 루프 위에서 호출하는 경로용: 레이트 리미터, 임베딩 캐시)
+        # 동기 client를 코루틴에서 쓰면 Redis 왕복 동안 이벤트 루프 전체가 멈춤
+        self.async_client = redis_async.Redis.from_url(
+            REDIS_URL,
+            decode_responses=True,
+            socket_connect_timeout=5,
+            socket_timeout=5,
+            socket_keepalive=True,
+            health_check_interval=30,
+            retry=AsyncRetry(ExponentialBackoff(), 3),
+            retry_on_error=[ConnectionError, TimeoutError],
+        )
+
     # ============================================
     # 키 생성 헬퍼 메서드
     # ============================================
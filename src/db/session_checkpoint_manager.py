@@ -15,10 +15,12 @@ Session Checkpoint Manager
 import json
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
-from sqlalchemy import create_engine, text
-from langchain.chat_models import init_chat_model
+from sqlalchemy import text
+from utils.client_registry import get_chat_model
+from utils.rate_limiter import PRIORITY_BACKGROUND, request_priority
 from enums.LLM import LLM
-from db.config import CONNECTION_URL
+from db.engine_registry import get_engine
+from db.read_router import read_router
 from utils.langfuse_tracker import tracker
 
 
@@ -27,8 +29,8 @@ class SessionCheckpointManager:
 
     def __init__(self):
         """초기화"""
-        self.engine = create_engine(CONNECTION_URL, pool_pre_ping=True)
-        self.llm = init_chat_model(model=LLM.GPT5_MINI)
+        self.engine = get_engine()
+        self.llm = get_chat_model(LLM.GPT5_MINI)
 
     def save_checkpoint_background(
         self,
@@ -95,6 +97,7 @@ class SessionCheckpointManager:
                     },
                 )
                 conn.commit()
+            read_router.mark_write(player_id)
 
         except Exception as e:
             print(f"[ERROR] save_checkpoint_background 실패: {e}")
@@ -139,7 +142,9 @@ class SessionCheckpointManager:
                 }
             )
             
-            response = await self.llm.ainvoke(prompt, **config)
+            # 요약은 background 우선순위로 레이트 리밋 (유저 대화 우선)
+            with request_priority(PRIORITY_BACKGROUND):
+                response = await self.llm.ainvoke(prompt, **config)
             content = response.content
 
             lines = content.strip().split("\n")
@@ -202,6 +207,7 @@ class SessionCheckpointManager:
                     },
                 )  # execute: 데이터베이스 쿼리를 실행하는 함수
                 conn.commit()  # commit: 데이터베이스 변경 사항을 영구적으로 저장하는 함수
+            read_router.mark_write(player_id)
 
         except Exception as e:
             print(f"[ERROR] save_summary 실패: {e}")
@@ -393,7 +399,7 @@ class SessionCheckpointManager:
             """
             )
 
-            with self.engine.connect() as conn:
+            with read_router.engine_for_read(player_id).connect() as conn:
                 result = conn.execute(
                     sql, {"player_id": str(player_id), "npc_id": npc_id}
                 )
@@ -456,7 +462,7 @@ class SessionCheckpointManager:
             """
             )
 
-            with self.engine.connect() as conn:
+            with read_router.engine_for_read(player_id).connect() as conn:
                 result = conn.execute(
                     sql, {"player_id": str(player_id), "npc_id": npc_id}
                 )
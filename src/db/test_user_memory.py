@@ -55,7 +55,8 @@ async def test_save_and_search():
     print("=" * 50)
 
     # 동기 검색 (기존 heroine_agent 호환)
-    results = user_memory_manager.search_memory_sync(
+    results = await asyncio.to_thread(
+        user_memory_manager.search_memory_sync,
         player_id=10001, npc_id=1, query="고양이", limit=3  # test_10001과 다름  # letia
     )
 
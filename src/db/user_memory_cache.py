@@ -0,0 +1,500 @@
+"""
+User-NPC 기억 핫 캐시 - 세션별 유효 기억 + 로컬 하이브리드 점수 계산
+
+대화 중인 (player, heroine) 세션은 기억 턴마다 search_user_memories_hybrid를 호출하지만,
+대상은 자주 바뀌지 않는 그 플레이어의 유효 기억 수십~수백 건입니다.
+이 모듈은 세션의 유효 기억과 임베딩을 프로세스 메모리에 올려두고
+같은 4요소 점수(최신도, 중요도, 관련도, 키워드)를 numpy로 계산합니다.
+
+주요 기능:
+1. 세션별 스냅샷: 유효 기억(invalid_at IS NULL) + 정규화 임베딩 행렬 + 키워드 토큰
+2. 로컬 하이브리드 점수: SearchWeights 가중치, search_user_memories_hybrid와 같은 공식 (db.memory_scoring)
+3. 쓰기 반영: add_memories는 저장한 행만 스냅샷에 덧붙이고 무효화된 행을 제거 (apply_writes, 재로드 없음)
+   - invalidate: 그 밖의 쓰기 후 로컬 제거
+   - 두 경우 모두 Redis 버전 증가 (다른 워커는 다음 조회 시 재로드)
+4. LRU + TTL로 메모리 상한, 기억이 너무 많은 세션은 캐시하지 않고 DB 경로 사용
+5. 날짜 버킷: 게임 타임존 기준 달력 날짜 -> 기억 목록 ("어제", "3일 전", "최근" 조회)
+6. 비동기 조회(asearch / aday_range): 스냅샷 로드(DB 조회 + 임베딩 파싱)를 asyncio.to_thread로 실행
+7. 적중/재로드 메트릭 (user_memory_cache_*)
+
+이 모듈이 없을 경우 발생할 문제:
+- 활성 세션의 기억 조회마다 Postgres 하이브리드 쿼리 왕복
+- 같은 세션의 같은 기억 집합을 턴마다 다시 스캔
+
+Redis 키 구조:
+- user_memory_cache:version:{player_id}:{heroine_id} - 세션 기억이 바뀔 때 증가하는 버전
+
+주의:
+- 키워드 점수는 PGroonga 대신 쿼리/기억(content + keywords)의 bigram 겹침 수를
+  세션 내 최댓값으로 정규화합니다 (SQL의 max_keyword_score 정규화와 같은 방식)
+- 오프라인 스크립트(migrations/fix_duplicate_preferences.py 등)의 직접 UPDATE는
+  버전을 올리지 않으므로 TTL 이후 반영됩니다
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from sqlalchemy import text
+
+from db.memory_scoring import (
+    combine,
+    importance_scores,
+    keyword_overlap_scores,
+    memory_tokens,
+    normalize_rows,
+    recency_scores,
+    relevance_scores,
+)
+from db.read_router import read_router
+from db.redis_manager import redis_manager
+from db.user_memory_models import MEMORY_DAY_TIMEZONE
+from services.scenario_index import parse_embedding
+from utils.metrics import metrics
+
+
+# 핫 캐시 사용 여부 (false면 항상 DB 하이브리드 검색)
+USER_MEMORY_CACHE_ENABLED = os.getenv("USER_MEMORY_CACHE_ENABLED", "true").lower() == "true"
+# 프로세스당 최대 캐시 세션 수 (LRU)
+USER_MEMORY_CACHE_MAX_SESSIONS = int(os.getenv("USER_MEMORY_CACHE_MAX_SESSIONS", "1024"))
+# 스냅샷 최대 수명(초) - Redis 버전을 확인하지 못해도 이 시간 후에는 재로드
+USER_MEMORY_CACHE_TTL_SECONDS = float(os.getenv("USER_MEMORY_CACHE_TTL_SECONDS", "300"))
+# 유효 기억이 이보다 많은 세션은 캐시하지 않음 (DB 인덱스 경로가 더 유리)
+USER_MEMORY_CACHE_MAX_ROWS = int(os.getenv("USER_MEMORY_CACHE_MAX_ROWS", "2000"))
+
+VERSION_KEY_PREFIX = "user_memory_cache:version"
+
+_DAY_TZ = ZoneInfo(MEMORY_DAY_TIMEZONE)
+
+
+def version_key(player_id: str, heroine_id: str) -> str:
+    return f"{VERSION_KEY_PREFIX}:{player_id}:{heroine_id}"
+
+
+@dataclass
+class MemorySnapshot:
+    """세션 1개의 유효 기억 스냅샷 (created_at 내림차순)"""
+
+    rows: List[Dict[str, Any]]
+    matrix: np.ndarray
+    importance: np.ndarray
+    created_ts: np.ndarray
+    tokens: List[frozenset]
+    day_buckets: Dict[date, List[int]]
+    version: Optional[str]
+    loaded_at: float
+
+
+class UserMemoryCache:
+    """(player_id, heroine_id)별 유효 기억 핫 캐시
+
+    아키텍처 위치:
+    - UserMemoryManager가 소유 (같은 engine 사용)
+    - search_memories / search_memory_sync / get_valid_memories_sync와
+      날짜 버킷 조회(get_memories_by_day_range)가 먼저 조회하고, None이면 기존 SQL 경로로 진행
+      (비동기 호출부는 asearch / aday_range)
+    - add_memories가 쓰기 후 apply_writes, 기억을 무효화하는 다른 쓰기는 invalidate 호출
+
+    사용 예시:
+        cache = UserMemoryCache(engine)
+        rows = cache.search("10001", "letia", "고양이", query_embedding, 5, SearchWeights())
+        if rows is None:
+            ...  # DB 하이브리드 검색
+        cache.invalidate("10001", "letia")
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._lock = threading.Lock()
+        self._snapshots: "OrderedDict[Tuple[str, str], MemorySnapshot]" = OrderedDict()
+        # 기억이 너무 많아 캐시하지 않는 세션 (key -> 판단 시각)
+        self._oversized: Dict[Tuple[str, str], float] = {}
+
+    # ============================================
+    # 스냅샷 관리
+    # ============================================
+
+    def _current_version(self, player_id: str, heroine_id: str) -> Optional[str]:
+        """Redis 버전 (키가 없으면 "0", Redis 장애 시 None)"""
+        try:
+            return redis_manager.client.get(version_key(player_id, heroine_id)) or "0"
+        except Exception:
+            return None
+
+    async def _acurrent_version(self, player_id: str, heroine_id: str) -> Optional[str]:
+        """_current_version의 비동기 버전"""
+        try:
+            return await redis_manager.async_client.get(version_key(player_id, heroine_id)) or "0"
+        except Exception:
+            return None
+
+    def _bump_version(self, player_id: str, heroine_id: str) -> Optional[int]:
+        """Redis 버전 증가 (증가 후 값, Redis 장애 시 None)"""
+        try:
+            return redis_manager.client.incr(version_key(player_id, heroine_id))
+        except Exception as e:
+            print(f"[MEMORY_CACHE] 버전 증가 실패 ({player_id}, {heroine_id}): {e}")
+            return None
+
+    def _load(self, player_id: str, heroine_id: str, version: Optional[str]) -> Optional[MemorySnapshot]:
+        """DB에서 세션의 유효 기억 로드 (행 수 초과 시 None)"""
+        start = time.perf_counter()
+        sql = text(
+            """
+            SELECT id, player_id, heroine_id, speaker, subject, content, keywords,
+                   content_type, importance, created_at, embedding
+            FROM user_memories
+            WHERE player_id = :player_id
+              AND heroine_id = :heroine_id
+              AND invalid_at IS NULL
+            ORDER BY created_at DESC
+            LIMIT :max_rows
+        """
+        )
+        with read_router.engine_for_read(player_id).connect() as conn:
+            result = conn.execute(
+                sql,
+                {
+                    "player_id": player_id,
+                    "heroine_id": heroine_id,
+                    "max_rows": USER_MEMORY_CACHE_MAX_ROWS + 1,
+                },
+            )
+            records = [dict(row._mapping) for row in result]
+
+        if len(records) > USER_MEMORY_CACHE_MAX_ROWS:
+            metrics.inc("user_memory_cache_oversized_total")
+            return None
+
+        rows, vectors, tokens = [], [], []
+        for record in records:
+            vector = parse_embedding(record.pop("embedding"))
+            if vector is None:
+                continue
+            record["id"] = str(record["id"])
+            keywords = record.pop("keywords") or []
+            rows.append(record)
+            vectors.append(vector)
+            tokens.append(memory_tokens(record["content"], keywords))
+
+        if vectors:
+            matrix = normalize_rows(np.vstack(vectors))
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+
+        snapshot = self._build(rows, matrix, tokens, version, time.monotonic())
+        metrics.observe("user_memory_cache_load_seconds", time.perf_counter() - start)
+        metrics.observe("user_memory_cache_snapshot_rows", len(rows))
+        return snapshot
+
+    @staticmethod
+    def _build(
+        rows: List[Dict[str, Any]],
+        matrix: np.ndarray,
+        tokens: List[frozenset],
+        version: Optional[str],
+        loaded_at: float,
+    ) -> MemorySnapshot:
+        """created_at 내림차순 행 + 정규화 임베딩 행렬로 스냅샷 구성"""
+        # 달력 날짜 -> 행 인덱스 (rows가 created_at 내림차순이므로 버킷 안도 내림차순)
+        day_buckets: Dict[date, List[int]] = {}
+        for idx, row in enumerate(rows):
+            day = row["created_at"].astimezone(_DAY_TZ).date()
+            day_buckets.setdefault(day, []).append(idx)
+
+        return MemorySnapshot(
+            rows=rows,
+            matrix=matrix,
+            importance=np.asarray([r["importance"] or 0 for r in rows], dtype=np.float32),
+            created_ts=np.asarray([r["created_at"].timestamp() for r in rows], dtype=np.float64),
+            tokens=tokens,
+            day_buckets=day_buckets,
+            version=version,
+            loaded_at=loaded_at,
+        )
+
+    def _lookup(self, key: Tuple[str, str], now: float) -> Tuple[bool, Optional[MemorySnapshot]]:
+        """(캐시 불가 세션 여부, 보관 중인 스냅샷)"""
+        with self._lock:
+            oversized_at = self._oversized.get(key)
+            if oversized_at is not None:
+                if now - oversized_at < USER_MEMORY_CACHE_TTL_SECONDS:
+                    return True, None
+                del self._oversized[key]
+            return False, self._snapshots.get(key)
+
+    def _validate(
+        self,
+        key: Tuple[str, str],
+        snapshot: Optional[MemorySnapshot],
+        version: Optional[str],
+        now: float,
+    ) -> Optional[MemorySnapshot]:
+        """보관 중인 스냅샷이 유효하면 반환, 재로드가 필요하면 None"""
+        if snapshot is not None:
+            fresh = now - snapshot.loaded_at < USER_MEMORY_CACHE_TTL_SECONDS
+            same_version = version is None or version == snapshot.version
+            if fresh and same_version:
+                with self._lock:
+                    if key in self._snapshots:
+                        self._snapshots.move_to_end(key)
+                metrics.inc("user_memory_cache_requests_total", labels={"result": "hit"})
+                return snapshot
+            reason = "stale" if not same_version else "expired"
+        else:
+            reason = "miss"
+        metrics.inc("user_memory_cache_requests_total", labels={"result": reason})
+        return None
+
+    def _store(
+        self, key: Tuple[str, str], snapshot: Optional[MemorySnapshot], now: float
+    ) -> Optional[MemorySnapshot]:
+        """로드한 스냅샷 보관 (None이면 캐시 불가 세션으로 기록)"""
+        with self._lock:
+            if snapshot is None:
+                self._oversized[key] = now
+                self._snapshots.pop(key, None)
+                return None
+            self._snapshots[key] = snapshot
+            self._snapshots.move_to_end(key)
+            while len(self._snapshots) > USER_MEMORY_CACHE_MAX_SESSIONS:
+                self._snapshots.popitem(last=False)
+            metrics.set_gauge("user_memory_cache_sessions", len(self._snapshots))
+        return snapshot
+
+    def _snapshot(self, player_id: str, heroine_id: str) -> Optional[MemorySnapshot]:
+        """유효한 스냅샷 반환 (없거나 오래됐으면 재로드, 캐시 불가면 None)"""
+        if not USER_MEMORY_CACHE_ENABLED:
+            return None
+
+        key = (player_id, heroine_id)
+        now = time.monotonic()
+        skip, snapshot = self._lookup(key, now)
+        if skip:
+            return None
+
+        version = self._current_version(player_id, heroine_id)
+        snapshot = self._validate(key, snapshot, version, now)
+        if snapshot is not None:
+            return snapshot
+
+        # 버전을 먼저 읽고 로드하므로 로드 중 쓰기가 있으면 다음 조회에서 다시 로드됨
+        try:
+            snapshot = self._load(player_id, heroine_id, version)
+        except Exception as e:
+            print(f"[MEMORY_CACHE] 스냅샷 로드 실패, DB 검색 사용: {e}")
+            return None
+        return self._store(key, snapshot, now)
+
+    async def _asnapshot(self, player_id: str, heroine_id: str) -> Optional[MemorySnapshot]:
+        """_snapshot의 비동기 버전 (재로드는 스레드에서 실행해 이벤트 루프를 막지 않음)"""
+        if not USER_MEMORY_CACHE_ENABLED:
+            return None
+
+        key = (player_id, heroine_id)
+        now = time.monotonic()
+        skip, snapshot = self._lookup(key, now)
+        if skip:
+            return None
+
+        version = await self._acurrent_version(player_id, heroine_id)
+        snapshot = self._validate(key, snapshot, version, now)
+        if snapshot is not None:
+            return snapshot
+
+        try:
+            snapshot = await asyncio.to_thread(self._load, player_id, heroine_id, version)
+        except Exception as e:
+            print(f"[MEMORY_CACHE] 스냅샷 로드 실패, DB 검색 사용: {e}")
+            return None
+        return self._store(key, snapshot, now)
+
+    def apply_writes(
+        self,
+        player_id: str,
+        heroine_id: str,
+        added: List[Dict[str, Any]],
+        removed_ids: List[str],
+    ) -> None:
+        """add_memories 저장 후 호출 - 보관 중인 스냅샷에 바뀐 행만 반영
+
+        세션 전체를 다시 읽지 않고 새 기억을 앞에 붙이고(created_at 내림차순 유지)
+        무효화된 기억을 뺍니다. Redis 버전은 올리므로 다른 워커는 다음 조회에서 재로드합니다.
+        이 워커의 스냅샷은 그 사이 다른 쓰기가 없었을 때(버전이 정확히 1 증가)만 새 버전으로 유지하고,
+        아니면 제거해서 다음 조회에서 재로드합니다.
+
+        Args:
+            player_id: 플레이어 ID
+            heroine_id: 히로인 ID
+            added: 저장된 기억 (스냅샷 행 컬럼 + "embedding", "keywords")
+            removed_ids: 무효화된 기억 ID
+        """
+        key = (player_id, heroine_id)
+        version = self._bump_version(player_id, heroine_id)
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is None:
+                return
+            if version is None or snapshot.version != str(version - 1):
+                self._snapshots.pop(key, None)
+                metrics.inc("user_memory_cache_invalidations_total")
+                return
+
+            removed = set(removed_ids)
+            keep = [idx for idx, row in enumerate(snapshot.rows) if row["id"] not in removed]
+            new = [memory for memory in added if memory["id"] not in removed]
+            if len(keep) + len(new) > USER_MEMORY_CACHE_MAX_ROWS:
+                self._snapshots.pop(key, None)
+                self._oversized[key] = time.monotonic()
+                metrics.inc("user_memory_cache_oversized_total")
+                return
+
+            new.sort(key=lambda memory: memory["created_at"], reverse=True)
+            rows = [
+                {k: v for k, v in memory.items() if k not in ("embedding", "keywords")}
+                for memory in new
+            ] + [snapshot.rows[idx] for idx in keep]
+            tokens = [memory_tokens(memory["content"], memory["keywords"]) for memory in new] + [
+                snapshot.tokens[idx] for idx in keep
+            ]
+            blocks = []
+            if new:
+                blocks.append(
+                    normalize_rows(np.asarray([memory["embedding"] for memory in new], dtype=np.float32))
+                )
+            if keep:
+                blocks.append(snapshot.matrix[keep])
+            matrix = np.vstack(blocks) if blocks else np.zeros((0, 0), dtype=np.float32)
+
+            # loaded_at은 유지 (오프라인 직접 UPDATE는 원래 TTL 안에 반영)
+            self._snapshots[key] = self._build(rows, matrix, tokens, str(version), snapshot.loaded_at)
+        metrics.inc("user_memory_cache_appends_total")
+
+    def invalidate(self, player_id: str, heroine_id: str) -> None:
+        """세션 기억이 바뀐 뒤 호출 (로컬 제거 + 다른 워커용 버전 증가)"""
+        key = (player_id, heroine_id)
+        with self._lock:
+            self._snapshots.pop(key, None)
+            self._oversized.pop(key, None)
+        metrics.inc("user_memory_cache_invalidations_total")
+        self._bump_version(player_id, heroine_id)
+
+    # ============================================
+    # 조회
+    # ============================================
+
+    def search(
+        self,
+        player_id: str,
+        heroine_id: str,
+        query_text: str,
+        query_embedding: List[float],
+        limit: int,
+        weights,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """로컬 4요소 하이브리드 검색
+
+        search_user_memories_hybrid와 같은 컬럼(recency_score ~ final_score)을 담은
+        dict 리스트를 반환합니다. 캐시를 사용할 수 없으면 None.
+        """
+        snapshot = self._snapshot(player_id, heroine_id)
+        if snapshot is None:
+            return None
+        return self._score(snapshot, query_text, query_embedding, limit, weights)
+
+    async def asearch(
+        self,
+        player_id: str,
+        heroine_id: str,
+        query_text: str,
+        query_embedding: List[float],
+        limit: int,
+        weights,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """search의 비동기 버전 (스냅샷 재로드를 스레드에서 실행)"""
+        snapshot = await self._asnapshot(player_id, heroine_id)
+        if snapshot is None:
+            return None
+        return self._score(snapshot, query_text, query_embedding, limit, weights)
+
+    def _score(
+        self,
+        snapshot: MemorySnapshot,
+        query_text: str,
+        query_embedding: List[float],
+        limit: int,
+        weights,
+    ) -> List[Dict[str, Any]]:
+        if not snapshot.rows:
+            return []
+
+        start = time.perf_counter()
+        now_ts = datetime.now(timezone.utc).timestamp()
+        recency = recency_scores(snapshot.created_ts, now_ts, weights.decay_days)
+        importance = importance_scores(snapshot.importance)
+        relevance = relevance_scores(snapshot.matrix, query_embedding)
+        keyword = keyword_overlap_scores(query_text, snapshot.tokens)
+        final = combine(weights, recency, importance, relevance, keyword)
+        order = np.argsort(-final, kind="stable")[:limit]
+
+        results = []
+        for idx in order:
+            row = dict(snapshot.rows[idx])
+            row["recency_score"] = float(recency[idx])
+            row["importance_score"] = float(importance[idx])
+            row["relevance_score"] = float(relevance[idx])
+            row["keyword_score"] = float(keyword[idx])
+            row["final_score"] = float(final[idx])
+            results.append(row)
+
+        metrics.observe("user_memory_cache_search_seconds", time.perf_counter() - start)
+        return results
+
+    def valid_memories(
+        self, player_id: str, heroine_id: str, limit: Optional[int] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """유효 기억 (created_at 내림차순, 캐시를 사용할 수 없으면 None)"""
+        snapshot = self._snapshot(player_id, heroine_id)
+        if snapshot is None:
+            return None
+        rows = snapshot.rows if limit is None else snapshot.rows[:limit]
+        return [dict(row) for row in rows]
+
+    def day_range(
+        self, player_id: str, heroine_id: str, from_day: date, to_day: date, limit: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """달력 날짜 범위(양 끝 포함)에 생성된 유효 기억 (최신순, 캐시를 사용할 수 없으면 None)"""
+        snapshot = self._snapshot(player_id, heroine_id)
+        if snapshot is None:
+            return None
+        return self._collect_days(snapshot, from_day, to_day, limit)
+
+    async def aday_range(
+        self, player_id: str, heroine_id: str, from_day: date, to_day: date, limit: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """day_range의 비동기 버전 (스냅샷 재로드를 스레드에서 실행)"""
+        snapshot = await self._asnapshot(player_id, heroine_id)
+        if snapshot is None:
+            return None
+        return self._collect_days(snapshot, from_day, to_day, limit)
+
+    @staticmethod
+    def _collect_days(
+        snapshot: MemorySnapshot, from_day: date, to_day: date, limit: int
+    ) -> List[Dict[str, Any]]:
+        results = []
+        day = to_day
+        while day >= from_day and len(results) < limit:
+            for idx in snapshot.day_buckets.get(day, ()):
+                results.append(dict(snapshot.rows[idx]))
+                if len(results) >= limit:
+                    break
+            day -= timedelta(days=1)
+        return results
@@ -21,14 +21,16 @@ PostgreSQL + pgvector + PGroonga 기반 4요소 하이브리드 검색
     )
 """
 
+import asyncio
 import json
 import uuid
 import logging
-from typing import List, Optional
-from datetime import datetime
-from sqlalchemy import create_engine, text
-from langchain_openai import OpenAIEmbeddings
-from langchain.chat_models import init_chat_model
+from typing import List, Optional, Dict
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+import numpy as np
+from sqlalchemy import text
+from utils.client_registry import get_chat_model, get_embeddings
 from dotenv import load_dotenv
 from enums.LLM import LLM
 
@@ -37,8 +39,19 @@ load_dotenv()
 # 로거 설정
 logger = logging.getLogger("user_memory")
 
-from db.config import CONNECTION_URL
+# 턴당 최대 저장 fact 수
+MAX_FACTS_PER_TURN = 2
+
+from db.engine_registry import get_engine
+from db.read_router import read_router
+from db.config import MEMORY_RESCORE_CANDIDATES, MEMORY_VECTOR_QUANTIZATION
+from db.vector_binding import to_vector
 from utils.langfuse_tracker import tracker
+from db.fact_prefilter import fact_prefilter
+from db.memory_scoring import normalize_rows
+from utils.resilience import provider_for_model, resilience
+from utils.rate_limiter import PRIORITY_BACKGROUND, request_priority
+from db.user_memory_cache import UserMemoryCache
 from db.user_memory_models import (
     Speaker,
     Subject,
@@ -48,6 +61,7 @@ from db.user_memory_models import (
     UserMemory,
     NPC_ID_TO_HEROINE,
     HEROINE_TO_SPEAKER,
+    MEMORY_DAY_TIMEZONE,
 )
 
 
@@ -69,13 +83,16 @@ class UserMemoryManager:
             embedding_model: OpenAI 임베딩 모델명
         """
         # DB 연결
-        self.engine = create_engine(CONNECTION_URL, pool_pre_ping=True)
+        self.engine = get_engine()
 
         # 임베딩 모델
-        self.embeddings = OpenAIEmbeddings(model=embedding_model)
+        self.embeddings = get_embeddings(embedding_model)
+
+        # 세션별 유효 기억 핫 캐시 (하이브리드 검색을 로컬에서 계산)
+        self.hot_cache = UserMemoryCache(self.engine)
 
         # Fact 추출용 LLM (temperature=0으로 일관된 추출)
-        self.extract_llm = init_chat_model(model=LLM.GPT5_MINI)
+        self.extract_llm = get_chat_model(LLM.GPT5_MINI)
 
         # 기본 검색 가중치
         self.default_weights = SearchWeights()
@@ -83,12 +100,21 @@ class UserMemoryManager:
         # 중복 판정 임계값 (90% 유사도 이상이면 중복)
         self.duplicate_threshold = 0.9
 
+        # 충돌 후보 검색 임계값 (DB 함수에 전달)
+        self.conflict_candidate_threshold = 0.55
+
+        # LLM 충돌 판정 프리필터: 이 유사도 미만 후보는 LLM에 보내지 않음
+        self.conflict_prefilter_threshold = 0.6
+
+        # fact당 LLM에 보낼 최대 충돌 후보 수 (유사도 높은 순)
+        self.max_conflict_candidates = 3
+
     # ============================================
     # Fact 추출
     # ============================================
 
     async def extract_facts(
-        self, conversation: str, heroine_id: str
+        self, conversation: str, heroine_id: str, turn_count: int = 1
     ) -> List[ExtractedFact]:
         """대화에서 장기 기억할 fact 추출
 
@@ -97,16 +123,28 @@ class UserMemoryManager:
         Args:
             conversation: 대화 내용 (예: "플레이어: 고양이 좋아해\n레티아: 저도요")
             heroine_id: 히로인 ID (letia, lupames, roco)
+            turn_count: 대화에 포함된 턴 수 (2 이상이면 [Turn N] 단위 배치 추출)
 
         Returns:
-            추출된 ExtractedFact 리스트
+            추출된 ExtractedFact 리스트 (배치 추출 시 fact.turn에 턴 번호 포함)
         """
+        max_facts = MAX_FACTS_PER_TURN * turn_count
+        batch_rules = ""
+        if turn_count > 1:
+            batch_rules = f"""
+[Batch Rules]
+- The conversation contains {turn_count} turns, each marked as [Turn N].
+- Evaluate each turn independently, using earlier turns only as context.
+- Every object MUST include an integer "turn" field: the number N of the [Turn N] the fact came from.
+- Extract at most {MAX_FACTS_PER_TURN} objects per turn.
+"""
+
         prompt = f"""You are an expert Memory Manager for an AI heroine.
 Your goal is to extract key facts from the conversation to be stored in the long-term memory database.
 
 [Conversation]
 {conversation}
-
+{batch_rules}
 [Heroine ID]
 {heroine_id}
 
@@ -155,7 +193,7 @@ Return an EMPTY array [] in these cases:
 - Conversations that reveal NO new personal facts about the user
 
 [Output Format - JSON Array]
-Return a JSON array of **0 to 2** objects.
+Return a JSON array of **0 to {max_facts}** objects.
 - Only extract facts with importance >= 5.
 - Only use types: preference, trait, event, opinion, personal.
 - Do NOT force extraction. Quality over quantity.
@@ -216,7 +254,18 @@ Output:
             }
         )
         
-        response = await self.extract_llm.ainvoke(prompt, **config)
+        # 프로바이더 장애 시 추출 생략 (대화 응답은 이미 나간 상태라 기억만 누락)
+        # 기억 추출은 background 우선순위로 레이트 리밋 (유저 대화 우선)
+        with request_priority(PRIORITY_BACKGROUND):
+            response = await resilience.call(
+                provider_for_model(LLM.GPT5_MINI),
+                lambda: self.extract_llm.ainvoke(prompt, **config),
+                retries=1,
+                fallback=lambda: None,
+            )
+        if response is None:
+            logger.warning(f"[MEMORY] Fact extraction skipped: provider unavailable")
+            return []
 
         # JSON 파싱
         try:
@@ -269,6 +318,13 @@ Output:
                 
                 keywords = item.get("keywords", []) or []
                 player_name = item.get("player_name")
+                turn = None
+                if turn_count > 1:
+                    # 범위를 벗어난 턴 번호는 마지막 턴으로 귀속
+                    try:
+                        turn = min(max(int(item.get("turn", turn_count)), 1), turn_count)
+                    except (TypeError, ValueError):
+                        turn = turn_count
                 fact = ExtractedFact(
                     speaker=Speaker(item["speaker"]),
                     subject=Subject(item["subject"]),
@@ -277,6 +333,7 @@ Output:
                     importance=importance,
                     keywords=keywords,
                     player_name=player_name,
+                    turn=turn,
                 )
                 facts.append(fact)
 
@@ -304,9 +361,7 @@ Output:
     ) -> dict:
         """단일 fact 저장 (중복/충돌 처리 포함)
 
-        하이브리드 충돌 감지:
-        1. 90% 유사도: 완전 중복으로 바로 무효화
-        2. 65% 유사도 + 같은 content_type: LLM으로 충돌 판단
+        add_memories에 fact 1개를 넘기는 편의 메서드입니다.
 
         Args:
             player_id: 플레이어 ID
@@ -319,80 +374,198 @@ Output:
                 "invalidated": 무효화된 기억 리스트 [{"content": ..., "created_at": ...}]
             }
         """
-        # 1. 임베딩 생성 (content + keywords)
-        text_to_embed = self._combine_content_with_keywords(fact.content, fact.keywords)
-        embedding = self.embeddings.embed_query(text_to_embed)
-        print(
-            "[MemorySave]",
-            f"player={player_id}",
-            f"heroine={heroine_id}",
-            f"speaker={fact.speaker.value}",
-            f"subject={fact.subject.value}",
-            f"content={fact.content}",
-            f"keywords={fact.keywords}",
-            f"embed_input={text_to_embed}",
-        )
+        results = await self.add_memories(player_id, heroine_id, [fact])
+        return results[0]
 
-        # 무효화된 기억 정보 수집
-        invalidated = []
+    async def add_memories(
+        self, player_id: str, heroine_id: str, facts: List[ExtractedFact]
+    ) -> List[dict]:
+        """여러 fact 저장 (중복/충돌 처리 포함)
 
-        # 2. 완전 중복 검사 (90% 유사도)
-        similar = await self._find_similar_memory(player_id, heroine_id, embedding)
+        하이브리드 충돌 감지:
+        1. 90% 유사도: 완전 중복으로 바로 무효화
+        2. 충돌 후보(같은 content_type) 중 임베딩 유사도 프리필터를 통과한 것만
+           모든 fact의 후보를 모아 LLM 1회 호출로 쌍별 판정
+        3. 같은 배치의 앞선 fact도 기존 기억과 같은 기준으로 비교 (나중 fact 우선)
+           - 중복/충돌로 밀려난 앞선 fact는 저장 후 같은 트랜잭션에서 무효화
 
-        if similar:
-            await self._invalidate_memory(similar["id"])
-            invalidated.append({"content": similar["content"]})
-            print(f"[INFO] 완전 중복 무효화: {similar['content'][:50]}...")
-        else:
-            # 3. 충돌 후보 검색 (65% 유사도 + 같은 content_type)
+        Args:
+            player_id: 플레이어 ID
+            heroine_id: 히로인 ID
+            facts: 저장할 fact 리스트 (저장 순서대로)
+
+        Returns:
+            fact 순서대로 dict 리스트: {"memory_id": ..., "invalidated": [...]}
+        """
+        if not facts:
+            return []
+
+        # 1. 임베딩 생성 (content + keywords, 1회 배치 호출)
+        texts_to_embed = [
+            self._combine_content_with_keywords(fact.content, fact.keywords)
+            for fact in facts
+        ]
+        embeddings = await self.embeddings.aembed_documents(texts_to_embed)
+
+        # 배치 내 fact 간 코사인 유사도 (앞선 fact와의 중복/충돌 판정용)
+        batch_similarity = normalize_rows(np.asarray(embeddings, dtype=np.float32))
+        batch_similarity = batch_similarity @ batch_similarity.T
+
+        invalidated_by_fact: List[List[dict]] = [[] for _ in facts]
+        # (fact 인덱스, 후보) - LLM 판정 대상 (후보가 같은 배치 fact면 "batch_index" 포함)
+        pending_pairs: List[tuple] = []
+        # 같은 기존 기억이 여러 fact의 후보가 되어도 한 번만 무효화
+        invalidated_ids = set()
+        # 나중 fact에 밀려난 같은 배치 fact 인덱스
+        superseded = set()
+
+        for idx, (fact, embedding) in enumerate(zip(facts, embeddings)):
+            print(
+                "[MemorySave]",
+                f"player={player_id}",
+                f"heroine={heroine_id}",
+                f"speaker={fact.speaker.value}",
+                f"subject={fact.subject.value}",
+                f"content={fact.content}",
+                f"keywords={fact.keywords}",
+                f"embed_input={texts_to_embed[idx]}",
+            )
+
+            # 2. 같은 배치의 앞선 fact와 비교 (중복이면 바로 대체, 충돌 후보는 LLM 판정에 합류)
+            for prev in range(idx):
+                if prev in superseded:
+                    continue
+                similarity = float(batch_similarity[idx, prev])
+                if similarity >= self.duplicate_threshold:
+                    superseded.add(prev)
+                    invalidated_by_fact[idx].append({"content": facts[prev].content})
+                    print(f"[INFO] 배치 내 중복 대체: {facts[prev].content[:50]}...")
+                elif (
+                    facts[prev].content_type == fact.content_type
+                    and similarity >= self.conflict_prefilter_threshold
+                ):
+                    pending_pairs.append(
+                        (idx, {"batch_index": prev, "content": facts[prev].content})
+                    )
+
+            # 3. 완전 중복 검사 (90% 유사도)
+            similar = await self._find_similar_memory(player_id, heroine_id, embedding)
+
+            if similar:
+                if similar["id"] not in invalidated_ids:
+                    await self._invalidate_memory(
+                        similar["id"], player_id, heroine_id, update_cache=False
+                    )
+                    invalidated_ids.add(similar["id"])
+                    invalidated_by_fact[idx].append({"content": similar["content"]})
+                    print(f"[INFO] 완전 중복 무효화: {similar['content'][:50]}...")
+                continue
+
+            # 4. 충돌 후보 검색 + 임베딩 유사도 프리필터
             candidates = await self._find_conflict_candidates(
                 player_id, heroine_id, embedding, fact.content_type.value
             )
+            for candidate in self._prefilter_conflict_candidates(candidates):
+                pending_pairs.append((idx, candidate))
 
-            # 4. LLM으로 충돌 판단
-            for candidate in candidates:
-                is_conflict = await self._check_conflict_with_llm(
-                    fact.content, candidate["content"]
+        # 5. 모든 (새 fact, 후보) 쌍을 LLM 1회 호출로 판정
+        if pending_pairs:
+            verdicts = await self._check_conflicts_batch_with_llm(
+                [(facts[idx].content, c["content"]) for idx, c in pending_pairs]
+            )
+            for (idx, candidate), is_conflict in zip(pending_pairs, verdicts):
+                if not is_conflict:
+                    continue
+                if "batch_index" in candidate:
+                    # 같은 배치의 앞선 fact와 충돌 -> 나중 fact 우선
+                    if candidate["batch_index"] not in superseded:
+                        superseded.add(candidate["batch_index"])
+                        invalidated_by_fact[idx].append({"content": candidate["content"]})
+                        print(
+                            f"[INFO] 배치 내 취향 변경 감지, 앞선 fact 무효화: {candidate['content'][:50]}..."
+                        )
+                    continue
+                if candidate["id"] in invalidated_ids:
+                    continue
+                await self._invalidate_memory(
+                    candidate["id"], player_id, heroine_id, update_cache=False
+                )
+                invalidated_ids.add(candidate["id"])
+                invalidated_by_fact[idx].append({"content": candidate["content"]})
+                print(
+                    f"[INFO] 취향 변경 감지, 기존 무효화: {candidate['content'][:50]}..."
                 )
-                if is_conflict:
-                    await self._invalidate_memory(candidate["id"])
-                    invalidated.append({"content": candidate["content"]})
-                    print(
-                        f"[INFO] 취향 변경 감지, 기존 무효화: {candidate['content'][:50]}..."
-                    )
-
-        # 5. 새 기억 저장
-        memory_id = str(uuid.uuid4())
 
+        # 6. 새 기억 저장 (밀려난 배치 fact는 같은 트랜잭션에서 무효화)
         sql = text(
             """
             INSERT INTO user_memories 
             (id, player_id, heroine_id, speaker, subject, content, keywords, content_type, embedding, importance)
             VALUES (:id, :player_id, :heroine_id, :speaker, :subject, :content, :keywords, :content_type, 
                     CAST(:embedding AS vector), :importance)
-            RETURNING id
+            RETURNING created_at
         """
         )
 
+        results = []
+        # 세션 캐시에 덧붙일 새 기억 (스냅샷 행 컬럼 + embedding, keywords)
+        added = []
         with self.engine.connect() as conn:
-            conn.execute(
-                sql,
-                {
-                    "id": memory_id,
-                    "player_id": player_id,
-                    "heroine_id": heroine_id,
-                    "speaker": fact.speaker.value,
-                    "subject": fact.subject.value,
-                    "content": fact.content,
-                    "keywords": fact.keywords,
-                    "content_type": fact.content_type.value,
-                    "embedding": str(embedding),
-                    "importance": fact.importance,
-                },
-            )
+            for idx, (fact, embedding) in enumerate(zip(facts, embeddings)):
+                memory_id = str(uuid.uuid4())
+                created_at = conn.execute(
+                    sql,
+                    {
+                        "id": memory_id,
+                        "player_id": player_id,
+                        "heroine_id": heroine_id,
+                        "speaker": fact.speaker.value,
+                        "subject": fact.subject.value,
+                        "content": fact.content,
+                        "keywords": fact.keywords,
+                        "content_type": fact.content_type.value,
+                        "embedding": to_vector(embedding),
+                        "importance": fact.importance,
+                    },
+                ).scalar()
+                results.append(
+                    {"memory_id": memory_id, "invalidated": invalidated_by_fact[idx]}
+                )
+                added.append(
+                    {
+                        "id": memory_id,
+                        "player_id": player_id,
+                        "heroine_id": heroine_id,
+                        "speaker": fact.speaker.value,
+                        "subject": fact.subject.value,
+                        "content": fact.content,
+                        "content_type": fact.content_type.value,
+                        "importance": fact.importance,
+                        "created_at": created_at,
+                        "embedding": embedding,
+                        "keywords": fact.keywords,
+                    }
+                )
+            if superseded:
+                conn.execute(
+                    text(
+                        """
+                        UPDATE user_memories
+                        SET invalid_at = NOW(), updated_at = NOW()
+                        WHERE id = ANY(CAST(:ids AS uuid[]))
+                    """
+                    ),
+                    {"ids": [results[i]["memory_id"] for i in sorted(superseded)]},
+                )
             conn.commit()
 
-        return {"memory_id": memory_id, "invalidated": invalidated}
+        # 새 기억이 다음 검색에 보이도록 세션 캐시에 반영 (전체 재로드 없이 바뀐 행만)
+        # (read-your-writes 표시를 먼저 해야 다른 워커의 재로드가 지연된 복제본에서 읽지 않음)
+        read_router.mark_write(player_id)
+        removed_ids = list(invalidated_ids) + [results[i]["memory_id"] for i in superseded]
+        self.hot_cache.apply_writes(player_id, heroine_id, added, removed_ids)
+
+        return results
 
     def _extract_player_name(self, fact: ExtractedFact) -> Optional[str]:
         """ExtractedFact에서 플레이어 이름 추출
@@ -432,45 +605,133 @@ Output:
         logger.info(f"[MEMORY] User: {user_message[:100]}{'...' if len(user_message) > 100 else ''}")
         logger.info(f"[MEMORY] NPC: {npc_response[:100]}{'...' if len(npc_response) > 100 else ''}")
         
+        # 잡담이면 LLM 추출 생략
+        decision = fact_prefilter.check(user_message)
+        if not decision.should_extract:
+            logger.info(f"[MEMORY] Prefilter skip (score={decision.score:.1f}, {decision.reasons})")
+            return {"memory_ids": [], "preference_changes": [], "extracted_player_name": None}
+
         # 대화 포맷
         conversation = f"플레이어: {user_message}\n{heroine_id}: {npc_response}"
 
         # Fact 추출
         facts = await self.extract_facts(conversation, heroine_id)
-        facts = facts[:2]
+        facts = facts[:MAX_FACTS_PER_TURN]
+
+        result = await self._store_facts(player_id, heroine_id, facts)
+        logger.info(f"[MEMORY] ========== SAVE CONVERSATION END ({len(result['memory_ids'])} saved) ==========")
+        return result
+
+    async def save_conversation_batch(
+        self, player_id: str, heroine_id: str, turns: List[Dict[str, str]]
+    ) -> dict:
+        """여러 턴을 한 번의 LLM 호출로 fact 추출 후 저장
+
+        턴마다 extract_facts를 호출하는 대신 [Turn N] 표식을 붙인 대화 윈도우를
+        한 번에 추출하고, 각 fact는 fact.turn으로 원래 턴에 귀속됩니다.
+
+        Args:
+            player_id: 플레이어 ID
+            heroine_id: 히로인 ID
+            turns: 턴 리스트 [{"user": "...", "npc": "..."}, ...] (오래된 순)
+
+        Returns:
+            dict: save_conversation 반환값 +
+                "facts_by_turn": {턴 번호(1부터): [fact content, ...]}
+        """
+        if not turns:
+            return {
+                "memory_ids": [],
+                "preference_changes": [],
+                "extracted_player_name": None,
+                "facts_by_turn": {},
+            }
+
+        if len(turns) == 1:
+            result = await self.save_conversation(
+                player_id, heroine_id, turns[0]["user"], turns[0]["npc"]
+            )
+            result["facts_by_turn"] = {}
+            return result
+
+        logger.info(f"[MEMORY] ========== SAVE CONVERSATION BATCH START ==========")
+        logger.info(f"[MEMORY] Player: {player_id}, Heroine: {heroine_id}, Turns: {len(turns)}")
+
+        # 모든 턴이 잡담이면 LLM 추출 생략 (하나라도 통과하면 윈도우 전체를 문맥으로 전달)
+        decisions = [fact_prefilter.check(turn["user"], source="batch") for turn in turns]
+        if not any(d.should_extract for d in decisions):
+            logger.info(f"[MEMORY] Prefilter skip: all {len(turns)} turn(s) are small talk")
+            return {
+                "memory_ids": [],
+                "preference_changes": [],
+                "extracted_player_name": None,
+                "facts_by_turn": {},
+            }
 
+        # [Turn N] 단위 대화 포맷
+        blocks = [
+            f"[Turn {i}]\n플레이어: {turn['user']}\n{heroine_id}: {turn['npc']}"
+            for i, turn in enumerate(turns, 1)
+        ]
+        conversation = "\n\n".join(blocks)
+
+        facts = await self.extract_facts(conversation, heroine_id, turn_count=len(turns))
+
+        # 턴당 최대 개수 제한 + 턴 순서대로 정렬 (나중 턴의 취향 변경이 최종 상태가 되도록)
+        per_turn: Dict[int, List[ExtractedFact]] = {}
+        for fact in facts:
+            per_turn.setdefault(fact.turn, []).append(fact)
+        ordered_facts = []
+        for turn_no in sorted(per_turn):
+            ordered_facts.extend(per_turn[turn_no][:MAX_FACTS_PER_TURN])
+
+        result = await self._store_facts(player_id, heroine_id, ordered_facts)
+        result["facts_by_turn"] = {
+            turn_no: [f.content for f in per_turn[turn_no][:MAX_FACTS_PER_TURN]]
+            for turn_no in sorted(per_turn)
+        }
+
+        logger.info(f"[MEMORY] ========== SAVE CONVERSATION BATCH END ({len(result['memory_ids'])} saved) ==========")
+        return result
+
+    async def _store_facts(
+        self, player_id: str, heroine_id: str, facts: List[ExtractedFact]
+    ) -> dict:
+        """추출된 fact들을 순서대로 저장 (중복/충돌 처리 포함)
+
+        Returns:
+            dict: {"memory_ids", "preference_changes", "extracted_player_name"}
+        """
         if not facts:
             logger.info(f"[MEMORY] FINAL RESULT: No facts to save - skipping DB insert")
-            logger.info(f"[MEMORY] ========== SAVE CONVERSATION END (0 saved) ==========")
             return {"memory_ids": [], "preference_changes": [], "extracted_player_name": None}
 
-        # 각 fact 저장
         memory_ids = []
         preference_changes = []
         extracted_player_name = None
 
-        for idx, fact in enumerate(facts):
-            logger.info(f"[MEMORY] Saving fact #{idx+1} to DB...")
-            result = await self.add_memory(player_id, heroine_id, fact)
+        logger.info(f"[MEMORY] Saving {len(facts)} fact(s) to DB...")
+        results = await self.add_memories(player_id, heroine_id, facts)
+
+        for idx, (fact, result) in enumerate(zip(facts, results)):
             if result["memory_id"]:
                 memory_ids.append(result["memory_id"])
-                logger.info(f"[MEMORY] Saved with ID: {result['memory_id']}")
+                turn_info = f" (turn {fact.turn})" if fact.turn else ""
+                logger.info(f"[MEMORY] Saved fact #{idx+1}{turn_info} with ID: {result['memory_id']}")
 
             # 무효화된 기억이 있으면 취향 변화로 기록
             for inv in result["invalidated"]:
                 preference_changes.append({"old": inv["content"], "new": fact.content})
                 logger.info(f"[MEMORY] Preference changed: '{inv['content'][:50]}' -> '{fact.content[:50]}'")
 
-            # 이름 추출 시도
-            if extracted_player_name is None:
-                name = self._extract_player_name(fact)
-                if name:
-                    extracted_player_name = name
-                    logger.info(f"[MEMORY] Player name extracted: {name}")
+            # 이름 추출 시도 (배치에서는 가장 나중 턴의 이름을 사용)
+            name = self._extract_player_name(fact)
+            if name and (extracted_player_name is None or fact.turn):
+                extracted_player_name = name
+                logger.info(f"[MEMORY] Player name extracted: {name}")
 
         logger.info(f"[MEMORY] FINAL RESULT: {len(memory_ids)} fact(s) saved to user_memories")
-        logger.info(f"[MEMORY] ========== SAVE CONVERSATION END ({len(memory_ids)} saved) ==========")
-        
+
         return {
             "memory_ids": memory_ids,
             "preference_changes": preference_changes,
@@ -506,61 +767,36 @@ Output:
         weights = weights or self.default_weights
 
         # 검색어 임베딩
-        query_embedding = self.embeddings.embed_query(query)
+        query_embedding = await self.embeddings.aembed_query(query)
 
-        # DB 검색 함수 호출
-        sql = text(
-            """
-            SELECT * FROM search_user_memories_hybrid(
-                :player_id,
-                :heroine_id,
-                :query_text,
-                CAST(:query_embedding AS vector),
-                :top_k,
-                :w_recency,
-                :w_importance,
-                :w_relevance,
-                :w_keyword
-            )
-        """
+        # 세션 캐시 우선 (스냅샷 재로드와 DB 검색은 스레드에서 실행)
+        rows = await self.hot_cache.asearch(
+            player_id, heroine_id, query, query_embedding, limit, weights
         )
+        if rows is None:
+            rows = await asyncio.to_thread(
+                self._query_hybrid, player_id, heroine_id, query, query_embedding, limit, weights
+            )
 
         memories = []
-
-        with self.engine.connect() as conn:
-            result = conn.execute(
-                sql,
-                {
-                    "player_id": player_id,
-                    "heroine_id": heroine_id,
-                    "query_text": query,
-                    "query_embedding": str(query_embedding),
-                    "top_k": limit,
-                    "w_recency": weights.recency,
-                    "w_importance": weights.importance,
-                    "w_relevance": weights.relevance,
-                    "w_keyword": weights.keyword,
-                },
+        for row in rows:
+            memory = UserMemory(
+                id=str(row["id"]),
+                player_id=row["player_id"],
+                heroine_id=row["heroine_id"],
+                speaker=row["speaker"],
+                subject=row["subject"],
+                content=row["content"],
+                content_type=row["content_type"],
+                importance=row["importance"],
+                created_at=row["created_at"],
+                recency_score=row["recency_score"],
+                importance_score=row["importance_score"],
+                relevance_score=row["relevance_score"],
+                keyword_score=row["keyword_score"],
+                final_score=row["final_score"],
             )
-
-            for row in result:
-                memory = UserMemory(
-                    id=str(row.id),
-                    player_id=row.player_id,
-                    heroine_id=row.heroine_id,
-                    speaker=row.speaker,
-                    subject=row.subject,
-                    content=row.content,
-                    content_type=row.content_type,
-                    importance=row.importance,
-                    created_at=row.created_at,
-                    recency_score=row.recency_score,
-                    importance_score=row.importance_score,
-                    relevance_score=row.relevance_score,
-                    keyword_score=row.keyword_score,
-                    final_score=row.final_score,
-                )
-                memories.append(memory)
+            memories.append(memory)
 
         return memories
 
@@ -570,6 +806,8 @@ Output:
         """동기 검색 (기존 Mem0 인터페이스 호환용)
 
         heroine_agent.py의 기존 코드와 호환되도록 dict 리스트 반환
+        동기 임베딩/레이트 리밋 대기를 포함하므로 이벤트 루프 안에서는
+        search_memories를 쓰거나 asyncio.to_thread로 호출
 
         Args:
             player_id: 플레이어 ID
@@ -585,56 +823,116 @@ Output:
         # 검색어 임베딩
         query_embedding = self.embeddings.embed_query(query)
 
-        sql = text(
-            """
-            SELECT * FROM search_user_memories_hybrid(
-                :player_id,
-                :heroine_id,
-                :query_text,
-                CAST(:query_embedding AS vector),
-                :top_k,
-                :w_recency,
-                :w_importance,
-                :w_relevance,
-                :w_keyword
-            )
-        """
+        rows = self._search_hybrid(
+            player_id, heroine_id, query, query_embedding, limit, self.default_weights
         )
 
         results = []
-
-        with self.engine.connect() as conn:
-            result = conn.execute(
-                sql,
+        for row in rows:
+            # Mem0 형식과 유사하게 반환
+            results.append(
                 {
-                    "player_id": player_id,
-                    "heroine_id": heroine_id,
-                    "query_text": query,
-                    "query_embedding": str(query_embedding),
-                    "top_k": limit,
-                    "w_recency": self.default_weights.recency,
-                    "w_importance": self.default_weights.importance,
-                    "w_relevance": self.default_weights.relevance,
-                    "w_keyword": self.default_weights.keyword,
-                },
+                    "memory": row["content"],
+                    "text": row["content"],
+                    "score": row["final_score"],
+                    "metadata": {
+                        "speaker": row["speaker"],
+                        "subject": row["subject"],
+                        "content_type": row["content_type"],
+                    },
+                }
             )
 
-            for row in result:
-                # Mem0 형식과 유사하게 반환
-                results.append(
-                    {
-                        "memory": row.content,
-                        "text": row.content,
-                        "score": row.final_score,
-                        "metadata": {
-                            "speaker": row.speaker,
-                            "subject": row.subject,
-                            "content_type": row.content_type,
-                        },
-                    }
+        return results
+
+    def _search_hybrid(
+        self,
+        player_id: str,
+        heroine_id: str,
+        query: str,
+        query_embedding: List[float],
+        limit: int,
+        weights: SearchWeights,
+    ) -> List[dict]:
+        """4요소 하이브리드 검색 (세션 캐시 우선, 사용할 수 없으면 DB 함수)
+
+        Returns:
+            search_user_memories_hybrid 컬럼을 담은 dict 리스트 (점수 높은 순)
+        """
+        cached = self.hot_cache.search(
+            player_id, heroine_id, query, query_embedding, limit, weights
+        )
+        if cached is not None:
+            return cached
+        return self._query_hybrid(
+            player_id, heroine_id, query, query_embedding, limit, weights
+        )
+
+    def _query_hybrid(
+        self,
+        player_id: str,
+        heroine_id: str,
+        query: str,
+        query_embedding: List[float],
+        limit: int,
+        weights: SearchWeights,
+    ) -> List[dict]:
+        """4요소 하이브리드 검색 DB 함수 호출 (읽기 복제본 라우팅)"""
+        params = {
+            "player_id": player_id,
+            "heroine_id": heroine_id,
+            "query_text": query,
+            "query_embedding": to_vector(query_embedding),
+            "top_k": limit,
+            "w_recency": weights.recency,
+            "w_importance": weights.importance,
+            "w_relevance": weights.relevance,
+            "w_keyword": weights.keyword,
+            "decay_days": weights.decay_days,
+        }
+        if MEMORY_VECTOR_QUANTIZATION in ("halfvec", "binary"):
+            # 양자화 벡터로 후보를 좁힌 뒤 원본 임베딩으로 relevance 재계산
+            sql = text(
+                """
+                SELECT * FROM search_user_memories_hybrid_quantized(
+                    :player_id,
+                    :heroine_id,
+                    :query_text,
+                    CAST(:query_embedding AS vector),
+                    :top_k,
+                    :w_recency,
+                    :w_importance,
+                    :w_relevance,
+                    :w_keyword,
+                    :decay_days,
+                    p_mode => :mode,
+                    p_rescore_candidates => :rescore_candidates
+                )
+            """
+            )
+            params["mode"] = MEMORY_VECTOR_QUANTIZATION
+            params["rescore_candidates"] = MEMORY_RESCORE_CANDIDATES
+        else:
+            sql = text(
+                """
+                SELECT * FROM search_user_memories_hybrid(
+                    :player_id,
+                    :heroine_id,
+                    :query_text,
+                    CAST(:query_embedding AS vector),
+                    :top_k,
+                    :w_recency,
+                    :w_importance,
+                    :w_relevance,
+                    :w_keyword,
+                    :decay_days
                 )
+            """
+            )
 
-        return results
+        with read_router.engine_for_read(player_id).connect() as conn:
+            result = conn.execute(sql, params)
+            return [dict(row._mapping) for row in result]
 
     # ============================================
     # 내부 메서드
@@ -667,7 +965,7 @@ Output:
                 {
                     "player_id": player_id,
                     "heroine_id": heroine_id,
-                    "embedding": str(embedding),
+                    "embedding": to_vector(embedding),
                     "threshold": self.duplicate_threshold,
                 },
             )
@@ -684,14 +982,23 @@ Output:
 
         return None
 
-    async def _invalidate_memory(self, memory_id: str) -> None:
-        """기억 무효화 (soft delete)"""
+    async def _invalidate_memory(
+        self, memory_id: str, player_id: str, heroine_id: str, update_cache: bool = True
+    ) -> None:
+        """기억 무효화 (soft delete) + 세션 캐시 무효화
+
+        update_cache=False: add_memories처럼 호출부가 저장 후 apply_writes로 한 번에 반영
+        """
         sql = text("SELECT invalidate_memory(:memory_id)")
 
         with self.engine.connect() as conn:
             conn.execute(sql, {"memory_id": memory_id})
             conn.commit()
 
+        read_router.mark_write(player_id)
+        if update_cache:
+            self.hot_cache.invalidate(player_id, heroine_id)
+
     async def _find_conflict_candidates(
         self, player_id: str, heroine_id: str, embedding: list, content_type: str
     ) -> List[dict]:
@@ -728,9 +1035,9 @@ Output:
                 {
                     "player_id": player_id,
                     "heroine_id": heroine_id,
-                    "embedding": str(embedding),
+                    "embedding": to_vector(embedding),
                     "content_type": content_type,
-                    "threshold": 0.55,
+                    "threshold": self.conflict_candidate_threshold,
                 },
             )
 
@@ -785,6 +1092,90 @@ Output:
 
         return answer == "yes"
 
+    def _prefilter_conflict_candidates(self, candidates: List[dict]) -> List[dict]:
+        """임베딩 유사도 기반 충돌 후보 프리필터
+
+        유사도가 conflict_prefilter_threshold 미만인 후보는 명백히 다른 주제로 보고
+        LLM 판정에서 제외하고, 유사도 상위 max_conflict_candidates개만 남깁니다.
+        """
+        filtered = [
+            c for c in candidates
+            if c.get("similarity", 0) >= self.conflict_prefilter_threshold
+        ]
+        filtered.sort(key=lambda c: c.get("similarity", 0), reverse=True)
+
+        skipped = len(candidates) - len(filtered[: self.max_conflict_candidates])
+        if skipped:
+            logger.debug(f"[MEMORY] Conflict prefilter skipped {skipped} candidate(s)")
+
+        return filtered[: self.max_conflict_candidates]
+
+    async def _check_conflicts_batch_with_llm(
+        self, pairs: List[tuple]
+    ) -> List[bool]:
+        """여러 (새 기억, 기존 기억) 쌍의 충돌 여부를 LLM 1회 호출로 판정
+
+        Args:
+            pairs: [(new_content, existing_content), ...]
+
+        Returns:
+            pairs 순서대로 충돌 여부 리스트 (파싱 실패 시 해당 쌍은 False)
+        """
+        if not pairs:
+            return []
+
+        if len(pairs) == 1:
+            return [await self._check_conflict_with_llm(pairs[0][0], pairs[0][1])]
+
+        pair_lines = []
+        for i, (new_content, existing_content) in enumerate(pairs, 1):
+            pair_lines.append(
+                f"{i}. [기존 기억] {existing_content}\n   [새 기억] {new_content}"
+            )
+
+        prompt = f"""다음 각 쌍에 대해 두 기억이 충돌하거나 대체 관계인지 판단하세요.
+
+[기억 쌍 목록]
+{chr(10).join(pair_lines)}
+
+[판단 기준]
+- 같은 주제에 대해 취향/선호도가 바뀌었으면 충돌
+- 새 기억이 기존 기억을 부정하거나 수정하면 충돌
+- 서로 다른 주제면 충돌 아님
+- 추가 정보면 충돌 아님
+
+[출력 형식]
+모든 쌍에 대해 아래 JSON 배열만 출력하세요:
+[{{"pair": 1, "conflict": true}}, {{"pair": 2, "conflict": false}}]"""
+
+        config = tracker.get_langfuse_config(
+            tags=["memory", "conflict_check", "batch"],
+            metadata={"action": "conflict_detection", "pair_count": len(pairs)}
+        )
+
+        response = await self.extract_llm.ainvoke(prompt, **config)
+
+        verdicts = [False] * len(pairs)
+        try:
+            content = response.content.strip()
+            if "```json" in content:
+                content = content.split("```json")[1].split("```")[0]
+            elif "```" in content:
+                content = content.split("```")[1].split("```")[0]
+
+            for item in json.loads(content.strip()):
+                pair_no = int(item.get("pair", 0))
+                if 1 <= pair_no <= len(pairs):
+                    verdicts[pair_no - 1] = bool(item.get("conflict", False))
+        except (json.JSONDecodeError, TypeError, ValueError, AttributeError) as e:
+            logger.error(f"[MEMORY] Batch conflict parsing failed: {e}")
+
+        logger.info(
+            f"[MEMORY] Batch conflict check: {len(pairs)} pair(s), "
+            f"{sum(verdicts)} conflict(s)"
+        )
+        return verdicts
+
     async def detect_preference_change(
         self, player_id: str, heroine_id: str, user_message: str
     ) -> List[dict]:
@@ -801,6 +1192,10 @@ Output:
         Returns:
             취향 변화 리스트 [{"old": 기존 취향, "new": 새 취향}]
         """
+        # 잡담이면 취향 변화도 없음
+        if not fact_prefilter.check(user_message, source="preference").should_extract:
+            return []
+
         # 1. 유저 메시지만으로 preference fact 추출
         conversation = f"플레이어: {user_message}"
         facts = await self.extract_facts(conversation, heroine_id)
@@ -815,35 +1210,39 @@ Output:
         if not preference_facts:
             return []
 
-        preference_changes = []
-
-        # 2. 각 fact에 대해 충돌 검사
-        for fact in preference_facts:
-            text_to_embed = self._combine_content_with_keywords(
-                fact.content, fact.keywords
-            )
-            embedding = self.embeddings.embed_query(text_to_embed)
+        # 2. 각 fact의 충돌 후보 수집 (임베딩 1회 배치 + 프리필터)
+        embeddings = await self.embeddings.aembed_documents(
+            [
+                self._combine_content_with_keywords(fact.content, fact.keywords)
+                for fact in preference_facts
+            ]
+        )
 
-            # 충돌 후보 검색
+        pending_pairs = []
+        for fact, embedding in zip(preference_facts, embeddings):
             candidates = await self._find_conflict_candidates(
                 player_id, heroine_id, embedding, "preference"
             )
             print(
                 f"[DEBUG] 충돌 후보 {len(candidates)}개: {[c['content'] for c in candidates]}"
             )
+            for candidate in self._prefilter_conflict_candidates(candidates):
+                pending_pairs.append((fact, candidate))
 
-            # LLM으로 충돌 판단
-            for candidate in candidates:
-                is_conflict = await self._check_conflict_with_llm(
-                    fact.content, candidate["content"]
-                )
-                print(
-                    f"[DEBUG] LLM 충돌 판단: {fact.content} vs {candidate['content']} -> {is_conflict}"
+        # 3. LLM 1회 호출로 쌍별 충돌 판단
+        verdicts = await self._check_conflicts_batch_with_llm(
+            [(fact.content, c["content"]) for fact, c in pending_pairs]
+        )
+
+        preference_changes = []
+        for (fact, candidate), is_conflict in zip(pending_pairs, verdicts):
+            print(
+                f"[DEBUG] LLM 충돌 판단: {fact.content} vs {candidate['content']} -> {is_conflict}"
+            )
+            if is_conflict:
+                preference_changes.append(
+                    {"old": candidate["content"], "new": fact.content}
                 )
-                if is_conflict:
-                    preference_changes.append(
-                        {"old": candidate["content"], "new": fact.content}
-                    )
 
         return preference_changes
 
@@ -891,7 +1290,7 @@ Output:
 
         results = []
 
-        with self.engine.connect() as conn:
+        with read_router.engine_for_read(player_id).connect() as conn:
             result = conn.execute(
                 sql, {"player_id": player_id, "heroine_id": heroine_id}
             )
@@ -932,6 +1331,21 @@ Output:
         """
         heroine_id = NPC_ID_TO_HEROINE.get(npc_id, "letia")
 
+        cached = self.hot_cache.valid_memories(player_id, heroine_id, limit)
+        if cached is not None:
+            return [
+                {
+                    "memory": row["content"],
+                    "text": row["content"],
+                    "metadata": {
+                        "speaker": row["speaker"],
+                        "subject": row["subject"],
+                        "content_type": row["content_type"],
+                    },
+                }
+                for row in cached
+            ]
+
         sql = text(
             """
             SELECT * FROM get_valid_memories(:player_id, :heroine_id, :limit)
@@ -940,7 +1354,7 @@ Output:
 
         results = []
 
-        with self.engine.connect() as conn:
+        with read_router.engine_for_read(player_id).connect() as conn:
             result = conn.execute(
                 sql,
                 {"player_id": player_id, "heroine_id": heroine_id, "limit": limit},
@@ -966,6 +1380,9 @@ Output:
     ) -> List[dict]:
         """특정 시점에 유효했던 기억 조회
 
+        memory_consolidator가 user_memories_history로 옮긴 기억도 포함합니다
+        (merged/capped 행은 archived_at까지 유효한 것으로 봄).
+
         Args:
             player_id: 플레이어 ID
             npc_id: NPC ID (숫자)
@@ -985,7 +1402,7 @@ Output:
 
         results = []
 
-        with self.engine.connect() as conn:
+        with read_router.engine_for_read(player_id).connect() as conn:
             result = conn.execute(
                 sql,
                 {
@@ -1035,7 +1452,7 @@ Output:
 
         results = []
 
-        with self.engine.connect() as conn:
+        with read_router.engine_for_read(player_id).connect() as conn:
             result = conn.execute(
                 sql,
                 {
@@ -1086,7 +1503,7 @@ Output:
 
         results = []
 
-        with self.engine.connect() as conn:
+        with read_router.engine_for_read(player_id).connect() as conn:
             result = conn.execute(
                 sql,
                 {
@@ -1114,5 +1531,200 @@ Output:
         return results
 
 
+    # ============================================
+    # 시간 기반 기억 조회 (비동기, 날짜 버킷)
+    # ============================================
+
+    def _today(self) -> date:
+        """게임 기준 타임존의 오늘 날짜"""
+        return datetime.now(ZoneInfo(MEMORY_DAY_TIMEZONE)).date()
+
+    def _format_time_memories(self, rows: List[dict]) -> List[dict]:
+        """시간 기반 조회 결과를 Mem0 호환 dict로 변환"""
+        return [
+            {
+                "memory": row["content"],
+                "text": row["content"],
+                "created_at": row["created_at"],
+                "metadata": {
+                    "speaker": row["speaker"],
+                    "subject": row["subject"],
+                    "content_type": row["content_type"],
+                },
+            }
+            for row in rows
+        ]
+
+    def _query_day_range(
+        self, player_id: str, heroine_id: str, from_day: date, to_day: date, limit: int
+    ) -> List[dict]:
+        """get_memories_by_day_range 호출 (idx_user_memory_valid_day 사용)"""
+        sql = text(
+            """
+            SELECT * FROM get_memories_by_day_range(
+                :player_id, :heroine_id, :from_day, :to_day, :limit
+            )
+        """
+        )
+        with read_router.engine_for_read(player_id).connect() as conn:
+            result = conn.execute(
+                sql,
+                {
+                    "player_id": player_id,
+                    "heroine_id": heroine_id,
+                    "from_day": from_day,
+                    "to_day": to_day,
+                    "limit": limit,
+                },
+            )
+            return [dict(row._mapping) for row in result]
+
+    async def get_memories_by_day_range(
+        self, player_id: str, npc_id: int, from_day: date, to_day: date, limit: int = 50
+    ) -> List[dict]:
+        """달력 날짜 범위(양 끝 포함)에 생성된 유효한 기억 조회
+
+        세션 캐시의 날짜 버킷을 먼저 사용하고, 캐시를 쓸 수 없으면
+        날짜 인덱스 쿼리를 스레드에서 실행합니다 (이벤트 루프를 막지 않음).
+
+        Args:
+            player_id: 플레이어 ID
+            npc_id: NPC ID (숫자)
+            from_day: 시작 날짜
+            to_day: 끝 날짜
+            limit: 최대 결과 수
+
+        Returns:
+            기억 dict 리스트 (최신순)
+        """
+        player_id = str(player_id)
+        heroine_id = NPC_ID_TO_HEROINE.get(npc_id, "letia")
+
+        rows = await self.hot_cache.aday_range(player_id, heroine_id, from_day, to_day, limit)
+        if rows is None:
+            rows = await asyncio.to_thread(
+                self._query_day_range, player_id, heroine_id, from_day, to_day, limit
+            )
+        return self._format_time_memories(rows)
+
+    async def get_memories_days_ago(
+        self, player_id: str, npc_id: int, days_ago: int, limit: int = 50
+    ) -> List[dict]:
+        """N일 전(달력 날짜)에 했던 이야기 조회 (1=어제, 2=그제)"""
+        day = self._today() - timedelta(days=days_ago)
+        return await self.get_memories_by_day_range(player_id, npc_id, day, day, limit)
+
+    async def get_recent_memories(
+        self, player_id: str, npc_id: int, days: int, limit: int = 50
+    ) -> List[dict]:
+        """최근 N일(오늘 포함 달력 날짜) 동안 생성된 기억 조회 (days=7: 오늘과 앞선 6일)"""
+        today = self._today()
+        return await self.get_memories_by_day_range(
+            player_id, npc_id, today - timedelta(days=max(days, 1) - 1), today, limit
+        )
+
+    async def get_valid_memories(
+        self, player_id: str, npc_id: int, limit: int = 50
+    ) -> List[dict]:
+        """현재 유효한 기억 조회 (get_valid_memories_sync를 스레드에서 실행)"""
+        return await asyncio.to_thread(
+            self.get_valid_memories_sync, str(player_id), npc_id, limit
+        )
+
+    async def get_memories_at_point(
+        self, player_id: str, npc_id: int, point_in_time: datetime, limit: int = 50
+    ) -> List[dict]:
+        """특정 시점에 유효했던 기억 조회 (get_memories_at_point_sync를 스레드에서 실행)"""
+        return await asyncio.to_thread(
+            self.get_memories_at_point_sync, str(player_id), npc_id, point_in_time, limit
+        )
+
+    def _query_preference_history(
+        self, player_id: str, heroine_id: str, limit: int
+    ) -> List[dict]:
+        """무효화된(바뀐) 기억 조회 (최근에 바뀐 순, 통합 작업이 이관한 이력 포함)"""
+        sql = text(
+            """
+            SELECT content, speaker, subject, content_type, created_at, invalid_at
+            FROM user_memories
+            WHERE player_id = :player_id
+              AND heroine_id = :heroine_id
+              AND invalid_at IS NOT NULL
+            UNION ALL
+            SELECT content, speaker, subject, content_type, created_at, invalid_at
+            FROM user_memories_history
+            WHERE player_id = :player_id
+              AND heroine_id = :heroine_id
+              AND archive_reason = 'invalidated'
+            ORDER BY invalid_at DESC
+            LIMIT :limit
+        """
+        )
+        with read_router.engine_for_read(player_id).connect() as conn:
+            result = conn.execute(
+                sql, {"player_id": player_id, "heroine_id": heroine_id, "limit": limit}
+            )
+            return [dict(row._mapping) for row in result]
+
+    async def get_preference_history(
+        self, player_id: str, npc_id: int, user_message: str, limit: int = 5
+    ) -> List[dict]:
+        """취향 변화 히스토리 조회 ("전에는 뭐 좋아했지?")
+
+        최근에 바뀐(무효화된) 기억과 현재 유효한 기억을 함께 반환합니다.
+        user_message가 있으면 현재 기억은 하이브리드 검색으로 관련된 것만 고릅니다.
+
+        Args:
+            player_id: 플레이어 ID
+            npc_id: NPC ID (숫자)
+            user_message: 사용자 메시지
+            limit: 바뀐 기억 최대 수
+
+        Returns:
+            기억 dict 리스트 (바뀐 기억은 "이전" 표시 + invalid_at 포함)
+        """
+        player_id = str(player_id)
+        heroine_id = NPC_ID_TO_HEROINE.get(npc_id, "letia")
+
+        previous = await asyncio.to_thread(
+            self._query_preference_history, player_id, heroine_id, limit
+        )
+        current = await self.search_memories(
+            player_id=player_id, heroine_id=heroine_id, query=user_message, limit=3
+        )
+
+        results = []
+        for row in previous:
+            changed_at = row["invalid_at"].astimezone(ZoneInfo(MEMORY_DAY_TIMEZONE))
+            label = f"(이전, {changed_at:%m월 %d일}에 바뀜) {row['content']}"
+            results.append(
+                {
+                    "memory": label,
+                    "text": label,
+                    "created_at": row["created_at"],
+                    "invalid_at": row["invalid_at"],
+                    "metadata": {
+                        "speaker": row["speaker"],
+                        "subject": row["subject"],
+                        "content_type": row["content_type"],
+                    },
+                }
+            )
+        for memory in current:
+            results.append(
+                {
+                    "memory": f"(현재) {memory.content}",
+                    "text": f"(현재) {memory.content}",
+                    "created_at": memory.created_at,
+                    "metadata": {
+                        "speaker": memory.speaker,
+                        "subject": memory.subject,
+                        "content_type": memory.content_type,
+                    },
+                }
+            )
+        return results
+
+
 # 싱글톤 인스턴스
 user_memory_manager = UserMemoryManager()
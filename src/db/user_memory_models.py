@@ -73,6 +73,7 @@ class ExtractedFact(BaseModel):
     importance: int = Field(default=5, ge=1, le=10)  # 중요도 1~10
     keywords: List[str] = Field(default_factory=list)  # 검색용 키워드/상위 개념
     player_name: Optional[str] = None  # 플레이어가 이름을 밝힌 경우 추출
+    turn: Optional[int] = None  # 배치 추출 시 fact가 나온 턴 번호 (1부터 시작)
 
 
 class FactExtractionResult(BaseModel):
@@ -92,12 +93,14 @@ class SearchWeights:
 
     기본값은 NEW_LONGMEMORY_SYSTEM.MD 권장값 사용
     합이 1.0일 필요 없음 (실험으로 튜닝)
+    튜닝: python src/scripts/eval_memory_retrieval.py (라벨셋 recall@k / MRR 그리드 탐색)
     """
 
     recency: float = 0.15  # 최신도 가중치
     importance: float = 0.15  # 중요도 가중치
     relevance: float = 0.50  # 관련도 가중치 (dense retriever)
     keyword: float = 0.20  # 키워드 가중치 (sparse retriever)
+    decay_days: float = 30.0  # 최신도 지수 감쇠 기준 일수 (SQL p_decay_days)
 
 
 # ============================================
@@ -149,6 +152,10 @@ class UserMemory:
 # NPC ID (숫자) -> npc_id (문자열) 변환
 NPC_ID_TO_HEROINE = {0: "sage", 1: "letia", 2: "lupames", 3: "roco"}
 
+# 시간 표현("어제", "3일 전")의 날짜 경계 타임존
+# user_memory_schema.sql의 idx_user_memory_valid_day / get_memories_by_day_range와 같아야 함
+MEMORY_DAY_TIMEZONE = "Asia/Seoul"
+
 # heroine_id -> Speaker Enum 변환
 HEROINE_TO_SPEAKER = {
     "sage": Speaker.SAGE,
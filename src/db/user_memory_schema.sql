@@ -30,6 +30,8 @@ CREATE TABLE user_memories (
     
     -- 검색용
     embedding vector(1536),             -- OpenAI text-embedding-3-small
+    embedding_half halfvec(1536),       -- 양자화 (트리거가 embedding에서 채움)
+    embedding_bit bit(1536),            -- 이진 양자화 (트리거가 embedding에서 채움)
     importance INT DEFAULT 5 CHECK (importance BETWEEN 1 AND 10),
     
     -- Bi-temporal 시간 관리
@@ -46,12 +48,15 @@ CREATE TABLE user_memories (
 -- 1. 세션 분리용 (player_id + heroine_id + invalid_at)
 CREATE INDEX idx_user_memory_session ON user_memories (player_id, heroine_id, invalid_at);
 
--- 2. pgvector HNSW 인덱스 (코사인 유사도)
-CREATE INDEX idx_user_memory_vector ON user_memories 
-USING hnsw (embedding vector_cosine_ops)
-WITH (m = 16, ef_construction = 64); 
--- ef_construction = 64 인덱스 구축 시 탐색할 이웃 노드의 수, 커지면 정확도 향상 but 인덱스 구축 시간 증가
--- m = 16 각 노드가 연결할 최대 이웃 수, 커지면 정확도 향상 but 메모리 사용량 증가
+-- 1-1. 유효한 기억만 담는 부분 인덱스 (하이브리드 검색 / 최근 기억 / 충돌 후보)
+CREATE INDEX idx_user_memory_valid_session ON user_memories (player_id, heroine_id, created_at DESC)
+WHERE invalid_at IS NULL;
+CREATE INDEX idx_user_memory_valid_type ON user_memories (player_id, heroine_id, content_type)
+WHERE invalid_at IS NULL;
+
+-- 2. 벡터 인덱스 없음: 모든 검색 함수가 세션 필터(1-1) 뒤 점수/유사도 임계값으로 계산하므로
+--    `ORDER BY embedding <=> q LIMIT k`에만 쓰이는 HNSW 인덱스는 사용되지 않음
+--    (migrations/user_memory_search_indexes.sql, migrations/memory_vector_quantization.sql)
 
 -- 3. PGroonga 전문검색 인덱스 (한국어 키워드 검색)
 CREATE INDEX idx_user_memory_pgroonga ON user_memories USING pgroonga (content);
@@ -66,6 +71,13 @@ CREATE INDEX idx_user_memory_subject ON user_memories (subject);
 -- 5. 시간순 조회용
 CREATE INDEX idx_user_memory_created ON user_memories (created_at DESC);
 
+-- 6. 날짜 버킷 조회용 ("어제", "3일 전", "최근" - get_memories_by_day_range)
+--    게임 기준 타임존(Asia/Seoul)의 달력 날짜로 묶음
+CREATE INDEX idx_user_memory_valid_day ON user_memories (
+    player_id, heroine_id, ((created_at AT TIME ZONE 'Asia/Seoul')::date), created_at DESC
+)
+WHERE invalid_at IS NULL;
+
 -- ============================================
 -- 하이브리드 검색 함수 (4요소 스코어링)
 -- ============================================
@@ -169,6 +181,109 @@ BEGIN
 END;
 $$;
 
+-- ============================================
+-- 양자화 하이브리드 검색 함수 (MEMORY_VECTOR_QUANTIZATION=binary|halfvec)
+-- 양자화 벡터로 근사 점수 -> 상위 p_rescore_candidates개만 원본 embedding으로 재계산
+-- ============================================
+CREATE OR REPLACE FUNCTION search_user_memories_hybrid_quantized(
+    p_player_id TEXT,
+    p_heroine_id TEXT,
+    p_query_text TEXT,
+    p_query_embedding vector(1536),
+    p_top_k INTEGER DEFAULT 10,
+    p_w_recency FLOAT DEFAULT 0.15,
+    p_w_importance FLOAT DEFAULT 0.15,
+    p_w_relevance FLOAT DEFAULT 0.50,
+    p_w_keyword FLOAT DEFAULT 0.20,
+    p_decay_days FLOAT DEFAULT 30.0,
+    p_mode TEXT DEFAULT 'binary',
+    p_rescore_candidates INTEGER DEFAULT 50
+) RETURNS TABLE (
+    id UUID,
+    player_id TEXT,
+    heroine_id TEXT,
+    speaker TEXT,
+    subject TEXT,
+    content TEXT,
+    content_type TEXT,
+    importance INT,
+    created_at TIMESTAMPTZ,
+    recency_score FLOAT,
+    importance_score FLOAT,
+    relevance_score FLOAT,
+    keyword_score FLOAT,
+    final_score FLOAT
+)
+LANGUAGE plpgsql AS $$
+DECLARE
+    max_keyword_score FLOAT;
+    q_half halfvec(1536) := p_query_embedding::halfvec(1536);
+    q_bit bit(1536) := binary_quantize(p_query_embedding)::bit(1536);
+BEGIN
+    SELECT MAX(pgroonga_score(tableoid, ctid))
+    INTO max_keyword_score
+    FROM user_memories m
+    WHERE m.player_id = p_player_id
+      AND m.heroine_id = p_heroine_id
+      AND m.invalid_at IS NULL
+      AND (m.content &@~ p_query_text OR m.keywords &@ p_query_text);
+
+    IF max_keyword_score IS NULL OR max_keyword_score = 0 THEN
+        max_keyword_score := 1.0;
+    END IF;
+
+    RETURN QUERY
+    WITH approx AS (
+        -- 원본 embedding은 읽지 않음 (양자화 컬럼이 비어 있는 행만 원본으로 대체)
+        SELECT
+            m.id,
+            EXP(-EXTRACT(EPOCH FROM (NOW() - m.created_at)) / (p_decay_days * 86400)) AS recency,
+            m.importance::FLOAT / 10.0 AS importance_norm,
+            COALESCE(pgroonga_score(m.tableoid, m.ctid) / max_keyword_score, 0) AS keyword,
+            CASE
+                WHEN p_mode = 'halfvec' THEN
+                    COALESCE(1 - (m.embedding_half <=> q_half), 1 - (m.embedding <=> p_query_embedding))
+                ELSE
+                    COALESCE(COS(PI() * (m.embedding_bit <~> q_bit) / 1536.0), 1 - (m.embedding <=> p_query_embedding))
+            END AS approx_relevance
+        FROM user_memories m
+        WHERE m.player_id = p_player_id
+          AND m.heroine_id = p_heroine_id
+          AND m.invalid_at IS NULL
+    ), candidates AS (
+        SELECT a.*
+        FROM approx a
+        ORDER BY (p_w_recency * a.recency +
+                  p_w_importance * a.importance_norm +
+                  p_w_relevance * a.approx_relevance +
+                  p_w_keyword * a.keyword) DESC NULLS LAST
+        LIMIT GREATEST(p_rescore_candidates, p_top_k)
+    )
+    SELECT
+        m.id,
+        m.player_id,
+        m.heroine_id,
+        m.speaker,
+        m.subject,
+        m.content,
+        m.content_type,
+        m.importance,
+        m.created_at,
+        c.recency AS recency_score,
+        c.importance_norm AS importance_score,
+        1 - (m.embedding <=> p_query_embedding) AS relevance_score,
+        c.keyword AS keyword_score,
+        (p_w_recency * c.recency +
+         p_w_importance * c.importance_norm +
+         p_w_relevance * (1 - (m.embedding <=> p_query_embedding)) +
+         p_w_keyword * c.keyword) AS final_score
+    FROM candidates c
+    JOIN user_memories m ON m.id = c.id
+    ORDER BY final_score DESC
+    LIMIT p_top_k;
+END;
+$$;
+
 -- ============================================
 -- 중복 검사 함수 (유사도 기반)
 -- ============================================
@@ -228,6 +343,56 @@ CREATE TRIGGER trigger_user_memories_updated_at
     FOR EACH ROW
     EXECUTE FUNCTION update_updated_at();
 
+-- ============================================
+-- 양자화 컬럼 동기화 트리거 (embedding -> embedding_half / embedding_bit)
+-- ============================================
+CREATE OR REPLACE FUNCTION sync_quantized_embedding()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.embedding IS NULL THEN
+        NEW.embedding_half := NULL;
+        NEW.embedding_bit := NULL;
+    ELSE
+        NEW.embedding_half := NEW.embedding::halfvec(1536);
+        NEW.embedding_bit := binary_quantize(NEW.embedding)::bit(1536);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_user_memories_quantize
+    BEFORE INSERT OR UPDATE OF embedding ON user_memories
+    FOR EACH ROW
+    EXECUTE FUNCTION sync_quantized_embedding();
+
+-- ============================================
+-- 기억 이력 테이블 (통합/압축 작업이 옮긴 기억)
+-- ============================================
+-- db/memory_consolidator.py가 검색 경로(user_memories)에서 빼낸 기억을 보관
+-- archive_reason: 'invalidated' (오래된 무효화 기억) | 'merged' (중복 통합) | 'capped' (세션 상한 초과)
+-- 임베딩은 보관하지 않음 (검색 대상이 아니므로)
+CREATE TABLE IF NOT EXISTS user_memories_history (
+    id UUID PRIMARY KEY,
+    player_id TEXT NOT NULL,
+    heroine_id TEXT,
+    speaker TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    content TEXT NOT NULL,
+    keywords TEXT[],
+    content_type TEXT,
+    importance INT,
+    valid_at TIMESTAMPTZ,
+    invalid_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ,
+    archive_reason TEXT NOT NULL,
+    merged_into UUID,                       -- 'merged'일 때 남긴 기억 ID
+    archived_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_user_memories_history_session
+ON user_memories_history (player_id, heroine_id, invalid_at DESC);
+
 -- ============================================
 -- 시간 기반 기억 조회 함수들
 -- ============================================
@@ -272,6 +437,8 @@ LANGUAGE SQL AS $$
 $$;
 
 -- 2. 특정 시점에 유효했던 사실 조회 (Bi-temporal)
+-- memory_consolidator가 history로 옮긴 기억도 포함
+-- merged/capped 행은 invalid_at이 NULL인 채 이관되므로 archived_at을 유효 종료 시점으로 사용
 CREATE OR REPLACE FUNCTION get_memories_at_point(
     p_player_id TEXT,
     p_heroine_id TEXT,
@@ -290,6 +457,69 @@ CREATE OR REPLACE FUNCTION get_memories_at_point(
     invalid_at TIMESTAMPTZ,
     created_at TIMESTAMPTZ
 )
+LANGUAGE SQL AS $$
+    SELECT * FROM (
+        SELECT 
+            m.id,
+            m.player_id,
+            m.heroine_id,
+            m.speaker,
+            m.subject,
+            m.content,
+            m.content_type,
+            m.importance,
+            m.valid_at,
+            m.invalid_at,
+            m.created_at
+        FROM user_memories m
+        WHERE m.player_id = p_player_id
+          AND m.heroine_id = p_heroine_id
+          AND m.valid_at <= p_point_in_time
+          AND (m.invalid_at IS NULL OR m.invalid_at > p_point_in_time)
+
+        UNION ALL
+
+        SELECT 
+            h.id,
+            h.player_id,
+            h.heroine_id,
+            h.speaker,
+            h.subject,
+            h.content,
+            h.content_type,
+            h.importance,
+            h.valid_at,
+            COALESCE(h.invalid_at, h.archived_at) AS invalid_at,
+            h.created_at
+        FROM user_memories_history h
+        WHERE h.player_id = p_player_id
+          AND h.heroine_id = p_heroine_id
+          AND h.valid_at <= p_point_in_time
+          AND COALESCE(h.invalid_at, h.archived_at) > p_point_in_time
+    ) AS point_memories
+    ORDER BY created_at DESC
+    LIMIT p_limit;
+$$;
+
+-- 3. 최근 N일 동안 생성된 기억
+CREATE OR REPLACE FUNCTION get_recent_memories(
+    p_player_id TEXT,
+    p_heroine_id TEXT,
+    p_days INTEGER,
+    p_limit INTEGER DEFAULT 50
+) RETURNS TABLE (
+    id UUID,
+    player_id TEXT,
+    heroine_id TEXT,
+    speaker TEXT,
+    subject TEXT,
+    content TEXT,
+    content_type TEXT,
+    importance INT,
+    valid_at TIMESTAMPTZ,
+    invalid_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ
+)
 LANGUAGE SQL AS $$
     SELECT 
         m.id,
@@ -306,17 +536,17 @@ LANGUAGE SQL AS $$
     FROM user_memories m
     WHERE m.player_id = p_player_id
       AND m.heroine_id = p_heroine_id
-      AND m.valid_at <= p_point_in_time
-      AND (m.invalid_at IS NULL OR m.invalid_at > p_point_in_time)
+      AND m.created_at >= NOW() - (p_days || ' days')::INTERVAL
+      AND m.invalid_at IS NULL
     ORDER BY m.created_at DESC
     LIMIT p_limit;
 $$;
 
--- 3. 최근 N일 동안 생성된 기억
-CREATE OR REPLACE FUNCTION get_recent_memories(
+-- 5. N일 전에 했던 이야기 조회
+CREATE OR REPLACE FUNCTION get_memories_days_ago(
     p_player_id TEXT,
     p_heroine_id TEXT,
-    p_days INTEGER,
+    p_days_ago INTEGER,
     p_limit INTEGER DEFAULT 50
 ) RETURNS TABLE (
     id UUID,
@@ -347,17 +577,20 @@ LANGUAGE SQL AS $$
     FROM user_memories m
     WHERE m.player_id = p_player_id
       AND m.heroine_id = p_heroine_id
-      AND m.created_at >= NOW() - (p_days || ' days')::INTERVAL
+      AND m.created_at >= NOW() - (p_days_ago || ' days')::INTERVAL
+      AND m.created_at < NOW() - ((p_days_ago - 1) || ' days')::INTERVAL
       AND m.invalid_at IS NULL
     ORDER BY m.created_at DESC
     LIMIT p_limit;
 $$;
 
--- 5. N일 전에 했던 이야기 조회
-CREATE OR REPLACE FUNCTION get_memories_days_ago(
+-- 5-1. 날짜 범위(달력 날짜, Asia/Seoul)에 생성된 유효한 기억
+--      idx_user_memory_valid_day와 같은 식을 써야 인덱스를 사용함
+CREATE OR REPLACE FUNCTION get_memories_by_day_range(
     p_player_id TEXT,
     p_heroine_id TEXT,
-    p_days_ago INTEGER,
+    p_from_day DATE,
+    p_to_day DATE,
     p_limit INTEGER DEFAULT 50
 ) RETURNS TABLE (
     id UUID,
@@ -372,7 +605,7 @@ CREATE OR REPLACE FUNCTION get_memories_days_ago(
     invalid_at TIMESTAMPTZ,
     created_at TIMESTAMPTZ
 )
-LANGUAGE SQL AS $$
+LANGUAGE SQL STABLE AS $$
     SELECT 
         m.id,
         m.player_id,
@@ -388,8 +621,7 @@ LANGUAGE SQL AS $$
     FROM user_memories m
     WHERE m.player_id = p_player_id
       AND m.heroine_id = p_heroine_id
-      AND m.created_at >= NOW() - (p_days_ago || ' days')::INTERVAL
-      AND m.created_at < NOW() - ((p_days_ago - 1) || ' days')::INTERVAL
+      AND (m.created_at AT TIME ZONE 'Asia/Seoul')::date BETWEEN p_from_day AND p_to_day
       AND m.invalid_at IS NULL
     ORDER BY m.created_at DESC
     LIMIT p_limit;
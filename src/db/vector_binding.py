@@ -0,0 +1,145 @@
+"""
+pgvector 파라미터 바인딩 (임베딩 -> vector 파라미터)
+
+벡터 쿼리/INSERT마다 str(embedding)으로 1536개 float를 float64 repr 문자열(약 31KB)로
+만들고, Postgres가 CAST(:embedding AS vector)에서 다시 파싱합니다.
+이 모듈은 임베딩을 전용 래퍼 타입(Vector)으로 넘기고 드라이버별 어댑터로 직렬화합니다.
+
+주요 기능:
+1. to_vector(embedding): 쿼리/INSERT 파라미터로 넘길 값 (Vector, float32 배열 래퍼)
+   - 어댑터는 Vector에만 등록 (다른 코드가 바인딩하는 np.ndarray 파라미터 동작은 그대로)
+2. psycopg2 연결 (DATABASE_URL postgresql://, 현재 기본 드라이버):
+   psycopg2는 텍스트 프로토콜만 지원하므로 바이너리 전송은 없음
+   - float32 왕복에 충분한 9자리 유효숫자 리터럴('[...]'::vector, 약 17KB)로 직렬화
+   - 이득은 문자열 크기 감소뿐이며 서버의 텍스트 파싱 비용은 그대로
+3. psycopg (v3) 연결 (postgresql+psycopg://): vector 타입 OID로 바이너리 덤퍼 등록
+   -> 바이너리 파라미터 전송 (약 6KB, 서버 텍스트 파싱 없음)
+4. VECTOR_BINARY_BINDING=false면 기존 str(list) 경로 (롤백용)
+
+이 모듈이 없을 경우 발생할 문제:
+- 임베딩 왕복마다 float64 repr 문자열 포맷 비용
+- 필요 이상으로 긴 decimal 문자열이 네트워크로 전송
+
+주의:
+- 바이너리 전송 효과를 보려면 psycopg 3 드라이버(postgresql+psycopg://)가 필요합니다
+- 결과 컬럼(vector)은 그대로 텍스트로 받습니다 (parse_embedding 등 기존 파싱 코드 유지)
+- SQL의 CAST(:x AS vector)는 그대로 둡니다 (어댑터 없이도 동작, vector -> vector는 no-op)
+- 벤치마크: python src/scripts/bench_vector_binding.py (드라이버별로 실행)
+"""
+
+import os
+import struct
+from typing import Sequence, Union
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+
+
+# 임베딩 파라미터를 배열 + 드라이버 어댑터로 보낼지 여부 (false면 str(list))
+VECTOR_BINARY_BINDING = os.getenv("VECTOR_BINARY_BINDING", "true").lower() == "true"
+
+_installed = False
+
+
+def encode_text(vector: np.ndarray) -> str:
+    """pgvector 텍스트 입력 형식 (float32 왕복에 충분한 9자리 유효숫자)"""
+    return "[" + ",".join(["%.9g" % v for v in vector.tolist()]) + "]"
+
+
+def encode_binary(vector: np.ndarray) -> bytes:
+    """pgvector 바이너리 입력 형식 (vector_recv: int16 차원 + int16 unused + float32 BE)"""
+    vector = np.asarray(vector, dtype=">f4")
+    return struct.pack(">HH", vector.shape[0], 0) + vector.tobytes()
+
+
+class Vector:
+    """vector 파라미터 전용 래퍼 (드라이버 어댑터 등록 대상)
+
+    np.ndarray에 어댑터를 등록하면 전역이라 다른 쿼리의 배열 파라미터까지
+    vector로 바뀌므로, to_vector가 반환하는 이 타입만 변환합니다.
+    """
+
+    __slots__ = ("array",)
+
+    def __init__(self, embedding: Sequence[float]):
+        self.array = np.asarray(embedding, dtype=np.float32)
+
+    def __str__(self) -> str:
+        return encode_text(self.array)
+
+
+def to_vector(embedding: Sequence[float]) -> Union[Vector, str]:
+    """임베딩 -> vector 파라미터 값
+
+    SQL 쪽은 기존처럼 CAST(:embedding AS vector)를 사용합니다.
+    """
+    if VECTOR_BINARY_BINDING and _installed:
+        return Vector(embedding)
+    return str(list(embedding))
+
+
+# ============================================
+# 드라이버 어댑터
+# ============================================
+
+
+class _Psycopg2VectorLiteral:
+    """psycopg2 어댑터: Vector -> '[...]'::vector 리터럴 (텍스트 프로토콜)"""
+
+    def __init__(self, vector: Vector):
+        self._vector = vector
+
+    def getquoted(self) -> bytes:
+        return ("'" + encode_text(self._vector.array) + "'::vector").encode()
+
+
+def _register_psycopg3(dbapi_connection) -> None:
+    """연결의 vector OID로 Vector 바이너리 덤퍼 등록 (연결 단위)"""
+    from psycopg.adapt import Dumper
+    from psycopg.pq import Format
+    from psycopg.types import TypeInfo
+
+    info = TypeInfo.fetch(dbapi_connection, "vector")
+    if info is None:
+        print("[VECTOR_BINDING] vector 타입 없음 - 바이너리 덤퍼 미등록")
+        return
+
+    class VectorBinaryDumper(Dumper):
+        format = Format.BINARY
+        oid = info.oid
+
+        def dump(self, obj):
+            return encode_binary(obj.array)
+
+    dbapi_connection.adapters.register_dumper(Vector, VectorBinaryDumper)
+
+
+def _on_connect(dbapi_connection, connection_record) -> None:
+    if type(dbapi_connection).__module__.startswith("psycopg."):
+        _register_psycopg3(dbapi_connection)
+
+
+def install_vector_adapters() -> None:
+    """전역 어댑터 설치 (여러 번 호출해도 1회만 등록)
+
+    - psycopg2: register_adapter는 전역이므로 바로 등록 (Vector 타입에만 적용)
+    - psycopg: 새 연결마다 vector OID를 조회해 등록 (Pool connect 이벤트)
+    """
+    global _installed
+    if _installed or not VECTOR_BINARY_BINDING:
+        return
+
+    try:
+        from psycopg2.extensions import register_adapter
+
+        register_adapter(Vector, _Psycopg2VectorLiteral)
+    except ImportError:
+        pass
+
+    event.listen(Pool, "connect", _on_connect)
+    _installed = True
+
+
+# 모듈 로드 시 전역 등록 (to_vector를 쓰는 모듈이 import하는 시점 = 첫 연결 이전)
+install_vector_adapters()
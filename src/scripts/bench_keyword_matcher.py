@@ -0,0 +1,153 @@
+"""
+다중 키워드 매처 마이크로벤치마크
+
+기존 `any(k in text for k in keywords)` / 목록 순서 반복 경로와 utils/keyword_matcher의
+컴파일된 매처를 키워드 수별로 비교합니다. 결과가 기존 경로와 같은지도 함께 확인합니다.
+
+측정 항목:
+- contains: 키워드 포함 여부 (던전 적대 키워드, 꼬리질문/최근 기억 판정)
+- first: 목록 순서상 첫 포함 키워드, 대소문자 무시 (호감도 liked 키워드)
+- find_all: 겹치는 매치까지 위치 포함 전체 (기존 경로는 키워드별 str.find 반복)
+- 호출당 평균 시간 (us)
+
+사용법:
+    python src/scripts/bench_keyword_matcher.py
+    python src/scripts/bench_keyword_matcher.py --sizes 5 20 100 500 --messages 500 --repeats 20
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.keyword_matcher import KeywordMatcher
+
+# 한글 음절 일부 (너무 넓으면 매치가 거의 안 나서 판정 분기가 한쪽으로만 측정됨)
+SYLLABLES = [chr(code) for code in range(0xAC00, 0xAC00 + 600)]
+
+
+def random_word(rng: random.Random, min_len: int, max_len: int) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(min_len, max_len)))
+
+
+def make_keywords(rng: random.Random, size: int) -> list:
+    keywords = []
+    while len(keywords) < size:
+        word = random_word(rng, 1, 4)
+        if word not in keywords:
+            keywords.append(word)
+    return keywords
+
+
+def make_messages(rng: random.Random, keywords: list, count: int) -> list:
+    """채팅 길이(20어절 내외) 메시지, 절반은 키워드 1~2개 포함"""
+    messages = []
+    for i in range(count):
+        words = [random_word(rng, 1, 4) for _ in range(rng.randint(8, 24))]
+        if i % 2 == 0:
+            for _ in range(rng.randint(1, 2)):
+                words.insert(rng.randrange(len(words) + 1), rng.choice(keywords))
+        messages.append(" ".join(words))
+    return messages
+
+
+# ============================================
+# 기존 경로
+# ============================================
+
+
+def legacy_contains(keywords: list, text: str) -> bool:
+    return any(keyword in text for keyword in keywords)
+
+
+def legacy_first(keywords: list, text: str):
+    message_lower = text.lower()
+    for keyword in keywords:
+        if keyword.lower() in message_lower:
+            return keyword
+    return None
+
+
+def legacy_find_all(keywords: list, text: str) -> list:
+    matches = []
+    for keyword in keywords:
+        start = text.find(keyword)
+        while start != -1:
+            matches.append((start, start + len(keyword), keyword))
+            start = text.find(keyword, start + 1)
+    matches.sort(key=lambda m: (m[0], -m[1]))
+    return matches
+
+
+def per_call_us(func, messages: list, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for message in messages:
+            func(message)
+    return (time.perf_counter() - start) / (repeats * len(messages)) * 1e6
+
+
+def bench_size(size: int, message_count: int, repeats: int, seed: int) -> None:
+    rng = random.Random(seed + size)
+    keywords = make_keywords(rng, size)
+    messages = make_messages(rng, keywords, message_count)
+
+    build_start = time.perf_counter()
+    matcher = KeywordMatcher(keywords)
+    matcher_ci = KeywordMatcher(keywords, ignore_case=True)
+    build_ms = (time.perf_counter() - build_start) * 1000
+
+    # 결과 동일성 (기존 경로와 같은 판정/같은 매치)
+    for message in messages:
+        assert matcher.contains_any(message) == legacy_contains(keywords, message)
+        assert matcher_ci.first_in_order(message) == legacy_first(keywords, message)
+        found = [(m.start, m.end, m.keyword) for m in matcher.find_all(message)]
+        assert sorted(found) == sorted(legacy_find_all(keywords, message))
+
+    cases = [
+        (
+            "contains",
+            lambda text: legacy_contains(keywords, text),
+            matcher.contains_any,
+        ),
+        (
+            "first",
+            lambda text: legacy_first(keywords, text),
+            matcher_ci.first_in_order,
+        ),
+        (
+            "find_all",
+            lambda text: legacy_find_all(keywords, text),
+            matcher.find_all,
+        ),
+    ]
+    for name, legacy, compiled in cases:
+        legacy_us = per_call_us(legacy, messages, repeats)
+        compiled_us = per_call_us(compiled, messages, repeats)
+        print(
+            f"{size:>8}{name:>10}{legacy_us:>14.2f}{compiled_us:>14.2f}"
+            f"{legacy_us / compiled_us:>10.2f}x{build_ms:>12.2f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="다중 키워드 매처 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 10, 20, 50, 200, 1000])
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"messages={args.messages}, repeats={args.repeats}")
+    print(f"{'keywords':>8}{'case':>10}{'legacy(us)':>14}{'matcher(us)':>14}{'speedup':>11}{'build(ms)':>12}")
+    for size in args.sizes:
+        bench_size(size, args.messages, args.repeats, args.seed)
+    print("결과 동일성 확인: OK")
+
+
+if __name__ == "__main__":
+    main()
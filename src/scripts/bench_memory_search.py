@@ -0,0 +1,356 @@
+"""
+user_memories 하이브리드 검색 벤치마크 (합성 데이터)
+
+테이블 크기를 단계적으로 키우면서 search_user_memories_hybrid /
+find_similar_memory / get_recent_memories 지연(p50/p99)과 EXPLAIN 플랜을 출력합니다.
+합성 데이터는 player_id가 'bench_'로 시작하므로 실서비스 데이터와 섞이지 않고,
+--cleanup으로 한 번에 지울 수 있습니다.
+
+합성 데이터 특성:
+- 플레이어당 --per-player개 기억 (히로인 3명에 분산)
+- 임베딩: 서버에서 만든 기준 벡터 --bases개 중 하나 (주제 클러스터 흉내)
+- 내용/키워드: 한국어 템플릿 조합
+- created_at: 최근 90일 균등 분포, 약 15%는 무효화(invalid_at)된 기억
+
+사용법:
+    python src/scripts/bench_memory_search.py --sizes 10000,100000,1000000
+    python src/scripts/bench_memory_search.py --sizes 100000 --queries 500 --no-explain
+    python src/scripts/bench_memory_search.py --cleanup
+
+주의:
+    인덱스 효과를 비교하려면 src/db/migrations/user_memory_search_indexes.sql
+    적용 전/후로 각각 실행하세요.
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from db.config import CONNECTION_URL
+
+BENCH_PREFIX = "bench_"
+HEROINES = ["letia", "lupames", "roco"]
+EMBEDDING_DIM = 1536
+
+# 합성 기억 내용 템플릿 ({0}: 대상)
+CONTENT_TEMPLATES = [
+    "플레이어는 {0}을(를) 좋아한다",
+    "플레이어는 {0}을(를) 싫어한다",
+    "플레이어는 어제 {0}에 대해 이야기했다",
+    "플레이어는 {0} 때문에 기분이 좋았다",
+    "플레이어의 고향에는 {0}이(가) 있다",
+    "플레이어는 {0}을(를) 배우고 싶어 한다",
+]
+SUBJECTS = [
+    "귤", "사과", "검술", "마법", "고양이", "비 오는 날", "바다", "던전", "동생",
+    "낚시", "요리", "음악", "별자리", "산책", "책", "겨울", "훈련", "축제",
+]
+QUERIES = ["좋아하는 음식 기억나?", "내 고향 어디라고 했지?", "내가 뭘 배우고 싶다고 했어?",
+           "요즘 기분 어때 보였어?", "고양이 얘기 했었나?", "내가 싫어하는 거 알아?"]
+
+# EXPLAIN용: search_user_memories_hybrid 함수 본문(db/user_memory_schema.sql)을 그대로 옮긴 두 쿼리
+# (plpgsql 함수 호출은 EXPLAIN에서 내부 플랜이 보이지 않음)
+# 함수를 고치면 이 두 쿼리도 같이 고쳐야 플랜이 실제와 일치합니다.
+# 1) 키워드 최대 점수 (정규화용, PGroonga 인덱스 검색)
+KEYWORD_MAX_EXPLAIN_SQL = """
+    SELECT MAX(pgroonga_score(tableoid, ctid))
+    FROM user_memories m
+    WHERE m.player_id = :player_id
+      AND m.heroine_id = :heroine_id
+      AND m.invalid_at IS NULL
+      AND (m.content &@~ :query_text OR m.keywords &@ :query_text)
+"""
+
+# 2) 4요소 점수 (기본 가중치, :max_keyword_score는 1)의 결과이며 없거나 0이면 1.0)
+HYBRID_EXPLAIN_SQL = """
+    WITH combined AS (
+        SELECT
+            m.id,
+            m.player_id,
+            m.heroine_id,
+            m.speaker,
+            m.subject,
+            m.content,
+            m.content_type,
+            m.importance,
+            m.created_at,
+            EXP(-EXTRACT(EPOCH FROM (NOW() - m.created_at)) / (30.0 * 86400)) AS recency,
+            m.importance::FLOAT / 10.0 AS importance_norm,
+            1 - (m.embedding <=> CAST(:embedding AS vector)) AS relevance,
+            COALESCE(pgroonga_score(m.tableoid, m.ctid) / :max_keyword_score, 0) AS keyword
+        FROM user_memories m
+        WHERE m.player_id = :player_id
+          AND m.heroine_id = :heroine_id
+          AND m.invalid_at IS NULL
+    )
+    SELECT
+        c.id,
+        c.player_id,
+        c.heroine_id,
+        c.speaker,
+        c.subject,
+        c.content,
+        c.content_type,
+        c.importance,
+        c.created_at,
+        c.recency AS recency_score,
+        c.importance_norm AS importance_score,
+        c.relevance AS relevance_score,
+        c.keyword AS keyword_score,
+        (0.15 * c.recency +
+         0.15 * c.importance_norm +
+         0.50 * c.relevance +
+         0.20 * c.keyword) AS final_score
+    FROM combined c
+    ORDER BY final_score DESC
+    LIMIT 3
+"""
+
+BENCH_QUERIES = {
+    "hybrid": """
+        SELECT * FROM search_user_memories_hybrid(
+            :player_id, :heroine_id, :query_text, CAST(:embedding AS vector), 3
+        )
+    """,
+    "find_similar": """
+        SELECT * FROM find_similar_memory(
+            :player_id, :heroine_id, CAST(:embedding AS vector), 0.9
+        )
+    """,
+    "recent_7d": """
+        SELECT * FROM get_recent_memories(:player_id, :heroine_id, 7, 5)
+    """,
+}
+
+
+# ============================================
+# 합성 데이터 생성
+# ============================================
+
+
+def count_bench_rows(engine) -> int:
+    with engine.connect() as conn:
+        return conn.execute(
+            text("SELECT COUNT(*) FROM user_memories WHERE player_id LIKE :prefix"),
+            {"prefix": f"{BENCH_PREFIX}%"},
+        ).scalar()
+
+
+def ensure_bases(engine, bases: int) -> None:
+    """기준 임베딩 테이블 생성 (서버에서 난수 생성, 정규화)"""
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS bench_embedding_bases (
+                    id INT PRIMARY KEY,
+                    embedding vector(1536)
+                )
+                """
+            )
+        )
+        existing = conn.execute(text("SELECT COUNT(*) FROM bench_embedding_bases")).scalar()
+        if existing >= bases:
+            return
+        conn.execute(
+            text(
+                """
+                INSERT INTO bench_embedding_bases (id, embedding)
+                SELECT b, l2_normalize(ARRAY(
+                    SELECT random() - 0.5 + b * 0 FROM generate_series(1, :dim)
+                )::vector)
+                FROM generate_series(:start, :end) AS b
+                """
+            ),
+            {"dim": EMBEDDING_DIM, "start": existing + 1, "end": bases},
+        )
+
+
+def generate(engine, target_rows: int, per_player: int, bases: int, chunk: int = 50000) -> None:
+    """합성 기억을 target_rows개까지 추가 (이미 있으면 부족한 만큼만)"""
+    ensure_bases(engine, bases)
+    current = count_bench_rows(engine)
+    if current >= target_rows:
+        return
+
+    templates = "ARRAY[" + ",".join(f"'{t}'" for t in CONTENT_TEMPLATES) + "]"
+    subjects = "ARRAY[" + ",".join(f"'{s}'" for s in SUBJECTS) + "]"
+    heroines = "ARRAY[" + ",".join(f"'{h}'" for h in HEROINES) + "]"
+
+    sql = text(
+        f"""
+        INSERT INTO user_memories (
+            player_id, heroine_id, speaker, subject, content, keywords,
+            content_type, embedding, importance, valid_at, invalid_at, created_at
+        )
+        SELECT
+            '{BENCH_PREFIX}' || (g / :per_player),
+            ({heroines})[1 + (g % 3)],
+            'user', 'user',
+            replace(
+                ({templates})[1 + floor(random() * {len(CONTENT_TEMPLATES)})::int],
+                '{{0}}', s.subject
+            ),
+            ARRAY[s.subject],
+            (ARRAY['preference','event','trait','personal'])[1 + floor(random() * 4)::int],
+            b.embedding,
+            1 + floor(random() * 10)::int,
+            s.created_at,
+            CASE WHEN random() < 0.15 THEN s.created_at + interval '1 day' END,
+            s.created_at
+        FROM generate_series(:start, :end) AS g
+        -- LATERAL에서 g를 참조해야 random()이 행마다 다시 평가됨
+        CROSS JOIN LATERAL (
+            SELECT ({subjects})[1 + floor(random() * {len(SUBJECTS)} + g * 0)::int] AS subject,
+                   NOW() - random() * interval '90 days' + g * interval '0' AS created_at
+        ) s
+        JOIN bench_embedding_bases b ON b.id = 1 + ((g * 7919) % :bases)
+        """
+    )
+
+    while current < target_rows:
+        end = min(target_rows, current + chunk)
+        t = time.perf_counter()
+        with engine.begin() as conn:
+            conn.execute(
+                sql,
+                {"per_player": per_player, "start": current, "end": end - 1, "bases": bases},
+            )
+        print(f"  rows {end:,}/{target_rows:,} ({time.perf_counter() - t:.1f}s)")
+        current = end
+
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE user_memories"))
+
+
+def cleanup(engine) -> None:
+    """합성 데이터 삭제"""
+    with engine.begin() as conn:
+        deleted = conn.execute(
+            text("DELETE FROM user_memories WHERE player_id LIKE :prefix"),
+            {"prefix": f"{BENCH_PREFIX}%"},
+        ).rowcount
+        conn.execute(text("DROP TABLE IF EXISTS bench_embedding_bases"))
+    print(f"합성 기억 {deleted:,}건 삭제")
+
+
+# ============================================
+# 측정
+# ============================================
+
+
+def random_embedding() -> str:
+    vec = [random.gauss(0, 1) for _ in range(EMBEDDING_DIM)]
+    norm = sum(v * v for v in vec) ** 0.5
+    return str([v / norm for v in vec])
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+def run_queries(engine, rows: int, per_player: int, queries: int) -> dict:
+    """쿼리 종류별 지연 측정 (임의의 합성 플레이어/히로인/쿼리)"""
+    players = max(1, rows // per_player)
+    embeddings = [random_embedding() for _ in range(20)]
+    results = {}
+    with engine.connect() as conn:
+        for name, sql in BENCH_QUERIES.items():
+            latencies = []
+            for i in range(queries):
+                params = {
+                    "player_id": f"{BENCH_PREFIX}{random.randrange(players)}",
+                    "heroine_id": random.choice(HEROINES),
+                    "query_text": random.choice(QUERIES),
+                    "embedding": embeddings[i % len(embeddings)],
+                }
+                t = time.perf_counter()
+                conn.execute(text(sql), params).fetchall()
+                latencies.append((time.perf_counter() - t) * 1000)
+            results[name] = {
+                "p50": percentile(latencies, 50),
+                "p99": percentile(latencies, 99),
+                "mean": statistics.mean(latencies),
+            }
+    return results
+
+
+def explain(engine, rows: int, per_player: int) -> str:
+    """하이브리드 검색 함수 본문 두 쿼리의 EXPLAIN (ANALYZE, BUFFERS)"""
+    players = max(1, rows // per_player)
+    params = {
+        "player_id": f"{BENCH_PREFIX}{random.randrange(players)}",
+        "heroine_id": random.choice(HEROINES),
+        "query_text": random.choice(QUERIES),
+        "embedding": random_embedding(),
+    }
+    with engine.connect() as conn:
+        keyword_plan = conn.execute(
+            text(f"EXPLAIN (ANALYZE, BUFFERS) {KEYWORD_MAX_EXPLAIN_SQL}"), params
+        )
+        lines = ["-- 키워드 최대 점수"] + [row[0] for row in keyword_plan]
+
+        # 함수와 같이 최대 점수가 없거나 0이면 1.0
+        max_keyword_score = conn.execute(text(KEYWORD_MAX_EXPLAIN_SQL), params).scalar()
+        params["max_keyword_score"] = max_keyword_score or 1.0
+
+        hybrid_plan = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {HYBRID_EXPLAIN_SQL}"), params)
+        lines += ["-- 4요소 점수"] + [row[0] for row in hybrid_plan]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="user_memories 하이브리드 검색 벤치마크")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="측정할 합성 행 수 (쉼표 구분)")
+    parser.add_argument("--per-player", type=int, default=200, help="플레이어당 기억 수")
+    parser.add_argument("--bases", type=int, default=2048, help="기준 임베딩 수 (주제 클러스터)")
+    parser.add_argument("--queries", type=int, default=200, help="쿼리 종류별 측정 횟수")
+    parser.add_argument("--no-explain", action="store_true", help="EXPLAIN 출력 생략")
+    parser.add_argument("--cleanup", action="store_true", help="합성 데이터 삭제 후 종료")
+    args = parser.parse_args()
+
+    engine = create_engine(CONNECTION_URL, pool_pre_ping=True)
+
+    if args.cleanup:
+        cleanup(engine)
+        return
+
+    sizes = sorted(int(s) for s in args.sizes.split(",") if s.strip())
+    report = []
+    for size in sizes:
+        print(f"\n=== {size:,} rows ===")
+        generate(engine, size, args.per_player, args.bases)
+        results = run_queries(engine, size, args.per_player, args.queries)
+        for name, r in results.items():
+            print(f"  {name:<13} p50={r['p50']:7.2f}ms  p99={r['p99']:7.2f}ms  mean={r['mean']:7.2f}ms")
+        report.append((size, results))
+        if not args.no_explain:
+            print("\n  EXPLAIN (hybrid 본문):")
+            for line in explain(engine, size, args.per_player).splitlines():
+                print(f"    {line}")
+
+    print("\n=== 요약 (ms) ===")
+    names = list(BENCH_QUERIES)
+    print("rows".rjust(12) + "".join(f"{n + ' p50':>18}{n + ' p99':>18}" for n in names))
+    for size, results in report:
+        print(
+            f"{size:>12,}"
+            + "".join(f"{results[n]['p50']:>18.2f}{results[n]['p99']:>18.2f}" for n in names)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+pgvector 파라미터 바인딩 마이크로벤치마크
+
+기존 str(embedding) 경로와 db/vector_binding 경로(psycopg2 9자리 리터럴 / psycopg 바이너리)의
+클라이언트 직렬화 시간과 전송 크기를 비교하고, --db를 주면 실제 DB 왕복 지연도 측정합니다.
+psycopg2(postgresql://)는 텍스트 리터럴만 보내므로, 바이너리 경로의 DB 왕복은
+DATABASE_URL을 postgresql+psycopg://로 바꿔 psycopg 3로 실행해야 측정됩니다.
+
+측정 항목:
+- encode: 파라미터 1개 직렬화 시간 (us)
+- bytes: 전송되는 파라미터 크기
+- round trip (--db): SELECT CAST(:e AS vector) <=> CAST(:e AS vector) 지연 p50/p99 (ms)
+  서버의 vector 입력 파싱 비용이 포함됨
+
+사용법:
+    python src/scripts/bench_vector_binding.py
+    python src/scripts/bench_vector_binding.py --dim 1536 --iterations 2000
+    python src/scripts/bench_vector_binding.py --db --queries 500
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from db.vector_binding import encode_binary, encode_text, to_vector
+
+
+def random_embedding(dim: int) -> list:
+    vec = np.random.randn(dim).astype(np.float32)
+    return (vec / np.linalg.norm(vec)).tolist()
+
+
+def bench_encode(dim: int, iterations: int) -> None:
+    """클라이언트 직렬화 시간 + 크기"""
+    embedding = random_embedding(dim)
+    array = np.asarray(embedding, dtype=np.float32)
+
+    cases = {
+        "str(list) (기존)": lambda: str(embedding).encode(),
+        "psycopg2 literal": lambda: encode_text(np.asarray(embedding, dtype=np.float32)).encode(),
+        "psycopg binary": lambda: encode_binary(np.asarray(embedding, dtype=np.float32)),
+    }
+
+    print(f"\n=== encode (dim={dim}, {iterations}회) ===")
+    print(f"{'path':<20}{'encode(us)':>12}{'bytes':>10}")
+    for name, func in cases.items():
+        start = time.perf_counter()
+        for _ in range(iterations):
+            payload = func()
+        elapsed = (time.perf_counter() - start) / iterations * 1e6
+        print(f"{name:<20}{elapsed:>12.1f}{len(payload):>10,}")
+
+    # 9자리 리터럴이 float32 값을 정확히 복원하는지 확인
+    restored = np.asarray(encode_text(array)[1:-1].split(","), dtype=np.float32)
+    print(f"literal round-trip exact: {np.array_equal(restored, array)}")
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def bench_db(dim: int, queries: int) -> None:
+    """DB 왕복 지연 (기존 문자열 vs to_vector)"""
+    from sqlalchemy import create_engine, text
+    from db.config import CONNECTION_URL
+
+    engine = create_engine(CONNECTION_URL, pool_pre_ping=True)
+    sql = text("SELECT CAST(:e AS vector) <=> CAST(:e AS vector)")
+    embeddings = [random_embedding(dim) for _ in range(20)]
+
+    cases = {
+        "str(list) (기존)": lambda e: str(e),
+        "to_vector": to_vector,
+    }
+
+    print(f"\n=== DB round trip ({engine.dialect.driver}, {queries}회) ===")
+    print(f"{'path':<20}{'p50(ms)':>10}{'p99(ms)':>10}")
+    with engine.connect() as conn:
+        conn.execute(sql, {"e": str(embeddings[0])}).scalar()  # 워밍업
+        for name, convert in cases.items():
+            latencies = []
+            for i in range(queries):
+                param = convert(random.choice(embeddings))
+                t = time.perf_counter()
+                conn.execute(sql, {"e": param}).scalar()
+                latencies.append((time.perf_counter() - t) * 1000)
+            print(f"{name:<20}{percentile(latencies, 50):>10.3f}{percentile(latencies, 99):>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pgvector 파라미터 바인딩 벤치마크")
+    parser.add_argument("--dim", type=int, default=1536, help="임베딩 차원")
+    parser.add_argument("--iterations", type=int, default=1000, help="encode 반복 횟수")
+    parser.add_argument("--db", action="store_true", help="DATABASE_URL로 DB 왕복 지연도 측정")
+    parser.add_argument("--queries", type=int, default=300, help="DB 왕복 측정 횟수")
+    args = parser.parse_args()
+
+    bench_encode(args.dim, args.iterations)
+    if args.db:
+        bench_db(args.dim, args.queries)
+
+
+if __name__ == "__main__":
+    main()
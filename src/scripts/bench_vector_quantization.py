@@ -0,0 +1,316 @@
+"""
+기억 임베딩 양자화 비교 벤치마크 (recall@k / 지연 / 크기)
+
+원본 vector 하이브리드 검색 결과를 정답으로 두고, halfvec / binary 양자화 후
+상위 후보를 원본 임베딩으로 재계산하는 검색의 recall@k와 지연을 비교합니다.
+
+측정 항목:
+- recall@k: 양자화 검색 top-k 중 정답 top-k의 k번째 점수 이상인 비율
+  (합성 데이터처럼 같은 임베딩이 많아 동점이 있어도 공정하게 비교)
+- p50 / p99 (ms): 검색 함수 호출 지연 (--offline이면 생략)
+- 크기: 임베딩 컬럼 평균 크기 (남아 있는 HNSW 인덱스가 있으면 그 크기도)
+
+모드:
+- 기본 (DB): migrations/memory_vector_quantization.sql 적용 후 실제 테이블의 세션으로 측정
+  (bench_memory_search.py로 만든 'bench_' 합성 데이터를 그대로 사용 가능)
+- --offline: DB 없이 numpy로 같은 점수 공식을 흉내 내 recall만 계산
+
+사용법:
+    python src/scripts/bench_vector_quantization.py
+    python src/scripts/bench_vector_quantization.py --table npc --player-prefix ""
+    python src/scripts/bench_vector_quantization.py --candidates 20,50,100 --queries 300
+    python src/scripts/bench_vector_quantization.py --offline --rows 500
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EMBEDDING_DIM = 1536
+MODES = ["halfvec", "binary"]
+# search_*_hybrid 기본 가중치
+WEIGHTS = {"recency": 0.15, "importance": 0.15, "relevance": 0.50, "keyword": 0.20}
+
+# 테이블별 세션 조회 / 정답 검색 / 양자화 검색 SQL
+TABLES = {
+    "user": {
+        "table": "user_memories",
+        "sessions": """
+            SELECT player_id, heroine_id AS session_key, COUNT(*) AS n
+            FROM user_memories
+            WHERE invalid_at IS NULL AND embedding IS NOT NULL AND player_id LIKE :prefix
+            GROUP BY player_id, heroine_id
+            HAVING COUNT(*) >= :min_rows
+            ORDER BY random()
+            LIMIT :sessions
+        """,
+        "sample_embedding": """
+            SELECT embedding FROM user_memories
+            WHERE player_id = :player_id AND heroine_id = :session_key AND invalid_at IS NULL
+            ORDER BY random() LIMIT 1
+        """,
+        "exact": """
+            SELECT id, final_score FROM search_user_memories_hybrid(
+                :player_id, :session_key, :query_text, CAST(:embedding AS vector), :top_k
+            )
+        """,
+        "quantized": """
+            SELECT id, final_score FROM search_user_memories_hybrid_quantized(
+                :player_id, :session_key, :query_text, CAST(:embedding AS vector), :top_k,
+                p_mode => :mode, p_rescore_candidates => :candidates
+            )
+        """,
+    },
+    "npc": {
+        "table": "npc_npc_memories",
+        "sessions": """
+            SELECT player_id, heroine_id_1 || ':' || heroine_id_2 AS session_key, COUNT(*) AS n
+            FROM npc_npc_memories
+            WHERE invalid_at IS NULL AND embedding IS NOT NULL AND player_id LIKE :prefix
+            GROUP BY player_id, heroine_id_1, heroine_id_2
+            HAVING COUNT(*) >= :min_rows
+            ORDER BY random()
+            LIMIT :sessions
+        """,
+        "sample_embedding": """
+            SELECT embedding FROM npc_npc_memories
+            WHERE player_id = :player_id
+              AND heroine_id_1 || ':' || heroine_id_2 = :session_key
+              AND invalid_at IS NULL
+            ORDER BY random() LIMIT 1
+        """,
+        "exact": """
+            SELECT id, final_score FROM search_npc_npc_memories_hybrid(
+                :player_id,
+                split_part(:session_key, ':', 1)::int, split_part(:session_key, ':', 2)::int,
+                :query_text, CAST(:embedding AS vector), :top_k
+            )
+        """,
+        "quantized": """
+            SELECT id, final_score FROM search_npc_npc_memories_hybrid_quantized(
+                :player_id,
+                split_part(:session_key, ':', 1)::int, split_part(:session_key, ':', 2)::int,
+                :query_text, CAST(:embedding AS vector), :top_k,
+                p_mode => :mode, p_rescore_candidates => :candidates
+            )
+        """,
+    },
+}
+
+QUERIES = ["좋아하는 음식 기억나?", "고향 얘기 했었나?", "요즘 기분 어때?", "같이 싸웠던 던전", "싫어하는 거"]
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def score_recall(exact_scores: list, approx_scores: list, k: int) -> float:
+    """approx top-k 중 정답 k번째 점수 이상인 비율"""
+    if not exact_scores:
+        return 1.0
+    threshold = sorted(exact_scores, reverse=True)[: k][-1] - 1e-9
+    hits = sum(1 for s in approx_scores[:k] if s >= threshold)
+    return hits / min(k, len(exact_scores))
+
+
+def perturb(embedding: np.ndarray, noise: float) -> np.ndarray:
+    """기억 임베딩에 잡음을 더한 쿼리 임베딩 (정규화)"""
+    vec = embedding + np.random.randn(embedding.shape[0]).astype(np.float32) * noise / np.sqrt(
+        embedding.shape[0]
+    )
+    return vec / np.linalg.norm(vec)
+
+
+# ============================================
+# 오프라인 (numpy)
+# ============================================
+
+
+def offline(rows: int, clusters: int, queries: int, k: int, candidates: list, noise: float) -> None:
+    """같은 점수 공식을 numpy로 계산해 recall@k만 비교 (DB 불필요)"""
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((clusters, EMBEDDING_DIM)).astype(np.float32)
+    assign = rng.integers(0, clusters, rows)
+    matrix = centers[assign] + rng.standard_normal((rows, EMBEDDING_DIM)).astype(np.float32) * 0.6
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+
+    base = (
+        WEIGHTS["recency"] * np.exp(-rng.uniform(0, 90, rows) / 30.0)
+        + WEIGHTS["importance"] * rng.integers(1, 11, rows) / 10.0
+        + WEIGHTS["keyword"] * (rng.random(rows) < 0.1) * rng.random(rows)
+    )
+    half = matrix.astype(np.float16).astype(np.float32)
+    bits = matrix > 0
+
+    print(f"\n=== offline (rows={rows}, clusters={clusters}, queries={queries}, k={k}) ===")
+    print(f"bytes/vector: vector={4 * EMBEDDING_DIM + 8}, halfvec={2 * EMBEDDING_DIM + 8}, "
+          f"bit={EMBEDDING_DIM // 8 + 8}")
+    print(f"{'mode':<10}{'candidates':>12}{'recall@k':>12}")
+
+    query_vectors = [perturb(matrix[rng.integers(rows)], noise) for _ in range(queries)]
+    for mode in MODES:
+        for cand in candidates:
+            recalls = []
+            for q in query_vectors:
+                exact = base + WEIGHTS["relevance"] * (matrix @ q)
+                if mode == "halfvec":
+                    q_half = q.astype(np.float16).astype(np.float32)
+                    approx_rel = (half @ q_half) / np.linalg.norm(half, axis=1) / np.linalg.norm(q_half)
+                else:
+                    hamming = (bits != (q > 0)).sum(axis=1)
+                    approx_rel = np.cos(np.pi * hamming / EMBEDDING_DIM)
+                approx = base + WEIGHTS["relevance"] * approx_rel
+                top = np.argsort(-approx)[: max(cand, k)]
+                rescored = top[np.argsort(-exact[top])][:k]
+                recalls.append(score_recall(exact.tolist(), exact[rescored].tolist(), k))
+            print(f"{mode:<10}{cand:>12}{np.mean(recalls):>12.4f}")
+
+
+# ============================================
+# DB
+# ============================================
+
+
+def sizes(engine, table: str) -> None:
+    """임베딩 컬럼 평균 크기 + 벡터 인덱스 크기"""
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        row = conn.execute(
+            text(
+                f"""
+                SELECT AVG(pg_column_size(embedding)) AS vector_bytes,
+                       AVG(pg_column_size(embedding_half)) AS half_bytes,
+                       AVG(pg_column_size(embedding_bit)) AS bit_bytes,
+                       COUNT(*) FILTER (WHERE embedding IS NOT NULL AND embedding_bit IS NULL) AS unfilled
+                FROM (SELECT * FROM {table} LIMIT 5000) t
+            """
+            )
+        ).one()
+        indexes = conn.execute(
+            text(
+                """
+                SELECT indexrelid::regclass::text AS name,
+                       pg_size_pretty(pg_relation_size(indexrelid)) AS size
+                FROM pg_index i
+                JOIN pg_class c ON c.oid = i.indexrelid
+                JOIN pg_am am ON am.oid = c.relam
+                WHERE i.indrelid = CAST(:table AS regclass) AND am.amname = 'hnsw'
+            """
+            ),
+            {"table": table},
+        ).fetchall()
+
+    print(f"\n=== {table} 크기 ===")
+    print(f"avg column bytes: vector={row.vector_bytes or 0:.0f}, "
+          f"halfvec={row.half_bytes or 0:.0f}, bit={row.bit_bytes or 0:.0f}")
+    if row.unfilled:
+        print(f"양자화 컬럼 미백필 행 (표본 5000 중): {row.unfilled}")
+    for index in indexes:
+        print(f"hnsw index {index.name}: {index.size}")
+
+
+def run_db(args) -> None:
+    from sqlalchemy import create_engine, text
+    from db.config import CONNECTION_URL
+    from services.scenario_index import parse_embedding
+
+    spec = TABLES[args.table]
+    engine = create_engine(CONNECTION_URL, pool_pre_ping=True)
+    candidates = [int(c) for c in args.candidates.split(",") if c.strip()]
+
+    with engine.connect() as conn:
+        sessions = conn.execute(
+            text(spec["sessions"]),
+            {"prefix": f"{args.player_prefix}%", "min_rows": args.k * 2, "sessions": args.sessions},
+        ).fetchall()
+        if not sessions:
+            print("측정할 세션이 없습니다 (--player-prefix / --table 확인, bench_memory_search.py로 생성 가능)")
+            return
+
+        # 쿼리 = (세션, 그 세션 기억 임베딩 + 잡음, 쿼리 텍스트)
+        workload = []
+        for _ in range(args.queries):
+            session = random.choice(sessions)
+            raw = conn.execute(
+                text(spec["sample_embedding"]),
+                {"player_id": session.player_id, "session_key": session.session_key},
+            ).scalar()
+            query_vec = perturb(parse_embedding(raw), args.noise)
+            workload.append(
+                {
+                    "player_id": session.player_id,
+                    "session_key": session.session_key,
+                    "query_text": random.choice(QUERIES),
+                    "embedding": str(query_vec.tolist()),
+                    "top_k": args.k,
+                }
+            )
+
+        avg_rows = sum(s.n for s in sessions) / len(sessions)
+        print(f"\n=== {spec['table']} (sessions={len(sessions)}, avg rows/session={avg_rows:.0f}, "
+              f"queries={len(workload)}, k={args.k}) ===")
+        print(f"{'mode':<10}{'candidates':>12}{'recall@k':>12}{'p50(ms)':>10}{'p99(ms)':>10}")
+
+        exact_results = []
+        latencies = []
+        for params in workload:
+            t = time.perf_counter()
+            rows = conn.execute(text(spec["exact"]), params).fetchall()
+            latencies.append((time.perf_counter() - t) * 1000)
+            exact_results.append([float(r.final_score) for r in rows])
+        print(f"{'vector':<10}{'-':>12}{1.0:>12.4f}"
+              f"{percentile(latencies, 50):>10.2f}{percentile(latencies, 99):>10.2f}")
+
+        for mode in MODES:
+            for cand in candidates:
+                recalls, latencies = [], []
+                for params, exact_scores in zip(workload, exact_results):
+                    t = time.perf_counter()
+                    rows = conn.execute(
+                        text(spec["quantized"]), {**params, "mode": mode, "candidates": cand}
+                    ).fetchall()
+                    latencies.append((time.perf_counter() - t) * 1000)
+                    recalls.append(
+                        score_recall(exact_scores, [float(r.final_score) for r in rows], args.k)
+                    )
+                print(f"{mode:<10}{cand:>12}{np.mean(recalls):>12.4f}"
+                      f"{percentile(latencies, 50):>10.2f}{percentile(latencies, 99):>10.2f}")
+
+    sizes(engine, spec["table"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="기억 임베딩 양자화 recall/지연 비교")
+    parser.add_argument("--table", choices=list(TABLES), default="user", help="user: user_memories, npc: npc_npc_memories")
+    parser.add_argument("--player-prefix", default="bench_", help="측정할 player_id 접두사 (''이면 전체)")
+    parser.add_argument("--sessions", type=int, default=50, help="표본 세션 수")
+    parser.add_argument("--queries", type=int, default=200, help="쿼리 수")
+    parser.add_argument("--k", type=int, default=5, help="top-k")
+    parser.add_argument("--candidates", default="20,50,100", help="재계산 후보 수 (쉼표 구분)")
+    parser.add_argument("--noise", type=float, default=0.8, help="쿼리 임베딩 잡음 크기 (기억 임베딩 기준)")
+    parser.add_argument("--offline", action="store_true", help="DB 없이 numpy로 recall만 계산")
+    parser.add_argument("--rows", type=int, default=300, help="--offline 세션 기억 수")
+    parser.add_argument("--clusters", type=int, default=30, help="--offline 주제 클러스터 수")
+    args = parser.parse_args()
+
+    if args.offline:
+        candidates = [int(c) for c in args.candidates.split(",") if c.strip()]
+        offline(args.rows, args.clusters, args.queries, args.k, candidates, args.noise)
+    else:
+        run_db(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Fact 추출 프리필터 평가 스크립트
+
+라벨셋에 대해 프리필터의 recall / 스킵률을 계산합니다.
+label=1: 장기 기억할 사실이 있는 메시지 (절대 스킵하면 안 됨)
+label=0: 잡담 (스킵 대상)
+
+라벨셋:
+- data/fact_prefilter_labeled.json: 규칙을 만들 때 본 메시지 (튜닝셋, 규칙과 거의 일치하는 게 당연함)
+- data/fact_prefilter_heldout.json: 규칙 수정 후 작성하고 규칙에 반영하지 않은 메시지 (보류셋)
+  recall 추정은 보류셋 기준이며, 보류셋에서 틀린 메시지로 규칙을 고쳤다면
+  그 메시지는 튜닝셋으로 옮기고 보류셋을 새로 작성해야 합니다.
+
+사용법:
+    python src/scripts/eval_fact_prefilter.py
+    python src/scripts/eval_fact_prefilter.py --threshold 1.5 --verbose
+
+종료 코드:
+    보류셋 recall이 FACT_PREFILTER_RECALL_TARGET 미만이면 1
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db.fact_prefilter import FactPrefilter, FACT_PREFILTER_RECALL_TARGET, FACT_PREFILTER_THRESHOLD
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+LABELED_SET_PATH = DATA_DIR / "fact_prefilter_labeled.json"
+HELDOUT_SET_PATH = DATA_DIR / "fact_prefilter_heldout.json"
+
+
+def evaluate(path: Path, threshold: float, verbose: bool = False) -> dict:
+    """라벨셋 평가
+
+    Returns:
+        dict: {"recall", "precision", "skip_rate", "missed", "total"}
+    """
+    with open(path, encoding="utf-8") as f:
+        samples = json.load(f)
+
+    prefilter = FactPrefilter(threshold=threshold)
+
+    tp = fn = fp = skipped = 0
+    missed = []
+    for sample in samples:
+        decision = prefilter.score(sample["message"])
+        if not decision.should_extract:
+            skipped += 1
+        if sample["label"] == 1:
+            if decision.should_extract:
+                tp += 1
+            else:
+                fn += 1
+                missed.append(sample["message"])
+        elif decision.should_extract:
+            fp += 1
+
+        if verbose:
+            mark = "PASS" if decision.should_extract else "SKIP"
+            print(
+                f"  [{mark}] label={sample['label']} score={decision.score:5.1f} "
+                f"{sample['message']} {decision.reasons}"
+            )
+
+    return {
+        "recall": tp / (tp + fn) if (tp + fn) else 1.0,
+        "precision": tp / (tp + fp) if (tp + fp) else 1.0,
+        "skip_rate": skipped / len(samples) if samples else 0.0,
+        "missed": missed,
+        "total": len(samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fact 프리필터 recall/스킵률 평가")
+    parser.add_argument("--threshold", type=float, default=FACT_PREFILTER_THRESHOLD)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    print(f"임계값: {args.threshold}")
+    results = {}
+    for name, path in (("튜닝셋", LABELED_SET_PATH), ("보류셋", HELDOUT_SET_PATH)):
+        result = evaluate(path, args.threshold, args.verbose)
+        results[name] = result
+
+        print("=" * 50)
+        print(f"[{name}] 샘플 수: {result['total']}")
+        print(f"Recall: {result['recall']:.3f} (목표 {FACT_PREFILTER_RECALL_TARGET})")
+        print(f"Precision: {result['precision']:.3f}")
+        print(f"스킵률: {result['skip_rate']:.3f}")
+        if result["missed"]:
+            print("놓친 메시지:")
+            for message in result["missed"]:
+                print(f"  - {message}")
+    print("=" * 50)
+
+    if results["보류셋"]["recall"] < FACT_PREFILTER_RECALL_TARGET:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
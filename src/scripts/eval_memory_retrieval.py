@@ -0,0 +1,376 @@
+"""
+User-NPC 기억 검색 오프라인 평가 + 가중치/감쇠 그리드 탐색
+
+라벨셋의 세션 기억/쿼리에 대해 하이브리드 점수(db.memory_scoring - 핫 캐시와 같은 공식)를
+numpy로 재현하고 recall@k / MRR을 계산합니다. SearchWeights 4개 가중치 x 감쇠 일수 그리드 전체를
+한 번의 행렬 연산으로 평가하므로 DB 없이 수천 개 설정을 몇 초 안에 비교할 수 있습니다.
+
+라벨셋:
+- data/memory_retrieval_eval.json: 튜닝셋 (그리드 탐색/상위 설정 선택)
+- data/memory_retrieval_heldout.json: 보류셋 (튜닝셋 상위 설정과 기본값을 다시 평가만 함)
+  튜닝셋에서 고른 설정이 보류셋에서도 기본값보다 나은지 확인하는 용도입니다.
+
+결과 해석 (가중치 변경 근거로 바로 쓰지 말 것):
+- 라벨셋이 수십 개 세션/쿼리 규모라 상위 설정 간 차이는 쿼리 몇 건의 순위 차이입니다.
+  보류셋에서도 기본값보다 나은지 확인한 뒤, 실제 대화 로그 기반 라벨로 다시 검증하고 바꾸세요.
+- keyword 요소는 핫 캐시와 같은 bigram 겹침 근사입니다. DB 경로(search_user_memories_hybrid)는
+  PGroonga 점수를 쓰므로 keyword 가중치 결과는 DB 검색 경로로 그대로 옮겨지지 않습니다.
+
+라벨셋 형식:
+    {"sessions": [{
+        "session_id": "letia_01",
+        "memories": [{"id", "content", "keywords", "importance", "age_days"}, ...],
+        "queries": [{"query": "...", "relevant": ["기억 id", ...]}, ...]
+    }]}
+    age_days: 쿼리 시점 기준 기억이 만들어진 지 며칠 지났는지
+
+임베딩:
+    평가는 미리 계산한 임베딩 파일(data/memory_retrieval_eval.embeddings.npz, 텍스트 해시 키)만
+    사용합니다 (API/DB 호출 없음). 라벨셋을 고치면 --embed로 바뀐 텍스트(튜닝셋 + 보류셋)만
+    다시 임베딩하고 파일을 라벨셋과 함께 커밋하세요. 임베딩이 없는 텍스트가 있으면 평가하지 않고 종료합니다.
+
+측정 항목:
+- recall@k: 정답 기억 중 top-k 안에 든 비율 (쿼리 평균)
+- MRR: 첫 정답 순위의 역수 평균
+- 지연: 설정별 쿼리 1건 점수 계산 + top-k 선택 시간 (핫 캐시 검색 경로와 같은 연산)
+- min k: 목표 recall(--recall-target)에 도달하는 가장 작은 top-k
+
+사용법:
+    python src/scripts/eval_memory_retrieval.py --embed
+    python src/scripts/eval_memory_retrieval.py
+    python src/scripts/eval_memory_retrieval.py --objective recall@3 --top 20
+    python src/scripts/eval_memory_retrieval.py --heldout-set data/other_heldout.json
+    python src/scripts/eval_memory_retrieval.py --recency 0,0.1,0.2 --decay 7,30,90
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import sys
+import time
+from dataclasses import replace
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from db.memory_scoring import (
+    combine,
+    importance_scores,
+    keyword_overlap_scores,
+    memory_tokens,
+    normalize_rows,
+    recency_scores,
+    relevance_scores,
+)
+from db.user_memory_models import SearchWeights
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+LABELED_SET_PATH = DATA_DIR / "memory_retrieval_eval.json"
+HELDOUT_SET_PATH = DATA_DIR / "memory_retrieval_heldout.json"
+EMBEDDING_CACHE_PATH = DATA_DIR / "memory_retrieval_eval.embeddings.npz"
+# UserMemoryManager 기본 임베딩 모델
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+COMPONENTS = ["recency", "importance", "relevance", "keyword"]
+
+
+def memory_embedding_text(memory: dict) -> str:
+    """UserMemoryManager._combine_content_with_keywords와 같은 임베딩 입력"""
+    keywords = memory.get("keywords") or []
+    if keywords:
+        return f"{memory['content']} (Keywords: {', '.join(keywords)})"
+    return memory["content"]
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def parse_floats(value: str) -> list:
+    return [float(v) for v in value.split(",") if v.strip()]
+
+
+# ============================================
+# 라벨셋 / 임베딩
+# ============================================
+
+
+def load_labeled_set(path: Path) -> list:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["sessions"]
+
+
+def all_texts(sessions: list) -> list:
+    texts = []
+    for session in sessions:
+        texts.extend(memory_embedding_text(m) for m in session["memories"])
+        texts.extend(q["query"] for q in session["queries"])
+    return texts
+
+
+def load_embeddings(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def embed_missing(sessions: list, path: Path) -> None:
+    """캐시에 없는 텍스트만 임베딩해서 저장"""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    from utils.client_registry import get_embeddings
+
+    cache = load_embeddings(path)
+    missing = sorted({t for t in all_texts(sessions) if text_key(t) not in cache})
+    if missing:
+        vectors = get_embeddings(EMBEDDING_MODEL).embed_documents(missing)
+        for text, vector in zip(missing, vectors):
+            cache[text_key(text)] = np.asarray(vector, dtype=np.float32)
+        np.savez_compressed(path, **cache)
+    print(f"임베딩: 새로 {len(missing)}건, 전체 {len(cache)}건 -> {path}")
+
+
+# ============================================
+# 평가
+# ============================================
+
+
+def prepare(sessions: list, embeddings: dict, now_ts: float) -> list:
+    """쿼리별 점수 요소 (감쇠와 무관한 값은 미리 계산)
+
+    Returns:
+        [{"age_ts", "importance", "relevance", "keyword", "relevant_idx", "n"}, ...]
+    """
+    cases = []
+    for session in sessions:
+        memories = session["memories"]
+        ids = [m["id"] for m in memories]
+        matrix = normalize_rows(
+            np.vstack([embeddings[text_key(memory_embedding_text(m))] for m in memories])
+        )
+        created_ts = np.asarray([now_ts - m["age_days"] * 86400 for m in memories], dtype=np.float64)
+        importance = importance_scores(np.asarray([m["importance"] for m in memories], dtype=np.float32))
+        tokens = [memory_tokens(m["content"], m.get("keywords")) for m in memories]
+
+        for query in session["queries"]:
+            relevant_idx = [ids.index(r) for r in query["relevant"]]
+            cases.append(
+                {
+                    "query": query["query"],
+                    "created_ts": created_ts,
+                    "importance": importance,
+                    "relevance": relevance_scores(matrix, embeddings[text_key(query["query"])]),
+                    "keyword": keyword_overlap_scores(query["query"], tokens),
+                    "relevant_idx": np.asarray(relevant_idx),
+                    "n": len(memories),
+                }
+            )
+    return cases
+
+
+def evaluate_grid(cases: list, weight_grid: np.ndarray, decays: np.ndarray, ks: list, now_ts: float) -> dict:
+    """전체 그리드 평가
+
+    Args:
+        weight_grid: (G, 4) [recency, importance, relevance, keyword]
+        decays: (D,) 감쇠 일수
+
+    Returns:
+        {"recall@k": (D, G), ..., "mrr": (D, G)} 쿼리 평균
+    """
+    results = {f"recall@{k}": np.zeros((len(decays), len(weight_grid))) for k in ks}
+    results["mrr"] = np.zeros((len(decays), len(weight_grid)))
+
+    for case in cases:
+        recency = recency_scores(case["created_ts"], now_ts, decays[:, None])  # (D, N)
+        n = case["n"]
+        components = np.stack(
+            [
+                recency,
+                np.broadcast_to(case["importance"], (len(decays), n)),
+                np.broadcast_to(case["relevance"], (len(decays), n)),
+                np.broadcast_to(case["keyword"], (len(decays), n)),
+            ],
+            axis=1,
+        )  # (D, 4, N)
+        scores = np.einsum("gc,dcn->dgn", weight_grid, components)  # (D, G, N)
+
+        # 정답 기억보다 점수가 높은 기억 수 = 0부터 시작하는 순위
+        relevant_scores = scores[..., case["relevant_idx"]]  # (D, G, R)
+        ranks = (scores[..., None, :] > relevant_scores[..., :, None]).sum(axis=-1)  # (D, G, R)
+
+        for k in ks:
+            results[f"recall@{k}"] += (ranks < k).mean(axis=-1)
+        results["mrr"] += 1.0 / (ranks.min(axis=-1) + 1)
+
+    return {name: total / len(cases) for name, total in results.items()}
+
+
+def measure_latency(cases: list, weights: SearchWeights, k: int, now_ts: float, repeats: int) -> tuple:
+    """설정 1개의 쿼리당 점수 계산 + top-k 지연 (us, p50 / p99)"""
+    samples = []
+    for _ in range(repeats):
+        for case in cases:
+            start = time.perf_counter()
+            recency = recency_scores(case["created_ts"], now_ts, weights.decay_days)
+            final = combine(weights, recency, case["importance"], case["relevance"], case["keyword"])
+            np.argsort(-final, kind="stable")[:k]
+            samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return samples[len(samples) // 2], samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+
+
+def min_k(metrics_row: dict, ks: list, target: float) -> str:
+    for k in ks:
+        if metrics_row[f"recall@{k}"] >= target:
+            return str(k)
+    return f">{ks[-1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="기억 검색 recall@k / MRR 평가 + 가중치 그리드 탐색")
+    parser.add_argument("--labeled-set", type=Path, default=LABELED_SET_PATH, help="튜닝셋")
+    parser.add_argument("--heldout-set", type=Path, default=HELDOUT_SET_PATH, help="보류셋")
+    parser.add_argument("--embeddings", type=Path, default=EMBEDDING_CACHE_PATH)
+    parser.add_argument("--embed", action="store_true", help="임베딩 파일에 없는 튜닝셋/보류셋 텍스트 임베딩 후 종료")
+    parser.add_argument("--recency", default="0,0.05,0.1,0.15,0.2,0.3")
+    parser.add_argument("--importance", default="0,0.05,0.1,0.15,0.2,0.3")
+    parser.add_argument("--relevance", default="0.3,0.4,0.5,0.6,0.7")
+    parser.add_argument("--keyword", default="0,0.1,0.2,0.3,0.4")
+    parser.add_argument("--decay", default="7,14,30,60,90", help="감쇠 일수 후보")
+    parser.add_argument("--k", default="1,3,5,10", help="recall@k의 k 목록")
+    parser.add_argument("--objective", default="mrr", help="정렬 기준 (mrr 또는 recall@k)")
+    parser.add_argument("--top", type=int, default=10, help="출력할 상위 설정 수")
+    parser.add_argument("--recall-target", type=float, default=0.9, help="min k 계산 기준 recall")
+    parser.add_argument("--latency-repeats", type=int, default=50, help="지연 측정 반복 횟수")
+    args = parser.parse_args()
+
+    sessions = load_labeled_set(args.labeled_set)
+    heldout_sessions = load_labeled_set(args.heldout_set)
+    if args.embed:
+        embed_missing(sessions + heldout_sessions, args.embeddings)
+        return
+
+    embeddings = load_embeddings(args.embeddings)
+    missing = [t for t in all_texts(sessions + heldout_sessions) if text_key(t) not in embeddings]
+    if missing:
+        print(
+            f"임베딩 없는 텍스트 {len(missing)}건 ({args.embeddings}) - "
+            "--embed로 임베딩한 뒤 임베딩 파일을 라벨셋과 함께 커밋하세요"
+        )
+        sys.exit(1)
+
+    ks = sorted(int(k) for k in args.k.split(","))
+    if args.objective != "mrr" and args.objective not in {f"recall@{k}" for k in ks}:
+        parser.error(f"--objective는 mrr 또는 recall@{{{args.k}}} 중 하나")
+
+    now_ts = time.time()
+    cases = prepare(sessions, embeddings, now_ts)
+    heldout_cases = prepare(heldout_sessions, embeddings, now_ts)
+    baseline = SearchWeights()
+
+    grid = list(
+        itertools.product(
+            parse_floats(args.recency),
+            parse_floats(args.importance),
+            parse_floats(args.relevance),
+            parse_floats(args.keyword),
+        )
+    )
+    weight_grid = np.asarray(
+        [[baseline.recency, baseline.importance, baseline.relevance, baseline.keyword]] + grid
+    )
+    decays = np.asarray(sorted(set(parse_floats(args.decay)) | {baseline.decay_days}))
+
+    start = time.perf_counter()
+    results = evaluate_grid(cases, weight_grid, decays, ks, now_ts)
+    elapsed = time.perf_counter() - start
+    configs = len(decays) * len(weight_grid)
+    heldout_results = evaluate_grid(heldout_cases, weight_grid, decays, ks, now_ts)
+
+    def weights_of(d: int, g: int) -> SearchWeights:
+        recency, importance, relevance, keyword = weight_grid[g]
+        return replace(
+            baseline,
+            recency=float(recency),
+            importance=float(importance),
+            relevance=float(relevance),
+            keyword=float(keyword),
+            decay_days=float(decays[d]),
+        )
+
+    metric_names = [f"recall@{k}" for k in ks] + ["mrr"]
+    header = (
+        f"{'rec':>6}{'imp':>6}{'rel':>6}{'kw':>6}{'decay':>7} |"
+        + "".join(f"{name:>11}" for name in metric_names)
+        + f"{'min k':>7}{'p50(us)':>9}{'p99(us)':>9}"
+    )
+
+    def print_row(split_results: dict, split_cases: list, d: int, g: int) -> None:
+        weights = weights_of(d, g)
+        metrics_row = {name: float(values[d, g]) for name, values in split_results.items()}
+        p50, p99 = measure_latency(split_cases, weights, ks[-1], now_ts, args.latency_repeats)
+        print(
+            f"{weights.recency:>6.2f}{weights.importance:>6.2f}{weights.relevance:>6.2f}"
+            f"{weights.keyword:>6.2f}{weights.decay_days:>7.0f} |"
+            + "".join(f"{metrics_row[name]:>11.3f}" for name in metric_names)
+            + f"{min_k(metrics_row, ks, args.recall_target):>7}{p50:>9.1f}{p99:>9.1f}"
+        )
+
+    def describe(split_sessions: list, split_cases: list) -> str:
+        n_memories = sum(len(s["memories"]) for s in split_sessions)
+        return f"세션 {len(split_sessions)}, 쿼리 {len(split_cases)}, 기억 {n_memories}"
+
+    print("=" * len(header))
+    print(f"튜닝셋: {describe(sessions, cases)}")
+    print(f"보류셋: {describe(heldout_sessions, heldout_cases)}")
+    print(
+        f"그리드: {configs:,}개 설정 (감쇠 {len(decays)} x 가중치 {len(weight_grid)}), "
+        f"평가 {elapsed:.2f}s (설정당 {elapsed / configs * 1e3:.3f}ms)"
+    )
+    print("=" * len(header))
+
+    baseline_d = int(np.where(decays == baseline.decay_days)[0][0])
+    print("\n[튜닝셋] 기준 (SearchWeights 기본값)")
+    print(header)
+    print_row(results, cases, baseline_d, 0)
+
+    objective = results[args.objective]
+    # 동점이면 MRR, 그다음 가장 작은 k의 recall 순
+    order = np.lexsort(
+        (-results[f"recall@{ks[0]}"].ravel(), -results["mrr"].ravel(), -objective.ravel())
+    )
+    top = [tuple(int(i) for i in np.unravel_index(flat, objective.shape)) for flat in order[: args.top]]
+    print(f"\n[튜닝셋] 상위 {args.top}개 ({args.objective} 기준)")
+    print(header)
+    for d, g in top:
+        print_row(results, cases, d, g)
+
+    # 보류셋은 튜닝셋에서 고른 설정을 다시 평가만 함 (보류셋 기준으로 다시 고르지 않음)
+    heldout_objective = heldout_results[args.objective]
+    baseline_heldout = float(heldout_objective[baseline_d, 0])
+    print(f"\n[보류셋] 기준 + 튜닝셋 상위 {args.top}개")
+    print(header)
+    print_row(heldout_results, heldout_cases, baseline_d, 0)
+    for d, g in top:
+        print_row(heldout_results, heldout_cases, d, g)
+
+    better = sum(1 for d, g in top if heldout_objective[d, g] > baseline_heldout)
+    print(
+        f"\n보류셋 {args.objective}: 기준 {baseline_heldout:.3f}, "
+        f"튜닝셋 상위 {len(top)}개 중 {better}개가 기준보다 높음"
+    )
+    print(
+        "참고: 라벨셋 규모가 작고 keyword 요소는 PGroonga가 아닌 bigram 근사입니다. "
+        "이 결과만으로 SearchWeights 기본값을 바꾸지 마세요 (모듈 docstring 참고)."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -27,6 +27,8 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from db.config import CONNECTION_URL
+from db.vector_binding import to_vector
+from services.scenario_index import bump_index_version
 
 
 # =============================================================================
@@ -1503,7 +1505,7 @@ def seed_heroine_scenarios():
                 "title": scenario["title"],
                 "content": scenario["content"],
                 "metadata": json.dumps(scenario["metadata"], ensure_ascii=False),
-                "embedding": str(embedding)
+                "embedding": to_vector(embedding)
             })
             conn.commit()
         
@@ -1540,7 +1542,7 @@ def seed_sage_scenarios():
                 "title": scenario["title"],
                 "content": scenario["content"],
                 "metadata": json.dumps(scenario["metadata"], ensure_ascii=False),
-                "embedding": str(embedding)
+                "embedding": to_vector(embedding)
             })
             conn.commit()
         
@@ -1557,6 +1559,10 @@ if __name__ == "__main__":
     
     seed_heroine_scenarios()
     seed_sage_scenarios()
+
+    # 실행 중인 서버의 인메모리 시나리오 인덱스 재로드 트리거
+    bump_index_version("heroine_scenarios")
+    bump_index_version("sage_scenarios")
     
     print("\n" + "=" * 60)
     print("        모든 시딩 완료!")
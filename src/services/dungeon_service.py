@@ -7,12 +7,31 @@ import json
 from typing import Dict, Any, List, Optional
 from sqlalchemy import text
 from db.RDBRepository import RDBRepository
+from db.read_router import read_router
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from src.agents.dungeon.event import event_rewards_penalties as er
 from agents.dungeon.event.event_rewards_penalties import (
     normalize_reward_payload,
     normalize_penalty_payload,
 )
+from utils.keyword_matcher import KeywordMatcher
+
+
+# Hostile / clearly out-of-scope keywords (Korean only) - select_event 선택지 분류용
+HOSTILE_KEYWORDS = [
+    "공격",
+    "죽",
+    "찔",
+    "불태",
+    "파괴",
+    "살해",
+    "도둑",
+    "훔치",
+    "팬다",
+    "좆",
+    "썅",
+]
+HOSTILE_KEYWORD_MATCHER = KeywordMatcher(HOSTILE_KEYWORDS)
 
 
 # ============================================================
@@ -1465,7 +1484,7 @@ class DungeonService:
         """모든 던전 조회 (관리자용)"""
         try:
 
-            with self.repo.engine.connect() as conn:
+            with read_router.engine_for_read().connect() as conn:
                 rows = conn.execute(
                     text("SELECT * FROM dungeon ORDER BY id DESC")
                 ).fetchall()
@@ -1563,11 +1582,12 @@ class DungeonService:
                 }
 
             # 4. 선택지에 따른 결과 도출 (LLM 사용)
-            from langchain.chat_models import init_chat_model
+            from utils.client_registry import get_chat_model
+            from utils.hedged_llm import HedgedLLM
             from enums.LLM import LLM
             from langchain_core.messages import HumanMessage, SystemMessage
 
-            llm = init_chat_model(model=LLM.GPT5_MINI, temperature=0.7)
+            llm = HedgedLLM(get_chat_model(LLM.GPT5_MINI, temperature=0.7), name="dungeon_select_event")
 
             scenario_narrative = target_event.get("scenario_narrative", "")
             choices = target_event.get("choices", [])
@@ -1626,22 +1646,7 @@ class DungeonService:
                         best_ratio = r
                         best_idx = i
 
-                # Hostile / clearly out-of-scope keywords (Korean only)
-                hostile_kw = [
-                    "공격",
-                    "죽",
-                    "찔",
-                    "불태",
-                    "파괴",
-                    "살해",
-                    "도둑",
-                    "훔치",
-                    "팬다",
-                    "좆",
-                    "썅",
-                ]
-
-                contains_hostile = any(kw in choice_norm for kw in hostile_kw)
+                contains_hostile = HOSTILE_KEYWORD_MATCHER.contains_any(choice_norm)
 
                 if best_ratio >= 0.60 and best_idx is not None:
                     idx = best_idx
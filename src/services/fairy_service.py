@@ -1,3 +1,4 @@
+import random
 from typing import List, Optional
 
 from agents.fairy.guild.fairy_guild_agent import graph_builder as guild_builder
@@ -12,10 +13,27 @@ from agents.fairy.fairy_state import DungeonPlayerState
 from core.game_dto.WeaponData import WeaponData
 from core.game_dto.StatData import StatData
 from agents.fairy.memory_messages import get_fairy_messages_dungeon
+from utils.metrics import metrics
+from utils.resilience import PROVIDER_GROQ, PROVIDER_XAI, resilience
+from utils.request_deadline import DeadlineExceededError
 
 dungeon_graph = dungeon_builder.compile()
 guild_graph = guild_builder.compile()
 
+# LLM 프로바이더 장애 시 사용하는 페어리 대사
+FAIRY_FALLBACK_REPLIES = [
+    "으음... 지금은 머리가 좀 멍해! 조금 있다가 다시 물어봐 줄래?",
+    "앗, 잠깐만! 주변 마력이 흔들려서 집중이 안 돼. 다시 말해줘!",
+    "미안, 방금 뭐라고 했어? 지금은 생각이 잘 안 나네... 잠시 후에 다시!",
+]
+
+
+def _fairy_fallback_reply(reason: str) -> str:
+    """장애 시 정해진 페어리 대사 반환 (요청을 붙잡고 있지 않도록 즉시 응답)"""
+    metrics.inc("fairy_fallback_replies_total", labels={"reason": reason})
+    return random.choice(FAIRY_FALLBACK_REPLIES)
+
+
 async def fairy_dungeon_talk(
     dungeon_player: DungeonPlayerState,
     question: str,
@@ -28,19 +46,30 @@ async def fairy_dungeon_talk(
             "thread_id": playerId,
         }
     }
+    # 의도 분류(Groq) / 응답 생성(xAI) 중 하나라도 서킷이 열려 있으면 바로 폴백
+    if not (resilience.is_available(PROVIDER_GROQ) and resilience.is_available(PROVIDER_XAI)):
+        return _fairy_fallback_reply("circuit_open")
+
     memories = get_fairy_messages_dungeon(
         player_id=playerId, heroine_id=dungeon_player.heroineId, limit=4
     )
-    response = await dungeon_graph.ainvoke(
-        {
-            "messages": memories + [add_human_message(content=question)],
-            "dungenon_player": dungeon_player,
-            "target_monster_ids": target_monster_ids,
-            "player_id": playerId,
-            "next_room_ids": next_room_ids,
-        },
-        config=config,
-    )
+    try:
+        response = await dungeon_graph.ainvoke(
+            {
+                "messages": memories + [add_human_message(content=question)],
+                "dungenon_player": dungeon_player,
+                "target_monster_ids": target_monster_ids,
+                "player_id": playerId,
+                "next_room_ids": next_room_ids,
+            },
+            config=config,
+        )
+    except DeadlineExceededError:
+        # 요청 데드라인 초과는 라우터에서 취소 처리 (폴백 대사를 만들 필요 없음)
+        raise
+    except Exception as e:
+        print(f"[ERROR] 페어리 던전 응답 실패, 폴백 대사 사용: {e}")
+        return _fairy_fallback_reply("error")
 
     interrupts = response.get("__interrupt__")
     if interrupts:
@@ -1,8 +1,12 @@
+import asyncio
 from typing import List, Optional
-from sqlalchemy import create_engine, text
-from langchain_openai import OpenAIEmbeddings
+from sqlalchemy import text
+from utils.client_registry import get_embeddings
 
-from db.config import CONNECTION_URL
+from db.engine_registry import get_engine
+from db.read_router import read_router
+from db.vector_binding import to_vector
+from services.scenario_index import SCENARIO_INDEX_ENABLED, ScenarioIndex
 
 
 # 동의어 사전 (쿼리 확장용)
@@ -30,8 +34,44 @@ class HeroineScenarioService:
     """히로인 시나리오 검색 서비스"""
 
     def __init__(self):
-        self.engine = create_engine(CONNECTION_URL, pool_pre_ping=True)
-        self.embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+        self.engine = get_engine()
+        self.embeddings = get_embeddings("text-embedding-3-small")
+        self.index = ScenarioIndex(
+            "heroine_scenarios", filter_columns=["heroine_id", "memory_progress"]
+        )
+
+    # ============================================
+    # 인메모리 인덱스
+    # ============================================
+
+    def load_index(self) -> None:
+        """heroine_scenarios 전체를 인메모리 인덱스로 로드 (시작 시 / 재시딩 감지 시)"""
+        version = self.index.current_version()
+        sql = text(
+            """
+            SELECT id, heroine_id, memory_progress, title, content, metadata, content_embedding
+            FROM heroine_scenarios
+        """
+        )
+        with self.engine.connect() as conn:
+            rows = [dict(row._mapping) for row in conn.execute(sql)]
+        self.index.build(rows, version=version)
+
+    def ensure_index(self) -> bool:
+        """인메모리 인덱스 사용 가능 여부 (미로드/재시딩 시 로드, 실패하면 SQL 경로)"""
+        if not SCENARIO_INDEX_ENABLED:
+            return False
+        if not self.index.loaded or self.index.is_stale():
+            try:
+                self.load_index()
+            except Exception as e:
+                print(f"[SCENARIO_INDEX] heroine_scenarios 로드 실패, SQL 검색 사용: {e}")
+        return self.index.loaded
+
+    def _where(self, heroine_id: int, max_memory_progress: int):
+        return lambda c: (c["heroine_id"] == heroine_id) & (
+            c["memory_progress"] <= max_memory_progress
+        )
 
     def _expand_query(self, query: str) -> str:
         """쿼리 확장 - 동의어 추가
@@ -55,7 +95,11 @@ class HeroineScenarioService:
         print(f"[DEBUG] 쿼리 확장: {query} -> {expanded_query}")
         return expanded_query
 
-    def search_scenarios(
+    def query_embedding_text(self, query: str) -> str:
+        """검색 시 임베딩하는 텍스트 (동의어 확장 쿼리, 턴 임베딩 prefetch용)"""
+        return self._expand_query(query)
+
+    async def search_scenarios(
         self, query: str, heroine_id: int, max_memory_progress: int, limit: int = 3
     ) -> List[dict]:
         """해금된 시나리오 검색
@@ -73,7 +117,44 @@ class HeroineScenarioService:
         expanded_query = self._expand_query(query)
 
         # 확장된 쿼리 임베딩
-        query_embedding = self.embeddings.embed_query(expanded_query)
+        query_embedding = await self.embeddings.aembed_query(expanded_query)
+
+        # 인메모리 인덱스/SQL 검색은 동기이므로 스레드에서 실행 (이벤트 루프를 막지 않음)
+        return await asyncio.to_thread(
+            self._search_scenarios_sync,
+            query,
+            expanded_query,
+            query_embedding,
+            heroine_id,
+            max_memory_progress,
+            limit,
+        )
+
+    def _search_scenarios_sync(
+        self,
+        query: str,
+        expanded_query: str,
+        query_embedding: List[float],
+        heroine_id: int,
+        max_memory_progress: int,
+        limit: int,
+    ) -> List[dict]:
+        """search_scenarios의 검색 부분 (임베딩 계산 후)"""
+        # 인메모리 인덱스 (SQL과 같은 필터 + 코사인 유사도)
+        if self.ensure_index():
+            return [
+                {
+                    "id": r["id"],
+                    "content": r["content"],
+                    "memory_progress": r["memory_progress"],
+                    "similarity": r["vector_score"],
+                }
+                for r in self.index.search(
+                    query_embedding,
+                    self._where(heroine_id, max_memory_progress),
+                    limit,
+                )
+            ]
 
         # 벡터 검색 SQL
         sql = text(
@@ -88,11 +169,11 @@ class HeroineScenarioService:
         """
         )
 
-        with self.engine.connect() as conn:
+        with read_router.engine_for_read().connect() as conn:
             result = conn.execute(
                 sql,
                 {
-                    "embedding": str(query_embedding),
+                    "embedding": to_vector(query_embedding),
                     "heroine_id": heroine_id,
                     "max_progress": max_memory_progress,
                     "limit": limit,
@@ -112,7 +193,7 @@ class HeroineScenarioService:
 
             return scenarios
 
-    def search_scenarios_hybrid(
+    async def search_scenarios_hybrid(
         self, query: str, heroine_id: int, max_memory_progress: int, limit: int = 3
     ) -> List[dict]:
         """BM25 + Vector 하이브리드 검색
@@ -132,8 +213,28 @@ class HeroineScenarioService:
         expanded_query = self._expand_query(query)
 
         # 확장된 쿼리 임베딩
-        query_embedding = self.embeddings.embed_query(expanded_query)
+        query_embedding = await self.embeddings.aembed_query(expanded_query)
+
+        return await asyncio.to_thread(
+            self._search_scenarios_hybrid_sync,
+            query,
+            expanded_query,
+            query_embedding,
+            heroine_id,
+            max_memory_progress,
+            limit,
+        )
 
+    def _search_scenarios_hybrid_sync(
+        self,
+        query: str,
+        expanded_query: str,
+        query_embedding: List[float],
+        heroine_id: int,
+        max_memory_progress: int,
+        limit: int,
+    ) -> List[dict]:
+        """search_scenarios_hybrid의 검색 부분 (임베딩 계산 후)"""
         # 하이브리드 검색 SQL (BM25 + Vector)
         sql = text(
             """
@@ -171,12 +272,12 @@ class HeroineScenarioService:
         """
         )
 
-        with self.engine.connect() as conn:
+        with read_router.engine_for_read().connect() as conn:
             result = conn.execute(
                 sql,
                 {
                     "query": expanded_query,
-                    "embedding": str(query_embedding),
+                    "embedding": to_vector(query_embedding),
                     "heroine_id": heroine_id,
                     "max_progress": max_memory_progress,
                     "bm25_weight": BM25_WEIGHT,
@@ -201,7 +302,7 @@ class HeroineScenarioService:
 
             return scenarios
 
-    def search_scenarios_with_keywords(
+    async def search_scenarios_with_keywords(
         self, query: str, heroine_id: int, max_memory_progress: int, limit: int = 3
     ) -> List[dict]:
         """키워드 메타데이터 기반 검색 (BM25 인덱스 없을 때 대안)
@@ -219,8 +320,28 @@ class HeroineScenarioService:
         """
         # 쿼리 확장
         expanded_query = self._expand_query(query)
-        query_embedding = self.embeddings.embed_query(expanded_query)
+        query_embedding = await self.embeddings.aembed_query(expanded_query)
+
+        return await asyncio.to_thread(
+            self._search_scenarios_with_keywords_sync,
+            query,
+            expanded_query,
+            query_embedding,
+            heroine_id,
+            max_memory_progress,
+            limit,
+        )
 
+    def _search_scenarios_with_keywords_sync(
+        self,
+        query: str,
+        expanded_query: str,
+        query_embedding: List[float],
+        heroine_id: int,
+        max_memory_progress: int,
+        limit: int,
+    ) -> List[dict]:
+        """search_scenarios_with_keywords의 검색 부분 (임베딩 계산 후)"""
         # 쿼리에서 키워드 추출 (공백으로 분리)
         keywords = expanded_query.split()
 
@@ -257,12 +378,12 @@ class HeroineScenarioService:
         """
         )
 
-        with self.engine.connect() as conn:
+        with read_router.engine_for_read().connect() as conn:
             result = conn.execute(
                 sql,
                 {
                     "keywords": keywords,
-                    "embedding": str(query_embedding),
+                    "embedding": to_vector(query_embedding),
                     "heroine_id": heroine_id,
                     "max_progress": max_memory_progress,
                     "bm25_weight": BM25_WEIGHT,
@@ -287,7 +408,7 @@ class HeroineScenarioService:
 
             return scenarios
 
-    def search_scenarios_pgroonga(
+    async def search_scenarios_pgroonga(
         self, query: str, heroine_id: int, max_memory_progress: int, limit: int = 3
     ) -> List[dict]:
         """PGroonga + Vector 하이브리드 검색 (Supabase용)
@@ -295,6 +416,10 @@ class HeroineScenarioService:
         PGroonga의 다국어 Full Text Search와 벡터 유사도 검색을 결합합니다.
         참고: https://supabase.com/docs/guides/database/extensions/pgroonga
 
+        인메모리 인덱스가 준비되어 있으면 PGroonga 점수 대신 bigram BM25 점수를
+        같은 가중치/스케일로 결합하여 Postgres 없이 검색합니다.
+        두 경로 모두 텍스트 점수는 pgroonga_score 필드로 반환합니다 (인덱스 경로는 BM25 값).
+
         Args:
             query: 검색 쿼리
             heroine_id: 히로인 ID
@@ -306,7 +431,49 @@ class HeroineScenarioService:
         """
         # 쿼리 확장 (동의어 추가)
         expanded_query = self._expand_query(query)
-        query_embedding = self.embeddings.embed_query(expanded_query)
+        query_embedding = await self.embeddings.aembed_query(expanded_query)
+
+        return await asyncio.to_thread(
+            self._search_scenarios_pgroonga_sync,
+            query,
+            expanded_query,
+            query_embedding,
+            heroine_id,
+            max_memory_progress,
+            limit,
+        )
+
+    def _search_scenarios_pgroonga_sync(
+        self,
+        query: str,
+        expanded_query: str,
+        query_embedding: List[float],
+        heroine_id: int,
+        max_memory_progress: int,
+        limit: int,
+    ) -> List[dict]:
+        """search_scenarios_pgroonga의 검색 부분 (임베딩 계산 후)"""
+        if self.ensure_index():
+            return [
+                {
+                    "id": r["id"],
+                    "content": r["content"],
+                    "memory_progress": r["memory_progress"],
+                    "metadata": r["metadata"],
+                    "pgroonga_score": r["text_score"],
+                    "vector_score": r["vector_score"],
+                    "combined_score": r["combined_score"],
+                }
+                for r in self.index.search(
+                    query_embedding,
+                    self._where(heroine_id, max_memory_progress),
+                    limit,
+                    query_text=query,
+                    text_weight=BM25_WEIGHT,
+                    vector_weight=VECTOR_WEIGHT,
+                    text_scale=10.0,
+                )
+            ]
 
         # PGroonga + Vector 하이브리드 검색
         # PGroonga는 &@~ 연산자로 full text search 수행
@@ -345,12 +512,12 @@ class HeroineScenarioService:
         """
         )
 
-        with self.engine.connect() as conn:
+        with read_router.engine_for_read().connect() as conn:
             result = conn.execute(
                 sql,
                 {
                     "query": query,
-                    "embedding": str(query_embedding),
+                    "embedding": to_vector(query_embedding),
                     "heroine_id": heroine_id,
                     "max_progress": max_memory_progress,
                     "bm25_weight": BM25_WEIGHT,
@@ -389,7 +556,7 @@ class HeroineScenarioService:
         """
         )
 
-        with self.engine.connect() as conn:
+        with read_router.engine_for_read().connect() as conn:
             result = conn.execute(
                 sql, {"heroine_id": heroine_id, "progress": memory_progress}
             )
@@ -410,7 +577,7 @@ class HeroineScenarioService:
         """
         )
 
-        with self.engine.connect() as conn:
+        with read_router.engine_for_read().connect() as conn:
             result = conn.execute(
                 sql, {"heroine_id": heroine_id, "max_progress": max_memory_progress}
             )
@@ -432,6 +599,13 @@ class HeroineScenarioService:
         Returns:
             가장 최근 해금된 시나리오 또는 None
         """
+        if self.ensure_index():
+            rows = self.index.rows(self._where(heroine_id, max_memory_progress))
+            if not rows:
+                return None
+            latest = max(rows, key=lambda r: r["memory_progress"])
+            return {k: latest[k] for k in ("id", "title", "content", "memory_progress")}
+
         sql = text(
             """
             SELECT id, title, content, memory_progress
@@ -443,7 +617,7 @@ class HeroineScenarioService:
         """
         )
 
-        with self.engine.connect() as conn:
+        with read_router.engine_for_read().connect() as conn:
             result = conn.execute(
                 sql, {"heroine_id": heroine_id, "max_progress": max_memory_progress}
             )
@@ -468,6 +642,17 @@ class HeroineScenarioService:
         Returns:
             해당 임계값의 시나리오 또는 None
         """
+        if self.ensure_index():
+            rows = self.index.rows(
+                lambda c: (c["heroine_id"] == heroine_id)
+                & (c["memory_progress"] == memory_progress)
+            )
+            if not rows:
+                return None
+            return {
+                k: rows[0][k] for k in ("id", "title", "content", "memory_progress", "metadata")
+            }
+
         sql = text(
             """
             SELECT id, title, content, memory_progress, metadata
@@ -478,7 +663,7 @@ class HeroineScenarioService:
         """
         )
 
-        with self.engine.connect() as conn:
+        with read_router.engine_for_read().connect() as conn:
             result = conn.execute(
                 sql, {"heroine_id": heroine_id, "progress": memory_progress}
             )
@@ -1,8 +1,12 @@
+import asyncio
 from typing import List
-from sqlalchemy import create_engine, text
-from langchain_openai import OpenAIEmbeddings
+from sqlalchemy import text
+from utils.client_registry import get_embeddings
 
-from db.config import CONNECTION_URL
+from db.engine_registry import get_engine
+from db.read_router import read_router
+from db.vector_binding import to_vector
+from services.scenario_index import SCENARIO_INDEX_ENABLED, ScenarioIndex
 
 # 하이브리드 검색 가중치
 BM25_WEIGHT = 0.4
@@ -13,10 +17,39 @@ class SageScenarioService:
     """대현자 시나리오 검색 서비스"""
 
     def __init__(self):
-        self.engine = create_engine(CONNECTION_URL, pool_pre_ping=True)
-        self.embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+        self.engine = get_engine()
+        self.embeddings = get_embeddings("text-embedding-3-small")
+        self.index = ScenarioIndex("sage_scenarios", filter_columns=["scenario_level"])
 
-    def search_scenarios(
+    # ============================================
+    # 인메모리 인덱스
+    # ============================================
+
+    def load_index(self) -> None:
+        """sage_scenarios 전체를 인메모리 인덱스로 로드 (시작 시 / 재시딩 감지 시)"""
+        version = self.index.current_version()
+        sql = text(
+            """
+            SELECT id, scenario_level, title, content, metadata, content_embedding
+            FROM sage_scenarios
+        """
+        )
+        with self.engine.connect() as conn:
+            rows = [dict(row._mapping) for row in conn.execute(sql)]
+        self.index.build(rows, version=version)
+
+    def ensure_index(self) -> bool:
+        """인메모리 인덱스 사용 가능 여부 (미로드/재시딩 시 로드, 실패하면 SQL 경로)"""
+        if not SCENARIO_INDEX_ENABLED:
+            return False
+        if not self.index.loaded or self.index.is_stale():
+            try:
+                self.load_index()
+            except Exception as e:
+                print(f"[SCENARIO_INDEX] sage_scenarios 로드 실패, SQL 검색 사용: {e}")
+        return self.index.loaded
+
+    async def search_scenarios(
         self, query: str, max_scenario_level: int, limit: int = 3
     ) -> List[dict]:
         """해금된 시나리오 검색
@@ -30,7 +63,40 @@ class SageScenarioService:
             검색된 시나리오 목록
         """
         # 쿼리 임베딩
-        query_embedding = self.embeddings.embed_query(query)
+        query_embedding = await self.embeddings.aembed_query(query)
+
+        # 인메모리 인덱스/SQL 검색은 동기이므로 스레드에서 실행 (이벤트 루프를 막지 않음)
+        return await asyncio.to_thread(
+            self._search_scenarios_sync,
+            query,
+            query_embedding,
+            max_scenario_level,
+            limit,
+        )
+
+    def _search_scenarios_sync(
+        self,
+        query: str,
+        query_embedding: List[float],
+        max_scenario_level: int,
+        limit: int,
+    ) -> List[dict]:
+        """search_scenarios의 검색 부분 (임베딩 계산 후)"""
+        # 인메모리 인덱스 (SQL과 같은 필터 + 코사인 유사도)
+        if self.ensure_index():
+            return [
+                {
+                    "id": r["id"],
+                    "content": r["content"],
+                    "scenario_level": r["scenario_level"],
+                    "similarity": r["vector_score"],
+                }
+                for r in self.index.search(
+                    query_embedding,
+                    lambda c: c["scenario_level"] <= max_scenario_level,
+                    limit,
+                )
+            ]
 
         # 벡터 검색 SQL
         sql = text(
@@ -44,11 +110,11 @@ class SageScenarioService:
         """
         )
 
-        with self.engine.connect() as conn:
+        with read_router.engine_for_read().connect() as conn:
             result = conn.execute(
                 sql,
                 {
-                    "embedding": str(query_embedding),
+                    "embedding": to_vector(query_embedding),
                     "max_level": max_scenario_level,
                     "limit": limit,
                 },
@@ -76,6 +142,13 @@ class SageScenarioService:
         Returns:
             시나리오 dict 또는 None
         """
+        if self.ensure_index():
+            rows = self.index.rows(lambda c: c["scenario_level"] <= max_scenario_level)
+            if not rows:
+                return None
+            latest = max(rows, key=lambda r: r["scenario_level"])
+            return {k: latest[k] for k in ("id", "title", "content", "scenario_level")}
+
         sql = text(
             """
             SELECT id, title, content, scenario_level
@@ -86,13 +159,13 @@ class SageScenarioService:
         """
         )
 
-        with self.engine.connect() as conn:
+        with read_router.engine_for_read().connect() as conn:
             row = conn.execute(sql, {"max_level": max_scenario_level}).fetchone()
             if row:
                 return dict(row._mapping)
             return None
 
-    def search_scenarios_hybrid(
+    async def search_scenarios_hybrid(
         self, query: str, max_scenario_level: int, limit: int = 3
     ) -> List[dict]:
         """BM25 + Vector 하이브리드 검색
@@ -108,8 +181,24 @@ class SageScenarioService:
             검색된 시나리오 목록 (combined_score 기준 정렬)
         """
         # 쿼리 임베딩
-        query_embedding = self.embeddings.embed_query(query)
+        query_embedding = await self.embeddings.aembed_query(query)
+
+        return await asyncio.to_thread(
+            self._search_scenarios_hybrid_sync,
+            query,
+            query_embedding,
+            max_scenario_level,
+            limit,
+        )
 
+    def _search_scenarios_hybrid_sync(
+        self,
+        query: str,
+        query_embedding: List[float],
+        max_scenario_level: int,
+        limit: int,
+    ) -> List[dict]:
+        """search_scenarios_hybrid의 검색 부분 (임베딩 계산 후)"""
         # 하이브리드 검색 SQL (BM25 + Vector)
         sql = text(
             """
@@ -144,14 +233,14 @@ class SageScenarioService:
         """
         )
 
-        # self.engine.connect(): SQLAlchemy 엔진에서 데이터베이스 연결 객체를 생성
+        # read_router.engine_for_read(): 읽기 복제본(또는 primary) 엔진에서 연결 객체를 생성
         # with 문: 컨텍스트 매니저로 연결을 자동으로 열고 닫음 (예외 발생 시에도 안전하게 종료)
-        with self.engine.connect() as conn:
+        with read_router.engine_for_read().connect() as conn:
             result = conn.execute(
                 sql,
                 {
                     "query": query,
-                    "embedding": str(query_embedding),
+                    "embedding": to_vector(query_embedding),
                     "max_level": max_scenario_level,
                     "bm25_weight": BM25_WEIGHT,
                     "vector_weight": VECTOR_WEIGHT,
@@ -175,7 +264,7 @@ class SageScenarioService:
 
             return scenarios
 
-    def search_scenarios_with_keywords(
+    async def search_scenarios_with_keywords(
         self, query: str, max_scenario_level: int, limit: int = 3
     ) -> List[dict]:
         """키워드 메타데이터 기반 검색 (BM25 인덱스 없을 때 대안)
@@ -190,8 +279,24 @@ class SageScenarioService:
         Returns:
             검색된 시나리오 목록
         """
-        query_embedding = self.embeddings.embed_query(query)
+        query_embedding = await self.embeddings.aembed_query(query)
+
+        return await asyncio.to_thread(
+            self._search_scenarios_with_keywords_sync,
+            query,
+            query_embedding,
+            max_scenario_level,
+            limit,
+        )
 
+    def _search_scenarios_with_keywords_sync(
+        self,
+        query: str,
+        query_embedding: List[float],
+        max_scenario_level: int,
+        limit: int,
+    ) -> List[dict]:
+        """search_scenarios_with_keywords의 검색 부분 (임베딩 계산 후)"""
         # 쿼리에서 키워드 추출 (공백으로 분리)
         keywords = query.split()
 
@@ -226,12 +331,12 @@ class SageScenarioService:
         """
         )
 
-        with self.engine.connect() as conn:
+        with read_router.engine_for_read().connect() as conn:
             result = conn.execute(
                 sql,
                 {
                     "keywords": keywords,
-                    "embedding": str(query_embedding),
+                    "embedding": to_vector(query_embedding),
                     "max_level": max_scenario_level,
                     "bm25_weight": BM25_WEIGHT,
                     "vector_weight": VECTOR_WEIGHT,
@@ -255,7 +360,7 @@ class SageScenarioService:
 
             return scenarios
 
-    def search_scenarios_pgroonga(
+    async def search_scenarios_pgroonga(
         self, query: str, max_scenario_level: int, limit: int = 3
     ) -> List[dict]:
         """PGroonga + Vector 하이브리드 검색 (Supabase용)
@@ -263,6 +368,10 @@ class SageScenarioService:
         PGroonga의 다국어 Full Text Search와 벡터 유사도 검색을 결합합니다.
         참고: https://supabase.com/docs/guides/database/extensions/pgroonga
 
+        인메모리 인덱스가 준비되어 있으면 PGroonga 점수 대신 bigram BM25 점수를
+        같은 가중치/스케일로 결합하여 Postgres 없이 검색합니다.
+        두 경로 모두 텍스트 점수는 pgroonga_score 필드로 반환합니다 (인덱스 경로는 BM25 값).
+
         Args:
             query: 검색 쿼리
             max_scenario_level: 현재 시나리오 레벨 (이하만 검색)
@@ -271,7 +380,45 @@ class SageScenarioService:
         Returns:
             검색된 시나리오 목록 (combined_score 기준 정렬)
         """
-        query_embedding = self.embeddings.embed_query(query)
+        query_embedding = await self.embeddings.aembed_query(query)
+
+        return await asyncio.to_thread(
+            self._search_scenarios_pgroonga_sync,
+            query,
+            query_embedding,
+            max_scenario_level,
+            limit,
+        )
+
+    def _search_scenarios_pgroonga_sync(
+        self,
+        query: str,
+        query_embedding: List[float],
+        max_scenario_level: int,
+        limit: int,
+    ) -> List[dict]:
+        """search_scenarios_pgroonga의 검색 부분 (임베딩 계산 후)"""
+        if self.ensure_index():
+            return [
+                {
+                    "id": r["id"],
+                    "content": r["content"],
+                    "scenario_level": r["scenario_level"],
+                    "metadata": r["metadata"],
+                    "pgroonga_score": r["text_score"],
+                    "vector_score": r["vector_score"],
+                    "combined_score": r["combined_score"],
+                }
+                for r in self.index.search(
+                    query_embedding,
+                    lambda c: c["scenario_level"] <= max_scenario_level,
+                    limit,
+                    query_text=query,
+                    text_weight=BM25_WEIGHT,
+                    vector_weight=VECTOR_WEIGHT,
+                    text_scale=10.0,
+                )
+            ]
 
         # PGroonga + Vector 하이브리드 검색
         sql = text(
@@ -306,12 +453,12 @@ class SageScenarioService:
         """
         )
 
-        with self.engine.connect() as conn:
+        with read_router.engine_for_read().connect() as conn:
             result = conn.execute(
                 sql,
                 {
                     "query": query,
-                    "embedding": str(query_embedding),
+                    "embedding": to_vector(query_embedding),
                     "max_level": max_scenario_level,
                     "bm25_weight": BM25_WEIGHT,
                     "vector_weight": VECTOR_WEIGHT,
@@ -346,7 +493,7 @@ class SageScenarioService:
         """
         )
 
-        with self.engine.connect() as conn:
+        with read_router.engine_for_read().connect() as conn:
             result = conn.execute(sql, {"level": scenario_level})
             return [dict(row._mapping) for row in result]
 
@@ -361,7 +508,7 @@ class SageScenarioService:
         """
         )
 
-        with self.engine.connect() as conn:
+        with read_router.engine_for_read().connect() as conn:
             result = conn.execute(sql, {"max_level": max_scenario_level})
             return [dict(row._mapping) for row in result]
 
@@ -0,0 +1,295 @@
+"""
+시나리오 인메모리 검색 인덱스
+
+히로인/대현자 시나리오는 수십 건 규모의 정적 데이터인데도 scenario_inquiry 턴마다
+pgvector + PGroonga 하이브리드 SQL을 실행합니다. 이 모듈은 시작 시 시나리오 전체를
+메모리에 올려 numpy 코사인 유사도 + 한국어 bigram BM25로 같은 필터/가중치의
+검색을 Postgres 없이 수행합니다.
+
+주요 기능:
+1. 정규화된 임베딩 행렬에 대한 numpy 코사인 유사도 (pgvector <=> 와 같은 1 - cosine distance)
+2. 한국어 문자 bigram 토큰 BM25 (PGroonga 기본 토크나이저 TokenBigram과 같은 단위)
+3. 필터 컬럼(heroine_id, memory_progress, scenario_level)을 numpy 배열로 보관 -> 마스크 필터
+   - 마스크는 인덱스 락 안에서 필터 함수로 구성 (재로드와 겹쳐도 행/마스크 길이가 어긋나지 않음)
+4. 재시딩 감지: Redis 버전 키가 바뀌면 다음 검색 시 다시 로드 (워커 간 공유)
+5. 검색 지연/재로드 메트릭 (utils.metrics)
+
+이 클래스가 없을 경우 발생할 문제:
+- 시나리오 질문마다 Postgres 왕복 + 전체 스캔 하이브리드 쿼리
+- DB 부하/지연이 시나리오 응답 지연으로 그대로 전파
+
+Redis 키 구조:
+- scenario_index:version:{table} - 재시딩 시 증가하는 버전 (seed_scenarios.py)
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from db.redis_manager import redis_manager
+from utils.metrics import metrics
+from utils.text_tokens import tokenize_bigrams
+
+
+# 인메모리 인덱스 사용 여부 (false면 기존 SQL 경로)
+SCENARIO_INDEX_ENABLED = os.getenv("SCENARIO_INDEX_ENABLED", "true").lower() == "true"
+# Redis 버전 키 확인 주기(초) - 재시딩 후 이 시간 안에 모든 워커가 다시 로드
+SCENARIO_INDEX_VERSION_CHECK_SECONDS = float(
+    os.getenv("SCENARIO_INDEX_VERSION_CHECK_SECONDS", "30")
+)
+
+# BM25 파라미터
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+VERSION_KEY_PREFIX = "scenario_index:version"
+
+# 필터 컬럼 배열 dict -> 불리언 마스크 (인덱스 락 안에서 호출)
+Where = Callable[[Dict[str, np.ndarray]], np.ndarray]
+
+
+def parse_embedding(value: Any) -> Optional[np.ndarray]:
+    """pgvector 컬럼 값("[0.1,0.2,...]" 문자열 또는 리스트) -> float32 배열"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = json.loads(value)
+    return np.asarray(value, dtype=np.float32)
+
+
+def version_key(table: str) -> str:
+    return f"{VERSION_KEY_PREFIX}:{table}"
+
+
+def bump_index_version(table: str) -> None:
+    """재시딩 후 호출 - 모든 워커의 인메모리 인덱스가 다음 검색 때 다시 로드됨"""
+    try:
+        redis_manager.client.incr(version_key(table))
+    except Exception as e:
+        print(f"[SCENARIO_INDEX] 버전 증가 실패 ({table}): {e}")
+
+
+class ScenarioIndex:
+    """시나리오 테이블 1개에 대한 인메모리 하이브리드 검색 인덱스
+
+    아키텍처 위치:
+    - HeroineScenarioService / SageScenarioService가 소유하고 로드
+    - 서비스의 search_* 메서드가 인덱스가 준비되어 있으면 SQL 대신 사용
+
+    사용 예시:
+        index = ScenarioIndex("heroine_scenarios", filter_columns=["heroine_id", "memory_progress"])
+        index.build(rows)
+        where = lambda c: (c["heroine_id"] == 1) & (c["memory_progress"] <= 50)
+        results = index.search(query_embedding, where, limit=2, query_text="고향")
+    """
+
+    def __init__(self, table: str, filter_columns: Iterable[str]):
+        """초기화
+
+        Args:
+            table: 원본 테이블 이름 (메트릭 라벨 + Redis 버전 키)
+            filter_columns: numpy 배열로 보관할 정수 필터 컬럼
+        """
+        self.table = table
+        self.filter_columns = list(filter_columns)
+
+        self._lock = threading.Lock()
+        self._rows: List[Dict[str, Any]] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._columns: Dict[str, np.ndarray] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._idf: Dict[str, float] = {}
+        self._doc_len = np.zeros(0, dtype=np.float32)
+        self._avg_doc_len = 0.0
+
+        self._version: Optional[str] = None
+        self._last_version_check = 0.0
+
+    @property
+    def loaded(self) -> bool:
+        return self._matrix is not None
+
+    # ============================================
+    # 빌드
+    # ============================================
+
+    def build(self, rows: List[Dict[str, Any]], version: Optional[str] = None) -> None:
+        """DB 행으로 인덱스 구성 (content_embedding이 없는 행은 제외)
+
+        Args:
+            rows: id, content, content_embedding, 필터 컬럼 등을 담은 dict 리스트
+            version: 로드 시점 Redis 버전 (재로드 판단용)
+        """
+        start = time.perf_counter()
+        docs, vectors = [], []
+        for row in rows:
+            vector = parse_embedding(row.get("content_embedding"))
+            if vector is None:
+                continue
+            doc = {k: v for k, v in row.items() if k != "content_embedding"}
+            docs.append(doc)
+            vectors.append(vector)
+
+        if vectors:
+            matrix = np.vstack(vectors)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix = matrix / np.where(norms == 0, 1, norms)
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+
+        columns = {
+            name: np.asarray([doc.get(name) for doc in docs], dtype=np.int64)
+            for name in self.filter_columns
+        }
+
+        # BM25 역색인 (term -> {doc_idx: tf})
+        postings: Dict[str, Dict[int, int]] = {}
+        doc_len = np.zeros(len(docs), dtype=np.float32)
+        for idx, doc in enumerate(docs):
+            tokens = tokenize_bigrams(doc.get("content", ""))
+            doc_len[idx] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, {})[idx] = tf
+        n_docs = len(docs)
+        idf = {
+            term: math.log(1 + (n_docs - len(p) + 0.5) / (len(p) + 0.5))
+            for term, p in postings.items()
+        }
+
+        with self._lock:
+            self._rows = docs
+            self._matrix = matrix
+            self._columns = columns
+            self._postings = postings
+            self._idf = idf
+            self._doc_len = doc_len
+            self._avg_doc_len = float(doc_len.mean()) if n_docs else 0.0
+            self._version = version
+            self._last_version_check = time.monotonic()
+
+        labels = {"table": self.table}
+        metrics.set_gauge("scenario_index_docs", n_docs, labels=labels)
+        metrics.inc("scenario_index_loads_total", labels=labels)
+        print(
+            f"[SCENARIO_INDEX] {self.table} 로드 완료: {n_docs}건 "
+            f"({time.perf_counter() - start:.3f}s)"
+        )
+
+    # ============================================
+    # 재시딩 감지
+    # ============================================
+
+    def current_version(self) -> Optional[str]:
+        """Redis의 현재 버전 (Redis 장애 시 None)"""
+        try:
+            return redis_manager.client.get(version_key(self.table))
+        except Exception:
+            return None
+
+    def is_stale(self) -> bool:
+        """재시딩으로 버전이 바뀌었는지 (확인 주기마다 Redis 조회)"""
+        now = time.monotonic()
+        if now - self._last_version_check < SCENARIO_INDEX_VERSION_CHECK_SECONDS:
+            return False
+        self._last_version_check = now
+        version = self.current_version()
+        return version is not None and version != self._version
+
+    # ============================================
+    # 조회
+    # ============================================
+
+    def rows(self, where: Where) -> List[Dict[str, Any]]:
+        """필터 함수에 해당하는 행 (복사본)"""
+        with self._lock:
+            return [dict(self._rows[i]) for i in np.flatnonzero(where(self._columns))]
+
+    def bm25_scores(self, query_text: str) -> np.ndarray:
+        """전체 문서에 대한 BM25 점수 (락 보유 상태에서 호출)"""
+        scores = np.zeros(len(self._rows), dtype=np.float32)
+        if not self._rows or not self._avg_doc_len:
+            return scores
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_len / self._avg_doc_len)
+        for term in set(tokenize_bigrams(query_text)):
+            posting = self._postings.get(term)
+            if not posting:
+                continue
+            idx = np.fromiter(posting.keys(), dtype=np.int64)
+            tf = np.fromiter(posting.values(), dtype=np.float32)
+            scores[idx] += self._idf[term] * tf * (BM25_K1 + 1) / (tf + norm[idx])
+        return scores
+
+    def search(
+        self,
+        query_embedding: List[float],
+        where: Where,
+        limit: int,
+        query_text: Optional[str] = None,
+        text_weight: float = 0.0,
+        vector_weight: float = 1.0,
+        text_scale: float = 1.0,
+    ) -> List[Dict[str, Any]]:
+        """하이브리드 검색
+
+        combined = bm25 / text_scale * text_weight + cosine * vector_weight
+        (query_text가 없으면 코사인 유사도만으로 정렬)
+
+        Args:
+            query_embedding: 쿼리 임베딩
+            where: 필터 컬럼 dict -> 마스크 함수 (락 안에서 현재 인덱스 기준으로 평가)
+            limit: 최대 결과 수
+            query_text: BM25용 쿼리 텍스트
+            text_weight: BM25 가중치
+            vector_weight: 벡터 가중치
+            text_scale: BM25 점수 나눗수 (SQL 경로의 pgroonga_score / 10.0과 맞춤)
+
+        Returns:
+            행 dict + vector_score / text_score / combined_score
+            (text_score는 SQL 경로의 pgroonga_score와 같은 스케일의 bigram BM25 점수)
+        """
+        start = time.perf_counter()
+        with self._lock:
+            matrix = self._matrix
+            if matrix is None:
+                return []
+            candidates = np.flatnonzero(where(self._columns))
+            if len(candidates) == 0:
+                return []
+
+            query = np.asarray(query_embedding, dtype=np.float32)
+            query_norm = np.linalg.norm(query)
+            if query_norm:
+                query = query / query_norm
+            vector_scores = matrix[candidates] @ query
+
+            if query_text is not None:
+                bm25 = self.bm25_scores(query_text)[candidates]
+                combined = bm25 / text_scale * text_weight + vector_scores * vector_weight
+            else:
+                bm25 = np.zeros(len(candidates), dtype=np.float32)
+                combined = vector_scores
+
+            # 점수 내림차순, 동점은 id 오름차순
+            ids = np.asarray([self._rows[i]["id"] for i in candidates])
+            order = np.lexsort((ids, -combined))[:limit]
+
+            results = []
+            for pos in order:
+                row = dict(self._rows[candidates[pos]])
+                row["vector_score"] = float(vector_scores[pos])
+                row["text_score"] = float(bm25[pos])
+                row["combined_score"] = float(combined[pos])
+                results.append(row)
+
+        metrics.observe(
+            "scenario_index_search_seconds",
+            time.perf_counter() - start,
+            labels={"table": self.table},
+        )
+        return results
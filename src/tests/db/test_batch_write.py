@@ -0,0 +1,118 @@
+"""
+batch_write.embed_in_batches 실패 처리 테스트
+
+입력 오류(400, 토큰 한도 초과)만 배치를 나눠 해당 항목을 None으로 격리하고,
+일시 장애(429, 5xx, 타임아웃)와 로컬 빠른 실패는 기억을 빠뜨리지 않고 예외로 올리는지 확인합니다.
+임베딩은 가짜 객체로 대체합니다.
+"""
+
+import pytest
+
+import db.batch_write as batch_write_module
+from db.batch_write import embed_in_batches
+from utils.rate_limiter import RateLimitTimeout
+
+
+class FakeAPIError(Exception):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class FakeEmbeddings:
+    """texts마다 [len(text)] 벡터, fail(batch)가 예외를 돌려주면 그 예외 발생"""
+
+    def __init__(self, fail=None):
+        self.fail = fail
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        error = self.fail(texts, len(self.calls)) if self.fail else None
+        if error is not None:
+            raise error
+        return [[float(len(t))] for t in texts]
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(batch_write_module, "backoff_delay", lambda attempt: 0)
+    monkeypatch.setattr(batch_write_module, "EMBED_BATCH_RETRIES", 2)
+
+
+TEXTS = ["가", "나나", "너무 긴 입력", "라라라", "마"]
+
+
+def test_invalid_input_is_isolated_to_the_bad_item():
+    def fail(texts, call):
+        if "너무 긴 입력" in texts:
+            return FakeAPIError("This model's maximum context length is 8192 tokens", status_code=400)
+        return None
+
+    embeddings = FakeEmbeddings(fail)
+    vectors = embed_in_batches(embeddings, TEXTS)
+
+    assert vectors == [[1.0], [2.0], None, [3.0], [1.0]]
+    # 입력 오류는 재시도하지 않고 바로 나눔
+    assert embeddings.calls[0] == TEXTS
+    assert TEXTS not in embeddings.calls[1:]
+
+
+def test_token_limit_message_without_status_is_treated_as_invalid_input():
+    def fail(texts, call):
+        if "너무 긴 입력" in texts:
+            return ValueError("Requested 9000 tokens, exceeds token limit")
+        return None
+
+    vectors = embed_in_batches(FakeEmbeddings(fail), TEXTS)
+
+    assert vectors[2] is None
+    assert all(v is not None for i, v in enumerate(vectors) if i != 2)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        FakeAPIError("Rate limit reached", status_code=429),
+        FakeAPIError("Internal server error", status_code=503),
+        TimeoutError("read timeout"),
+    ],
+)
+def test_transient_error_is_raised_after_retries_without_splitting(error):
+    embeddings = FakeEmbeddings(lambda texts, call: error)
+
+    with pytest.raises(type(error)):
+        embed_in_batches(embeddings, TEXTS)
+
+    # 재시도 2회 후 예외, 배치를 나눠 항목을 None으로 빠뜨리지 않음
+    assert embeddings.calls == [TEXTS] * 3
+
+
+def test_transient_error_recovers_on_retry():
+    def fail(texts, call):
+        return FakeAPIError("Bad gateway", status_code=502) if call == 1 else None
+
+    embeddings = FakeEmbeddings(fail)
+    vectors = embed_in_batches(embeddings, TEXTS)
+
+    assert vectors == [[float(len(t))] for t in TEXTS]
+    assert embeddings.calls == [TEXTS, TEXTS]
+
+
+def test_rate_limit_timeout_is_raised_immediately():
+    embeddings = FakeEmbeddings(lambda texts, call: RateLimitTimeout("token bucket wait exceeded"))
+
+    with pytest.raises(RateLimitTimeout):
+        embed_in_batches(embeddings, TEXTS)
+
+    assert embeddings.calls == [TEXTS]
+
+
+def test_transient_error_while_isolating_is_raised():
+    def fail(texts, call):
+        if call == 1:
+            return FakeAPIError("Invalid input", status_code=400)
+        return FakeAPIError("Service unavailable", status_code=503)
+
+    with pytest.raises(FakeAPIError, match="Service unavailable"):
+        embed_in_batches(FakeEmbeddings(fail), TEXTS)
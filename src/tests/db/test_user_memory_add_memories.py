@@ -0,0 +1,161 @@
+"""
+UserMemoryManager.add_memories 배치 내 중복/충돌 처리 테스트
+
+같은 추출 배치에 들어온 fact끼리도 "나중 fact 우선" 규칙이 적용되는지 확인합니다.
+DB/LLM/임베딩은 가짜 객체로 대체합니다.
+"""
+
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pytest
+
+import db.user_memory_manager as user_memory_module
+from db.user_memory_manager import UserMemoryManager
+from db.user_memory_models import ContentType, ExtractedFact, SearchWeights, Speaker, Subject
+
+
+class FakeEmbeddings:
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    async def aembed_documents(self, texts):
+        return [self.vectors[t.split(" (Keywords")[0]] for t in texts]
+
+
+class FakeResult:
+    def scalar(self):
+        return datetime.now(timezone.utc)
+
+
+class FakeConn:
+    def __init__(self, executed):
+        self.executed = executed
+
+    def execute(self, sql, params=None):
+        self.executed.append((str(sql), params))
+        return FakeResult()
+
+    def commit(self):
+        pass
+
+
+class FakeEngine:
+    def __init__(self):
+        self.executed = []
+
+    @contextmanager
+    def connect(self):
+        yield FakeConn(self.executed)
+
+
+class FakeHotCache:
+    def __init__(self):
+        self.writes = []
+
+    def invalidate(self, player_id, heroine_id):
+        pass
+
+    def apply_writes(self, player_id, heroine_id, added, removed_ids):
+        self.writes.append(([memory["id"] for memory in added], list(removed_ids)))
+
+
+def make_manager(vectors, verdicts):
+    manager = UserMemoryManager.__new__(UserMemoryManager)
+    manager.engine = FakeEngine()
+    manager.embeddings = FakeEmbeddings(vectors)
+    manager.hot_cache = FakeHotCache()
+    manager.default_weights = SearchWeights()
+    manager.duplicate_threshold = 0.9
+    manager.conflict_candidate_threshold = 0.55
+    manager.conflict_prefilter_threshold = 0.6
+    manager.max_conflict_candidates = 3
+    manager.llm_calls = []
+
+    async def no_similar(*args, **kwargs):
+        return None
+
+    async def no_candidates(*args, **kwargs):
+        return []
+
+    async def judge(pairs):
+        manager.llm_calls.append(list(pairs))
+        return verdicts[: len(pairs)]
+
+    manager._find_similar_memory = no_similar
+    manager._find_conflict_candidates = no_candidates
+    manager._check_conflicts_batch_with_llm = judge
+    return manager
+
+
+def preference(content):
+    return ExtractedFact(
+        speaker=Speaker.USER,
+        subject=Subject.USER,
+        content_type=ContentType.PREFERENCE,
+        content=content,
+    )
+
+
+def invalidated_ids(manager):
+    return [
+        id_
+        for sql, params in manager.engine.executed
+        if "SET invalid_at" in sql
+        for id_ in params["ids"]
+    ]
+
+
+@pytest.fixture(autouse=True)
+def no_read_router(monkeypatch):
+    monkeypatch.setattr(user_memory_module.read_router, "mark_write", lambda scope: None)
+
+
+@pytest.mark.asyncio
+async def test_contradictory_pair_in_one_batch_keeps_later_fact():
+    vectors = {
+        "고양이를 좋아함": [1.0, 0.0, 0.0],
+        "고양이를 싫어함": [0.8, 0.6, 0.0],  # 코사인 0.8: 충돌 후보, 중복 아님
+    }
+    manager = make_manager(vectors, verdicts=[True])
+
+    results = await manager.add_memories(
+        "10001", "letia", [preference("고양이를 좋아함"), preference("고양이를 싫어함")]
+    )
+
+    # 배치 내 쌍도 LLM 1회 호출에 포함 (새 기억 = 나중 fact)
+    assert manager.llm_calls == [[("고양이를 싫어함", "고양이를 좋아함")]]
+    # 앞선 fact만 무효화, 나중 fact는 유효
+    assert invalidated_ids(manager) == [results[0]["memory_id"]]
+    assert results[1]["invalidated"] == [{"content": "고양이를 좋아함"}]
+    assert results[0]["invalidated"] == []
+    # 세션 캐시에는 두 행을 덧붙이고 밀려난 앞선 fact는 제거 (재로드 없음)
+    assert manager.hot_cache.writes == [
+        ([r["memory_id"] for r in results], [results[0]["memory_id"]])
+    ]
+
+
+@pytest.mark.asyncio
+async def test_duplicate_pair_in_one_batch_is_replaced_without_llm():
+    vectors = {"커피를 좋아함": [1.0, 0.0, 0.0], "커피를 좋아함 ": [1.0, 0.0, 0.0]}
+    manager = make_manager(vectors, verdicts=[])
+
+    results = await manager.add_memories(
+        "10001", "letia", [preference("커피를 좋아함"), preference("커피를 좋아함 ")]
+    )
+
+    assert manager.llm_calls == []
+    assert invalidated_ids(manager) == [results[0]["memory_id"]]
+
+
+@pytest.mark.asyncio
+async def test_unrelated_facts_in_one_batch_are_both_kept():
+    vectors = {"고양이를 좋아함": [1.0, 0.0, 0.0], "수영을 배움": [0.0, 1.0, 0.0]}
+    manager = make_manager(vectors, verdicts=[])
+
+    await manager.add_memories(
+        "10001", "letia", [preference("고양이를 좋아함"), preference("수영을 배움")]
+    )
+
+    assert manager.llm_calls == []
+    assert invalidated_ids(manager) == []
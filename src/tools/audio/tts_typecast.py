@@ -9,9 +9,19 @@ SDK 문서: https://github.com/neosapience/typecast-python
 
 import os
 import re
+from typing import Optional
+
 from typecast.async_client import AsyncTypecast
 from typecast.models import TTSRequest, LanguageCode
 
+from utils.metrics import metrics
+from utils.rate_limiter import rate_limiter
+from utils.resilience import PROVIDER_TYPECAST, resilience
+
+
+# Typecast TTS 모델
+TYPECAST_MODEL = "ssfm-v21"
+
 
 def sanitize_text_for_tts(text: str) -> str:
     """TTS용 텍스트 전처리
@@ -124,21 +134,48 @@ class TypecastTTSService:
         if not text:
             raise ValueError("TTS 입력 텍스트가 비어있습니다.")
 
-        # Typecast SDK 사용
-        async with AsyncTypecast(api_key=self.api_key) as client:
-            response = await client.text_to_speech(
-                TTSRequest(
-                    text=text,
-                    model="ssfm-v21",
-                    voice_id=voice_id,
-                    language=LanguageCode.KOR,
-                    emotion=emotion_preset,
-                    emotion_intensity=emotion_intensity,
-                    audio_format="wav",
+        # 워커 간 공유 RPM 한도 확보
+        await rate_limiter.acquire(PROVIDER_TYPECAST, TYPECAST_MODEL)
+
+        # Typecast SDK 사용 (서킷이 열려 있으면 요청 없이 CircuitOpenError)
+        async def _request() -> bytes:
+            async with AsyncTypecast(api_key=self.api_key) as client:
+                response = await client.text_to_speech(
+                    TTSRequest(
+                        text=text,
+                        model=TYPECAST_MODEL,
+                        voice_id=voice_id,
+                        language=LanguageCode.KOR,
+                        emotion=emotion_preset,
+                        emotion_intensity=emotion_intensity,
+                        audio_format="wav",
+                    )
                 )
-            )
+                return response.audio_data
+
+        return await resilience.call(PROVIDER_TYPECAST, _request)
+
+    async def text_to_speech_or_none(
+        self,
+        text: str,
+        npc_id: int,
+        emotion: int = 0,
+        emotion_intensity: float = 1.0,
+    ) -> Optional[bytes]:
+        """text_to_speech의 폴백 버전
 
-            return response.audio_data
+        Typecast 장애(서킷 open 포함) 시 예외 대신 None을 반환하여
+        음성 API가 텍스트만으로 응답할 수 있게 합니다.
+
+        Returns:
+            wav 바이트 또는 None (TTS 실패)
+        """
+        try:
+            return await self.text_to_speech(text, npc_id, emotion, emotion_intensity)
+        except Exception as e:
+            metrics.inc("tts_fallback_text_only_total")
+            print(f"[TTS] 음성 생성 실패, 텍스트만 응답: {e}")
+            return None
 
 
 # 싱글톤 인스턴스
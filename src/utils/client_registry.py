@@ -0,0 +1,374 @@
+"""
+LLM / 임베딩 클라이언트 레지스트리
+
+에이전트 모듈마다 init_chat_model / ChatGroq / OpenAIEmbeddings를 따로 만들면
+인스턴스마다 별도의 HTTP 커넥션 풀과 TLS 세션을 갖게 됩니다.
+이 모듈은 (provider, model, params) 단위로 클라이언트를 프로세스 전체에서 공유하고,
+같은 프로바이더의 클라이언트들은 하나의 httpx 커넥션 풀을 함께 씁니다.
+
+주요 기능:
+1. (provider, model, model_provider, params) 키 기반 ChatModel / Embeddings 캐시
+2. 프로바이더별 공유 httpx 클라이언트 (keep-alive 풀 튜닝, h2 설치 시 HTTP/2)
+3. 계측 transport: 프로바이더별 in-flight 요청 수 / 지연 시간 / 에러 수 (utils.metrics)
+4. 분산 레이트 리미터 주입 (ChatModel rate_limiter + 토큰 사용량 콜백, 임베딩 래퍼)
+5. 임베딩 2단계 캐시 (LRU + Redis, utils.embedding_cache)
+
+이 모듈이 없을 경우 발생할 문제:
+- 모듈 수만큼 커넥션 풀이 생겨 전체 소켓 수를 제한할 수 없음
+- 새 인스턴스마다 콜드 TLS 핸드셰이크 발생 (요청마다 생성하는 곳은 매 호출마다)
+- 프로바이더별 동시 요청 수/지연을 확인할 방법이 없음
+
+사용 예시:
+    from utils.client_registry import get_chat_model, get_embeddings
+
+    llm = get_chat_model(LLM.GROK_4_1_FAST_NON_REASONING, temperature=1, max_tokens=200)
+    embeddings = get_embeddings("text-embedding-3-small")
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from langchain.chat_models import init_chat_model
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+from utils.embedding_cache import CachedEmbeddings
+from utils.metrics import metrics
+from utils.request_deadline import check_deadline
+from utils.rate_limiter import (
+    ProviderRateLimiter,
+    TokenUsageCallback,
+    estimate_tokens,
+    rate_limiter,
+)
+from utils.resilience import (
+    PROVIDER_ANTHROPIC,
+    PROVIDER_GOOGLE,
+    PROVIDER_GROQ,
+    PROVIDER_OPENAI,
+    PROVIDER_XAI,
+    provider_for_model,
+)
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+# 프로바이더별 최대 동시 커넥션 수 (전체 소켓 수 상한)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+# 유지할 keep-alive 커넥션 수
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+# keep-alive 커넥션 유지 시간(초)
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+# 커넥션 수립 타임아웃(초) / 전체 요청 타임아웃(초)
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_REQUEST_TIMEOUT = float(os.getenv("HTTP_REQUEST_TIMEOUT", "60"))
+
+# http_client / http_async_client 주입을 지원하는 프로바이더 (OpenAI SDK / Groq SDK 기반)
+HTTPX_PROVIDERS = {PROVIDER_OPENAI, PROVIDER_XAI, PROVIDER_GROQ}
+
+# init_chat_model model_provider -> 레이트 리밋/서킷/httpx 풀 프로바이더
+MODEL_PROVIDER_TO_PROVIDER = {
+    "openai": PROVIDER_OPENAI,
+    "xai": PROVIDER_XAI,
+    "groq": PROVIDER_GROQ,
+    "google_genai": PROVIDER_GOOGLE,
+    "anthropic": PROVIDER_ANTHROPIC,
+}
+
+# (프로바이더, 모델, init_chat_model model_provider, 파라미터)
+ClientKey = Tuple[str, str, Optional[str], Tuple]
+
+
+def _freeze(params: Dict[str, Any]) -> Tuple:
+    """파라미터 dict를 해시 가능한 키로 변환"""
+    return tuple(sorted((k, repr(v)) for k, v in params.items()))
+
+
+# ============================================
+# 계측 transport
+# ============================================
+
+
+class _InstrumentedAsyncTransport(httpx.AsyncHTTPTransport):
+    """요청 단위 in-flight / 지연 / 에러를 기록하는 비동기 transport"""
+
+    def __init__(self, provider: str, **kwargs):
+        super().__init__(**kwargs)
+        self.provider = provider
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        labels = {"provider": self.provider}
+        metrics.add_gauge("http_client_in_flight", 1, labels=labels)
+        start = time.perf_counter()
+        try:
+            return await super().handle_async_request(request)
+        except Exception:
+            metrics.inc("http_client_errors_total", labels=labels)
+            raise
+        finally:
+            metrics.add_gauge("http_client_in_flight", -1, labels=labels)
+            metrics.observe(
+                "http_client_latency_seconds", time.perf_counter() - start, labels=labels
+            )
+
+
+class _InstrumentedTransport(httpx.HTTPTransport):
+    """요청 단위 in-flight / 지연 / 에러를 기록하는 동기 transport"""
+
+    def __init__(self, provider: str, **kwargs):
+        super().__init__(**kwargs)
+        self.provider = provider
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        labels = {"provider": self.provider}
+        metrics.add_gauge("http_client_in_flight", 1, labels=labels)
+        start = time.perf_counter()
+        try:
+            return super().handle_request(request)
+        except Exception:
+            metrics.inc("http_client_errors_total", labels=labels)
+            raise
+        finally:
+            metrics.add_gauge("http_client_in_flight", -1, labels=labels)
+            metrics.observe(
+                "http_client_latency_seconds", time.perf_counter() - start, labels=labels
+            )
+
+
+# ============================================
+# 레이트 리밋 임베딩 래퍼
+# ============================================
+
+
+class RateLimitedEmbeddings(Embeddings):
+    """요청 전 분산 레이트 리미터로 RPM/TPM을 확보하는 임베딩 래퍼
+
+    임베딩은 입력 텍스트로 토큰 수를 미리 알 수 있으므로 TPM을 선차감합니다.
+    요청 데드라인이 이미 지났으면 호출하지 않습니다.
+    나머지 속성은 감싼 OpenAIEmbeddings에 위임합니다.
+    """
+
+    def __init__(self, inner: OpenAIEmbeddings, provider: str, model: str):
+        self.inner = inner
+        self.provider = provider
+        self.model = model
+
+    def _tokens(self, texts: List[str]) -> int:
+        return sum(estimate_tokens(t) for t in texts)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        check_deadline("embedding")
+        rate_limiter.acquire_sync(self.provider, self.model, tokens=self._tokens(texts))
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        check_deadline("embedding")
+        rate_limiter.acquire_sync(self.provider, self.model, tokens=estimate_tokens(text))
+        return self.inner.embed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        check_deadline("embedding")
+        await rate_limiter.acquire(self.provider, self.model, tokens=self._tokens(texts))
+        return await self.inner.aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        check_deadline("embedding")
+        await rate_limiter.acquire(self.provider, self.model, tokens=estimate_tokens(text))
+        return await self.inner.aembed_query(text)
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self.inner, item)
+
+
+# ============================================
+# 레지스트리
+# ============================================
+
+
+class ClientRegistry:
+    """프로세스 전역 LLM / 임베딩 클라이언트 레지스트리
+
+    아키텍처 위치:
+    - 에이전트, 메모리 매니저, 시나리오 서비스의 LLM/임베딩 생성 지점에서 사용
+    - HedgedLLM은 여기서 받은 ChatModel을 감싸서 사용 (같은 키면 같은 인스턴스)
+
+    사용 예시:
+        llm = client_registry.chat_model(LLM.GPT5_MINI)
+        client_registry.stats()
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._chat_models: Dict[ClientKey, Any] = {}
+        self._embeddings: Dict[ClientKey, Any] = {}
+        self._async_http: Dict[str, httpx.AsyncClient] = {}
+        self._sync_http: Dict[str, httpx.Client] = {}
+
+    # ============================================
+    # 공유 httpx 클라이언트
+    # ============================================
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        )
+
+    def _timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(HTTP_REQUEST_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+
+    def async_http_client(self, provider: str) -> httpx.AsyncClient:
+        """프로바이더 공유 비동기 httpx 클라이언트 (락 보유 상태에서 호출)"""
+        if provider not in self._async_http:
+            self._async_http[provider] = httpx.AsyncClient(
+                transport=_InstrumentedAsyncTransport(
+                    provider, http2=HTTP2_AVAILABLE, limits=self._limits()
+                ),
+                timeout=self._timeout(),
+            )
+        return self._async_http[provider]
+
+    def sync_http_client(self, provider: str) -> httpx.Client:
+        """프로바이더 공유 동기 httpx 클라이언트 (락 보유 상태에서 호출)"""
+        if provider not in self._sync_http:
+            self._sync_http[provider] = httpx.Client(
+                transport=_InstrumentedTransport(
+                    provider, http2=HTTP2_AVAILABLE, limits=self._limits()
+                ),
+                timeout=self._timeout(),
+            )
+        return self._sync_http[provider]
+
+    def _http_kwargs(self, provider: str) -> Dict[str, Any]:
+        if provider not in HTTPX_PROVIDERS:
+            return {}
+        return {
+            "http_client": self.sync_http_client(provider),
+            "http_async_client": self.async_http_client(provider),
+        }
+
+    # ============================================
+    # 클라이언트 조회
+    # ============================================
+
+    def chat_model(
+        self, model: str, model_provider: Optional[str] = None, **params
+    ) -> Any:
+        """공유 ChatModel 조회 (없으면 생성)
+
+        Args:
+            model: 모델 이름 (enums.LLM 값)
+            model_provider: init_chat_model에 넘길 프로바이더 (None이면 자동 추론,
+                            Groq 서빙 모델은 자동으로 "groq")
+            **params: temperature, max_tokens 등 모델 파라미터
+
+        Returns:
+            LangChain ChatModel
+        """
+        provider = provider_for_model(model)
+        if model_provider is None and provider == PROVIDER_GROQ:
+            model_provider = "groq"
+        # 명시한 model_provider가 실제 요청 대상 (같은 모델 이름이라도 다른 클라이언트)
+        provider = MODEL_PROVIDER_TO_PROVIDER.get(model_provider, provider)
+
+        key: ClientKey = (provider, str(model), model_provider, _freeze(params))
+        with self._lock:
+            if key not in self._chat_models:
+                kwargs = dict(params)
+                if model_provider:
+                    kwargs["model_provider"] = model_provider
+                self._chat_models[key] = init_chat_model(
+                    model=str(model),
+                    rate_limiter=ProviderRateLimiter(provider, str(model)),
+                    callbacks=[TokenUsageCallback(provider, str(model))],
+                    **kwargs,
+                    **self._http_kwargs(provider),
+                )
+                metrics.set_gauge("client_registry_chat_models", len(self._chat_models))
+            return self._chat_models[key]
+
+    def embeddings(self, model: str = "text-embedding-3-small", **params) -> Embeddings:
+        """공유 임베딩 조회 (없으면 생성, 캐시 -> 레이트 리미터 -> OpenAI 순서)"""
+        key: ClientKey = (PROVIDER_OPENAI, str(model), None, _freeze(params))
+        with self._lock:
+            if key not in self._embeddings:
+                self._embeddings[key] = CachedEmbeddings(
+                    RateLimitedEmbeddings(
+                        OpenAIEmbeddings(
+                            model=str(model), **params, **self._http_kwargs(PROVIDER_OPENAI)
+                        ),
+                        PROVIDER_OPENAI,
+                        str(model),
+                    ),
+                    str(model),
+                )
+                metrics.set_gauge("client_registry_embeddings", len(self._embeddings))
+            return self._embeddings[key]
+
+    # ============================================
+    # 통계 / 종료
+    # ============================================
+
+    def stats(self) -> Dict[str, Any]:
+        """프로바이더별 in-flight / 지연 통계 + 등록된 클라이언트 수"""
+        with self._lock:
+            providers = set(self._async_http) | set(self._sync_http)
+            chat_count = len(self._chat_models)
+            embedding_count = len(self._embeddings)
+
+        per_provider = {}
+        for provider in sorted(providers):
+            labels = {"provider": provider}
+            samples = metrics.get_samples("http_client_latency_seconds", labels=labels)
+            per_provider[provider] = {
+                "in_flight": metrics.get_gauge("http_client_in_flight", labels=labels),
+                "errors": metrics.get_counter("http_client_errors_total", labels=labels),
+                "recent_requests": len(samples),
+                "p50": metrics.get_percentile("http_client_latency_seconds", 50, labels=labels),
+                "p99": metrics.get_percentile("http_client_latency_seconds", 99, labels=labels),
+            }
+
+        return {
+            "http2": HTTP2_AVAILABLE,
+            "chat_models": chat_count,
+            "embeddings": embedding_count,
+            "providers": per_provider,
+        }
+
+    async def aclose(self) -> None:
+        """공유 httpx 클라이언트 종료 (서버 종료 시)"""
+        with self._lock:
+            async_clients = list(self._async_http.values())
+            sync_clients = list(self._sync_http.values())
+            self._async_http.clear()
+            self._sync_http.clear()
+            self._chat_models.clear()
+            self._embeddings.clear()
+
+        for client in async_clients:
+            await client.aclose()
+        for client in sync_clients:
+            client.close()
+
+
+# 싱글톤 인스턴스
+client_registry = ClientRegistry()
+
+
+def get_chat_model(model: str, model_provider: Optional[str] = None, **params) -> Any:
+    """client_registry.chat_model 단축 함수"""
+    return client_registry.chat_model(model, model_provider=model_provider, **params)
+
+
+def get_embeddings(model: str = "text-embedding-3-small", **params) -> Embeddings:
+    """client_registry.embeddings 단축 함수"""
+    return client_registry.embeddings(model, **params)
@@ -0,0 +1,446 @@
+"""
+2단계(프로세스 LRU + Redis) 임베딩 캐시
+
+시나리오 검색, 기억 검색, 대화 저장 시 중복 검사 등에서 같은(또는 공백만 다른)
+텍스트를 반복해서 임베딩하며, 이 중복 호출이 OpenAI 왕복의 큰 비중을 차지합니다.
+이 모듈은 (model, 정규화 텍스트 해시) 키로 임베딩을 캐시하는 Embeddings 래퍼입니다.
+
+주요 기능:
+1. 1단계: 프로세스 내 LRU (락 보호, 크기 제한)
+2. 2단계: 워커 간 공유 Redis (float32 base64, TTL)
+3. 미스 배치: 한 번의 호출에서 나온 미스를 중복 제거 후 inner.embed_documents 1회로 처리
+4. 비동기 경로 single-flight: 동시에 같은 텍스트를 요청하면 원격 호출 1회만 수행
+   - 시나리오 검색, 기억 검색/저장, 턴 임베딩 prefetch가 모두 이 경로 사용
+   - 원격 호출은 분리된 태스크에서 실행되어, 처음 요청한 코루틴이 취소되어도
+     같은 키를 기다리는 다른 코루틴은 결과를 받음 (공유 future를 취소하지 않음)
+   - 비동기 경로의 Redis 조회/저장은 비동기 클라이언트 사용 (이벤트 루프를 막지 않음)
+5. 티어별 히트/미스, 히트율, 조회/원격 지연 메트릭 (utils.metrics)
+6. Redis 장애 시 LRU + 원격 호출로 계속 동작 (fail-open)
+7. 턴 컨텍스트 티어: 현재 턴에서 이미 계산한 임베딩을 먼저 조회 (utils.embedding_context)
+8. 이벤트 루프 안에서 동기 경로를 호출하면 embedding_cache_sync_on_loop_total 기록
+   (동기 경로는 레이트 리밋 대기/Redis 조회로 루프를 막음, 스크립트/스레드 전용)
+
+이 모듈이 없을 경우 발생할 문제:
+- 같은 질문/기억 텍스트를 턴마다 다시 임베딩 -> 불필요한 지연 + 비용
+- 워커가 여러 개면 한 워커에서 계산한 임베딩을 다른 워커가 재사용할 수 없음
+
+Redis 키 구조:
+- embcache:{model}:{sha1(정규화 텍스트)} - float32 벡터 base64 (TTL)
+
+사용 예시:
+    from utils.embedding_cache import CachedEmbeddings
+
+    model = "text-embedding-3-small"
+    embeddings = CachedEmbeddings(OpenAIEmbeddings(model=model), model)
+    vector = await embeddings.aembed_query("어제 뭐 했어?")
+"""
+
+import asyncio
+import base64
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from db.redis_manager import redis_manager
+from utils.embedding_context import current_turn_embeddings
+from utils.metrics import metrics
+
+
+# 전체 비활성화 스위치 (false면 inner로 바로 위임)
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+# 프로세스 LRU 최대 항목 수 (1536차원 기준 항목당 약 12KB)
+EMBEDDING_CACHE_LRU_SIZE = int(os.getenv("EMBEDDING_CACHE_LRU_SIZE", "4096"))
+# Redis TTL(초) - 임베딩은 모델이 같으면 변하지 않으므로 길게
+EMBEDDING_CACHE_TTL_SECONDS = int(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+# Redis 티어 사용 여부
+EMBEDDING_CACHE_REDIS_ENABLED = (
+    os.getenv("EMBEDDING_CACHE_REDIS_ENABLED", "true").lower() == "true"
+)
+
+REDIS_KEY_PREFIX = "embcache"
+
+TIER_TURN = "turn"
+TIER_LRU = "lru"
+TIER_REDIS = "redis"
+TIER_MISS = "miss"
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """캐시 키용 텍스트 정규화 (유니코드 NFC + 공백 정리)"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", str(text))).strip()
+
+
+def cache_key(model: str, text: str) -> str:
+    """(model, 정규화 텍스트 해시) 캐시 키"""
+    digest = hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+    return f"{REDIS_KEY_PREFIX}:{model}:{digest}"
+
+
+def _encode(vector: List[float]) -> str:
+    return base64.b64encode(array("f", vector).tobytes()).decode("ascii")
+
+
+def _decode(data: str) -> List[float]:
+    vector = array("f")
+    vector.frombytes(base64.b64decode(data))
+    return vector.tolist()
+
+
+def _consume_task_result(task: asyncio.Task) -> None:
+    """요청한 코루틴이 먼저 취소된 분리 태스크의 예외를 소비 ("never retrieved" 경고 방지)"""
+    if not task.cancelled():
+        task.exception()
+
+
+class CachedEmbeddings(Embeddings):
+    """LRU + Redis 2단계 캐시를 적용한 임베딩 래퍼
+
+    아키텍처 위치:
+    - ClientRegistry.embeddings가 레이트 리밋 래퍼 바깥에 감싸서 반환
+      (캐시 히트는 레이트 리밋 토큰을 쓰지 않음)
+    - embed_query / embed_documents 모두 같은 키 공간 사용
+      (OpenAI는 쿼리/문서 임베딩이 같은 엔드포인트)
+
+    사용 예시:
+        embeddings = get_embeddings("text-embedding-3-small")
+        vectors = await embeddings.aembed_documents(["기억 1", "기억 2"])
+    """
+
+    def __init__(
+        self,
+        inner: Embeddings,
+        model: str,
+        lru_size: int = EMBEDDING_CACHE_LRU_SIZE,
+        ttl_seconds: int = EMBEDDING_CACHE_TTL_SECONDS,
+        use_redis: bool = EMBEDDING_CACHE_REDIS_ENABLED,
+        enabled: bool = EMBEDDING_CACHE_ENABLED,
+    ):
+        """초기화
+
+        Args:
+            inner: 실제 임베딩 (RateLimitedEmbeddings 등)
+            model: 캐시 키에 포함할 모델 이름
+            lru_size: 프로세스 LRU 최대 항목 수
+            ttl_seconds: Redis TTL(초)
+            use_redis: Redis 티어 사용 여부
+            enabled: False면 캐시 없이 inner에 위임
+        """
+        self.inner = inner
+        self.model = model
+        self.lru_size = lru_size
+        self.ttl_seconds = ttl_seconds
+        self.use_redis = use_redis
+        self.enabled = enabled
+
+        self._lru: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    # ============================================
+    # LRU 티어
+    # ============================================
+
+    def _lru_get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._lru.get(key)
+            if vector is not None:
+                self._lru.move_to_end(key)
+            return vector
+
+    def _lru_put(self, key: str, vector: List[float]) -> None:
+        with self._lock:
+            self._lru[key] = vector
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    # ============================================
+    # Redis 티어
+    # ============================================
+
+    def _redis_get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        if not self.use_redis or not keys:
+            return {}
+        try:
+            values = redis_manager.client.mget(keys)
+        except Exception as e:
+            metrics.inc("embedding_cache_redis_errors_total", labels={"op": "get"})
+            print(f"[EMBED_CACHE] Redis 조회 실패, 원격 호출로 진행: {e}")
+            return {}
+        return {key: _decode(value) for key, value in zip(keys, values) if value}
+
+    def _redis_put_many(self, items: Dict[str, List[float]]) -> None:
+        if not self.use_redis or not items:
+            return
+        try:
+            pipe = redis_manager.client.pipeline(transaction=False)
+            for key, vector in items.items():
+                pipe.setex(key, self.ttl_seconds, _encode(vector))
+            pipe.execute()
+        except Exception as e:
+            metrics.inc("embedding_cache_redis_errors_total", labels={"op": "set"})
+            print(f"[EMBED_CACHE] Redis 저장 실패: {e}")
+
+    async def _aredis_get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """_redis_get_many의 비동기 버전"""
+        if not self.use_redis or not keys:
+            return {}
+        try:
+            values = await redis_manager.async_client.mget(keys)
+        except Exception as e:
+            metrics.inc("embedding_cache_redis_errors_total", labels={"op": "get"})
+            print(f"[EMBED_CACHE] Redis 조회 실패, 원격 호출로 진행: {e}")
+            return {}
+        return {key: _decode(value) for key, value in zip(keys, values) if value}
+
+    async def _aredis_put_many(self, items: Dict[str, List[float]]) -> None:
+        """_redis_put_many의 비동기 버전"""
+        if not self.use_redis or not items:
+            return
+        try:
+            pipe = redis_manager.async_client.pipeline(transaction=False)
+            for key, vector in items.items():
+                pipe.setex(key, self.ttl_seconds, _encode(vector))
+            await pipe.execute()
+        except Exception as e:
+            metrics.inc("embedding_cache_redis_errors_total", labels={"op": "set"})
+            print(f"[EMBED_CACHE] Redis 저장 실패: {e}")
+
+    # ============================================
+    # 조회 공통
+    # ============================================
+
+    def _lookup_local(self, keys: List[str]) -> Tuple[Dict[str, List[float]], int, int]:
+        """턴 컨텍스트 -> LRU 조회 -> (찾은 벡터, 턴 히트 수, LRU 히트 수)"""
+        found: Dict[str, List[float]] = {}
+        turn = current_turn_embeddings()
+        if turn is not None:
+            for key in keys:
+                vector = turn.get(key)
+                if vector is not None:
+                    found[key] = vector
+        turn_hits = len(found)
+
+        for key in keys:
+            if key in found:
+                continue
+            vector = self._lru_get(key)
+            if vector is not None:
+                found[key] = vector
+        return found, turn_hits, len(found) - turn_hits
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        """턴 컨텍스트 -> LRU -> Redis 순서로 조회 (Redis 히트는 LRU에 채움)"""
+        start = time.perf_counter()
+        found, turn_hits, lru_hits = self._lookup_local(keys)
+        redis_hits = self._redis_get_many([k for k in keys if k not in found])
+        return self._finish_lookup(keys, found, redis_hits, turn_hits, lru_hits, start)
+
+    async def _alookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        """_lookup의 비동기 버전 (Redis 티어만 비동기 클라이언트)"""
+        start = time.perf_counter()
+        found, turn_hits, lru_hits = self._lookup_local(keys)
+        redis_hits = await self._aredis_get_many([k for k in keys if k not in found])
+        return self._finish_lookup(keys, found, redis_hits, turn_hits, lru_hits, start)
+
+    def _finish_lookup(
+        self,
+        keys: List[str],
+        found: Dict[str, List[float]],
+        redis_hits: Dict[str, List[float]],
+        turn_hits: int,
+        lru_hits: int,
+        start: float,
+    ) -> Dict[str, List[float]]:
+        """Redis 히트를 LRU/턴 저장소에 채우고 티어별 메트릭 기록"""
+        turn = current_turn_embeddings()
+        for key, vector in redis_hits.items():
+            self._lru_put(key, vector)
+        found.update(redis_hits)
+
+        # LRU/Redis 히트도 턴 안에서는 eviction과 무관하게 재사용
+        if turn is not None:
+            for key, vector in found.items():
+                turn.put(key, vector)
+
+        labels = {"model": self.model}
+        metrics.observe("embedding_cache_lookup_seconds", time.perf_counter() - start, labels=labels)
+        self._record(TIER_TURN, turn_hits)
+        self._record(TIER_LRU, lru_hits)
+        self._record(TIER_REDIS, len(redis_hits))
+        self._record(TIER_MISS, len(keys) - len(found))
+        return found
+
+    def _store_local(self, vectors: Dict[str, List[float]]) -> None:
+        turn = current_turn_embeddings()
+        for key, vector in vectors.items():
+            self._lru_put(key, vector)
+            if turn is not None:
+                turn.put(key, vector)
+
+    def _store(self, vectors: Dict[str, List[float]]) -> None:
+        self._store_local(vectors)
+        self._redis_put_many(vectors)
+
+    async def _astore(self, vectors: Dict[str, List[float]]) -> None:
+        self._store_local(vectors)
+        await self._aredis_put_many(vectors)
+
+    def _record(self, tier: str, count: int) -> None:
+        if count <= 0:
+            return
+        labels = {"model": self.model}
+        metrics.inc("embedding_cache_requests_total", count, labels={**labels, "tier": tier})
+        hits = sum(
+            metrics.get_counter("embedding_cache_requests_total", labels={**labels, "tier": t})
+            for t in (TIER_TURN, TIER_LRU, TIER_REDIS)
+        )
+        misses = metrics.get_counter(
+            "embedding_cache_requests_total", labels={**labels, "tier": TIER_MISS}
+        )
+        metrics.set_gauge("embedding_cache_hit_rate", hits / max(1, hits + misses), labels=labels)
+
+    def _observe_remote(self, start: float, batch_size: int) -> None:
+        labels = {"model": self.model}
+        metrics.observe("embedding_cache_remote_seconds", time.perf_counter() - start, labels=labels)
+        metrics.observe("embedding_cache_miss_batch_size", batch_size, labels=labels)
+
+    @staticmethod
+    def _unique_misses(texts: List[str], keys: List[str], found: Dict[str, Any]) -> Dict[str, str]:
+        """미스 키 -> 원본 텍스트 (중복 제거, 입력 순서 유지)"""
+        misses: Dict[str, str] = {}
+        for text, key in zip(texts, keys):
+            if key not in found and key not in misses:
+                misses[key] = text
+        return misses
+
+    # ============================================
+    # 동기 경로 (스크립트 / 워커 스레드용)
+    # ============================================
+
+    def _check_not_on_loop(self) -> None:
+        """이벤트 루프 스레드에서 동기 경로를 호출하면 메트릭/로그로 남김"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        metrics.inc("embedding_cache_sync_on_loop_total", labels={"model": self.model})
+        print("[EMBED_CACHE] 이벤트 루프 안에서 동기 임베딩 호출, aembed_query/aembed_documents 사용 필요")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """문서 임베딩 (미스는 중복 제거 후 한 번에 원격 호출)"""
+        self._check_not_on_loop()
+        if not self.enabled or not texts:
+            return self.inner.embed_documents(texts)
+
+        keys = [cache_key(self.model, t) for t in texts]
+        found = self._lookup(keys)
+        misses = self._unique_misses(texts, keys, found)
+
+        if misses:
+            start = time.perf_counter()
+            vectors = self.inner.embed_documents(list(misses.values()))
+            self._observe_remote(start, len(misses))
+            fetched = dict(zip(misses.keys(), vectors))
+            self._store(fetched)
+            found.update(fetched)
+
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """쿼리 임베딩 (캐시 미스 시 inner.embed_query)"""
+        self._check_not_on_loop()
+        if not self.enabled:
+            return self.inner.embed_query(text)
+
+        key = cache_key(self.model, text)
+        found = self._lookup([key])
+        if key in found:
+            return found[key]
+
+        start = time.perf_counter()
+        vector = self.inner.embed_query(text)
+        self._observe_remote(start, 1)
+        self._store({key: vector})
+        return vector
+
+    # ============================================
+    # 비동기 경로 (single-flight)
+    # ============================================
+
+    async def _fetch_owned(
+        self, owned: Dict[str, str], futures: Dict[str, asyncio.Future]
+    ) -> Dict[str, List[float]]:
+        """미스 원격 호출 + 공유 future 완료 (요청한 코루틴과 분리된 태스크에서 실행)"""
+        try:
+            start = time.perf_counter()
+            vectors = await self.inner.aembed_documents(list(owned.values()))
+            self._observe_remote(start, len(owned))
+            fetched = dict(zip(owned.keys(), vectors))
+            for key, future in futures.items():
+                if not future.done():
+                    future.set_result(fetched[key])
+            await self._astore(fetched)
+            return fetched
+        except BaseException as e:
+            # 태스크 자체가 취소되는 경우(루프 종료)에도 기다리는 쪽은 예외로 깨움
+            error = e if isinstance(e, Exception) else RuntimeError("임베딩 계산이 중단되었습니다")
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(error)
+                    # 기다리는 쪽이 없으면 "never retrieved" 경고가 나지 않도록 소비
+                    future.exception()
+            raise
+        finally:
+            for key in futures:
+                self._inflight.pop(key, None)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """비동기 문서 임베딩 (다른 코루틴이 계산 중인 키는 그 결과를 기다림)"""
+        if not self.enabled or not texts:
+            return await self.inner.aembed_documents(texts)
+
+        keys = [cache_key(self.model, t) for t in texts]
+        found = await self._alookup(keys)
+        misses = self._unique_misses(texts, keys, found)
+
+        # 이미 계산 중인 키는 기다리고, 나머지만 이번에 계산
+        waiting = {key: self._inflight[key] for key in misses if key in self._inflight}
+        owned = {key: text for key, text in misses.items() if key not in waiting}
+
+        if owned:
+            loop = asyncio.get_running_loop()
+            futures = {key: loop.create_future() for key in owned}
+            self._inflight.update(futures)
+            # 이 코루틴이 취소되어도 원격 호출은 계속되어 같은 키를 기다리는 쪽에 결과 전달
+            task = asyncio.create_task(self._fetch_owned(owned, futures))
+            task.add_done_callback(_consume_task_result)
+            found.update(await asyncio.shield(task))
+
+        if waiting:
+            metrics.inc(
+                "embedding_cache_coalesced_total", len(waiting), labels={"model": self.model}
+            )
+            for key, future in waiting.items():
+                found[key] = await asyncio.shield(future)
+
+        return [found[key] for key in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """비동기 쿼리 임베딩"""
+        if not self.enabled:
+            return await self.inner.aembed_query(text)
+        return (await self.aembed_documents([text]))[0]
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self.inner, item)
@@ -0,0 +1,116 @@
+"""
+턴 단위 임베딩 컨텍스트
+
+히로인 한 턴 안에서 같은 유저 메시지가 기억 검색, 시나리오 검색, NPC-NPC 기억 검색에서
+각각 임베딩되고, fact 추출의 중복 검사에서도 같은 fact 텍스트가 다시 임베딩됩니다.
+이 모듈은 턴(요청) 동안 살아 있는 임베딩 저장소를 contextvar로 제공하여
+어느 검색기에서든 같은 텍스트의 임베딩을 재사용하고, 필요한 임베딩을
+검색 노드 진입 전에 한 번의 배치 호출로 미리 계산(prefetch)할 수 있게 합니다.
+
+주요 기능:
+1. turn_embedding_context: 턴 범위 임베딩 저장소 설정 (LangGraph 노드/하위 태스크로 전파)
+2. CachedEmbeddings가 LRU/Redis보다 먼저 조회하고, 계산한 임베딩을 저장
+3. prefetch: 검색이 필요하다고 판단된 시점(의도 분류 직후)에 필요한 텍스트를 aembed_documents 1회로 미리 계산
+4. wait_turn_embeddings: 검색 노드가 동기 임베딩 호출 전에 prefetch 완료를 기다림
+
+이 모듈이 없을 경우 발생할 문제:
+- 검색기마다 같은 메시지를 따로 임베딩 -> 검색이 많은 턴의 임계 경로에 중복 왕복
+- 캐시 크기/TTL에 따라 같은 턴 안에서도 재사용이 보장되지 않음
+
+사용 예시:
+    from utils.embedding_context import turn_embedding_context, wait_turn_embeddings
+
+    with turn_embedding_context() as turn:
+        turn.prefetch(embeddings, [user_message])
+        ...
+        await wait_turn_embeddings()
+        vector = embeddings.embed_query(user_message)  # prefetch 결과 재사용
+"""
+
+import asyncio
+import contextvars
+import os
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from utils.metrics import metrics
+
+
+# 턴 시작 시 임베딩 prefetch 사용 여부
+TURN_EMBEDDING_PREFETCH = os.getenv("TURN_EMBEDDING_PREFETCH", "true").lower() == "true"
+
+
+class TurnEmbeddings:
+    """한 턴 동안 계산된 임베딩 저장소 (캐시 키 -> 벡터)
+
+    키는 utils.embedding_cache.cache_key (model + 정규화 텍스트 해시)를 그대로 사용합니다.
+    """
+
+    def __init__(self):
+        self._vectors: Dict[str, List[float]] = {}
+        self._prefetch_task: Optional[asyncio.Task] = None
+
+    def get(self, key: str) -> Optional[List[float]]:
+        return self._vectors.get(key)
+
+    def put(self, key: str, vector: List[float]) -> None:
+        self._vectors[key] = vector
+
+    def prefetch(self, embeddings, texts: List[str]) -> None:
+        """필요한 텍스트를 한 번의 배치 호출로 미리 임베딩 (백그라운드 태스크)
+
+        결과는 embeddings(CachedEmbeddings)가 이 저장소에 넣으므로 따로 받지 않습니다.
+        실패하면 검색기가 필요할 때 개별로 임베딩합니다.
+        """
+        texts = [t for t in dict.fromkeys(texts) if t]
+        if not TURN_EMBEDDING_PREFETCH or not texts:
+            return
+        metrics.inc("turn_embedding_prefetch_total")
+        metrics.observe("turn_embedding_prefetch_texts", len(texts))
+        self._prefetch_task = asyncio.create_task(self._run_prefetch(embeddings, texts))
+
+    async def _run_prefetch(self, embeddings, texts: List[str]) -> None:
+        try:
+            await embeddings.aembed_documents(texts)
+        except Exception as e:
+            metrics.inc("turn_embedding_prefetch_errors_total")
+            print(f"[TURN_EMBED] prefetch 실패, 검색 시 개별 임베딩: {e}")
+
+    async def wait(self) -> None:
+        """진행 중인 prefetch 완료 대기"""
+        if self._prefetch_task is not None and not self._prefetch_task.done():
+            await asyncio.shield(self._prefetch_task)
+
+    def close(self) -> None:
+        """턴 종료 시 끝나지 않은 prefetch 취소"""
+        if self._prefetch_task is not None and not self._prefetch_task.done():
+            self._prefetch_task.cancel()
+
+
+_current: contextvars.ContextVar[Optional[TurnEmbeddings]] = contextvars.ContextVar(
+    "turn_embeddings", default=None
+)
+
+
+def current_turn_embeddings() -> Optional[TurnEmbeddings]:
+    """현재 턴의 임베딩 저장소 (턴 밖이면 None)"""
+    return _current.get()
+
+
+@contextmanager
+def turn_embedding_context():
+    """턴 범위 임베딩 저장소 설정"""
+    turn = TurnEmbeddings()
+    token = _current.set(turn)
+    try:
+        yield turn
+    finally:
+        turn.close()
+        _current.reset(token)
+
+
+async def wait_turn_embeddings() -> None:
+    """현재 턴의 prefetch 완료 대기 (턴 밖이면 즉시 반환)"""
+    turn = _current.get()
+    if turn is not None:
+        await turn.wait()
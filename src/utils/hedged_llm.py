@@ -0,0 +1,368 @@
+"""
+헤지(Hedged) LLM 호출 래퍼
+
+단일 프로바이더의 간헐적인 느린 응답이 p99 지연을 지배하는 문제를 줄이기 위해,
+첫 요청이 최근 지연 분위수(예: p95) 안에 끝나지 않으면 같은 모델 또는
+대체 모델로 두 번째 요청(헤지)을 보내고 먼저 끝난 쪽을 사용합니다.
+
+주요 기능:
+1. 최근 지연 시간 분위수 기반 헤지 데드라인 계산 (샘플 부족 시 기본값)
+   - 취소/실패한 요청도 그때까지의 경과 시간을 샘플로 기록 (실제 지연의 하한)
+     성공 샘플만 쓰면 헤지에 진 느린 요청이 빠져 데드라인이 계속 내려가고 헤지 비율이 늘어남
+2. 먼저 끝난 응답 채택 + 나머지 요청 취소 (호출자가 취소되어도 남은 요청을 모두 취소)
+3. 첫 요청이 데드라인 전에 프로바이더 장애(429, 5xx, 타임아웃, 서킷 open)로 실패하면 즉시 헤지
+   - 요청 오류(400 등)는 헤지해도 같으므로 그대로 올림
+4. 호출별 헤지 통계 기록 (utils.metrics)
+5. 프로바이더 서킷 브레이커 적용 + 헤지는 전역 재시도 예산 안에서만 발사 (utils.resilience)
+6. 동기 invoke도 같은 규칙으로 헤지 (헤지 스레드 풀에서 실행, 진 쪽 요청은 결과만 버림)
+
+이 모듈이 없을 경우 발생할 문제:
+- 프로바이더 한 곳의 tail latency가 그대로 채팅 p99가 됨
+- 에이전트마다 타임아웃/재시도 로직을 따로 구현해야 함
+
+사용 예시:
+    from utils.hedged_llm import HedgedLLM
+
+    llm = HedgedLLM(
+        init_chat_model(model=LLM.GROK_4_1_FAST_NON_REASONING, max_tokens=200),
+        name="heroine_response",
+    )
+    response = await llm.ainvoke(messages, **config)
+    response = llm.invoke(messages)  # 동기 그래프 노드
+"""
+
+import asyncio
+import contextvars
+import os
+import time
+from concurrent import futures
+from typing import Any, Optional
+
+from utils.metrics import metrics
+from utils.resilience import FastFailError, is_provider_failure, provider_for_model, resilience
+
+# 헤지 데드라인 분위수 (최근 지연의 p95를 넘기면 헤지 발사)
+HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+# 데드라인 계산에 필요한 최소 샘플 수 (미만이면 기본 데드라인 사용)
+HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+# 샘플이 부족할 때 사용하는 기본 데드라인(초)
+HEDGE_DEFAULT_DELAY = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", "2.0"))
+# 데드라인 하한/상한(초) - 너무 이른 헤지로 비용이 늘거나, 너무 늦어 효과가 없는 것 방지
+HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.3"))
+HEDGE_MAX_DELAY = float(os.getenv("LLM_HEDGE_MAX_DELAY", "5.0"))
+# 전체 비활성화 스위치
+HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "true").lower() == "true"
+# 동기 invoke 헤지용 스레드 수 (진 쪽 요청도 끝날 때까지 스레드를 점유)
+HEDGE_SYNC_WORKERS = int(os.getenv("LLM_HEDGE_SYNC_WORKERS", "16"))
+
+LATENCY_METRIC = "llm_call_latency_seconds"
+
+# 동기 invoke의 primary/헤지 요청 실행 스레드 풀
+_sync_pool = futures.ThreadPoolExecutor(
+    max_workers=HEDGE_SYNC_WORKERS, thread_name_prefix="llm-hedge"
+)
+
+
+def _model_name(llm: Any) -> Optional[str]:
+    """ChatModel의 모델 이름 (ChatOpenAI/ChatXAI/ChatGroq 공통 model_name)"""
+    return getattr(llm, "model_name", None) or getattr(llm, "model", None)
+
+
+def _should_hedge(error: BaseException) -> bool:
+    """헤지로 회복될 수 있는 실패인지 (프로바이더 장애, 서킷 open/레이트 리밋 대기 초과)"""
+    return isinstance(error, FastFailError) or is_provider_failure(error)
+
+class HedgedLLM:
+    """헤지 요청을 지원하는 LLM 래퍼
+
+    LangChain Runnable(ChatModel, with_structured_output 결과 등)을 감싸며,
+    ainvoke/invoke가 헤지 로직을 타고 나머지 속성은 primary에 위임합니다.
+
+    아키텍처 위치:
+    - 각 에이전트의 LLM 인스턴스 생성 지점에서 감싸서 사용
+    - 지연 시간/헤지 통계는 utils.metrics에 기록
+
+    Args:
+        primary: 기본 LLM (Runnable)
+        name: 지연 통계를 구분할 호출 이름 (예: "heroine_response")
+        hedge: 헤지 요청에 사용할 LLM (None이면 primary를 한 번 더 호출)
+        percentile: 헤지 데드라인 분위수
+        enabled: False면 헤지 없이 primary만 호출
+        provider: 서킷 브레이커 프로바이더 (None이면 모델 이름으로 추론)
+        hedge_provider: 헤지 LLM의 프로바이더 (None이면 모델 이름으로 추론)
+    """
+
+    def __init__(
+        self,
+        primary: Any,
+        name: str,
+        hedge: Optional[Any] = None,
+        percentile: float = HEDGE_PERCENTILE,
+        enabled: bool = HEDGE_ENABLED,
+        provider: Optional[str] = None,
+        hedge_provider: Optional[str] = None,
+    ):
+        self.primary = primary
+        self.hedge = hedge if hedge is not None else primary
+        self.name = name
+        self.percentile = percentile
+        self.enabled = enabled
+        self.provider = provider or provider_for_model(_model_name(self.primary))
+        self.hedge_provider = hedge_provider or (
+            provider_for_model(_model_name(self.hedge))
+            if hedge is not None
+            else self.provider
+        )
+
+    # ============================================
+    # 데드라인 계산
+    # ============================================
+
+    def hedge_delay(self) -> float:
+        """현재 헤지 데드라인(초) 계산
+
+        최근 지연 샘플이 충분하면 지정 분위수를, 아니면 기본값을 사용하고
+        하한/상한으로 자릅니다.
+        """
+        labels = {"name": self.name}
+        samples = metrics.get_samples(LATENCY_METRIC, labels=labels)
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            delay = HEDGE_DEFAULT_DELAY
+        else:
+            delay = metrics.get_percentile(LATENCY_METRIC, self.percentile, labels=labels)
+        return min(HEDGE_MAX_DELAY, max(HEDGE_MIN_DELAY, delay))
+
+    # ============================================
+    # 호출
+    # ============================================
+
+    async def ainvoke(self, input: Any, config: Optional[dict] = None, **kwargs) -> Any:
+        """헤지 요청을 포함한 비동기 호출
+
+        Args:
+            input: 프롬프트 문자열 또는 메시지 리스트
+            config: LangChain RunnableConfig (Langfuse 콜백 등)
+            **kwargs: primary.ainvoke에 그대로 전달
+
+        Returns:
+            먼저 성공한 요청의 응답
+        """
+        if not self.enabled:
+            return await self._timed(self.primary, "primary", input, config, kwargs)
+
+        # primary 프로바이더 서킷이 열려 있으면 바로 헤지 쪽으로
+        if not resilience.is_available(self.provider) and self.hedge_provider != self.provider:
+            return await self._timed(self.hedge, "hedge", input, config, kwargs)
+
+        labels = {"name": self.name}
+        delay = self.hedge_delay()
+        start = time.perf_counter()
+        metrics.inc("llm_hedge_calls_total", labels=labels)
+
+        pending: set = set()
+        try:
+            # 헤지 대기 중 호출자가 취소되어도 finally에서 primary를 취소하도록 try 안에서 생성
+            primary_task = asyncio.create_task(
+                self._timed(self.primary, "primary", input, config, kwargs)
+            )
+            pending = {primary_task}
+            done, pending = await asyncio.wait(pending, timeout=delay)
+
+            if primary_task in done:
+                error = primary_task.exception()
+                # 데드라인 안에 성공하면 헤지 없이 반환
+                if error is None:
+                    return primary_task.result()
+                # 요청 오류는 헤지해도 같으므로 그대로 올림
+                if not _should_hedge(error):
+                    raise error
+
+            # 데드라인 초과 또는 primary 장애 -> 헤지 발사
+            if not self._acquire_hedge(primary_task in done, delay):
+                # 재시도 예산이 없으면 헤지 없이 primary 결과를 그대로 사용 (장애 시 재시도 폭주 방지)
+                return await primary_task
+
+            pending.add(
+                asyncio.create_task(self._timed(self.hedge, "hedge", input, config, kwargs))
+            )
+            winner, last_error = None, None
+            while pending and winner is None:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        break
+                    last_error = task.exception()
+
+            if winner is None:
+                # 두 요청 모두 실패
+                raise last_error
+
+            self._record_win("primary" if winner is primary_task else "hedge", start)
+            return winner.result()
+        finally:
+            # 진 쪽 요청 / 호출자 취소 시 남은 요청 취소
+            for task in pending:
+                if not task.done():
+                    task.cancel()
+                    metrics.inc("llm_hedge_cancelled_total", labels=labels)
+
+    def invoke(self, input: Any, config: Optional[dict] = None, **kwargs) -> Any:
+        """헤지 요청을 포함한 동기 호출 (ainvoke와 같은 규칙)
+
+        요청은 헤지 스레드 풀에서 실행합니다. 스레드는 취소할 수 없으므로
+        진 쪽 요청은 끝날 때까지 실행되고 결과만 버립니다 (지연 샘플은 기록됨).
+        """
+        if not self.enabled:
+            return self._timed_sync(self.primary, "primary", input, config, kwargs)
+
+        if not resilience.is_available(self.provider) and self.hedge_provider != self.provider:
+            return self._timed_sync(self.hedge, "hedge", input, config, kwargs)
+
+        labels = {"name": self.name}
+        delay = self.hedge_delay()
+        start = time.perf_counter()
+        metrics.inc("llm_hedge_calls_total", labels=labels)
+
+        primary_future = self._submit(self.primary, "primary", input, config, kwargs)
+        done, pending = futures.wait({primary_future}, timeout=delay)
+
+        if primary_future in done:
+            error = primary_future.exception()
+            if error is None:
+                return primary_future.result()
+            if not _should_hedge(error):
+                raise error
+
+        if not self._acquire_hedge(primary_future in done, delay):
+            return primary_future.result()
+
+        pending.add(self._submit(self.hedge, "hedge", input, config, kwargs))
+        winner, last_error = None, None
+        while pending and winner is None:
+            done, pending = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    winner = future
+                    break
+                last_error = future.exception()
+
+        if winner is None:
+            raise last_error
+
+        for future in pending:
+            future.cancel()  # 아직 시작 전이면 취소, 실행 중이면 결과만 버림
+            metrics.inc("llm_hedge_cancelled_total", labels=labels)
+        self._record_win("primary" if winner is primary_future else "hedge", start)
+        return winner.result()
+
+    def _acquire_hedge(self, primary_failed: bool, delay: float) -> bool:
+        """헤지 발사 여부 (전역 재시도 예산 확인 + 발사/억제 메트릭)"""
+        labels = {"name": self.name}
+        if not resilience.retry_budget.try_acquire():
+            metrics.inc("llm_hedge_suppressed_total", labels=labels)
+            return False
+        reason = "error" if primary_failed else "timeout"
+        metrics.inc("llm_hedge_fired_total", labels={**labels, "reason": reason})
+        print(f"[HEDGE] {self.name} 헤지 발사 ({reason}, 데드라인 {delay:.2f}s)")
+        return True
+
+    def _record_win(self, source: str, start: float) -> None:
+        metrics.inc("llm_hedge_wins_total", labels={"name": self.name, "source": source})
+        print(f"[HEDGE] {self.name} {source} 채택 (총 {time.perf_counter() - start:.3f}s)")
+
+    async def _timed(
+        self, llm: Any, source: str, input: Any, config: Optional[dict], kwargs: dict
+    ) -> Any:
+        """단일 요청 실행 (서킷 브레이커 적용) + 지연 시간 기록"""
+        provider = self.provider if source == "primary" else self.hedge_provider
+        start = time.perf_counter()
+        try:
+            response = await resilience.call(
+                provider, lambda: llm.ainvoke(input, config=config, **kwargs)
+            )
+        except asyncio.CancelledError:
+            self._record_latency(source, start, "cancelled")
+            raise
+        except Exception:
+            self._record_latency(source, start, "error")
+            raise
+        self._record_latency(source, start, "success")
+        return response
+
+    def _timed_sync(
+        self, llm: Any, source: str, input: Any, config: Optional[dict], kwargs: dict
+    ) -> Any:
+        """단일 동기 요청 실행 (서킷 브레이커 적용) + 지연 시간 기록"""
+        provider = self.provider if source == "primary" else self.hedge_provider
+        start = time.perf_counter()
+        try:
+            response = resilience.call_sync(
+                provider, lambda: llm.invoke(input, config=config, **kwargs)
+            )
+        except Exception:
+            self._record_latency(source, start, "error")
+            raise
+        self._record_latency(source, start, "success")
+        return response
+
+    def _submit(
+        self, llm: Any, source: str, input: Any, config: Optional[dict], kwargs: dict
+    ) -> futures.Future:
+        """헤지 스레드 풀에서 _timed_sync 실행 (요청 데드라인 등 contextvar 유지)"""
+        context = contextvars.copy_context()
+        return _sync_pool.submit(
+            context.run, self._timed_sync, llm, source, input, config, kwargs
+        )
+
+    def _record_latency(self, source: str, start: float, outcome: str) -> None:
+        """지연 샘플 기록
+
+        취소/실패한 요청의 경과 시간은 실제 지연의 하한이지만, 빼면 느린 요청이
+        분위수에서 사라져 헤지 데드라인이 계속 내려가므로 같은 샘플로 기록합니다.
+        """
+        elapsed = time.perf_counter() - start
+        metrics.observe(LATENCY_METRIC, elapsed, labels={"name": self.name})
+        metrics.observe(
+            "llm_call_latency_by_source_seconds",
+            elapsed,
+            labels={"name": self.name, "source": source},
+        )
+        if outcome != "success":
+            metrics.inc(
+                "llm_call_incomplete_total",
+                labels={"name": self.name, "source": source, "outcome": outcome},
+            )
+
+    # ============================================
+    # Runnable 호환
+    # ============================================
+
+    def with_structured_output(self, schema: Any, **kwargs) -> "HedgedLLM":
+        """구조화 출력 래퍼도 같은 헤지 설정으로 감싸서 반환"""
+        return HedgedLLM(
+            self.primary.with_structured_output(schema, **kwargs),
+            name=self.name,
+            hedge=self.hedge.with_structured_output(schema, **kwargs),
+            percentile=self.percentile,
+            enabled=self.enabled,
+            provider=self.provider,
+            hedge_provider=self.hedge_provider,
+        )
+
+    def bind_tools(self, tools: Any, **kwargs) -> "HedgedLLM":
+        """도구 바인딩 래퍼도 같은 헤지 설정으로 감싸서 반환"""
+        return HedgedLLM(
+            self.primary.bind_tools(tools, **kwargs),
+            name=self.name,
+            hedge=self.hedge.bind_tools(tools, **kwargs),
+            percentile=self.percentile,
+            enabled=self.enabled,
+            provider=self.provider,
+            hedge_provider=self.hedge_provider,
+        )
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self.primary, item)
@@ -0,0 +1,163 @@
+"""
+다중 키워드 매처 - 키워드 목록을 한 번 컴파일해서 메시지 한 번 스캔으로 모두 찾기
+
+호감도 키워드(liked/trauma), 시나리오 꼬리질문/최근 기억 키워드, 던전 적대 키워드,
+기억 검색 시간 표현이 모두 `any(k in text for k in keywords)` 반복으로 매 턴 실행됩니다.
+호출부마다 소문자 변환/중복 제거/반복 로직이 조금씩 다르게 복사되어 있고, 어떤 키워드가 어디서 걸렸는지는 알 수 없습니다.
+
+주요 기능:
+1. KeywordMatcher: 키워드 목록(또는 키워드 -> 값 매핑)을 검색 키로 한 번 변환해 보관
+   - find_all: 겹치는 매치까지 모두 (시작/끝 위치, 키워드, 값) 반환
+   - contains_any / first_in_order / values: 라우팅용 단축 조회
+   - 매처는 모듈 상수/인스턴스 속성으로 한 번만 생성 (호출마다 생성하거나 조회하지 않음)
+
+검색 방식:
+- 검색 키 전체를 긴 키 우선 교대 정규식 하나로 컴파일해 메시지를 한 번만 스캔
+  - contains_any: 정규식 search 1회 (키워드별 `in` 반복 대비 5~200개에서 2~4배)
+  - find_all / values: 전방탐색 (?=(...))로 모든 시작 위치의 가장 긴 키를 찾고,
+    같은 위치의 짧은 매치는 그 키의 접두사인 등록 키로 채움 (매치 객체 생성 비용이 커서 기존과 비슷)
+  - 매치가 없는 메시지는 search 1회로 종료
+- first_in_order는 등록 순서가 기준이라 미리 변환한 키의 `in` 반복으로 조기 종료
+- 대소문자 무시 키워드는 생성 시 한 번만 소문자로 변환 (기존 경로는 매 호출 키워드마다 변환)
+- 키워드가 1000개 수준이면 교대 정규식 분기 비용으로 contains_any가 `in` 반복보다 약간 느림
+
+이 모듈이 없을 경우 발생할 문제:
+- 키워드 분기마다 위치/분류 정보 없이 판정을 여러 번 반복
+- 호출부마다 소문자 변환/반복 로직이 조금씩 다르게 복사됨
+
+주의:
+- ignore_case=True의 위치는 text.lower() 기준 (한국어/ASCII는 원문과 동일)
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Set, Tuple, Union
+
+
+class KeywordMatch(NamedTuple):
+    """매치 결과 (text[start:end] == keyword, ignore_case면 소문자 기준)"""
+
+    start: int
+    end: int
+    keyword: str
+    value: Any
+
+
+class KeywordMatcher:
+    """컴파일된 다중 키워드 매처
+
+    아키텍처 위치:
+    - 키워드 기반 분기(호감도, 시나리오 검색 분기, 던전 선택 분류, 기억 검색 시간 표현)의 공통 매칭
+    - 고정 키워드 목록은 모듈/클래스 상수로, 페르소나 키워드처럼 데이터에서 읽는 목록은 로드 시점에 한 번 생성
+
+    사용 예시:
+        from utils.keyword_matcher import KeywordMatcher
+
+        HOSTILE_MATCHER = KeywordMatcher(["공격", "파괴"])
+        if HOSTILE_MATCHER.contains_any(message):
+            ...
+
+        # 키워드 -> 값(분류) 매핑: 한 번 스캔으로 걸린 분류 집합
+        TIME_MATCHER = KeywordMatcher({"어제": "yesterday", "그제": "two_days"})
+        categories = TIME_MATCHER.values(message)
+
+        # 목록 순서상 첫 키워드 (대소문자 무시, 페르소나 로드 시 생성해 둔 매처)
+        LIKED_MATCHER = KeywordMatcher(persona["liked_keywords"], ignore_case=True)
+        liked = LIKED_MATCHER.first_in_order(message)
+    """
+
+    def __init__(
+        self,
+        keywords: Union[Iterable[str], Mapping[str, Any]],
+        ignore_case: bool = False,
+    ):
+        """초기화
+
+        Args:
+            keywords: 키워드 목록 (값 = 키워드) 또는 키워드 -> 값 매핑. 빈 문자열은 무시
+            ignore_case: 대소문자 무시 여부
+        """
+        items = keywords.items() if isinstance(keywords, Mapping) else ((k, k) for k in keywords)
+        self.ignore_case = ignore_case
+        # 등록 순서대로 (원래 키워드, 값) / (검색 키, 원래 키워드)
+        self._entries: List[Tuple[str, Any]] = []
+        self._ordered_keys: List[Tuple[str, str]] = []
+        # 검색 키(소문자 변환 후) -> 등록 인덱스들 (대소문자만 다른 중복 키워드 포함)
+        self._indices: Dict[str, List[int]] = {}
+        for keyword, value in items:
+            if not keyword:
+                continue
+            key = self._key(keyword)
+            self._indices.setdefault(key, []).append(len(self._entries))
+            self._entries.append((keyword, value))
+            self._ordered_keys.append((key, keyword))
+
+        # 긴 키부터 나열한 교대 정규식 하나로 컴파일 (위치마다 가장 긴 키 1개 매치)
+        keys = sorted(self._indices, key=len, reverse=True)
+        alternation = "|".join(re.escape(key) for key in keys)
+        self._pattern = re.compile(alternation) if keys else None
+        # 전방탐색으로 소비하지 않고 모든 시작 위치를 검사 (겹치는 매치용)
+        self._overlapping = re.compile(f"(?=({alternation}))") if keys else None
+        # 같은 위치에서 함께 매치되는 짧은 키 = 가장 긴 매치 키의 접두사인 등록 키
+        self._prefix_keys: Dict[str, List[str]] = {
+            key: [key[:n] for n in range(len(key), 0, -1) if key[:n] in self._indices]
+            for key in keys
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _key(self, text: str) -> str:
+        return text.lower() if self.ignore_case else text
+
+    def _scan(self, text: str) -> Iterable[Tuple[int, str, List[int]]]:
+        """(시작 위치, 검색 키, 등록 인덱스들) - 겹치는 매치 포함"""
+        # 매치가 없는 메시지(대부분)는 위치별 전방탐색 없이 한 번의 search로 종료
+        first = self._pattern.search(text)
+        if first is None:
+            return
+        for match in self._overlapping.finditer(text, first.start()):
+            start = match.start()
+            for key in self._prefix_keys[match.group(1)]:
+                yield start, key, self._indices[key]
+
+    def find_all(self, text: str) -> List[KeywordMatch]:
+        """모든 매치 (시작 위치, 긴 키워드 순 정렬)"""
+        if not text or not self._indices:
+            return []
+        matches = [
+            KeywordMatch(start, start + len(key), *self._entries[index])
+            for start, key, indices in self._scan(self._key(text))
+            for index in indices
+        ]
+        matches.sort(key=lambda m: (m.start, -m.end))
+        return matches
+
+    def contains_any(self, text: str) -> bool:
+        """키워드가 하나라도 포함되어 있는지"""
+        if not text or not self._indices:
+            return False
+        return self._pattern.search(self._key(text)) is not None
+
+    def first_in_order(self, text: str) -> Optional[str]:
+        """포함된 키워드 중 등록 순서가 가장 빠른 키워드 (원래 표기, 없으면 None)
+
+        `for k in keywords: if k in text: return k` 와 같은 결과입니다 (미리 변환한 키로 조기 종료 스캔).
+        """
+        if not text or not self._indices:
+            return None
+        text = self._key(text)
+        for key, keyword in self._ordered_keys:
+            if key in text:
+                return keyword
+        return None
+
+    def values(self, text: str) -> Set[Any]:
+        """포함된 키워드들의 값 집합 (키워드 -> 분류 매핑으로 한 번에 분기 판정)"""
+        if not text or not self._indices:
+            return set()
+        return {
+            self._entries[index][1]
+            for _, _, indices in self._scan(self._key(text))
+            for index in indices
+        }
+
@@ -18,6 +18,8 @@ LangFuse v3 API 변경사항:
 import os
 from typing import Optional, Dict, Any, List
 
+from utils.resilience import PROVIDER_LANGFUSE, resilience
+
 # LangFuse 초기화 (환경 변수 기반)
 try:
     from langfuse import Langfuse, get_client
@@ -147,6 +149,10 @@ class TokenTracker:
         """
         if not LANGFUSE_ENABLED:
             return {}
+
+        # Langfuse 장애 중이면 트레이싱 없이 진행
+        if not resilience.is_available(PROVIDER_LANGFUSE):
+            return {}
         
         # LangFuse metadata 생성
         langfuse_metadata = TokenTracker.build_metadata(
@@ -178,7 +184,16 @@ class TokenTracker:
         - 중요한 이벤트 직후 (선택적)
         """
         if LANGFUSE_ENABLED and _langfuse_client:
-            _langfuse_client.flush()
+            breaker = resilience.breaker(PROVIDER_LANGFUSE)
+            if not breaker.allow_request():
+                return
+            try:
+                _langfuse_client.flush()
+            except Exception as e:
+                breaker.record_failure()
+                print(f"[WARNING] LangFuse flush 실패: {e}")
+            else:
+                breaker.record_success()
     
     @staticmethod
     def shutdown():
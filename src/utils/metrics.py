@@ -0,0 +1,155 @@
+"""
+프로세스 내 경량 메트릭 레지스트리
+
+LLM 캐시 적중, 지연 시간, 스킵률 같은 운영 지표를 한 곳에 모아
+/metrics 엔드포인트로 노출합니다.
+
+주요 기능:
+1. 카운터 (누적 횟수/토큰 수)
+2. 게이지 (현재 값: 사용 중 커넥션 수 등)
+3. 히스토그램 (최근 N개 샘플 기반 p50/p95/p99)
+
+이 모듈이 없을 경우 발생할 문제:
+- 각 모듈이 print 로그로만 지표를 남겨 집계 불가
+- 최적화 전후 효과(캐시 적중률, p99)를 수치로 확인 불가
+"""
+
+import threading
+from collections import defaultdict, deque
+from typing import Dict, Any, Deque, Optional, Tuple
+
+# 히스토그램당 보관할 최근 샘플 수
+HISTOGRAM_WINDOW_SIZE = 1024
+
+
+def _key(name: str, labels: Optional[Dict[str, Any]]) -> Tuple[str, Tuple]:
+    """메트릭 이름 + 라벨을 해시 가능한 키로 변환"""
+    if not labels:
+        return name, ()
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_key(key: Tuple[str, Tuple]) -> str:
+    """출력용 키 문자열 (name{a=1,b=2})"""
+    name, labels = key
+    if not labels:
+        return name
+    inner = ",".join(f"{k}={v}" for k, v in labels)
+    return f"{name}{{{inner}}}"
+
+
+def percentile(samples, q: float) -> float:
+    """샘플 리스트의 q 분위수 (0~100)
+
+    Args:
+        samples: 숫자 시퀀스
+        q: 분위수 (예: 95)
+
+    Returns:
+        분위수 값 (샘플이 없으면 0.0)
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+    return float(ordered[idx])
+
+
+class MetricsRegistry:
+    """카운터/게이지/히스토그램 저장소
+
+    아키텍처 위치:
+    - 에이전트, 메모리 매니저, 서비스 레이어에서 기록
+    - main.py의 /metrics 엔드포인트에서 스냅샷 조회
+
+    사용 예시:
+        from utils.metrics import metrics
+
+        metrics.inc("llm_cached_tokens", 512, labels={"agent": "heroine"})
+        metrics.observe("llm_latency_seconds", 0.82, labels={"model": "grok"})
+        metrics.snapshot()
+    """
+
+    def __init__(self, window_size: int = HISTOGRAM_WINDOW_SIZE):
+        self._lock = threading.Lock()
+        self._window_size = window_size
+        self._counters: Dict[Tuple, float] = defaultdict(float)
+        self._gauges: Dict[Tuple, float] = {}
+        self._histograms: Dict[Tuple, Deque[float]] = {}
+
+    def inc(
+        self, name: str, value: float = 1, labels: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """카운터 증가"""
+        with self._lock:
+            self._counters[_key(name, labels)] += value
+
+    def set_gauge(
+        self, name: str, value: float, labels: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """게이지 값 설정"""
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+
+    def add_gauge(
+        self, name: str, delta: float, labels: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """게이지 값 증감 (in-flight 카운트 등)"""
+        key = _key(name, labels)
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + delta
+
+    def observe(
+        self, name: str, value: float, labels: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """히스토그램 샘플 추가"""
+        key = _key(name, labels)
+        with self._lock:
+            window = self._histograms.get(key)
+            if window is None:
+                window = deque(maxlen=self._window_size)
+                self._histograms[key] = window
+            window.append(value)
+
+    def get_counter(self, name: str, labels: Optional[Dict[str, Any]] = None) -> float:
+        """카운터 현재 값"""
+        with self._lock:
+            return self._counters.get(_key(name, labels), 0.0)
+
+    def get_gauge(self, name: str, labels: Optional[Dict[str, Any]] = None) -> float:
+        """게이지 현재 값"""
+        with self._lock:
+            return self._gauges.get(_key(name, labels), 0.0)
+
+    def get_samples(self, name: str, labels: Optional[Dict[str, Any]] = None) -> list:
+        """히스토그램 최근 샘플 복사본"""
+        with self._lock:
+            return list(self._histograms.get(_key(name, labels), ()))
+
+    def get_percentile(
+        self, name: str, q: float, labels: Optional[Dict[str, Any]] = None
+    ) -> float:
+        """히스토그램 분위수"""
+        return percentile(self.get_samples(name, labels), q)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """전체 메트릭 스냅샷 (JSON 직렬화 가능)"""
+        with self._lock:
+            counters = {_format_key(k): v for k, v in self._counters.items()}
+            gauges = {_format_key(k): v for k, v in self._gauges.items()}
+            histograms = {k: list(v) for k, v in self._histograms.items()}
+
+        summary = {}
+        for key, samples in histograms.items():
+            summary[_format_key(key)] = {
+                "count": len(samples),
+                "p50": percentile(samples, 50),
+                "p95": percentile(samples, 95),
+                "p99": percentile(samples, 99),
+            }
+
+        return {"counters": counters, "gauges": gauges, "histograms": summary}
+
+
+# 싱글톤 인스턴스
+metrics = MetricsRegistry()
@@ -0,0 +1,429 @@
+"""
+Redis 기반 분산 토큰 버킷 레이트 리미터
+
+피크 시간대에 프로바이더 429가 발생하면 LangChain 재시도가 부하를 더 키우고
+진행 중인 모든 요청이 느려집니다. 이 모듈은 워커 간에 공유되는 Redis 토큰 버킷으로
+(provider, model) 단위 RPM / TPM을 제한하여 429 폭주 대신 통제된 대기를 만듭니다.
+
+주요 기능:
+1. (provider, model) 단위 RPM / TPM 토큰 버킷 (Lua 스크립트로 원자적 차감, Redis TIME 기준)
+2. 우선순위 클래스: interactive는 버킷 전체, background는 예약분(BACKGROUND_RESERVE_RATIO)을 남기고 사용
+3. LangChain BaseRateLimiter 어댑터 (ChatModel의 rate_limiter 파라미터로 주입)
+4. TPM 후불 정산: 응답의 실제 토큰 사용량을 콜백으로 차감 (버킷이 음수가 되면 다음 요청 대기)
+5. Redis 장애 시 fail-open (제한 없이 진행 + 메트릭)
+6. 비동기 경로(acquire)는 비동기 Redis 클라이언트 사용 (대기/왕복 중 이벤트 루프를 막지 않음)
+
+이 모듈이 없을 경우 발생할 문제:
+- 워커마다 독립적으로 요청을 보내 프로바이더 한도를 넘김 -> 429 + 재시도 폭주
+- 백그라운드 요약/기억 추출이 유저 대화와 같은 한도를 두고 경쟁
+
+Redis 키 구조:
+- ratelimit:{provider}:{model}:rpm - 요청 버킷 (hash: tokens, ts)
+- ratelimit:{provider}:{model}:tpm - 토큰 버킷 (hash: tokens, ts)
+
+사용 예시:
+    from utils.rate_limiter import rate_limiter, request_priority, PRIORITY_BACKGROUND
+
+    with request_priority(PRIORITY_BACKGROUND):
+        await rate_limiter.acquire("openai", "text-embedding-3-small", tokens=120)
+"""
+
+import asyncio
+import contextvars
+import os
+import random
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.rate_limiters import BaseRateLimiter
+
+from db.redis_manager import redis_manager
+from utils.metrics import metrics
+from utils.request_deadline import check_deadline, remaining
+from utils.resilience import (
+    FastFailError,
+    PROVIDER_ANTHROPIC,
+    PROVIDER_GOOGLE,
+    PROVIDER_GROQ,
+    PROVIDER_OPENAI,
+    PROVIDER_TYPECAST,
+    PROVIDER_XAI,
+)
+
+
+# 우선순위 클래스
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BACKGROUND = "background"
+
+# background 요청이 건드리지 못하는 버킷 비율 (interactive 전용 예약분)
+BACKGROUND_RESERVE_RATIO = float(os.getenv("RATE_LIMIT_BACKGROUND_RESERVE", "0.2"))
+# 우선순위별 최대 대기 시간(초) - 초과 시 RateLimitTimeout
+MAX_WAIT_SECONDS = {
+    PRIORITY_INTERACTIVE: float(os.getenv("RATE_LIMIT_INTERACTIVE_MAX_WAIT", "10")),
+    PRIORITY_BACKGROUND: float(os.getenv("RATE_LIMIT_BACKGROUND_MAX_WAIT", "120")),
+}
+# 전체 비활성화 스위치
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+
+
+def _limit(provider: str, rpm: int, tpm: int) -> Tuple[int, int]:
+    """환경변수(RATE_LIMIT_{PROVIDER}_RPM / _TPM) 우선, 0이면 제한 없음"""
+    prefix = f"RATE_LIMIT_{provider.upper()}"
+    return (
+        int(os.getenv(f"{prefix}_RPM", str(rpm))),
+        int(os.getenv(f"{prefix}_TPM", str(tpm))),
+    )
+
+
+# 프로바이더별 (RPM, TPM) - 같은 프로바이더의 모델마다 별도 버킷
+PROVIDER_LIMITS: Dict[str, Tuple[int, int]] = {
+    PROVIDER_OPENAI: _limit(PROVIDER_OPENAI, 500, 200_000),
+    PROVIDER_XAI: _limit(PROVIDER_XAI, 480, 2_000_000),
+    PROVIDER_GROQ: _limit(PROVIDER_GROQ, 1000, 300_000),
+    PROVIDER_GOOGLE: _limit(PROVIDER_GOOGLE, 1000, 1_000_000),
+    PROVIDER_ANTHROPIC: _limit(PROVIDER_ANTHROPIC, 50, 40_000),
+    PROVIDER_TYPECAST: _limit(PROVIDER_TYPECAST, 60, 0),
+}
+
+_current_priority: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "rate_limit_priority", default=PRIORITY_INTERACTIVE
+)
+
+
+@contextmanager
+def request_priority(priority: str):
+    """블록 안의 호출(생성된 태스크 포함)에 우선순위 클래스 적용"""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> str:
+    """현재 컨텍스트의 우선순위 클래스"""
+    return _current_priority.get()
+
+
+def estimate_tokens(text: str) -> int:
+    """요청 전 토큰 수 근사 (한글 1자 ~= 1토큰, 그 외 4자 ~= 1토큰)"""
+    if not text:
+        return 0
+    hangul = sum(1 for ch in text if "가" <= ch <= "힣")
+    return hangul + (len(text) - hangul + 3) // 4
+
+
+class RateLimitTimeout(FastFailError):
+    """최대 대기 시간 안에 토큰을 얻지 못함"""
+
+
+# ============================================
+# Lua 스크립트
+# ============================================
+
+# KEYS[1]=rpm 버킷, KEYS[2]=tpm 버킷
+# ARGV: rpm_cap, tpm_cap, req_cost, tok_cost, reserve_ratio, debit_only
+# 반환: 0이면 허용(차감 완료), 양수면 대기해야 할 ms
+TOKEN_BUCKET_LUA = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local rpm_cap = tonumber(ARGV[1])
+local tpm_cap = tonumber(ARGV[2])
+local req_cost = tonumber(ARGV[3])
+local tok_cost = tonumber(ARGV[4])
+local reserve = tonumber(ARGV[5])
+local debit_only = tonumber(ARGV[6])
+
+local function refill(key, cap)
+  if cap <= 0 then return nil end
+  local data = redis.call('HMGET', key, 'tokens', 'ts')
+  local tokens = tonumber(data[1]) or cap
+  local ts = tonumber(data[2]) or now
+  return math.min(cap, tokens + (now - ts) * cap / 60000)
+end
+
+local function store(key, tokens)
+  redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+  redis.call('PEXPIRE', key, 120000)
+end
+
+local rpm = refill(KEYS[1], rpm_cap)
+local tpm = refill(KEYS[2], tpm_cap)
+
+if debit_only == 0 then
+  local wait = 0
+  if rpm ~= nil then
+    local need = req_cost + rpm_cap * reserve
+    if rpm < need then wait = math.max(wait, (need - rpm) * 60000 / rpm_cap) end
+  end
+  if tpm ~= nil then
+    local need = tok_cost + tpm_cap * reserve
+    if tpm < need then wait = math.max(wait, (need - tpm) * 60000 / tpm_cap) end
+  end
+  if wait > 0 then
+    return math.ceil(wait)
+  end
+end
+
+if rpm ~= nil then store(KEYS[1], rpm - req_cost) end
+if tpm ~= nil then store(KEYS[2], tpm - tok_cost) end
+return 0
+"""
+
+
+# ============================================
+# 리미터
+# ============================================
+
+
+class RedisRateLimiter:
+    """(provider, model) 단위 분산 토큰 버킷
+
+    아키텍처 위치:
+    - ChatModel: client_registry가 ProviderRateLimiter + TokenUsageCallback을 주입
+    - 임베딩: client_registry의 RateLimitedEmbeddings
+    - TTS: TypecastTTSService.text_to_speech
+    - 우선순위: 길드 백그라운드 루프, 기억 추출, 요약 생성은 request_priority(PRIORITY_BACKGROUND)
+
+    사용 예시:
+        await rate_limiter.acquire("xai", "grok-4-1-fast-non-reasoning")
+    """
+
+    def __init__(self, enabled: bool = RATE_LIMIT_ENABLED):
+        self.enabled = enabled
+        self._script = None
+        self._async_script = None
+        self._last_redis_error = 0.0
+
+    def _get_script(self):
+        if self._script is None:
+            self._script = redis_manager.client.register_script(TOKEN_BUCKET_LUA)
+        return self._script
+
+    def _get_async_script(self):
+        if self._async_script is None:
+            self._async_script = redis_manager.async_client.register_script(TOKEN_BUCKET_LUA)
+        return self._async_script
+
+    def _keys(self, provider: str, model: str) -> list:
+        base = f"ratelimit:{provider}:{model}"
+        return [f"{base}:rpm", f"{base}:tpm"]
+
+    def _script_args(
+        self,
+        provider: str,
+        model: str,
+        requests: int,
+        tokens: int,
+        priority: str,
+        debit_only: bool,
+    ) -> Optional[dict]:
+        """스크립트 keys/args (제한 없는 프로바이더거나 비활성화면 None)"""
+        rpm_cap, tpm_cap = PROVIDER_LIMITS.get(provider, (0, 0))
+        if not self.enabled or (rpm_cap <= 0 and tpm_cap <= 0):
+            return None
+
+        reserve = BACKGROUND_RESERVE_RATIO if priority == PRIORITY_BACKGROUND else 0.0
+        if tpm_cap > 0:
+            # 버킷보다 큰 요청이 영원히 대기하지 않도록 비용 상한
+            tokens = min(tokens, int(tpm_cap * (1 - reserve)))
+        return {
+            "keys": self._keys(provider, model),
+            "args": [rpm_cap, tpm_cap, requests, tokens, reserve, 1 if debit_only else 0],
+        }
+
+    def _on_redis_error(self, error: Exception) -> float:
+        """Redis 장애 시 fail-open (제한 없이 진행)"""
+        metrics.inc("rate_limit_redis_errors_total")
+        now = time.monotonic()
+        if now - self._last_redis_error > 60:
+            self._last_redis_error = now
+            print(f"[RATE_LIMIT] Redis 오류로 제한 없이 진행: {error}")
+        return 0.0
+
+    def _run(
+        self,
+        provider: str,
+        model: str,
+        requests: int,
+        tokens: int,
+        priority: str,
+        debit_only: bool = False,
+    ) -> float:
+        """스크립트 실행 -> 대기해야 할 초 (0이면 허용)"""
+        script_args = self._script_args(provider, model, requests, tokens, priority, debit_only)
+        if script_args is None:
+            return 0.0
+        try:
+            wait_ms = self._get_script()(**script_args)
+        except Exception as e:
+            return self._on_redis_error(e)
+        return int(wait_ms) / 1000
+
+    async def _arun(
+        self,
+        provider: str,
+        model: str,
+        requests: int,
+        tokens: int,
+        priority: str,
+        debit_only: bool = False,
+    ) -> float:
+        """_run의 비동기 버전 (비동기 Redis 클라이언트)"""
+        script_args = self._script_args(provider, model, requests, tokens, priority, debit_only)
+        if script_args is None:
+            return 0.0
+        try:
+            wait_ms = await self._get_async_script()(**script_args)
+        except Exception as e:
+            return self._on_redis_error(e)
+        return int(wait_ms) / 1000
+
+    def _on_wait(self, provider: str, model: str, priority: str, wait: float) -> float:
+        metrics.inc(
+            "rate_limit_waits_total",
+            labels={"provider": provider, "priority": priority},
+        )
+        # 같은 시점에 깨어나 몰리지 않도록 지터 추가
+        return wait + random.uniform(0, min(0.1, wait))
+
+    def _on_granted(self, provider: str, model: str, priority: str, waited: float) -> None:
+        metrics.observe(
+            "rate_limit_wait_seconds",
+            waited,
+            labels={"provider": provider, "priority": priority},
+        )
+
+    def _max_wait(self, priority: str) -> float:
+        """최대 대기 시간 (요청 데드라인이 있으면 남은 시간까지만)"""
+        left = remaining()
+        if left is None:
+            return MAX_WAIT_SECONDS[priority]
+        return min(MAX_WAIT_SECONDS[priority], max(0.0, left))
+
+    def _on_timeout(self, provider: str, model: str, priority: str, waited: float):
+        metrics.inc(
+            "rate_limit_timeouts_total",
+            labels={"provider": provider, "priority": priority},
+        )
+        return RateLimitTimeout(
+            f"{provider}/{model} 레이트 리밋 대기 초과 ({priority}, {waited:.1f}s)"
+        )
+
+    async def acquire(
+        self,
+        provider: str,
+        model: str,
+        tokens: int = 0,
+        priority: Optional[str] = None,
+        blocking: bool = True,
+    ) -> bool:
+        """요청 1건 + tokens 만큼 토큰 확보 (비동기 대기)
+
+        Args:
+            provider: 프로바이더 이름
+            model: 모델 이름
+            tokens: 사전에 알 수 있는 토큰 수 (모르면 0, 응답 후 debit_tokens로 정산)
+            priority: 우선순위 클래스 (None이면 현재 컨텍스트)
+            blocking: False면 대기 없이 즉시 결과 반환
+
+        Returns:
+            확보 여부 (blocking=True면 항상 True, 초과 시 RateLimitTimeout)
+        """
+        priority = priority or current_priority()
+        start = time.monotonic()
+        while True:
+            wait = await self._arun(provider, model, 1, tokens, priority)
+            if wait <= 0:
+                self._on_granted(provider, model, priority, time.monotonic() - start)
+                return True
+            if not blocking:
+                return False
+            waited = time.monotonic() - start
+            if waited + wait > self._max_wait(priority):
+                raise self._on_timeout(provider, model, priority, waited)
+            await asyncio.sleep(self._on_wait(provider, model, priority, wait))
+
+    def acquire_sync(
+        self,
+        provider: str,
+        model: str,
+        tokens: int = 0,
+        priority: Optional[str] = None,
+        blocking: bool = True,
+    ) -> bool:
+        """acquire의 동기 버전 (동기 invoke / embed_query 경로)"""
+        priority = priority or current_priority()
+        start = time.monotonic()
+        while True:
+            wait = self._run(provider, model, 1, tokens, priority)
+            if wait <= 0:
+                self._on_granted(provider, model, priority, time.monotonic() - start)
+                return True
+            if not blocking:
+                return False
+            waited = time.monotonic() - start
+            if waited + wait > self._max_wait(priority):
+                raise self._on_timeout(provider, model, priority, waited)
+            time.sleep(self._on_wait(provider, model, priority, wait))
+
+    def debit_tokens(self, provider: str, model: str, tokens: int) -> None:
+        """응답 후 실제 사용 토큰 차감 (버킷이 음수가 될 수 있음)"""
+        if tokens > 0:
+            self._run(provider, model, 0, tokens, PRIORITY_INTERACTIVE, debit_only=True)
+            metrics.inc("rate_limit_tokens_debited", tokens, labels={"provider": provider})
+
+
+# 싱글톤 인스턴스
+rate_limiter = RedisRateLimiter()
+
+
+# ============================================
+# LangChain 어댑터
+# ============================================
+
+
+class ProviderRateLimiter(BaseRateLimiter):
+    """ChatModel(rate_limiter=...)에 주입하는 LangChain 어댑터
+
+    LangChain은 요청 전에 acquire/aacquire를 호출합니다.
+    입력 토큰 수는 알 수 없으므로 RPM만 선차감하고,
+    TPM은 버킷이 음수(이전 요청의 후불 정산분)가 아닐 때만 통과시킵니다.
+    요청 데드라인이 이미 지났으면 LLM 호출 전에 DeadlineExceededError를 올립니다.
+    """
+
+    def __init__(self, provider: str, model: str):
+        self.provider = provider
+        self.model = model
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        check_deadline("llm")
+        return rate_limiter.acquire_sync(self.provider, self.model, blocking=blocking)
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        check_deadline("llm")
+        return await rate_limiter.acquire(self.provider, self.model, blocking=blocking)
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """응답의 실제 토큰 사용량을 TPM 버킷에 후불 차감하는 콜백"""
+
+    def __init__(self, provider: str, model: str):
+        self.provider = provider
+        self.model = model
+
+    def on_llm_end(self, response: Any, **kwargs: Any) -> None:
+        llm_output = getattr(response, "llm_output", None) or {}
+        usage = llm_output.get("token_usage") or {}
+        total = usage.get("total_tokens") or 0
+
+        if not total:
+            for generations in getattr(response, "generations", []) or []:
+                for generation in generations:
+                    message = getattr(generation, "message", None)
+                    usage_metadata = getattr(message, "usage_metadata", None) or {}
+                    total += usage_metadata.get("total_tokens", 0)
+
+        rate_limiter.debit_tokens(self.provider, self.model, int(total))
@@ -0,0 +1,214 @@
+"""
+요청 데드라인 전파 + 클라이언트 연결 끊김 시 작업 취소
+
+게임 클라이언트가 응답을 포기(타임아웃/씬 전환)해도 서버는 LangGraph 파이프라인,
+LLM, 임베딩, DB, TTS 호출을 끝까지 실행하여 아무도 읽지 않을 응답에
+토큰과 워커 용량을 소모합니다. 이 모듈은 요청마다 데드라인을 contextvar로 싣고,
+데드라인 초과 또는 연결 끊김 시 진행 중인 작업을 취소합니다.
+
+주요 기능:
+1. 요청 데드라인 contextvar (하위 LLM/임베딩/DB/TTS 호출이 남은 시간을 조회)
+2. run_with_deadline: 파이프라인을 태스크로 실행하고 연결 끊김/데드라인 초과 시 취소
+3. 클라이언트 헤더(X-Request-Timeout-Ms)로 데드라인 단축 (서버 기본값이 상한)
+4. spawn_detached: 응답 후에도 끝나야 하는 백그라운드 작업은 데드라인 없이 분리
+5. SQLAlchemy 훅: 데드라인이 지난 요청의 다음 쿼리를 보내기 전에 중단
+6. 취소 메트릭 (사유별 건수, 취소 시점까지 소요된 작업 시간)
+
+이 모듈이 없을 경우 발생할 문제:
+- 클라이언트가 떠난 요청이 LLM 호출/TTS를 끝까지 실행 -> 과부하 시 용량 낭비
+- 호출마다 타임아웃을 따로 잡아 전체 요청 시간이 보장되지 않음
+
+사용 예시:
+    from utils.request_deadline import run_with_deadline, remaining
+
+    result = await run_with_deadline(
+        http_request, "heroine_chat_sync",
+        lambda: heroine_agent.process_message(state),
+        timeout=REQUEST_DEADLINE_HEROINE_CHAT_SECONDS,
+    )
+"""
+
+import asyncio
+import contextvars
+import os
+import time
+from typing import Any, Awaitable, Callable, Coroutine, Optional
+
+from fastapi import HTTPException, Request
+
+from utils.metrics import metrics
+
+
+# 히로인 대화(/api/npc/heroine/chat/sync) 서버 데드라인(초)
+REQUEST_DEADLINE_HEROINE_CHAT_SECONDS = float(
+    os.getenv("REQUEST_DEADLINE_HEROINE_CHAT_SECONDS", "20")
+)
+# 페어리 던전 대화(/api/fairy/dungeon/talk) 서버 데드라인(초)
+REQUEST_DEADLINE_FAIRY_DUNGEON_SECONDS = float(
+    os.getenv("REQUEST_DEADLINE_FAIRY_DUNGEON_SECONDS", "15")
+)
+# 클라이언트 연결 끊김 확인 주기(초)
+REQUEST_DISCONNECT_POLL_SECONDS = float(os.getenv("REQUEST_DISCONNECT_POLL_SECONDS", "0.25"))
+
+# 클라이언트가 자신의 타임아웃을 알려주는 헤더 (밀리초)
+DEADLINE_HEADER = "x-request-timeout-ms"
+
+# 취소 사유
+REASON_DISCONNECT = "client_disconnect"
+REASON_DEADLINE = "deadline"
+
+# nginx 관례: 클라이언트가 먼저 끊은 요청
+STATUS_CLIENT_CLOSED = 499
+
+# 현재 요청의 절대 데드라인 (time.monotonic 기준, None이면 데드라인 없음)
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "request_deadline", default=None
+)
+
+
+class DeadlineExceededError(Exception):
+    """요청 데드라인이 지나 하위 호출을 보내지 않음"""
+
+    def __init__(self, stage: str):
+        super().__init__(f"요청 데드라인 초과 ({stage})")
+        self.stage = stage
+
+
+def remaining() -> Optional[float]:
+    """현재 요청의 남은 시간(초), 데드라인이 없으면 None"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check_deadline(stage: str) -> None:
+    """데드라인이 지났으면 DeadlineExceededError (하위 호출 직전에 사용)"""
+    left = remaining()
+    if left is not None and left <= 0:
+        metrics.inc("request_deadline_exceeded_total", labels={"stage": stage})
+        raise DeadlineExceededError(stage)
+
+
+async def bounded(awaitable: Awaitable[Any], stage: str) -> Any:
+    """남은 데드라인 안에서만 대기 (데드라인이 없으면 그대로 await)"""
+    left = remaining()
+    if left is None:
+        return await awaitable
+    try:
+        async with asyncio.timeout(max(0.0, left)):
+            return await awaitable
+    except TimeoutError:
+        left = remaining()
+        if left is not None and left <= 0:
+            metrics.inc("request_deadline_exceeded_total", labels={"stage": stage})
+            raise DeadlineExceededError(stage) from None
+        raise
+
+
+def spawn_detached(coro: Coroutine[Any, Any, Any]) -> asyncio.Task:
+    """요청 데드라인과 분리된 백그라운드 태스크 생성
+
+    asyncio.create_task는 현재 contextvar를 복사하므로, 기억 저장/요약처럼
+    응답 이후에도 끝나야 하는 작업은 이 함수로 데드라인을 떼고 실행합니다.
+    """
+    context = contextvars.copy_context()
+    context.run(_deadline.set, None)
+    return asyncio.create_task(coro, context=context)
+
+
+def resolve_timeout(request: Request, default: float) -> float:
+    """클라이언트 헤더를 반영한 요청 타임아웃(초), 서버 기본값이 상한"""
+    header = request.headers.get(DEADLINE_HEADER)
+    if not header:
+        return default
+    try:
+        client_timeout = float(header) / 1000
+    except ValueError:
+        return default
+    if client_timeout <= 0:
+        return default
+    return min(default, client_timeout)
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    """클라이언트 연결이 끊길 때까지 주기적으로 확인"""
+    while not await request.is_disconnected():
+        await asyncio.sleep(REQUEST_DISCONNECT_POLL_SECONDS)
+
+
+async def run_with_deadline(
+    request: Request,
+    endpoint: str,
+    func: Callable[[], Awaitable[Any]],
+    timeout: float,
+) -> Any:
+    """데드라인을 싣고 작업을 실행, 연결 끊김/데드라인 초과 시 취소
+
+    Args:
+        request: FastAPI Request (연결 끊김 감지 + 데드라인 헤더)
+        endpoint: 메트릭 라벨용 엔드포인트 이름
+        func: 작업 코루틴을 만드는 함수 (태스크 안에서 데드라인이 설정된 채 실행)
+        timeout: 서버 기본 데드라인(초)
+
+    Returns:
+        func 결과
+
+    Raises:
+        HTTPException: 연결 끊김(499) 또는 데드라인 초과(504)
+    """
+    timeout = resolve_timeout(request, timeout)
+    start = time.monotonic()
+    deadline = start + timeout
+
+    async def _work() -> Any:
+        _deadline.set(deadline)
+        return await func()
+
+    work = asyncio.create_task(_work())
+    watcher = asyncio.create_task(_wait_for_disconnect(request))
+    reason = None
+    try:
+        done, _ = await asyncio.wait(
+            {work, watcher}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+        )
+        if work in done:
+            try:
+                return work.result()
+            except DeadlineExceededError:
+                reason = REASON_DEADLINE
+        else:
+            reason = REASON_DISCONNECT if watcher in done else REASON_DEADLINE
+    finally:
+        watcher.cancel()
+        if not work.done():
+            work.cancel()
+            await asyncio.gather(work, return_exceptions=True)
+
+    elapsed = time.monotonic() - start
+    labels = {"endpoint": endpoint, "reason": reason}
+    metrics.inc("request_cancelled_total", labels=labels)
+    metrics.observe("request_cancelled_work_seconds", elapsed, labels=labels)
+    print(f"[DEADLINE] {endpoint} 작업 취소 ({reason}, {elapsed:.2f}s / 데드라인 {timeout:.1f}s)")
+
+    if reason == REASON_DISCONNECT:
+        raise HTTPException(status_code=STATUS_CLIENT_CLOSED, detail="client closed request")
+    raise HTTPException(status_code=504, detail="request deadline exceeded")
+
+
+def install_sqlalchemy_deadline_hook() -> None:
+    """모든 SQLAlchemy 엔진에 데드라인 확인 훅 등록
+
+    동기 DB 호출은 실행 중에 취소할 수 없으므로, 데드라인이 지난 요청이
+    다음 쿼리를 보내기 전에 DeadlineExceededError로 중단합니다.
+    """
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    if event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    check_deadline("db")
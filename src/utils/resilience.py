@@ -0,0 +1,474 @@
+"""
+외부 프로바이더 공통 복원력(Resilience) 레이어
+
+OpenAI / xAI / Groq / Typecast / Langfuse 호출 실패가 느린 타임아웃으로 전파되어
+프로바이더 장애 시 모든 워커에 멈춘 요청이 쌓이는 문제를 막기 위해,
+프로바이더별 서킷 브레이커와 전역 재시도 예산을 한 곳에서 관리합니다.
+
+주요 기능:
+1. 프로바이더별 서킷 브레이커 (closed -> open -> half_open 탐침 -> closed)
+2. 전역 재시도 예산 (정상 요청 대비 일정 비율까지만 재시도/헤지 허용)
+3. 지터가 들어간 지수 백오프 (full jitter)
+4. 빠른 실패 + 폴백 (서킷이 열려 있으면 호출 없이 즉시 폴백/CircuitOpenError)
+5. 상태/전이/거절 메트릭 (utils.metrics)
+   - 서킷 실패로 세는 것은 프로바이더 장애 신호(전송 오류, 타임아웃, 5xx, 429)뿐
+   - 그 밖의 예외(400, 파싱 오류, 호출부 버그)는 기록 없이 그대로 올림
+6. 요청 데드라인 준수 (남은 시간 안에서만 호출/재시도, utils.request_deadline)
+
+이 모듈이 없을 경우 발생할 문제:
+- 장애 중인 프로바이더에 계속 요청을 보내 타임아웃까지 대기
+- 모듈마다 재시도 루프를 따로 구현 -> 장애 시 재시도 폭주(retry storm)
+- TTS 하나가 죽어도 음성 API 전체가 실패
+
+사용 예시:
+    from utils.resilience import resilience, PROVIDER_OPENAI
+
+    result = await resilience.call(
+        PROVIDER_OPENAI,
+        lambda: llm.ainvoke(prompt),
+        retries=1,
+        fallback=lambda: [],
+    )
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from utils.metrics import metrics
+from utils.request_deadline import DeadlineExceededError, bounded, check_deadline, remaining
+
+
+# 프로바이더 이름
+PROVIDER_OPENAI = "openai"
+PROVIDER_XAI = "xai"
+PROVIDER_GROQ = "groq"
+PROVIDER_GOOGLE = "google"
+PROVIDER_ANTHROPIC = "anthropic"
+PROVIDER_TYPECAST = "typecast"
+PROVIDER_LANGFUSE = "langfuse"
+
+# 연속 실패 N회면 서킷 open
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+# open 상태 유지 시간(초) - 이후 half_open으로 전환해 탐침 요청 허용
+CIRCUIT_RECOVERY_SECONDS = float(os.getenv("CIRCUIT_RECOVERY_SECONDS", "30"))
+# half_open 상태에서 동시에 허용할 탐침 요청 수
+CIRCUIT_HALF_OPEN_MAX_CALLS = int(os.getenv("CIRCUIT_HALF_OPEN_MAX_CALLS", "1"))
+
+# 정상 요청 1건당 적립되는 재시도 토큰 (0.1 = 요청의 10%까지 재시도 허용)
+RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.1"))
+# 트래픽이 적을 때도 보장하는 초당 최소 재시도 수
+RETRY_BUDGET_MIN_PER_SECOND = float(os.getenv("RETRY_BUDGET_MIN_PER_SECOND", "1.0"))
+# 적립 가능한 최대 토큰
+RETRY_BUDGET_MAX_TOKENS = float(os.getenv("RETRY_BUDGET_MAX_TOKENS", "20"))
+
+# 백오프 기본/최대(초)
+BACKOFF_BASE_SECONDS = 0.2
+BACKOFF_MAX_SECONDS = 2.0
+
+# 서킷 상태
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+_STATE_GAUGE = {STATE_CLOSED: 0, STATE_HALF_OPEN: 1, STATE_OPEN: 2}
+
+# 전송 계층/타임아웃 예외 클래스 이름 (openai, anthropic, httpx, aiohttp, requests, groq 공통)
+# 선택 의존성이라 import 대신 MRO의 클래스 이름으로 판별
+_TRANSPORT_ERROR_NAMES = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "TransportError",
+    "TimeoutException",
+    "ClientConnectionError",
+    "ClientPayloadError",
+    "ServerDisconnectedError",
+    "ServerTimeoutError",
+    "ConnectionError",
+    "Timeout",
+}
+
+# 상태 코드 없이 올라오는 요청 크기/입력 오류 메시지 (소문자, 토큰/컨텍스트 한도 초과)
+_INVALID_REQUEST_MESSAGES = (
+    "maximum context length",
+    "max_tokens_per_request",
+    "too many tokens",
+    "token limit",
+)
+
+
+class FastFailError(Exception):
+    """요청을 보내기 전에 로컬에서 거절됨 (프로바이더 실패로 집계하지 않음)"""
+
+
+class CircuitOpenError(FastFailError):
+    """서킷이 열려 있어 호출 없이 즉시 실패"""
+
+    def __init__(self, provider: str):
+        super().__init__(f"{provider} 서킷이 열려 있습니다 (빠른 실패)")
+        self.provider = provider
+
+
+def provider_for_model(model_name: Optional[str]) -> str:
+    """모델 이름으로 프로바이더 추론
+
+    enums.LLM 값 기준입니다. Groq에서 서빙하는 오픈 모델(llama, gpt-oss, kimi)은
+    이름에 openai가 들어가도 groq로 분류합니다.
+    """
+    name = (model_name or "").lower()
+    if name.startswith("google-genai:") or "gemini" in name:
+        return PROVIDER_GOOGLE
+    if name.startswith("grok"):
+        return PROVIDER_XAI
+    if "llama" in name or "gpt-oss" in name or "kimi" in name:
+        return PROVIDER_GROQ
+    if name.startswith("claude"):
+        return PROVIDER_ANTHROPIC
+    return PROVIDER_OPENAI
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    """예외에 담긴 HTTP 상태 코드 (SDK별 status_code / status / response.status_code)"""
+    for candidate in (error, getattr(error, "response", None)):
+        for attr in ("status_code", "status"):
+            value = getattr(candidate, attr, None)
+            if isinstance(value, int):
+                return value
+    return None
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """서킷 실패로 셀 예외인지 (전송 오류, 타임아웃, 5xx, 429)
+
+    요청 자체가 잘못된 경우(400/401/404, 컨텍스트 초과, 응답 파싱 오류)는
+    프로바이더가 정상이어도 계속 실패하므로 서킷을 열 근거가 아닙니다.
+    """
+    status = _status_code(error)
+    if status is not None:
+        return status == 429 or status >= 500
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    return any(cls.__name__ in _TRANSPORT_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def is_invalid_request(error: BaseException) -> bool:
+    """요청 내용 자체가 잘못된 예외인지 (400/413/422, 토큰/컨텍스트 한도 초과)
+
+    같은 입력으로 재시도해도 계속 실패하므로, 묶음 요청이면 입력을 나눠야 하는 경우입니다.
+    """
+    status = _status_code(error)
+    if status is not None:
+        return status in (400, 413, 422)
+    message = str(error).lower()
+    return any(marker in message for marker in _INVALID_REQUEST_MESSAGES)
+
+
+def backoff_delay(
+    attempt: int, base: float = BACKOFF_BASE_SECONDS, cap: float = BACKOFF_MAX_SECONDS
+) -> float:
+    """full jitter 지수 백오프 (0 ~ min(cap, base * 2^attempt))"""
+    return random.uniform(0, min(cap, base * (2**attempt)))
+
+
+# ============================================
+# 서킷 브레이커
+# ============================================
+
+
+class CircuitBreaker:
+    """프로바이더 단위 서킷 브레이커
+
+    - closed: 정상. 연속 실패가 임계값에 도달하면 open
+    - open: 모든 요청 즉시 거절. recovery_seconds 경과 후 half_open
+    - half_open: 탐침 요청만 허용. 성공하면 closed, 실패하면 다시 open
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        recovery_seconds: float = CIRCUIT_RECOVERY_SECONDS,
+        half_open_max_calls: int = CIRCUIT_HALF_OPEN_MAX_CALLS,
+    ):
+        self.provider = provider
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._set_state_gauge()
+
+    @property
+    def state(self) -> str:
+        """현재 상태 (open 유지 시간이 지났으면 half_open으로 보고)"""
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def allow_request(self) -> bool:
+        """요청 허용 여부 (half_open이면 탐침 슬롯 확보)"""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == STATE_CLOSED:
+                return True
+            if self._state == STATE_HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+                self._half_open_in_flight += 1
+                return True
+        metrics.inc("circuit_rejected_total", labels={"provider": self.provider})
+        return False
+
+    def record_success(self) -> None:
+        """성공 기록 (half_open 탐침 성공 시 closed로 복구)"""
+        with self._lock:
+            self._consecutive_failures = 0
+            if self._state == STATE_HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+                self._transition(STATE_CLOSED)
+
+    def record_failure(self) -> None:
+        """실패 기록 (임계값 도달 또는 탐침 실패 시 open)"""
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._state == STATE_HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+                self._transition(STATE_OPEN)
+            elif (
+                self._state == STATE_CLOSED
+                and self._consecutive_failures >= self.failure_threshold
+            ):
+                self._transition(STATE_OPEN)
+
+    def release(self) -> None:
+        """결과 없이 끝난 요청(취소 등)의 탐침 슬롯 반환"""
+        with self._lock:
+            if self._state == STATE_HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+
+    def _maybe_half_open(self) -> None:
+        if (
+            self._state == STATE_OPEN
+            and time.monotonic() - self._opened_at >= self.recovery_seconds
+        ):
+            self._transition(STATE_HALF_OPEN)
+
+    def _transition(self, new_state: str) -> None:
+        if new_state == self._state:
+            return
+        old_state = self._state
+        self._state = new_state
+        if new_state == STATE_OPEN:
+            self._opened_at = time.monotonic()
+        if new_state != STATE_HALF_OPEN:
+            self._half_open_in_flight = 0
+        metrics.inc(
+            "circuit_transitions_total",
+            labels={"provider": self.provider, "to": new_state},
+        )
+        self._set_state_gauge()
+        print(f"[CIRCUIT] {self.provider}: {old_state} -> {new_state}")
+
+    def _set_state_gauge(self) -> None:
+        metrics.set_gauge(
+            "circuit_state", _STATE_GAUGE[self._state], labels={"provider": self.provider}
+        )
+
+
+# ============================================
+# 재시도 예산
+# ============================================
+
+
+class RetryBudget:
+    """전역 재시도 예산 (토큰 버킷)
+
+    정상 요청마다 ratio 만큼 토큰이 적립되고, 재시도/헤지 1회에 토큰 1개를 씁니다.
+    트래픽이 적을 때를 위해 초당 min_per_second 만큼 시간 기반으로도 적립됩니다.
+    장애 중에는 요청 대부분이 실패하므로 재시도 총량이 요청량의 일정 비율로 묶입니다.
+    """
+
+    def __init__(
+        self,
+        ratio: float = RETRY_BUDGET_RATIO,
+        min_per_second: float = RETRY_BUDGET_MIN_PER_SECOND,
+        max_tokens: float = RETRY_BUDGET_MAX_TOKENS,
+    ):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._lock = threading.Lock()
+        self._tokens = max_tokens
+        self._last_refill = time.monotonic()
+
+    def record_request(self) -> None:
+        """요청 1건 적립"""
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_acquire(self) -> bool:
+        """재시도 토큰 1개 사용 (부족하면 False)"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.max_tokens,
+                self._tokens + (now - self._last_refill) * self.min_per_second,
+            )
+            self._last_refill = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+        metrics.inc("retry_budget_exhausted_total")
+        return False
+
+
+# ============================================
+# 매니저
+# ============================================
+
+
+class ResilienceManager:
+    """프로바이더별 서킷 브레이커 + 전역 재시도 예산
+
+    아키텍처 위치:
+    - HedgedLLM: 모든 LLM 호출의 서킷 체크 + 헤지 발사 시 재시도 예산 사용
+    - UserMemoryManager.extract_facts: OpenAI 장애 시 추출 생략
+    - TypecastTTSService: Typecast 장애 시 음성 없이 텍스트만 응답
+    - fairy_service: LLM 장애 시 정해진 페어리 대사로 응답
+    - TokenTracker: Langfuse 장애 시 트레이싱 생략
+
+    사용 예시:
+        if resilience.is_available(PROVIDER_TYPECAST):
+            audio = await resilience.call(PROVIDER_TYPECAST, lambda: tts(...))
+    """
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self.retry_budget = RetryBudget()
+
+    def breaker(self, provider: str) -> CircuitBreaker:
+        """프로바이더 서킷 브레이커 (없으면 생성)"""
+        with self._lock:
+            if provider not in self._breakers:
+                self._breakers[provider] = CircuitBreaker(provider)
+            return self._breakers[provider]
+
+    def is_available(self, provider: str) -> bool:
+        """서킷이 open이 아닌지 (탐침 슬롯은 소비하지 않음)"""
+        return self.breaker(provider).state != STATE_OPEN
+
+    async def call(
+        self,
+        provider: str,
+        func: Callable[[], Awaitable[Any]],
+        retries: int = 0,
+        fallback: Optional[Callable[[], Any]] = None,
+    ) -> Any:
+        """서킷 브레이커 + 재시도 예산을 적용한 비동기 호출
+
+        Args:
+            provider: 프로바이더 이름 (PROVIDER_*)
+            func: 호출할 때마다 새 코루틴을 만드는 함수 (재시도 시 다시 호출됨)
+            retries: 최대 재시도 횟수 (재시도마다 전역 예산 토큰 1개 사용)
+            fallback: 서킷 open 또는 프로바이더 장애로 최종 실패 시 반환값을 만드는 함수
+                      (None이면 예외를 그대로 올림, 장애가 아닌 예외는 항상 그대로 올림)
+
+        Returns:
+            func 결과 또는 fallback 결과
+        """
+        breaker = self.breaker(provider)
+        labels = {"provider": provider}
+        self.retry_budget.record_request()
+
+        attempt = 0
+        while True:
+            check_deadline(provider)
+            if not breaker.allow_request():
+                error: Exception = CircuitOpenError(provider)
+                break
+
+            try:
+                result = await bounded(func(), provider)
+            except (asyncio.CancelledError, DeadlineExceededError):
+                # 요청 취소/데드라인 초과는 프로바이더 실패가 아니므로 슬롯만 반환
+                breaker.release()
+                raise
+            except FastFailError as e:
+                # 레이트 리밋 대기 초과 등 로컬 거절은 서킷 실패로 세지 않음
+                breaker.release()
+                error = e
+                break
+            except Exception as e:
+                if not is_provider_failure(e):
+                    # 요청 오류/호출부 오류는 재시도해도 같으므로 기록 없이 그대로 올림
+                    breaker.release()
+                    raise
+                breaker.record_failure()
+                metrics.inc("provider_call_failures_total", labels=labels)
+                error = e
+                delay = backoff_delay(attempt)
+                left = remaining()
+                if (
+                    attempt < retries
+                    and (left is None or delay < left)
+                    and self.retry_budget.try_acquire()
+                ):
+                    metrics.inc("provider_call_retries_total", labels=labels)
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
+                break
+            else:
+                breaker.record_success()
+                return result
+
+        if fallback is None:
+            raise error
+
+        metrics.inc("provider_fallbacks_total", labels=labels)
+        print(f"[RESILIENCE] {provider} 폴백 사용: {error}")
+        return fallback()
+
+    def call_sync(self, provider: str, func: Callable[[], Any]) -> Any:
+        """서킷 브레이커를 적용한 동기 호출 (재시도/폴백 없음)
+
+        HedgedLLM.invoke처럼 스레드에서 동기 SDK를 호출하는 경로용입니다.
+        실패 분류는 call과 같습니다 (프로바이더 장애만 서킷 실패로 기록).
+
+        Args:
+            provider: 프로바이더 이름 (PROVIDER_*)
+            func: 호출할 함수
+
+        Returns:
+            func 결과
+        """
+        breaker = self.breaker(provider)
+        self.retry_budget.record_request()
+        check_deadline(provider)
+        if not breaker.allow_request():
+            raise CircuitOpenError(provider)
+
+        try:
+            result = func()
+        except (DeadlineExceededError, FastFailError):
+            breaker.release()
+            raise
+        except Exception as e:
+            if not is_provider_failure(e):
+                breaker.release()
+                raise
+            breaker.record_failure()
+            metrics.inc("provider_call_failures_total", labels={"provider": provider})
+            raise
+        breaker.record_success()
+        return result
+
+
+# 싱글톤 인스턴스
+resilience = ResilienceManager()
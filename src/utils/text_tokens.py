@@ -0,0 +1,31 @@
+"""
+한국어 검색용 토큰화
+
+PGroonga 기본 토크나이저(TokenBigram)와 같은 단위의 문자 bigram 토큰을 만듭니다.
+시나리오 인메모리 인덱스(BM25)와 기억 키워드 점수(db.memory_scoring)가 함께 사용합니다.
+
+주요 기능:
+1. tokenize_bigrams: 공백/기호 단위 어절 -> 문자 bigram (1글자 어절은 그대로)
+
+이 모듈이 없을 경우 발생할 문제:
+- DB 없이 동작하는 점수 계산/평가 스크립트가 토큰화 때문에 서비스 패키지 전체를 import
+"""
+
+import re
+from typing import List
+
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def tokenize_bigrams(text: str) -> List[str]:
+    """한국어 검색용 토큰화 (공백 단위 어절 -> 문자 bigram, 1글자 어절은 그대로)"""
+    tokens = []
+    for word in _NON_WORD.split(str(text).lower()):
+        if not word:
+            continue
+        if len(word) == 1:
+            tokens.append(word)
+            continue
+        tokens.extend(word[i : i + 2] for i in range(len(word) - 1))
+    return tokens